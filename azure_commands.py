@@ -0,0 +1,570 @@
+"""
+Azure SDK operations for Azure Copilot.
+
+Thin wrappers around the azure-mgmt-* clients that return plain dictionaries.
+SDK packages are imported inside the functions that need them so that the CLI
+starts quickly and commands like "help" never load them.
+"""
+
+import hashlib
+import queue
+import random
+import re
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+
+from config import Config
+from tracing import span
+
+
+class AzureCommandError(Exception):
+    """Raised when an Azure operation cannot be completed."""
+
+
+def is_azure_error(exc: BaseException) -> bool:
+    """True for exceptions raised by the Azure SDK, without importing azure.core."""
+    return type(exc).__module__.startswith("azure.")
+
+
+# ============================================================================
+# Client Construction
+# ============================================================================
+def get_resource_client(config: Config, subscription_id: Optional[str] = None) -> Any:
+    """
+    Get the shared ResourceManagementClient for a subscription.
+
+    Clients and credentials come from the process-wide ClientPool, so repeated
+    calls reuse the same HTTP session and access token.
+
+    Args:
+        config: Application configuration.
+        subscription_id: Subscription to manage. Defaults to config.subscription_id.
+
+    Returns:
+        azure.mgmt.resource.ResourceManagementClient instance.
+
+    Raises:
+        AzureCommandError: If the Azure SDK packages are not installed.
+    """
+    from clients import ClientError, get_client_pool
+
+    try:
+        return get_client_pool(config).client("resource", subscription_id)
+    except ClientError as e:
+        raise AzureCommandError(str(e)) from e
+
+
+# ============================================================================
+# Resource Listing
+# ============================================================================
+def resource_group_from_id(resource_id: str) -> str:
+    """
+    Extract the resource group name from an ARM resource ID.
+
+    Example:
+        /subscriptions/123/resourceGroups/my-rg/providers/... -> "my-rg"
+    """
+    parts = resource_id.split("/")
+    for index, part in enumerate(parts[:-1]):
+        if part.lower() == "resourcegroups":
+            return parts[index + 1]
+    return ""
+
+
+def resource_to_dict(resource: Any) -> dict[str, Any]:
+    """Convert an SDK GenericResource model into a plain, JSON-serializable dict."""
+    resource_id = resource.id or ""
+    return {
+        "id": resource_id,
+        "name": resource.name,
+        "type": resource.type,
+        "location": resource.location,
+        "resource_group": resource_group_from_id(resource_id),
+        "tags": dict(resource.tags or {}),
+    }
+
+
+def iter_resources(
+    client: Any, resource_group: Optional[str] = None, odata_filter: Optional[str] = None
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield resources one at a time as the SDK pager fetches them.
+
+    Args:
+        client: ResourceManagementClient (or a fake with the same shape).
+        resource_group: Limit the listing to this resource group.
+        odata_filter: ARM ``$filter`` expression evaluated by the server
+            (see query_planner).
+
+    Raises:
+        AzureCommandError: If the Azure API call fails.
+    """
+    with span(
+        "azure.list_resources", resource_group=resource_group or "", filter=odata_filter or ""
+    ) as stage:
+        kwargs = {"filter": odata_filter} if odata_filter else {}
+        if resource_group:
+            pager = client.resources.list_by_resource_group(resource_group, **kwargs)
+        else:
+            pager = client.resources.list(**kwargs)
+
+        count = 0
+        try:
+            for resource in pager:
+                count += 1
+                yield resource_to_dict(resource)
+        except Exception as e:
+            if is_azure_error(e):
+                raise AzureCommandError(f"Failed to list resources: {e}") from e
+            raise
+        finally:
+            stage.set(rows=count)
+
+
+def list_resources(client: Any, resource_group: Optional[str] = None) -> list[dict[str, Any]]:
+    """List every resource in the subscription or resource group."""
+    return list(iter_resources(client, resource_group))
+
+
+# ============================================================================
+# Resource Creation
+# ============================================================================
+RESOURCE_GROUP_NAME = re.compile(r"^[-\w._()]{1,90}$")
+STORAGE_ACCOUNT_NAME = re.compile(r"^[a-z0-9]{3,24}$")
+DEFAULT_STORAGE_SKU = "Standard_LRS"
+
+
+def validate_resource_group_name(name: str) -> str:
+    """
+    Check a resource group name against Azure's naming rules.
+
+    Raises:
+        ValueError: If the name is invalid.
+    """
+    if not RESOURCE_GROUP_NAME.match(name) or name.endswith("."):
+        raise ValueError(
+            f"Invalid resource group name: {name!r}. Use up to 90 letters, digits, "
+            "'-', '_', '.', '(' or ')', not ending in '.'"
+        )
+    return name
+
+
+def validate_storage_account_name(name: str) -> str:
+    """
+    Check a storage account name against Azure's naming rules.
+
+    Raises:
+        ValueError: If the name is invalid.
+    """
+    if not STORAGE_ACCOUNT_NAME.match(name):
+        raise ValueError(
+            f"Invalid storage account name: {name!r}. Use 3-24 lowercase letters and digits"
+        )
+    return name
+
+
+def default_storage_account_name(resource_group: str, subscription_id: str) -> str:
+    """
+    A valid storage account name derived from its resource group.
+
+    The same group and subscription always give the same name, so re-running
+    "create storage in my-rg" does not create a second account.
+    """
+    prefix = re.sub(r"[^a-z0-9]", "", resource_group.lower())[:16]
+    digest = hashlib.sha1(f"{subscription_id}/{resource_group.lower()}".encode()).hexdigest()
+    return f"st{prefix}{digest[:6]}"
+
+
+def get_storage_client(config: Config, subscription_id: Optional[str] = None) -> Any:
+    """
+    Get the shared StorageManagementClient for a subscription.
+
+    Raises:
+        AzureCommandError: If the Azure SDK packages are not installed.
+    """
+    from clients import ClientError, get_client_pool
+
+    try:
+        return get_client_pool(config).client("storage", subscription_id)
+    except ClientError as e:
+        raise AzureCommandError(str(e)) from e
+
+
+def create_resource_group(
+    client: Any, name: str, location: str, tags: Optional[dict[str, str]] = None
+) -> dict[str, Any]:
+    """
+    Create a resource group, or update it if it already exists.
+
+    Args:
+        client: ResourceManagementClient.
+        name: Resource group name.
+        location: Azure region, e.g. "eastus".
+        tags: Tags to set on the group.
+
+    Returns:
+        The resource group as a plain dict.
+
+    Raises:
+        ValueError: If the name is invalid.
+        AzureCommandError: If the Azure API call fails.
+    """
+    validate_resource_group_name(name)
+    try:
+        with span("azure.create_resource_group", location=location):
+            group = client.resource_groups.create_or_update(
+                name, {"location": location, "tags": tags or {}}
+            )
+    except Exception as e:
+        if is_azure_error(e):
+            raise AzureCommandError(f"Failed to create resource group {name}: {e}") from e
+        raise
+    return {"id": group.id, "name": group.name, "location": group.location}
+
+
+def create_storage_account(
+    client: Any,
+    resource_group: str,
+    name: str,
+    location: str,
+    sku: str = DEFAULT_STORAGE_SKU,
+) -> dict[str, Any]:
+    """
+    Create a general purpose v2 storage account and wait for it to finish.
+
+    Args:
+        client: StorageManagementClient.
+        resource_group: Resource group to create the account in.
+        name: Globally unique account name.
+        location: Azure region, e.g. "eastus".
+        sku: Replication SKU, e.g. "Standard_LRS".
+
+    Returns:
+        The storage account as a plain dict.
+
+    Raises:
+        ValueError: If the name is invalid.
+        AzureCommandError: If the Azure API call fails.
+    """
+    poller = begin_create_storage_account(client, resource_group, name, location, sku)
+    try:
+        with span("azure.create_storage_account", location=location, sku=sku):
+            account = poller.result()
+    except Exception as e:
+        if is_azure_error(e):
+            raise AzureCommandError(f"Failed to create storage account {name}: {e}") from e
+        raise
+    return storage_account_to_dict(account, resource_group)
+
+
+def begin_create_storage_account(
+    client: Any,
+    resource_group: str,
+    name: str,
+    location: str = "",
+    sku: str = DEFAULT_STORAGE_SKU,
+    *,
+    polling: Any = None,
+    continuation_token: Optional[str] = None,
+) -> Any:
+    """
+    Start creating a general purpose v2 storage account without waiting for it.
+
+    Args:
+        client: StorageManagementClient.
+        resource_group: Resource group to create the account in.
+        name: Globally unique account name.
+        location: Azure region, e.g. "eastus". Unused when resuming.
+        sku: Replication SKU, e.g. "Standard_LRS". Unused when resuming.
+        polling: Polling method for the poller, e.g. lro.manual_polling();
+            None keeps the SDK's own.
+        continuation_token: Resume an operation started earlier instead of
+            starting a new one.
+
+    Returns:
+        The SDK's LROPoller.
+
+    Raises:
+        ValueError: If the name is invalid.
+        AzureCommandError: If the Azure API call fails.
+    """
+    validate_storage_account_name(name)
+    parameters = {"location": location, "kind": "StorageV2", "sku": {"name": sku}}
+    options: dict[str, Any] = {}
+    if polling is not None:
+        options["polling"] = polling
+    if continuation_token is not None:
+        options["continuation_token"] = continuation_token
+    try:
+        with span("azure.begin_create_storage_account", location=location, sku=sku):
+            return client.storage_accounts.begin_create(resource_group, name, parameters, **options)
+    except Exception as e:
+        if is_azure_error(e):
+            raise AzureCommandError(f"Failed to create storage account {name}: {e}") from e
+        raise
+
+
+def storage_account_to_dict(account: Any, resource_group: str) -> dict[str, Any]:
+    """Convert a StorageAccount model into a plain dict."""
+    return {
+        "id": account.id,
+        "name": account.name,
+        "location": account.location,
+        "resource_group": resource_group,
+    }
+
+
+# ============================================================================
+# Multi-Scope Fan-Out
+# ============================================================================
+@dataclass(frozen=True)
+class Scope:
+    """A subscription, optionally narrowed to one resource group."""
+
+    subscription_id: str
+    resource_group: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ScopeResult:
+    """Outcome of running a call against one scope."""
+
+    scope: Scope
+    value: Any = None
+    error: Optional[BaseException] = None
+    attempts: int = 1
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Backoff for throttled (HTTP 429) calls.
+
+    The server's Retry-After header is honored when present; otherwise the
+    delay grows exponentially from base_delay with full jitter.
+    """
+
+    max_attempts: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Seconds to wait before retry number ``attempt`` (1-based)."""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status of an SDK error (or the one behind an AzureCommandError), if any."""
+    exc = _sdk_error(exc)
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def is_throttled(exc: BaseException) -> bool:
+    """True if the exception is an HTTP 429 Too Many Requests response."""
+    return status_code(exc) == 429
+
+
+def _sdk_error(exc: BaseException) -> BaseException:
+    """The SDK error behind an AzureCommandError, or exc itself."""
+    if isinstance(exc, AzureCommandError) and exc.__cause__ is not None:
+        return exc.__cause__
+    return exc
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """
+    Read the Retry-After header of a throttled response.
+
+    Returns:
+        Seconds to wait, or None if the header is missing or unparseable.
+    """
+    return parse_retry_after(getattr(getattr(_sdk_error(exc), "response", None), "headers", None))
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    Seconds a Retry-After header (delta-seconds or HTTP date) asks to wait.
+
+    Returns:
+        Seconds to wait, or None if the header is missing or unparseable.
+    """
+    headers = headers or {}
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def fan_out(
+    scopes: Iterable[Scope],
+    call: Callable[[Scope], Any],
+    *,
+    max_workers: int = 8,
+    max_per_subscription: int = 4,
+    retry: RetryPolicy = RetryPolicy(),
+    sleep: Callable[[float], None] = time.sleep,
+) -> Iterator[ScopeResult]:
+    """
+    Run ``call`` against many scopes concurrently and stream the results.
+
+    Results are yielded in completion order, so a caller can render the fast
+    scopes while slow ones are still running; total wall-clock time tracks the
+    slowest scope rather than the sum of all of them. A failing scope is
+    reported in its ScopeResult instead of aborting the others.
+
+    Args:
+        scopes: Scopes to query.
+        call: Function that performs the SDK call(s) for one scope.
+        max_workers: Upper bound on concurrent calls overall.
+        max_per_subscription: Upper bound on concurrent calls per subscription,
+            since ARM throttles each subscription independently.
+        retry: Backoff applied when a call is throttled.
+        sleep: Sleep function, injectable for tests.
+
+    Yields:
+        One ScopeResult per scope.
+    """
+    limits: dict[str, threading.Semaphore] = {}
+    limits_lock = threading.Lock()
+
+    def limit_for(subscription_id: str) -> threading.Semaphore:
+        with limits_lock:
+            if subscription_id not in limits:
+                limits[subscription_id] = threading.Semaphore(max_per_subscription)
+            return limits[subscription_id]
+
+    def run(scope: Scope) -> ScopeResult:
+        start = time.perf_counter()
+        attempt = 1
+        while True:
+            try:
+                with limit_for(scope.subscription_id.lower()):
+                    value = call(scope)
+                return ScopeResult(scope, value, None, attempt, time.perf_counter() - start)
+            except Exception as e:
+                if not is_throttled(e) or attempt >= retry.max_attempts:
+                    return ScopeResult(scope, None, e, attempt, time.perf_counter() - start)
+                # Back off outside the semaphore so other scopes keep running
+                sleep(retry.delay(attempt, retry_after_seconds(e)))
+                attempt += 1
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending: set[Future[ScopeResult]] = {pool.submit(run, scope) for scope in scopes}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+@dataclass(frozen=True)
+class ScopeItem:
+    """One item produced by a scope during a streaming fan-out, or its failure."""
+
+    scope: Scope
+    item: Any = None
+    error: Optional[BaseException] = None
+
+
+def fan_out_stream(
+    scopes: Iterable[Scope],
+    call: Callable[[Scope], Iterable[Any]],
+    *,
+    max_workers: int = 8,
+    max_per_subscription: int = 4,
+    retry: RetryPolicy = RetryPolicy(),
+    sleep: Callable[[float], None] = time.sleep,
+    buffer_size: int = 1000,
+) -> Iterator[ScopeItem]:
+    """
+    Like fan_out, but yields individual items as soon as any scope produces them.
+
+    ``call`` returns an iterable (typically an SDK pager) that is consumed on a
+    worker thread. Items are handed over through a bounded buffer, so memory
+    stays constant however large the listings are, and slow consumers apply
+    backpressure to the workers. A throttled scope is retried only if it fails
+    before producing its first item; later failures are reported as-is.
+
+    Yields:
+        ScopeItem per produced item, plus one ScopeItem with ``error`` set for
+        each scope that fails.
+    """
+    done = object()
+    items: queue.Queue[Any] = queue.Queue(maxsize=buffer_size)
+    stopped = threading.Event()
+    limits: dict[str, threading.Semaphore] = {}
+    limits_lock = threading.Lock()
+
+    def limit_for(subscription_id: str) -> threading.Semaphore:
+        with limits_lock:
+            if subscription_id not in limits:
+                limits[subscription_id] = threading.Semaphore(max_per_subscription)
+            return limits[subscription_id]
+
+    def emit(event: Any) -> bool:
+        while not stopped.is_set():
+            try:
+                items.put(event, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(scope: Scope) -> None:
+        attempt = 1
+        produced = False
+        try:
+            while True:
+                try:
+                    with limit_for(scope.subscription_id.lower()):
+                        for item in call(scope):
+                            produced = True
+                            if not emit(ScopeItem(scope, item)):
+                                return
+                    return
+                except Exception as e:
+                    if produced or not is_throttled(e) or attempt >= retry.max_attempts:
+                        emit(ScopeItem(scope, error=e))
+                        return
+                    sleep(retry.delay(attempt, retry_after_seconds(e)))
+                    attempt += 1
+        finally:
+            emit(done)
+
+    scopes = list(scopes)
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for scope in scopes:
+            pool.submit(run, scope)
+        remaining = len(scopes)
+        while remaining:
+            event = items.get()
+            if event is done:
+                remaining -= 1
+            else:
+                yield event
+    finally:
+        # Unblock workers if the consumer stopped early
+        stopped.set()
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,391 @@
+"""
+Batch execution of command files (`copilot batch plan.txt`).
+
+Every line of a plan is classified with the intent registry up front, so a
+typo on line 40 is reported before line 1 touches Azure. Steps then form a
+dependency DAG: a step that mentions a resource group depends on the step that
+creates it, wherever that step appears in the file. Steps whose dependencies
+have succeeded run concurrently on a worker pool, so a plan takes about as
+long as its longest dependency chain rather than the sum of its steps.
+
+Plans are plain text (one command per line, `#` comments) or JSONL, where each
+line is a command string or an object with "command" and optional "id" and
+"after" (ids of steps that must succeed first).
+"""
+
+import json
+import time
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Optional
+
+from entities import Entities, extract_entities
+from intents import Intent, IntentRegistry, registry
+
+# Intents that create something, mapped to the kind of entity their name is
+PRODUCES = {"create_resource_group": "resource_group"}
+
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"  # A dependency failed
+STATUS_CANCELLED = "cancelled"  # Not started because another step failed (fail-fast)
+
+
+class BatchError(ValueError):
+    """Raised when a plan cannot be parsed or scheduled."""
+
+
+@dataclass(frozen=True)
+class BatchStep:
+    """One command of a plan."""
+
+    index: int
+    line: int
+    command: str
+    intent: Intent
+    entities: Entities
+    step_id: str
+    depends_on: tuple[int, ...] = ()
+
+
+@dataclass(frozen=True)
+class StepResult:
+    """Outcome of one step. Times are seconds since the batch started."""
+
+    step: BatchStep
+    status: str
+    error: Optional[BaseException] = None
+    started: float = 0.0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+
+@dataclass(frozen=True)
+class BatchReport:
+    """Results of running a plan, in plan order."""
+
+    results: tuple[StepResult, ...]
+    elapsed: float
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.results)
+
+    def count(self, status: str) -> int:
+        return sum(1 for result in self.results if result.status == status)
+
+
+# ============================================================================
+# Parsing
+# ============================================================================
+def _plan_lines(text: str, jsonl: bool) -> Iterable[tuple[int, str, Optional[str], list[str]]]:
+    """Yield (line number, command, id, after) for each command in a plan."""
+    for number, raw in enumerate(text.splitlines(), start=1):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if not jsonl:
+            yield number, line, None, []
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise BatchError(f"line {number}: invalid JSON: {e.msg}") from e
+        if isinstance(entry, str):
+            yield number, entry, None, []
+        elif isinstance(entry, dict) and isinstance(entry.get("command"), str):
+            after = entry.get("after", [])
+            yield number, entry["command"], entry.get("id"), (
+                [after] if isinstance(after, str) else list(after)
+            )
+        else:
+            raise BatchError(f'line {number}: expected a string or an object with "command"')
+
+
+def parse_plan(
+    text: str,
+    *,
+    jsonl: bool = False,
+    intents: IntentRegistry = registry,
+    min_confidence: float = 1.0,
+) -> list[BatchStep]:
+    """
+    Parse a plan and work out the dependencies between its steps.
+
+    Args:
+        text: Plan contents.
+        jsonl: Parse each line as JSON instead of plain text.
+        intents: Registry the commands are classified against.
+        min_confidence: Minimum classification confidence for a command.
+
+    Returns:
+        Steps in plan order, with depends_on filled in.
+
+    Raises:
+        BatchError: If a line is not a recognized command, an "after" id is
+            unknown, or the dependencies form a cycle. Every unrecognized
+            line is reported, not just the first.
+    """
+    parsed = []
+    errors = []
+    for number, command, step_id, after in _plan_lines(text, jsonl):
+        match = intents.classify(command, min_confidence=min_confidence)
+        if match is None:
+            errors.append(f"line {number}: command not recognized: {command}")
+            continue
+        parsed.append((number, command, match.intent, step_id or str(number), after))
+    if errors:
+        raise BatchError("\n".join(errors))
+    if not parsed:
+        raise BatchError("Plan has no commands")
+
+    ids = {}
+    for index, (number, _, _, step_id, _) in enumerate(parsed):
+        if step_id in ids:
+            raise BatchError(f"line {number}: duplicate step id {step_id!r}")
+        ids[step_id] = index
+
+    steps = [
+        BatchStep(index, number, command, intent, extract_entities(command), step_id)
+        for index, (number, command, intent, step_id, _) in enumerate(parsed)
+    ]
+
+    # The first step creating an entity is the one everything else waits for
+    producers: dict[tuple[str, str], int] = {}
+    for step in steps:
+        kind = PRODUCES.get(step.intent.name)
+        if kind and step.entities.name:
+            producers.setdefault((kind, step.entities.name.lower()), step.index)
+
+    for step, (number, _, _, _, after) in zip(steps, parsed, strict=True):
+        depends_on = set()
+        for step_id in after:
+            if step_id not in ids:
+                raise BatchError(f"line {number}: unknown step id in after: {step_id!r}")
+            depends_on.add(ids[step_id])
+        if step.entities.resource_group:
+            producer = producers.get(("resource_group", step.entities.resource_group.lower()))
+            if producer is not None:
+                depends_on.add(producer)
+        depends_on.discard(step.index)
+        steps[step.index] = replace(step, depends_on=tuple(sorted(depends_on)))
+
+    topological_order(steps)
+    return steps
+
+
+def load_plan(path: Path, **kwargs: Any) -> list[BatchStep]:
+    """
+    Read and parse a plan file. Files ending in .jsonl or .ndjson are JSONL.
+
+    Raises:
+        BatchError: If the file cannot be read or parsed.
+    """
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError as e:
+        raise BatchError(f"Cannot read plan {path}: {e.strerror}") from e
+    return parse_plan(text, jsonl=path.suffix.lower() in JSONL_SUFFIXES, **kwargs)
+
+
+def topological_order(steps: Sequence[BatchStep]) -> list[int]:
+    """
+    Order step indexes so every step comes after its dependencies.
+
+    Raises:
+        BatchError: If the dependencies form a cycle.
+    """
+    remaining = {step.index: len(step.depends_on) for step in steps}
+    dependents: dict[int, list[int]] = {step.index: [] for step in steps}
+    for step in steps:
+        for dependency in step.depends_on:
+            dependents[dependency].append(step.index)
+
+    order = [index for index, count in remaining.items() if count == 0]
+    for index in order:
+        for dependent in dependents[index]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                order.append(dependent)
+    if len(order) != len(steps):
+        cycle = sorted(steps[index].line for index, count in remaining.items() if count)
+        raise BatchError(f"Steps on lines {cycle} depend on each other")
+    return order
+
+
+def stages(steps: Sequence[BatchStep]) -> list[list[BatchStep]]:
+    """
+    Group steps into stages that could each run fully in parallel.
+
+    Stage n holds the steps whose longest dependency chain has length n.
+    """
+    depth: dict[int, int] = {}
+    for index in topological_order(steps):
+        depth[index] = max((depth[d] + 1 for d in steps[index].depends_on), default=0)
+    grouped: list[list[BatchStep]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for step in steps:
+        grouped[depth[step.index]].append(step)
+    return grouped
+
+
+# ============================================================================
+# Scheduling
+# ============================================================================
+def run_plan(
+    steps: Sequence[BatchStep],
+    execute: Callable[[BatchStep], Any],
+    *,
+    max_workers: int = 4,
+    fail_fast: bool = True,
+    on_result: Optional[Callable[[StepResult], None]] = None,
+    clock: Callable[[], float] = time.perf_counter,
+) -> BatchReport:
+    """
+    Run a plan, starting each step as soon as its dependencies have succeeded.
+
+    Args:
+        steps: Parsed plan from parse_plan().
+        execute: Runs one step; raising marks the step as failed. A step that
+            starts a long-running operation may return its Future instead of
+            waiting: the step then ends when the Future does, without holding
+            one of the max_workers slots meanwhile.
+        max_workers: Upper bound on steps running at once.
+        fail_fast: Stop starting new steps after the first failure. Otherwise
+            only the failed step's dependents are skipped.
+        on_result: Called with each StepResult as soon as the step finishes.
+        clock: Time source, injectable for tests.
+
+    Returns:
+        BatchReport with one result per step, in plan order.
+    """
+    remaining = {step.index: len(step.depends_on) for step in steps}
+    dependents: dict[int, list[int]] = {step.index: [] for step in steps}
+    for step in steps:
+        for dependency in step.depends_on:
+            dependents[dependency].append(step.index)
+
+    start = clock()
+    results: dict[int, StepResult] = {}
+
+    def finish(step: BatchStep, started: float, error: Optional[BaseException]) -> StepResult:
+        status = STATUS_OK if error is None else STATUS_FAILED
+        return StepResult(step, status, error, started, clock() - start - started)
+
+    def run(step: BatchStep) -> StepResult | tuple[Future, float]:
+        started = clock() - start
+        try:
+            outcome = execute(step)
+        except Exception as e:
+            return finish(step, started, e)
+        if isinstance(outcome, Future):
+            return outcome, started
+        return finish(step, started, None)
+
+    ready = [step.index for step in steps if not step.depends_on]
+    stopped = False
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        running: dict[Future[StepResult | tuple[Future, float]], int] = {}
+        # Operations steps handed back -> (step index, start time)
+        deferred: dict[Future, tuple[int, float]] = {}
+        while True:
+            while ready and not stopped and len(running) < max_workers:
+                index = ready.pop(0)
+                running[pool.submit(run, steps[index])] = index
+            if not running and not deferred:
+                break
+            done, _ = wait([*running, *deferred], return_when=FIRST_COMPLETED)
+            finished: list[StepResult] = []
+            for future in done:
+                if future in deferred:
+                    index, started = deferred.pop(future)
+                    finished.append(finish(steps[index], started, future.exception()))
+                    continue
+                index = running.pop(future)
+                outcome = future.result()
+                if isinstance(outcome, StepResult):
+                    finished.append(outcome)
+                else:
+                    deferred[outcome[0]] = (index, outcome[1])
+            for result in sorted(finished, key=lambda result: result.step.index):
+                index = result.step.index
+                results[index] = result
+                if on_result is not None:
+                    on_result(result)
+                if not result.ok:
+                    stopped = stopped or fail_fast
+                    continue
+                for dependent in dependents[index]:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        ready.append(dependent)
+
+    # Whatever never ran was either blocked by a failure or never started
+    for index in topological_order(steps):
+        if index not in results:
+            step = steps[index]
+            blocked = any(not results[d].ok for d in step.depends_on if d in results)
+            results[index] = StepResult(step, STATUS_SKIPPED if blocked else STATUS_CANCELLED)
+    return BatchReport(tuple(results[step.index] for step in steps), clock() - start)
+
+
+# ============================================================================
+# Reporting
+# ============================================================================
+STATUS_STYLES = {
+    STATUS_OK: "green",
+    STATUS_FAILED: "red",
+    STATUS_SKIPPED: "yellow",
+    STATUS_CANCELLED: "dim",
+}
+
+
+def print_plan(steps: Sequence[BatchStep], console: Any) -> None:
+    """Render the stages of a plan and each step's dependencies."""
+    from rich.markup import escape
+
+    for number, stage in enumerate(stages(steps), start=1):
+        console.print(f"Stage {number}", style="bold")
+        for step in stage:
+            after = ", ".join(steps[d].step_id for d in step.depends_on)
+            # Ids, commands and errors are user text; Rich would read "[rg]" as a style
+            line = f"  [{step.step_id}] {step.command}" + (f"  (after {after})" if after else "")
+            console.print(escape(line))
+
+
+def print_report(report: BatchReport, console: Any) -> None:
+    """Render per-step timings and a summary as a Rich table."""
+    from rich.markup import escape
+    from rich.table import Table
+
+    table = Table(title=f"Batch — {report.elapsed:.2f} s")
+    table.add_column("Step", justify="right")
+    table.add_column("Command")
+    table.add_column("Status")
+    table.add_column("Start (s)", justify="right")
+    table.add_column("Time (s)", justify="right")
+    for result in report.results:
+        ran = result.status in (STATUS_OK, STATUS_FAILED)
+        table.add_row(
+            escape(result.step.step_id),
+            escape(result.step.command),
+            f"[{STATUS_STYLES[result.status]}]{result.status}[/]",
+            f"{result.started:.2f}" if ran else "",
+            f"{result.elapsed:.2f}" if ran else "",
+        )
+    console.print(table)
+
+    for result in report.results:
+        if result.error is not None:
+            console.print(escape(f"[{result.step.step_id}] Error: {result.error}"), style="red")
+    busy = sum(result.elapsed for result in report.results)
+    summary = ", ".join(
+        f"{report.count(status)} {status}" for status in STATUS_STYLES if report.count(status)
+    )
+    console.print(f"{summary}; {busy:.2f} s of work in {report.elapsed:.2f} s", style="dim")
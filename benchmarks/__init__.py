@@ -0,0 +1,6 @@
+"""
+Micro-benchmarks for Azure Copilot.
+
+Run a benchmark from the project root, for example:
+    python -m benchmarks.bench_intents
+"""
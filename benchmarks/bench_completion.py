@@ -0,0 +1,152 @@
+"""
+Completion index build time and per-keystroke latency at scale.
+
+Caches a synthetic inventory (50k resources by default, spread over resource
+group scopes), syncs a completion index from it, then measures:
+
+    prefix         - sorted-array prefix lookups, as typed one key at a time
+    linear         - the same lookups as a scan over every name (the baseline)
+    fuzzy          - trigram lookups of names with a typo
+    complete       - full ``complete`` calls after "stop vm"
+
+plus the one-off costs: the initial sync, building the trigram index, saving
+and loading the JSON snapshot, and re-syncing after one scope is refetched.
+
+Usage:
+    python -m benchmarks.bench_completion [--resources 50000] [--groups 50]
+        [--queries 2000]
+"""
+
+import argparse
+import random
+import statistics
+import string
+import tempfile
+import time
+from pathlib import Path
+
+from completion import CompletionIndex
+from inventory_cache import InventoryCache
+
+SUB = "00000000-0000-0000-0000-000000000000"
+TYPES = (
+    "Microsoft.Compute/virtualMachines",
+    "Microsoft.Storage/storageAccounts",
+    "Microsoft.Network/virtualNetworks",
+    "Microsoft.Web/sites",
+)
+WORDS = ("web", "api", "db", "cache", "worker", "logs", "batch", "edge", "auth", "queue")
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[int(fraction * 100) - 1]
+
+
+def resources(group: str, count: int, rng: random.Random) -> list[dict]:
+    return [
+        {
+            "name": f"{rng.choice(WORDS)}-{group}-{index:04d}",
+            "type": rng.choice(TYPES),
+            "resource_group": group,
+        }
+        for index in range(count)
+    ]
+
+
+def typo(name: str, rng: random.Random) -> str:
+    position = rng.randrange(len(name))
+    return name[:position] + rng.choice(string.ascii_lowercase) + name[position + 1 :]
+
+
+def timed(queries, lookup) -> list[float]:
+    latencies = []
+    for query in queries:
+        before = time.perf_counter()
+        lookup(query)
+        latencies.append(time.perf_counter() - before)
+    return latencies
+
+
+def run(total: int, groups: int, queries: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    results: dict = {}
+    per_group = total // groups
+    with tempfile.TemporaryDirectory() as directory:
+        inventory = InventoryCache(Path(directory) / "inventory.db", max_bytes=1 << 40)
+        names = []
+        for group in range(groups):
+            rows = resources(f"rg{group:03d}", per_group, rng)
+            inventory.put(SUB, f"rg{group:03d}", rows)
+            names += [row["name"] for row in rows]
+
+        index = CompletionIndex()
+        started = time.perf_counter()
+        index.sync(inventory)
+        results["sync"] = time.perf_counter() - started
+        results["entries"] = len(index)
+
+        snapshot = Path(directory) / "completions.json"
+        started = time.perf_counter()
+        index.save(snapshot)
+        results["save"] = time.perf_counter() - started
+        started = time.perf_counter()
+        CompletionIndex().load(snapshot)
+        results["load"] = time.perf_counter() - started
+
+        # Every prefix of a name, as if typed one key at a time
+        typed = [
+            name[:length]
+            for name in rng.sample(names, max(1, queries // 8))
+            for length in range(1, 9)
+        ][:queries]
+        lowered = [name.lower() for name in names]
+        results["prefix"] = timed(typed, index.prefix)
+        results["linear"] = timed(
+            typed, lambda p: sorted(n for n in lowered if n.startswith(p.lower()))[:50]
+        )
+
+        started = time.perf_counter()
+        index.fuzzy("warmup")
+        results["trigram_build"] = time.perf_counter() - started
+        misspelt = [typo(name, rng) for name in rng.sample(names, queries)]
+        results["fuzzy"] = timed(misspelt, index.fuzzy)
+        results["complete"] = timed(typed, lambda p: index.complete(["stop", "vm"], p))
+
+        inventory.put(SUB, "rg000", resources("rg000", per_group, rng))
+        started = time.perf_counter()
+        results["resynced_scopes"] = index.sync(inventory)
+        results["resync"] = time.perf_counter() - started
+        inventory.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--resources", type=int, default=50_000)
+    parser.add_argument("--groups", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = run(args.resources, args.groups, args.queries)
+    print(f"{results['entries']:,} completion entries from {args.resources:,} resources")
+    print(f"initial sync      {results['sync'] * 1000:>9.1f} ms")
+    print(f"snapshot save     {results['save'] * 1000:>9.1f} ms")
+    print(f"snapshot load     {results['load'] * 1000:>9.1f} ms")
+    print(f"trigram build     {results['trigram_build'] * 1000:>9.1f} ms")
+    print(
+        f"resync 1 scope    {results['resync'] * 1000:>9.1f} ms"
+        f"  ({results['resynced_scopes']} scope re-read)"
+    )
+    print(f"{'lookup':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name in ("prefix", "linear", "fuzzy", "complete"):
+        latencies = results[name]
+        print(
+            f"{name:>10} {percentile(latencies, 0.5) * 1000:>8.3f}"
+            f" {percentile(latencies, 0.95) * 1000:>8.3f} {percentile(latencies, 0.99) * 1000:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Config resolution time: environment only, layered, and layered from the disk cache.
+
+Writes a copilot.toml with a few profiles and a .env of typical size to a
+temporary directory and times, best of --repeats:
+
+    env only        - Config() from the process environment alone
+    dotenv + env    - load_dotenv() then Config(), as get_config() used to
+    layered         - load_config() parsing copilot.toml and .env every time
+    layered, cached - load_config() reusing the parsed files from the disk cache
+    get_config()    - the warm singleton
+
+and the wall time of a fresh interpreter building the config (python -c
+"import config; config.get_config()"), where the disk cache also saves
+importing tomllib and python-dotenv.
+
+Usage:
+    python -m benchmarks.bench_config [--repeats 200] [--processes 10]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import config
+from config import Config, ConfigSources, load_config
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+CONFIG_FILE = """
+default_location = "eastus"
+fan_out_workers = 8
+inventory_cache_ttl = 300
+
+[profiles.prod]
+default_dry_run = true
+additional_subscription_ids = ["11111111-1111-1111-1111-111111111111"]
+
+[profiles.dev]
+default_location = "westus2"
+inventory_cache_type_ttls = { "Microsoft.Compute/virtualMachines" = 30 }
+
+[subscriptions."00000000-0000-0000-0000-000000000000"]
+default_resource_group = "prod-rg"
+"""
+
+DOTENV = """
+AZURE_SUBSCRIPTION_ID=00000000-0000-0000-0000-000000000000
+AZURE_TENANT_ID=22222222-2222-2222-2222-222222222222
+AZURE_CLIENT_ID=33333333-3333-3333-3333-333333333333
+AZURE_CLIENT_SECRET=secret
+DEFAULT_LOCATION=eastus
+DEFAULT_RESOURCE_GROUP=app-rg
+LOG_LEVEL=INFO
+INVENTORY_CACHE_TTL=300
+INVENTORY_CACHE_MAX_MB=64
+TRANSLATION_CACHE_TTL=86400
+PROMPT_TOKEN_BUDGET=4000
+TRACK_TOKEN_USAGE=true
+"""
+
+
+def best_of(repeats: int, func: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def in_process(directory: Path, repeats: int) -> list[tuple[str, float]]:
+    from dotenv import dotenv_values, load_dotenv
+
+    dotenv_file = directory / ".env"
+    parsing = ConfigSources(directory / "copilot.toml", dotenv_file, None)
+    cached = ConfigSources(directory / "copilot.toml", dotenv_file, directory / "cache.json")
+    environ = {**os.environ, **dotenv_values(dotenv_file)}
+    load_config("prod", sources=cached)  # fill the disk cache
+
+    saved = dict(os.environ)
+    try:
+        os.environ.update(environ)
+        env_only = best_of(repeats, Config)
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+    def dotenv_and_env() -> Config:
+        load_dotenv(dotenv_file)
+        return Config()
+
+    try:
+        legacy = best_of(repeats, dotenv_and_env)
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+    config.configure("prod", sources=cached)
+    config.get_config()
+    try:
+        return [
+            ("env only", env_only),
+            ("dotenv + env", legacy),
+            ("layered", best_of(repeats, lambda: load_config("prod", sources=parsing))),
+            ("layered, cached", best_of(repeats, lambda: load_config("prod", sources=cached))),
+            ("get_config()", best_of(repeats, config.get_config)),
+        ]
+    finally:
+        config.configure()
+
+
+def fresh_process(directory: Path, processes: int) -> list[tuple[str, float]]:
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(PROJECT_ROOT),
+        "COPILOT_CONFIG": str(directory / "copilot.toml"),
+        "COPILOT_DOTENV": str(directory / ".env"),
+        "COPILOT_PROFILE": "prod",
+    }
+    script = "import config; config.get_config()"
+
+    def run(cache: str) -> None:
+        subprocess.run(
+            [sys.executable, "-c", script], env={**env, "COPILOT_CONFIG_CACHE": cache}, check=True
+        )
+
+    cache = str(directory / "process-cache.json")
+    run(cache)
+    return [
+        ("process, no cache", best_of(processes, lambda: run(""))),
+        ("process, cached", best_of(processes, lambda: run(cache))),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--processes", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        (directory / "copilot.toml").write_text(CONFIG_FILE)
+        (directory / ".env").write_text(DOTENV)
+        results = in_process(directory, args.repeats) + fresh_process(directory, args.processes)
+
+    print(f"{'mode':<18} {'ms':>8}")
+    for mode, seconds in results:
+        print(f"{mode:<18} {seconds * 1000:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Cost estimates: loading the price sheet, single lookups and batches.
+
+Builds a synthetic sheet of --rows prices (the real one for a handful of
+regions is in the tens of thousands), saves it gzip-compressed, and reports:
+
+    load         - reading and indexing the sheet (once per process)
+    price        - one PriceSheet.price() lookup
+    lookup       - one CostEstimator.estimate() call
+    loop         - estimating --items items one estimate() at a time
+    batch        - the same items through CostEstimator.estimate_batch()
+
+Batch items repeat a few dozen distinct (service, SKU, region) keys, like a
+plan that creates many resources of the same kind.
+
+Usage:
+    python -m benchmarks.bench_cost [--rows 50000] [--items 20000]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from cost import (
+    SERVICE_STORAGE,
+    SERVICE_VM,
+    UNIT_GB_MONTH,
+    UNIT_HOUR,
+    CostEstimator,
+    CostItem,
+    PriceSheet,
+)
+
+
+def synthetic_rows(count: int) -> list[list]:
+    regions = [f"region{n:02d}" for n in range(60)]
+    rows = []
+    for n in range(count):
+        region = regions[n % len(regions)]
+        if n % 10:
+            rows.append([SERVICE_VM, f"Standard_X{n // len(regions)}s_v5", region, 0.1, UNIT_HOUR])
+        else:
+            rows.append(
+                [SERVICE_STORAGE, f"Standard_S{n // len(regions)}", region, 0.02, UNIT_GB_MONTH]
+            )
+    return rows
+
+
+def timed(function, repeat: int = 1) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat
+
+
+def run(rows: int, items: int, seed: int = 0) -> dict[str, float]:
+    table = synthetic_rows(rows)
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "prices.json.gz"
+        PriceSheet(table, fetched_at=time.time()).save(path)
+        size = path.stat().st_size
+        load = timed(lambda: PriceSheet.load(path), repeat=3)
+        estimator = CostEstimator(PriceSheet.load(path))
+
+    rng = random.Random(seed)
+    keys = rng.sample(table, 40)
+    batch = [
+        CostItem(service, sku, region) for service, sku, region, _, _ in rng.choices(keys, k=items)
+    ]
+    single = batch[0]
+    lookups = 100_000
+    key = (single.service, single.sku, single.region)
+    price = timed(lambda: [estimator.sheet.price(*key) for _ in range(lookups)]) / lookups
+    lookup = timed(lambda: [estimator.estimate(single) for _ in range(lookups)]) / lookups
+    loop = timed(lambda: sum(estimator.estimate(item).monthly for item in batch), repeat=3)
+    vectorized = timed(lambda: estimator.estimate_batch(batch), repeat=3)
+    return {
+        "kb": size / 1024,
+        "load": load,
+        "price": price,
+        "lookup": lookup,
+        "loop": loop,
+        "batch": vectorized,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--items", type=int, default=20_000)
+    args = parser.parse_args()
+
+    result = run(args.rows, args.items)
+    print(f"{args.rows} prices ({result['kb']:.0f} KB compressed), {args.items} batch items")
+    print(f"{'stage':<8} {'time':>12}")
+    print(f"{'load':<8} {result['load'] * 1e3:>9.1f} ms")
+    print(f"{'price':<8} {result['price'] * 1e6:>9.2f} us")
+    print(f"{'lookup':<8} {result['lookup'] * 1e6:>9.2f} us")
+    print(f"{'loop':<8} {result['loop'] * 1e3:>9.1f} ms")
+    print(f"{'batch':<8} {result['batch'] * 1e3:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Wall time of many sequential one-shot `copilot` invocations, with and without the daemon.
+
+Each invocation is a fresh interpreter running the console script entry point
+(copilot_daemon.main), like a CI job calling `copilot` in a loop:
+    in-process - COPILOT_NO_DAEMON is set, every call imports and runs the CLI
+    daemon     - every call forwards to one warm daemon over its socket
+
+Usage:
+    python -m benchmarks.bench_daemon [--count 500] [--command help]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import copilot_daemon
+
+MODES = ("in-process", "daemon")
+
+
+def invoke(command: list[str], env: dict[str, str]) -> float:
+    """Run one `copilot` invocation in a new interpreter and return its wall time."""
+    code = f"import copilot_daemon; copilot_daemon.main({command!r})"
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], env=env, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def run(count: int, command: list[str]) -> list[dict]:
+    """Time `count` sequential invocations in each mode."""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="copilot-bench-") as directory:
+        socket_path = Path(directory) / "daemon.sock"
+        env = {**os.environ, "COPILOT_DAEMON_SOCKET": str(socket_path)}
+        for mode in MODES:
+            mode_env = dict(env)
+            if mode == "in-process":
+                mode_env[copilot_daemon.NO_DAEMON_ENV] = "1"
+            else:
+                copilot_daemon.start(socket_path)
+            try:
+                start = time.perf_counter()
+                timings = [invoke(command, mode_env) for _ in range(count)]
+                total = time.perf_counter() - start
+            finally:
+                if mode == "daemon":
+                    copilot_daemon.stop(socket_path)
+            results.append(
+                {
+                    "mode": mode,
+                    "total_s": total,
+                    "mean_ms": statistics.mean(timings) * 1000,
+                    "p95_ms": statistics.quantiles(timings, n=20)[-1] * 1000,
+                }
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--command", default="help", help="copilot command to run")
+    args = parser.parse_args()
+
+    print(f"{'mode':>10} {'calls':>6} {'total s':>8} {'mean ms':>8} {'p95 ms':>8}")
+    for row in run(args.count, args.command.split()):
+        print(
+            f"{row['mode']:>10} {args.count:>6} {row['total_s']:>8.2f} "
+            f"{row['mean_ms']:>8.1f} {row['p95_ms']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
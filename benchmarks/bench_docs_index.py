@@ -0,0 +1,128 @@
+"""
+Ingest throughput and query latency of the hybrid docs index.
+
+Generates a synthetic corpus of markdown docs (one file per service, a
+section per operation), then measures:
+
+    cold ingest    - every chunk embedded, serially and across a process pool
+    warm re-ingest - nothing changed, so nothing is embedded
+    edit re-ingest - a few files changed, only their changed chunks embedded
+    search         - p50/p95 latency of hybrid search with and without rerank
+
+Embeddings come from the deterministic HashingEmbedder, so the numbers
+measure the pipeline rather than an embedding service.
+
+Usage:
+    python -m benchmarks.bench_docs_index [--files 200] [--sections 12]
+        [--queries 200] [--workers 4]
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from docs_index import DocsIndex
+from embeddings import HashingEmbedder
+
+SERVICES = ("vm", "storage account", "webapp", "aks", "keyvault", "sql server", "vnet", "disk")
+OPERATIONS = ("create", "delete", "list", "show", "update", "start", "stop", "resize", "tag")
+OPTIONS = ("--resource-group", "--name", "--location", "--sku", "--tags", "--size", "--yes")
+FILLER = (
+    "This operation is idempotent when retried with the same arguments. "
+    "Long running operations can be polled with --no-wait and az resource wait. "
+    "Role based access control decides which principals may perform it. "
+)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[int(fraction * 100) - 1]
+
+
+def write_corpus(root: Path, files: int, sections: int, rng: random.Random) -> list[Path]:
+    paths = []
+    for number in range(files):
+        service = SERVICES[number % len(SERVICES)]
+        lines = [f"# {service.title()} reference {number}", "", f"Manage {service} resources."]
+        operations = rng.sample(OPERATIONS, len(OPERATIONS)) * (sections // len(OPERATIONS) + 1)
+        for operation in operations[:sections]:
+            options = " ".join(rng.sample(OPTIONS, 3))
+            lines += [
+                "",
+                f"## {operation.title()} a {service}",
+                "",
+                f"Use az {service} {operation} {options} to {operation} a {service}. " + FILLER,
+                "",
+                "```bash",
+                f"az {service.replace(' ', '-')} {operation} {options}",
+                "```",
+            ]
+        path = root / f"{service.replace(' ', '-')}-{number}.md"
+        path.write_text("\n".join(lines))
+        paths.append(path)
+    return paths
+
+
+def run(files: int, sections: int, queries: int, workers: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    results: dict = {}
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory) / "docs"
+        root.mkdir()
+        paths = write_corpus(root, files, sections, rng)
+
+        for name, pool in (
+            ("cold ingest (1 proc)", 1),
+            (f"cold ingest ({workers} procs)", workers),
+        ):
+            index = DocsIndex(Path(directory) / f"index-{pool}.db", HashingEmbedder())
+            results[name] = index.ingest(root, workers=pool)
+        results["warm re-ingest"] = index.ingest(root, workers=workers)
+        for path in rng.sample(paths, max(1, files // 20)):
+            path.write_text(path.read_text().replace("idempotent", "safe to retry", 1))
+        results["edit re-ingest"] = index.ingest(root, workers=workers)
+
+        for rerank in (False, True):
+            latencies = []
+            for _ in range(queries):
+                query = f"how do I {rng.choice(OPERATIONS)} a {rng.choice(SERVICES)}"
+                start = time.perf_counter()
+                index.search(query, rerank=rerank)
+                latencies.append(time.perf_counter() - start)
+            results[f"search{' + rerank' if rerank else ''}"] = latencies
+        index.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--sections", type=int, default=12)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    results = run(args.files, args.sections, args.queries, args.workers)
+    print(f"{'ingest':>24} {'chunks':>7} {'embedded':>9} {'seconds':>8} {'chunks/s':>9}")
+    for name, report in results.items():
+        if name.startswith("search"):
+            continue
+        print(
+            f"{name:>24} {report.chunks:>7} {report.embedded:>9} {report.seconds:>8.2f}"
+            f" {report.chunks_per_second:>9.0f}"
+        )
+    print(f"{'search':>24} {'queries':>7} {'p50 ms':>9} {'p95 ms':>8}")
+    for name in ("search", "search + rerank"):
+        latencies = results[name]
+        print(
+            f"{name:>24} {len(latencies):>7} {percentile(latencies, 0.5) * 1000:>9.2f}"
+            f" {percentile(latencies, 0.95) * 1000:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Entity extraction accuracy and latency over a labeled set of commands.
+
+Each example lists the entities a command mentions; every field the example
+leaves out must come back as None. Reports, per field, the share of examples
+extracted exactly right, then the latency of entities.extract_entities().
+
+With --spacy-model (spaCy and the model installed) the same examples are run
+again with the spaCy name fallback, reporting its one-off load time too.
+
+Usage:
+    python -m benchmarks.bench_entities [--repeat 2000] [--spacy-model en_core_web_sm]
+"""
+
+import argparse
+import statistics
+import time
+from dataclasses import fields
+from typing import Any, Optional
+
+from entities import Entities, _load_model, extract_entities
+
+STORAGE = "Microsoft.Storage/storageAccounts"
+VM = "Microsoft.Compute/virtualMachines"
+VNET = "Microsoft.Network/virtualNetworks"
+
+EXAMPLES: list[tuple[str, dict[str, Any]]] = [
+    ("create rg app-rg", {"name": "app-rg"}),
+    (
+        "create a resource group called rg-prod in westeurope",
+        {"name": "rg-prod", "location": "westeurope"},
+    ),
+    ("create resource group rg-data in West Europe", {"name": "rg-data", "location": "westeurope"}),
+    (
+        "make a new resource group named billing in East US 2",
+        {"name": "billing", "location": "eastus2"},
+    ),
+    ("create rg shared-rg location uksouth", {"name": "shared-rg", "location": "uksouth"}),
+    ("create storage in app-rg", {"resource_group": "app-rg"}),
+    (
+        "create storage account logs01 in rg-prod",
+        {"name": "logs01", "resource_group": "rg-prod", "resource_type": STORAGE},
+    ),
+    (
+        "create storage account logs01 in rg-prod in EastUS sku Standard_GRS",
+        {
+            "name": "logs01",
+            "resource_group": "rg-prod",
+            "location": "eastus",
+            "sku": "Standard_GRS",
+            "resource_type": STORAGE,
+        },
+    ),
+    (
+        "create storage account media02 in rg-web in north europe with ra-grs",
+        {
+            "name": "media02",
+            "resource_group": "rg-web",
+            "location": "northeurope",
+            "sku": "Standard_RAGRS",
+            "resource_type": STORAGE,
+        },
+    ),
+    (
+        "create a storage account called backups in rg-ops sku premium_lrs",
+        {
+            "name": "backups",
+            "resource_group": "rg-ops",
+            "sku": "Premium_LRS",
+            "resource_type": STORAGE,
+        },
+    ),
+    (
+        "create storage account archive7 in rg-cold japaneast zrs",
+        {
+            "name": "archive7",
+            "resource_group": "rg-cold",
+            "location": "japaneast",
+            "sku": "Standard_ZRS",
+            "resource_type": STORAGE,
+        },
+    ),
+    ("list resources", {}),
+    ("list all resources in my subscription", {}),
+    ("list resources in the rg-app group", {"resource_group": "rg-app"}),
+    ("list resources in resource group prod", {"resource_group": "prod"}),
+    ("show VMs in eastus", {"location": "eastus", "resource_type": VM}),
+    ("show virtual machines in Southeast Asia", {"location": "southeastasia", "resource_type": VM}),
+    (
+        "show VMs in eastus tagged env=prod",
+        {"location": "eastus", "resource_type": VM, "tags": (("env", "prod"),)},
+    ),
+    (
+        "list storage accounts in rg-data with tags env=prod and team:web",
+        {
+            "resource_group": "rg-data",
+            "resource_type": STORAGE,
+            "tags": (("env", "prod"), ("team", "web")),
+        },
+    ),
+    ("list virtual networks", {"resource_type": VNET}),
+    ("list vnets in rg-net", {"resource_group": "rg-net", "resource_type": VNET}),
+    ("how many vms per region", {"resource_type": VM, "group_by": "location"}),
+    ("count resources by resource group", {"group_by": "resource_group"}),
+    ("how many storage accounts per type", {"resource_type": STORAGE, "group_by": "type"}),
+    ("how much is a D4s_v5 in westeurope?", {"location": "westeurope", "sku": "Standard_D4s_v5"}),
+    ("how much does a b2s cost in Central US", {"location": "centralus", "sku": "Standard_B2s"}),
+    (
+        "price of Standard_E8s_v5 in australia east",
+        {"location": "australiaeast", "sku": "Standard_E8s_v5"},
+    ),
+    ("what does an NC6s_v3 cost", {"sku": "Standard_NC6s_v3"}),
+    (
+        "cost of Standard_M128ms in swedencentral",
+        {"location": "swedencentral", "sku": "Standard_M128ms"},
+    ),
+    (
+        "how much would a storage account with grs cost",
+        {"sku": "Standard_GRS", "resource_type": STORAGE},
+    ),
+    ("price of premium zrs storage in UK South", {"location": "uksouth", "sku": "Premium_ZRS"}),
+    (
+        "create storage account in rg app-rg",
+        {"resource_group": "app-rg", "resource_type": STORAGE},
+    ),
+    (
+        "create a vm called web-01 in rg-web",
+        {"name": "web-01", "resource_group": "rg-web", "resource_type": VM},
+    ),
+    # No rule names this; the spaCy fallback is for commands like it
+    ("deploy Atlas to westus2", {"name": "Atlas", "location": "westus2"}),
+    ("create storage in narnia", {"resource_group": "narnia"}),
+    (
+        "show vms in rg-ml at westus3",
+        {"resource_group": "rg-ml", "location": "westus3", "resource_type": VM},
+    ),
+    (
+        "list key vaults in rg-sec",
+        {"resource_group": "rg-sec", "resource_type": "Microsoft.KeyVault/vaults"},
+    ),
+    (
+        "list web apps in rg-web in France Central",
+        {
+            "resource_group": "rg-web",
+            "location": "francecentral",
+            "resource_type": "Microsoft.Web/sites",
+        },
+    ),
+]
+
+FIELDS = [field.name for field in fields(Entities)]
+
+
+def evaluate(fallback: Optional[Any] = None, repeat: int = 1) -> dict[str, Any]:
+    correct = dict.fromkeys(FIELDS, 0)
+    exact = 0
+    misses = []
+    for command, expected in EXAMPLES:
+        found = extract_entities(command, fallback)
+        want = Entities(**expected)
+        exact += found == want
+        for name in FIELDS:
+            if getattr(found, name) == getattr(want, name):
+                correct[name] += 1
+            else:
+                misses.append((command, name, getattr(found, name), getattr(want, name)))
+
+    timings = []
+    for command, _ in EXAMPLES:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            extract_entities(command, fallback)
+        timings.append((time.perf_counter() - started) / repeat)
+    timings.sort()
+    return {
+        "accuracy": {name: count / len(EXAMPLES) for name, count in correct.items()},
+        "exact": exact / len(EXAMPLES),
+        "misses": misses,
+        "mean_us": statistics.fmean(timings) * 1e6,
+        "p50_us": timings[len(timings) // 2] * 1e6,
+        "max_us": timings[-1] * 1e6,
+    }
+
+
+def report(label: str, result: dict[str, Any]) -> None:
+    print(f"\n{label}: {result['exact']:.0%} of {len(EXAMPLES)} commands exactly right")
+    print(f"{'field':<15} {'accuracy':>8}")
+    for name, accuracy in result["accuracy"].items():
+        print(f"{name:<15} {accuracy:>8.0%}")
+    print(
+        f"latency: mean {result['mean_us']:.1f} us, p50 {result['p50_us']:.1f} us,"
+        f" max {result['max_us']:.1f} us"
+    )
+    for command, name, found, want in result["misses"]:
+        print(f"  miss {name}: {command!r} -> {found!r}, expected {want!r}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=2000, help="timed runs per command")
+    parser.add_argument("--spacy-model", help="also run with this spaCy pipeline as fallback")
+    args = parser.parse_args()
+
+    report("rules", evaluate(repeat=args.repeat))
+    if args.spacy_model:
+        started = time.perf_counter()
+        model = _load_model(args.spacy_model)
+        if model is None:
+            print(f"\nspaCy or {args.spacy_model} is not installed")
+            return
+        print(f"\nloaded {args.spacy_model} in {(time.perf_counter() - started) * 1e3:.0f} ms")
+        report("rules + spaCy", evaluate(model, repeat=max(1, args.repeat // 100)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+History store write throughput and lookup latency at scale.
+
+Fills a history database with synthetic sessions (1M commands by default),
+then measures:
+
+    record         - time for ``record`` to return (it only enqueues)
+    background     - rows/s the batching writer sustains
+    next_commands  - "most frequent next command" lookups
+    last_rg        - "last referenced resource group" lookups
+
+Both lookups should stay well under a millisecond at 1M rows.
+
+Usage:
+    python -m benchmarks.bench_history [--rows 1000000] [--queries 2000]
+        [--recorded 50000]
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from history import HistoryEntry, HistoryStore
+
+INTENTS = (
+    "list_resources",
+    "create_resource_group",
+    "create_storage_account",
+    "stop_vm",
+    "start_vm",
+    "list_vms",
+    "delete_resource_group",
+    "show_costs",
+)
+GROUPS = tuple(f"rg-{n}" for n in range(500))
+BULK_BATCH = 10_000
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[int(fraction * 100) - 1]
+
+
+def entries(count: int, rng: random.Random, start: float):
+    for index in range(count):
+        intent = rng.choice(INTENTS)
+        group = rng.choice(GROUPS) if rng.random() < 0.6 else None
+        yield HistoryEntry(
+            f"{intent.replace('_', ' ')} {group or ''}".strip(),
+            intent,
+            group,
+            None,
+            rng.random() > 0.05,
+            start + index,
+        )
+
+
+def run(rows: int, queries: int, recorded: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    results: dict = {}
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(Path(directory) / "history.db")
+        started = time.perf_counter()
+        batch: list[HistoryEntry] = []
+        for entry in entries(rows, rng, start=0.0):
+            batch.append(entry)
+            if len(batch) == BULK_BATCH:
+                store.write(batch)
+                batch = []
+        store.write(batch)
+        results["bulk_rows_per_second"] = rows / (time.perf_counter() - started)
+
+        record_latencies = []
+        started = time.perf_counter()
+        for entry in entries(recorded, rng, start=float(rows)):
+            before = time.perf_counter()
+            store.record(entry)
+            record_latencies.append(time.perf_counter() - before)
+        store.flush()
+        results["background_rows_per_second"] = recorded / (time.perf_counter() - started)
+        results["record"] = record_latencies
+        results["rows"] = len(store)
+
+        for name, query in (
+            ("next_commands", lambda: store.next_commands(rng.choice(INTENTS))),
+            ("last_rg", store.last_resource_group),
+        ):
+            latencies = []
+            for _ in range(queries):
+                before = time.perf_counter()
+                query()
+                latencies.append(time.perf_counter() - before)
+            results[name] = latencies
+        store.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--recorded", type=int, default=50_000)
+    args = parser.parse_args()
+
+    results = run(args.rows, args.queries, args.recorded)
+    print(f"{results['rows']:,} history rows")
+    print(f"bulk write        {results['bulk_rows_per_second']:>10,.0f} rows/s")
+    print(f"background write  {results['background_rows_per_second']:>10,.0f} rows/s")
+    print(f"{'operation':>14} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name in ("record", "next_commands", "last_rg"):
+        latencies = results[name]
+        print(
+            f"{name:>14} {percentile(latencies, 0.5) * 1000:>8.3f}"
+            f" {percentile(latencies, 0.95) * 1000:>8.3f} {percentile(latencies, 0.99) * 1000:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
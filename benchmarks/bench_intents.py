@@ -0,0 +1,100 @@
+"""
+Intent classification latency as the number of intents grows.
+
+Compares the compiled IntentRegistry against the naive approach of checking
+every intent's keywords with ``in`` one after another (the old if/elif chain).
+
+Usage:
+    python -m benchmarks.bench_intents [--sizes 10 100 1000] [--repeat 2000]
+"""
+
+import argparse
+import random
+import string
+import time
+
+from intents import Intent, IntentRegistry
+
+COMMANDS = [
+    "list all resources in my subscription",
+    "please show me the help page",
+    "create a storage account in westeurope for the analytics team",
+    "this sentence mentions nothing the copilot understands at all",
+]
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+
+
+def build_intents(count: int, seed: int = 42) -> list[Intent]:
+    """Create ``count`` synthetic intents with two keyword groups each."""
+    rng = random.Random(seed)
+    intents = [
+        Intent("list_resources", (("list",), ("resource",))),
+        Intent("help", (("help",),)),
+    ]
+    while len(intents) < count:
+        groups = tuple(tuple(_word(rng) for _ in range(3)) for _ in range(2))
+        intents.append(Intent(f"intent_{len(intents)}", groups))
+    return intents[:count]
+
+
+def naive_classify(intents: list[Intent], command: str) -> Intent | None:
+    """Reference implementation: scan the input once per keyword of every intent."""
+    text = command.lower()
+    for intent in intents:
+        if all(any(phrase in text for phrase in group) for group in intent.keywords):
+            return intent
+    return None
+
+
+def _time_per_call(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for i in range(repeat):
+        func(COMMANDS[i % len(COMMANDS)])
+    return (time.perf_counter() - start) / repeat
+
+
+def run(sizes: list[int], repeat: int) -> list[dict[str, float]]:
+    """Measure average classification latency (microseconds) for each size."""
+    results = []
+    for size in sizes:
+        intents = build_intents(size)
+        registry = IntentRegistry()
+        for intent in intents:
+            registry.add(intent)
+
+        compile_start = time.perf_counter()
+        registry.compile()
+        compile_ms = (time.perf_counter() - compile_start) * 1000
+
+        compiled_us = _time_per_call(registry.classify, repeat) * 1e6
+        naive_us = _time_per_call(lambda c, i=intents: naive_classify(i, c), repeat) * 1e6
+        results.append(
+            {
+                "intents": size,
+                "compile_ms": compile_ms,
+                "compiled_us": compiled_us,
+                "naive_us": naive_us,
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'intents':>8} {'compile ms':>11} {'compiled us':>12} {'naive us':>10}")
+    for row in run(args.sizes, args.repeat):
+        print(
+            f"{row['intents']:>8} {row['compile_ms']:>11.2f} "
+            f"{row['compiled_us']:>12.2f} {row['naive_us']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Waiting on many long-running creates: one thread each versus one poller loop.
+
+Starts --creates storage account creates (20 by default) against a FakeAzure
+backend whose operations take --duration seconds and answer status requests
+with a Retry-After of --retry-after seconds, three ways:
+
+    sequential  - each create started and waited for with ``.result()`` in turn
+    threads     - the same on a thread per create
+    multiplexed - every create started, then tracked by one lro.LroManager
+
+For each it reports the wall time, the status requests made and the number
+of threads that made them. The real SDK's LROPoller also starts a polling
+thread per poller in the first two modes; with lro.manual_polling() it does
+not.
+
+Usage:
+    python -m benchmarks.bench_lro [--creates 20] [--duration 0.5] [--retry-after 0.1]
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import azure_commands
+from benchmarks.fake_azure import BackendProfile, FakeAzure
+from lro import LroManager
+
+SUB = "00000000-0000-0000-0000-000000000000"
+
+
+def begin(azure: FakeAzure, n: int) -> Any:
+    client = azure.client("storage", SUB)
+    return azure_commands.begin_create_storage_account(client, "rg-000", f"bench{n:05d}", "eastus")
+
+
+def create_sequential(azure: FakeAzure, creates: int) -> None:
+    for n in range(creates):
+        begin(azure, n).result()
+
+
+def create_threads(azure: FakeAzure, creates: int) -> None:
+    with ThreadPoolExecutor(max_workers=creates) as pool:
+        list(pool.map(lambda n: begin(azure, n).result(), range(creates)))
+
+
+def create_multiplexed(azure: FakeAzure, creates: int) -> None:
+    manager = LroManager(initial_delay=0.05, max_delay=1.0)
+    try:
+        manager.wait([manager.track(f"create {n}", begin(azure, n)) for n in range(creates)])
+    finally:
+        manager.close()
+
+
+MODES: dict[str, Callable[[FakeAzure, int], None]] = {
+    "sequential": create_sequential,
+    "threads": create_threads,
+    "multiplexed": create_multiplexed,
+}
+
+
+def run(creates: int, duration: float, retry_after: float, latency: float) -> list[dict]:
+    results = []
+    for mode, create in MODES.items():
+        profile = BackendProfile(
+            latency=latency, lro_duration=duration, lro_retry_after=retry_after
+        )
+        azure = FakeAzure([SUB], groups=1, resources_per_group=5, profile=profile)
+        started = time.perf_counter()
+        create(azure, creates)
+        results.append(
+            {
+                "mode": mode,
+                "seconds": time.perf_counter() - started,
+                "polls": azure.calls["storage_accounts.poll"],
+                "threads": len(azure.poll_threads),
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--creates", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=0.5, help="seconds per operation")
+    parser.add_argument("--retry-after", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds per request")
+    args = parser.parse_args()
+
+    results = run(args.creates, args.duration, args.retry_after, args.latency)
+    print(f"{args.creates} creates of {args.duration:.2f} s, Retry-After {args.retry_after:.2f} s")
+    print(f"{'mode':<12} {'seconds':>8} {'polls':>6} {'threads':>8}")
+    for result in results:
+        print(
+            f"{result['mode']:<12} {result['seconds']:>8.2f} {result['polls']:>6}"
+            f" {result['threads']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Prompt size, build time and estimated cost with and without a token budget.
+
+Builds translation prompts for a workload of queries, each with conversation
+history and retrieved documentation, once with everything included and once
+through the budgeted PromptBuilder. Reports prompt tokens, per-build latency
+with a cold and a warm token-count cache, and the estimated prompt cost per
+1,000 requests.
+
+Usage:
+    python -m benchmarks.bench_prompts [--queries 500] [--budget 1500]
+        [--model gpt-4-turbo]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from prompts import PromptBuilder, TokenCounter
+from token_ledger import estimate_cost
+
+VERBS = ("list", "show", "stop", "start", "restart", "delete", "create")
+TYPES = ("vms", "storage accounts", "web apps", "vnets", "disks", "key vaults")
+GROUPS = tuple(f"rg-{n}" for n in range(20))
+DOC = "az {kind} {verb}: {verb} Azure {kind} resources. Supports --resource-group and --ids. "
+
+
+def workload(queries: int, seed: int = 7) -> list[tuple[str, list[str], list[tuple[str, float]]]]:
+    rng = random.Random(seed)
+    items = []
+    for _ in range(queries):
+        query = f"{rng.choice(VERBS)} {rng.choice(TYPES)} in {rng.choice(GROUPS)}"
+        history = [f"{rng.choice(VERBS)} {rng.choice(TYPES)}" for _ in range(rng.randint(2, 12))]
+        docs = [
+            (DOC.format(kind=rng.choice(TYPES), verb=rng.choice(VERBS)) * rng.randint(5, 30), score)
+            for score in sorted((rng.random() for _ in range(4)), reverse=True)
+        ]
+        items.append((query, history, docs))
+    return items
+
+
+def run(queries: int, budget: int, model: str) -> dict[str, dict]:
+    items = workload(queries)
+    results = {}
+
+    counter = TokenCounter(model)
+    builder = PromptBuilder(counter, budget=budget)
+    sizes = [counter.count_messages(builder.unbudgeted(*item)) for item in items]
+    results["unbudgeted"] = {"tokens": sizes, "cold_ms": [], "warm_ms": []}
+
+    sizes, cold, warm = [], [], []
+    for attempt in (cold, warm):
+        builder = PromptBuilder(TokenCounter(model), budget=budget)
+        if attempt is warm:
+            for item in items:
+                builder.build(*item)
+        for item in items:
+            start = time.perf_counter()
+            prompt = builder.build(*item)
+            attempt.append((time.perf_counter() - start) * 1000)
+            if attempt is cold:
+                sizes.append(prompt.tokens)
+    results["budgeted"] = {"tokens": sizes, "cold_ms": cold, "warm_ms": warm}
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--budget", type=int, default=1500)
+    parser.add_argument("--model", default="gpt-4-turbo")
+    args = parser.parse_args()
+
+    results = run(args.queries, args.budget, args.model)
+    exact = "tiktoken" if TokenCounter(args.model).exact else "estimated"
+    print(f"token counts: {exact}")
+    print(
+        f"{'prompt':>11} {'mean tok':>9} {'max tok':>8} {'cold ms':>8} {'warm ms':>8}"
+        f" {'$/1k req':>9}"
+    )
+    for name, row in results.items():
+        mean = statistics.fmean(row["tokens"])
+        cold = f"{statistics.fmean(row['cold_ms']):.2f}" if row["cold_ms"] else "-"
+        warm = f"{statistics.fmean(row['warm_ms']):.2f}" if row["warm_ms"] else "-"
+        cost = estimate_cost(args.model, round(mean), 0) * 1000
+        print(f"{name:>11} {mean:>9.0f} {max(row['tokens']):>8} {cold:>8} {warm:>8} {cost:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Bytes transferred and latency of filtered listings with and without pushdown.
+
+Runs natural language listing queries against a FakeAzure subscription
+(50k resources by default, with per-page latency) three ways:
+
+    client    - list everything, then filter in Python (no pushdown)
+    arm       - ARM ``$filter`` with the one predicate ARM accepts; the
+                rest is filtered locally
+    graph     - Resource Graph KQL with every predicate and the projection
+                pushed to the server
+
+Bytes are the JSON the fake service sent back; latency is the best of
+--repeats runs.
+
+Usage:
+    python -m benchmarks.bench_pushdown [--resources 50000] [--latency 0.005]
+        [--repeats 3]
+"""
+
+import argparse
+import time
+
+from benchmarks.fake_azure import BackendProfile, FakeAzure
+from entities import extract_entities
+from inventory_sync import ResourceGraph
+from query_planner import ResourceQuery, plan_query, run_plan
+
+SUB = "00000000-0000-0000-0000-000000000000"
+QUERIES = (
+    "show vms in eastus tagged env=prod",
+    "list storage accounts in westeurope",
+    "list resources tagged env=dev",
+    "list web apps in rg-007",
+)
+# What a table listing shows
+TABLE_COLUMNS = ("name", "type", "location", "resource_group")
+
+
+def run_mode(azure: FakeAzure, query: ResourceQuery, mode: str) -> tuple[int, int]:
+    """Run one query one way; returns (rows, bytes sent by the service)."""
+    before = sum(azure.bytes_sent.values())
+    if mode == "client":
+        unfiltered = ResourceQuery(query.resource_group)
+        rows = run_plan(plan_query(unfiltered, "arm"), SUB, azure.client("resource", SUB))
+        rows = plan_query(query, "local").apply(rows)
+    elif mode == "arm":
+        rows = run_plan(plan_query(query, "arm"), SUB, azure.client("resource", SUB))
+    else:
+        graph = ResourceGraph(azure.client("resourcegraph", SUB))
+        rows = run_plan(plan_query(query, "graph"), SUB, graph)
+    count = sum(1 for _ in rows)
+    return count, sum(azure.bytes_sent.values()) - before
+
+
+def run(total: int, latency: float, repeats: int) -> list[dict]:
+    groups = max(total // 1000, 1)
+    azure = FakeAzure(
+        [SUB],
+        groups=groups,
+        resources_per_group=total // groups,
+        profile=BackendProfile(latency=latency, page_size=1000),
+    )
+    results = []
+    for text in QUERIES:
+        query = ResourceQuery.from_entities(extract_entities(text), columns=TABLE_COLUMNS)
+        for mode in ("client", "arm", "graph"):
+            best = float("inf")
+            for _ in range(repeats):
+                started = time.perf_counter()
+                rows, sent = run_mode(azure, query, mode)
+                best = min(best, time.perf_counter() - started)
+            results.append(
+                {"query": text, "mode": mode, "rows": rows, "bytes": sent, "seconds": best}
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--resources", type=int, default=50_000)
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds per page")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(args.resources, args.latency, args.repeats)
+    print(f"{args.resources:,} resources, {args.latency * 1000:.0f} ms per page of 1000")
+    print(f"{'query':<38} {'mode':>6} {'rows':>7} {'KB sent':>10} {'ms':>9}")
+    for result in results:
+        print(
+            f"{result['query']:<38} {result['mode']:>6} {result['rows']:>7,}"
+            f" {result['bytes'] / 1024:>10,.0f} {result['seconds'] * 1000:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Memory and aggregation time of resource representations for large inventories.
+
+Loads a FakeAzure inventory (100k resources by default) the way a listing
+receives it - page by page from JSON, so every row has its own strings - and
+keeps it three ways:
+
+    models  - SDK-style model objects, one instance __dict__ per resource
+              with the fields GenericResourceExpanded carries
+    dicts   - the plain dict rows resource_to_dict produces
+    table   - a columnar resource_table.ResourceTable
+
+For each it reports the memory still held once loaded, the peak while
+loading (tracemalloc), and the best of --repeats runs of "how many resources
+per type and region" and of sorting by location.
+
+Usage:
+    python -m benchmarks.bench_resource_table [--resources 100000] [--repeats 5]
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable, Iterator
+from functools import partial
+from typing import Any
+
+from azure_commands import resource_group_from_id
+from benchmarks.fake_azure import FakeAzure
+from resource_table import ResourceTable
+
+SUB = "00000000-0000-0000-0000-000000000000"
+PAGE_SIZE = 1000
+
+
+class SdkResource:
+    """Stand-in for an SDK GenericResourceExpanded model."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.additional_properties: dict[str, Any] = {}
+        self.id = kwargs.get("id")
+        self.name = kwargs.get("name")
+        self.type = kwargs.get("type")
+        self.location = kwargs.get("location")
+        self.extended_location = None
+        self.tags = kwargs.get("tags")
+        self.plan = None
+        self.properties = None
+        self.kind = None
+        self.managed_by = None
+        self.sku = None
+        self.identity = None
+        self.created_time = None
+        self.changed_time = None
+        self.provisioning_state = None
+
+
+def pages(azure: FakeAzure) -> Iterator[list[dict[str, Any]]]:
+    """The inventory as decoded JSON pages, like the SDK receives it."""
+    resources = azure.resources(SUB)
+    for start in range(0, len(resources), PAGE_SIZE):
+        page = [
+            {"id": r.id, "name": r.name, "type": r.type, "location": r.location, "tags": r.tags}
+            for r in resources[start : start + PAGE_SIZE]
+        ]
+        yield json.loads(json.dumps(page))
+
+
+def load_models(azure: FakeAzure) -> list[SdkResource]:
+    return [SdkResource(**item) for page in pages(azure) for item in page]
+
+
+def load_dicts(azure: FakeAzure) -> list[dict[str, Any]]:
+    return [
+        {**item, "resource_group": resource_group_from_id(item["id"])}
+        for page in pages(azure)
+        for item in page
+    ]
+
+
+def load_table(azure: FakeAzure) -> ResourceTable:
+    table = ResourceTable()
+    for page in pages(azure):
+        table.extend(
+            {**item, "resource_group": resource_group_from_id(item["id"])} for item in page
+        )
+    return table
+
+
+def measure_memory(load: Callable[[], Any]) -> tuple[Any, int, int]:
+    """Load once under tracemalloc; returns (result, bytes held, peak bytes)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = load()
+        gc.collect()
+        held, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, held, peak
+
+
+def best_of(repeats: int, func: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(total: int, repeats: int) -> list[dict]:
+    groups = max(total // 1000, 1)
+    azure = FakeAzure([SUB], groups=groups, resources_per_group=total // groups)
+    azure.resources(SUB)  # generate outside the measurements
+
+    modes: dict[str, tuple[Callable[[], Any], Callable[[Any], Any], Callable[[Any], Any]]] = {
+        "models": (
+            lambda: load_models(azure),
+            lambda rows: Counter((r.type, r.location) for r in rows),
+            lambda rows: sorted(rows, key=lambda r: r.location.lower()),
+        ),
+        "dicts": (
+            lambda: load_dicts(azure),
+            lambda rows: Counter((r["type"], r["location"]) for r in rows),
+            lambda rows: sorted(rows, key=lambda r: r["location"].lower()),
+        ),
+        "table": (
+            lambda: load_table(azure),
+            lambda table: table.count_by("type", "location"),
+            lambda table: table.sort_by("location"),
+        ),
+    }
+    results = []
+    for mode, (load, count, sort) in modes.items():
+        data, held, peak = measure_memory(load)
+        results.append(
+            {
+                "mode": mode,
+                "rows": len(data),
+                "held": held,
+                "peak": peak,
+                "count_seconds": best_of(repeats, partial(count, data)),
+                "sort_seconds": best_of(repeats, partial(sort, data)),
+            }
+        )
+        del data
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--resources", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    results = run(args.resources, args.repeats)
+    print(f"{args.resources:,} resources")
+    print(f"{'mode':<8} {'rows':>8} {'held MB':>9} {'peak MB':>9} {'count ms':>10} {'sort ms':>9}")
+    for result in results:
+        print(
+            f"{result['mode']:<8} {result['rows']:>8,} {result['held'] / 2**20:>9.1f}"
+            f" {result['peak'] / 2**20:>9.1f} {result['count_seconds'] * 1000:>10.1f}"
+            f" {result['sort_seconds'] * 1000:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
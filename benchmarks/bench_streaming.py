@@ -0,0 +1,126 @@
+"""
+Time to first row and peak memory for large resource listings.
+
+Renders a synthetic 100k-item pager to /dev/null in two ways:
+    buffered  - fetch every page into a list, then render (the old behaviour)
+    streaming - render each resource as the pager yields it
+
+Each mode runs in its own interpreter so peak RSS is measured independently.
+
+Usage:
+    python -m benchmarks.bench_streaming [--items 100000] [--page-size 1000]
+        [--page-latency 0.002] [--format ndjson]
+"""
+
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from types import SimpleNamespace
+
+from azure_commands import iter_resources
+from render import render_resources
+
+MODES = ("buffered", "streaming")
+
+
+def synthetic_pager(items: int, page_size: int, page_latency: float) -> Iterator[SimpleNamespace]:
+    """Yield fake GenericResource objects, sleeping once per page like a real pager."""
+    for index in range(items):
+        if index % page_size == 0:
+            time.sleep(page_latency)
+        yield SimpleNamespace(
+            id=f"/subscriptions/sub/resourceGroups/rg-{index % 50}"
+            f"/providers/Microsoft.Compute/virtualMachines/vm-{index}",
+            name=f"vm-{index}",
+            type="Microsoft.Compute/virtualMachines",
+            location="eastus",
+            tags={"env": "prod", "owner": f"team-{index % 7}"},
+        )
+
+
+class TimedSink(io.TextIOBase):
+    """Discards output but records when the first byte was written."""
+
+    def __init__(self) -> None:
+        self.first_write = None
+
+    def write(self, text: str) -> int:
+        if self.first_write is None:
+            self.first_write = time.perf_counter()
+        return len(text)
+
+
+class FakeClient:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.resources = SimpleNamespace(
+            list=lambda: synthetic_pager(args.items, args.page_size, args.page_latency)
+        )
+
+
+def run_mode(args: argparse.Namespace) -> dict[str, float]:
+    """Run one mode in this process and return its measurements."""
+    from rich.console import Console
+
+    sink = TimedSink()
+    console = Console(file=sink, width=160)
+    start = time.perf_counter()
+    rows = iter_resources(FakeClient(args))
+    if args.mode == "buffered":
+        rows = list(rows)
+    count = render_resources(rows, args.format, sink, console)
+    total = time.perf_counter() - start
+    return {
+        "rows": count,
+        "first_row_s": (sink.first_write or time.perf_counter()) - start,
+        "total_s": total,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def run(items: int, page_size: int, page_latency: float, output_format: str) -> list[dict]:
+    """Run every mode in a fresh interpreter and collect the results."""
+    results = []
+    for mode in MODES:
+        command = [
+            sys.executable, "-m", "benchmarks.bench_streaming", "--child",
+            "--mode", mode, "--items", str(items), "--page-size", str(page_size),
+            "--page-latency", str(page_latency), "--format", output_format,
+        ]  # fmt: skip
+        output = subprocess.run(
+            command, capture_output=True, text=True, check=True, cwd=os.getcwd()
+        ).stdout
+        results.append({"mode": mode, **json.loads(output)})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--page-latency", type=float, default=0.002)
+    parser.add_argument("--format", choices=["ndjson", "csv", "table"], default="ndjson")
+    parser.add_argument("--mode", choices=MODES, default="streaming")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args)))
+        return
+
+    print(f"{'mode':>10} {'rows':>8} {'first row ms':>13} {'total s':>8} {'peak RSS MB':>12}")
+    for row in run(args.items, args.page_size, args.page_latency, args.format):
+        print(
+            f"{row['mode']:>10} {row['rows']:>8} {row['first_row_s'] * 1000:>13.1f} "
+            f"{row['total_s']:>8.2f} {row['peak_rss_mb']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Cost of tracing spans on a hot path.
+
+Times a tight loop of ``with span(...)`` blocks with tracing off (the normal
+case, which should cost about as much as a function call) and on, against an
+empty loop, then the intent classifier with and without a span around it.
+
+Usage:
+    python -m benchmarks.bench_tracing [--iterations 1000000]
+"""
+
+import argparse
+import time
+
+import tracing
+from intents import registry
+from tracing import span
+
+
+def per_call_ns(loop, iterations: int) -> float:
+    started = time.perf_counter_ns()
+    loop(iterations)
+    return (time.perf_counter_ns() - started) / iterations
+
+
+def empty(iterations: int) -> None:
+    for _ in range(iterations):
+        pass
+
+
+def spans(iterations: int) -> None:
+    for _ in range(iterations):
+        with span("stage"):
+            pass
+
+
+def classify(iterations: int) -> None:
+    for _ in range(iterations):
+        registry.classify("list resources in rg-prod")
+
+
+def classify_traced(iterations: int) -> None:
+    for _ in range(iterations):
+        with span("intent.classify"):
+            registry.classify("list resources in rg-prod")
+
+
+def run(iterations: int) -> dict[str, float]:
+    import cli  # noqa: F401 - registers the intents
+
+    results = {
+        "empty loop": per_call_ns(empty, iterations),
+        "span, tracing off": per_call_ns(spans, iterations),
+        "classify": per_call_ns(classify, iterations // 10),
+        "classify + span, off": per_call_ns(classify_traced, iterations // 10),
+    }
+    tracing.start_tracing()
+    try:
+        results["span, tracing on"] = per_call_ns(spans, iterations // 10)
+        results["classify + span, on"] = per_call_ns(classify_traced, iterations // 10)
+    finally:
+        tracing.stop_tracing()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'operation':>22} {'ns/call':>9}")
+    for name, nanoseconds in run(args.iterations).items():
+        print(f"{name:>22} {nanoseconds:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Lookup latency and hit rate of the two-tier translation cache.
+
+Fills a cache with synthetic translations, then replays a workload of exact
+repeats, reworded repeats (filler words, "all", punctuation) and new queries,
+and reports per-tier latency percentiles and hit rates. Every hit avoids an
+LLM round trip, simulated here as --llm-latency seconds.
+
+Usage:
+    python -m benchmarks.bench_translation_cache [--entries 2000] [--queries 2000]
+        [--llm-latency 2.0] [--threshold 0.9]
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from embeddings import HashingEmbedder
+from translation_cache import TIER_EXACT, TIER_SEMANTIC, TranslationCache
+
+VERBS = ("list", "show", "count", "describe", "delete", "stop", "start", "restart")
+TYPES = ("vms", "storage accounts", "web apps", "vnets", "disks", "key vaults", "sql servers")
+GROUPS = tuple(f"rg-{n}" for n in range(40))
+CONTEXT = {"subscription": "00000000-0000-0000-0000-000000000000", "model": "gpt-4-turbo"}
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[int(fraction * 100) - 1]
+
+
+def reword(query: str, rng: random.Random) -> str:
+    verb, rest = query.split(" ", 1)
+    return rng.choice(
+        (
+            f"please {verb} all {rest}",
+            f"{verb.capitalize()} my {rest}!",
+            f"can you {verb} the {rest}?",
+            f"{verb} all {rest}",
+        )
+    )
+
+
+def run(entries: int, queries: int, threshold: float, seed: int = 7) -> dict[str, dict]:
+    rng = random.Random(seed)
+    stored = [
+        f"{rng.choice(VERBS)} {rng.choice(TYPES)} in {rng.choice(GROUPS)}" for _ in range(entries)
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TranslationCache(
+            Path(directory) / "translations.db",
+            HashingEmbedder(),
+            max_entries=entries,
+            threshold=threshold,
+        )
+        for query in stored:
+            cache.put(query, {"command": f"az {query}"}, CONTEXT)
+
+        latencies: dict[str, list[float]] = {TIER_EXACT: [], TIER_SEMANTIC: [], "miss": []}
+        for index in range(queries):
+            kind = index % 3
+            if kind == 0:
+                query = rng.choice(stored)
+            elif kind == 1:
+                query = reword(rng.choice(stored), rng)
+            else:
+                query = f"{rng.choice(VERBS)} {rng.choice(TYPES)} in rg-new-{index}"
+            start = time.perf_counter()
+            hit = cache.get(query, CONTEXT)
+            latencies[hit.tier if hit else "miss"].append(time.perf_counter() - start)
+        metrics = cache.metrics
+        cache.close()
+
+    return {
+        tier: {
+            "count": len(values),
+            "p50_ms": percentile(values, 0.5) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+        }
+        for tier, values in latencies.items()
+    } | {"total": {"hit_rate": metrics.hit_rate}}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--llm-latency", type=float, default=2.0)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    args = parser.parse_args()
+
+    results = run(args.entries, args.queries, args.threshold)
+    print(f"{'tier':>10} {'lookups':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for tier in (TIER_EXACT, TIER_SEMANTIC, "miss"):
+        row = results[tier]
+        print(f"{tier:>10} {row['count']:>8} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f}")
+    hit_rate = results["total"]["hit_rate"]
+    saved = hit_rate * args.queries * args.llm_latency
+    print(
+        f"hit rate {hit_rate:.0%}; ~{saved:.0f} s of LLM time avoided at {args.llm_latency} s/call"
+    )
+
+
+if __name__ == "__main__":
+    main()
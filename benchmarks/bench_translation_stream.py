@@ -0,0 +1,88 @@
+"""
+Perceived latency of streamed translation against a local fake deployment.
+
+A FakeOpenAIServer streams a reply at a fixed per-chunk delay, followed by
+trailing prose as models often add. For each run this reports the time until
+the first command preview appears, until the reply object is complete (when
+the translator stops reading), and until the whole stream would have ended
+had the client waited for it, as a non-streaming request would.
+
+Usage:
+    python -m benchmarks.bench_translation_stream [--runs 10] [--chunk-delay 0.02]
+        [--chunk-size 8] [--trailer-chunks 30]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from config import get_config
+from prompts import PromptBuilder, TokenCounter
+from tests.fake_openai import FakeOpenAIServer, reply_chunks
+from translator import StreamingTranslator
+
+REPLY = {
+    "intent": "stop_vm",
+    "command": "az vm stop --resource-group rg-prod --name web01",
+    "arguments": {"resource_group": "rg-prod", "name": "web01"},
+    "explanation": "Stops (powers off) VM web01 in rg-prod.",
+}
+TRAILER = " Let me know if you also want to deallocate it to stop compute billing."
+
+
+class FirstPreview:
+    """Preview callback that notes when the first preview arrived."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def __call__(self, _command: str) -> None:
+        if not self.elapsed:
+            self.elapsed = time.perf_counter() - self.started
+
+
+def run(runs: int, chunk_delay: float, chunk_size: int, trailer_chunks: int) -> dict[str, list]:
+    trailer = (TRAILER * trailer_chunks)[: trailer_chunks * chunk_size]
+    chunks = reply_chunks(REPLY, size=chunk_size, trailer=trailer)
+    server = FakeOpenAIServer(chunks, delay=chunk_delay).start()
+    os.environ["AZURE_OPENAI_ENDPOINT"] = server.endpoint
+    os.environ["AZURE_OPENAI_API_KEY"] = "bench"
+    os.environ.setdefault("AZURE_SUBSCRIPTION_ID", "00000000-0000-0000-0000-000000000000")
+    get_config.cache_clear()
+    translator = StreamingTranslator(get_config(), PromptBuilder(TokenCounter()))
+
+    results: dict[str, list] = {"first_preview": [], "complete": [], "full_stream": []}
+    try:
+        for _ in range(runs):
+            first_preview = FirstPreview()
+            translator.translate("stop web01 in rg-prod", on_preview=first_preview)
+            results["complete"].append(time.perf_counter() - first_preview.started)
+            results["first_preview"].append(first_preview.elapsed)
+            # Connection setup is negligible locally, so the full stream is chunks x delay
+            results["full_stream"].append(len(chunks) * chunk_delay)
+    finally:
+        server.stop()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--chunk-delay", type=float, default=0.02)
+    parser.add_argument("--chunk-size", type=int, default=8)
+    parser.add_argument("--trailer-chunks", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["TOKEN_LEDGER_PATH"] = os.path.join(directory, "ledger.db")
+        results = run(args.runs, args.chunk_delay, args.chunk_size, args.trailer_chunks)
+    print(f"{'milestone':>14} {'mean s':>8} {'max s':>8}")
+    for name, values in results.items():
+        print(f"{name:>14} {statistics.fmean(values):>8.3f} {max(values):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,644 @@
+"""
+In-process fake of the Azure management APIs for benchmarks.
+
+FakeAzure serves the resource, compute, storage, network and Resource Graph
+client operations the CLI uses, plus ARM what-if for single-resource
+templates, from deterministic synthetic data, with configurable per-page
+latency, page size, and rates of server errors and throttling. Creating a
+storage account is a long-running operation that finishes after
+``BackendProfile.lro_duration``; its poller offers the polling-method
+protocol lro.LroManager drives as well as ``result()``. ``mutate`` creates, updates and deletes resources and records
+each change in a synthetic Resource Graph change feed. ``install`` puts it behind the process-wide ClientPool, so the
+real CLI code path (config, pool, fan-out, inventory cache, rendering) runs
+unchanged against it.
+
+Failures are decided from (seed, operation, scope, call number) rather than
+a shared random stream, so a run injects the same failures whatever order
+worker threads make their calls in.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator, Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from typing import Any, Optional
+
+from config import Config
+
+RESOURCE_TYPES = (
+    "Microsoft.Compute/virtualMachines",
+    "Microsoft.Storage/storageAccounts",
+    "Microsoft.Network/virtualNetworks",
+    "Microsoft.Web/sites",
+    "Microsoft.KeyVault/vaults",
+)
+LOCATIONS = ("eastus", "westeurope", "southeastasia")
+ENVIRONMENTS = ("prod", "dev", "test", "staging")
+
+# A quoted string in OData ('it''s') or KQL ('it\'s')
+_QUOTED = r"'((?:[^'\\]|\\.|'')*)'"
+# Resource Graph column -> fake resource attribute
+_GRAPH_ATTRIBUTES = {"resourceGroup": "resource_group"}
+_KQL_CONDITION = re.compile(rf"(tostring\(tags\[{_QUOTED}\]\)|\w+) =~ {_QUOTED}")
+
+
+class HttpResponseError(Exception):
+    """Shaped like azure.core.exceptions.HttpResponseError."""
+
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"({status_code}) {message}")
+        self.status_code = status_code
+        headers = {} if retry_after is None else {"Retry-After": str(retry_after)}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+
+# Code that tells SDK errors apart by module sees this as one
+HttpResponseError.__module__ = "azure.core.exceptions"
+
+
+@dataclass(frozen=True)
+class BackendProfile:
+    """How the fake service behaves."""
+
+    # Seconds each page (or non-list call) takes
+    latency: float = 0.0
+    page_size: int = 1000
+    # Fraction of calls answered with HTTP 500
+    failure_rate: float = 0.0
+    # Fraction of calls answered with HTTP 429
+    throttle_rate: float = 0.0
+    retry_after: float = 0.0
+    seed: int = 0
+    # Seconds a long-running operation (begin_*) takes to finish
+    lro_duration: float = 0.0
+    # Retry-After the operation's status responses carry; None sends none
+    lro_retry_after: Optional[float] = None
+
+
+class FakeAzure:
+    """
+    Synthetic tenant: subscriptions of resource groups of resources.
+
+    Example:
+        azure = FakeAzure(["sub-a", "sub-b"], groups=20, resources_per_group=500,
+                          profile=BackendProfile(latency=0.05, page_size=100))
+        azure.install(get_config())
+        cli.main(["list", "resources"])  # served by the fake
+    """
+
+    def __init__(
+        self,
+        subscriptions: Sequence[str] = ("00000000-0000-0000-0000-000000000000",),
+        groups: int = 10,
+        resources_per_group: int = 100,
+        profile: BackendProfile = BackendProfile(),
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.subscriptions = list(subscriptions)
+        self.groups = groups
+        self.resources_per_group = resources_per_group
+        self.profile = profile
+        self.calls: Counter[str] = Counter()
+        # operation -> bytes of JSON the service sent back
+        self.bytes_sent: Counter[str] = Counter()
+        self._clock = clock
+        self._lock = threading.RLock()
+        # subscription -> lower-cased resource ID -> resource
+        self._resources: dict[str, dict[str, SimpleNamespace]] = {}
+        # subscription -> (time, lower-cased resource ID, change type)
+        self._changes: dict[str, list[tuple[float, str, str]]] = {}
+        self._mutations = 0
+        # subscription -> lower-cased name -> resource groups created through the API
+        self._created_groups: dict[str, dict[str, SimpleNamespace]] = {}
+        self._graph_results: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        # continuation token -> long-running operation
+        self._operations: dict[str, FakeOperation] = {}
+        # Threads that have polled a long-running operation
+        self.poll_threads: set[int] = set()
+
+    # ------------------------------------------------------------------------
+    # Data
+    # ------------------------------------------------------------------------
+    def resources(self, subscription_id: str) -> list[SimpleNamespace]:
+        """Every resource of a subscription, generated once."""
+        return list(self._inventory(subscription_id).values())
+
+    def _inventory(self, subscription_id: str) -> dict[str, SimpleNamespace]:
+        with self._lock:
+            if subscription_id not in self._resources:
+                generated = (
+                    self._resource(subscription_id, group, index)
+                    for group in range(self.groups)
+                    for index in range(self.resources_per_group)
+                )
+                self._resources[subscription_id] = {r.id.lower(): r for r in generated}
+            return self._resources[subscription_id]
+
+    def _resource(self, subscription_id: str, group: int, index: int) -> SimpleNamespace:
+        resource_type = RESOURCE_TYPES[index % len(RESOURCE_TYPES)]
+        name = f"{resource_type.rsplit('/', 1)[1][:4].lower()}{group:03d}{index:05d}"
+        env = ENVIRONMENTS[index % len(ENVIRONMENTS)]
+        return _resource(
+            subscription_id, f"rg-{group:03d}", resource_type, name, LOCATIONS[group % 3], env
+        )
+
+    # ------------------------------------------------------------------------
+    # Changes
+    # ------------------------------------------------------------------------
+    def mutate(
+        self, subscription_id: str, created: int = 0, updated: int = 0, deleted: int = 0
+    ) -> None:
+        """
+        Change resources the way other users of the subscription would.
+
+        Updates retag the oldest resources, deletes remove the ones after
+        those, and creates add new web sites; every change is recorded in the
+        change feed at the current clock time.
+        """
+        with self._lock:
+            inventory = self._inventory(subscription_id)
+            existing = list(inventory.values())
+            for resource in existing[:updated]:
+                self._mutations += 1
+                tags = {**resource.tags, "revision": str(self._mutations)}
+                inventory[resource.id.lower()] = SimpleNamespace(**{**vars(resource), "tags": tags})
+                self._record(subscription_id, resource.id, "Update")
+            for resource in existing[updated : updated + deleted]:
+                del inventory[resource.id.lower()]
+                self._record(subscription_id, resource.id, "Delete")
+            for _ in range(created):
+                self._mutations += 1
+                group = f"rg-{self._mutations % max(self.groups, 1):03d}"
+                name = f"new{self._mutations:06d}"
+                resource = _resource(subscription_id, group, RESOURCE_TYPES[3], name, LOCATIONS[0])
+                inventory[resource.id.lower()] = resource
+                self._record(subscription_id, resource.id, "Create")
+
+    def _record(self, subscription_id: str, resource_id: str, change_type: str) -> None:
+        self._changes.setdefault(subscription_id, []).append(
+            (self._clock(), resource_id.lower(), change_type)
+        )
+        self._graph_results.clear()
+
+    # ------------------------------------------------------------------------
+    # Call behaviour
+    # ------------------------------------------------------------------------
+    def _call(self, operation: str, scope: str) -> None:
+        """Count a call, wait out its latency and maybe fail it."""
+        key = f"{operation}:{scope}"
+        with self._lock:
+            self.calls[operation] += 1
+            self.calls[key] += 1
+            number = self.calls[key]
+        if self.profile.latency:
+            time.sleep(self.profile.latency)
+        roll = random.Random(f"{self.profile.seed}:{key}:{number}").random()
+        if roll < self.profile.throttle_rate:
+            raise HttpResponseError(429, "Too Many Requests", self.profile.retry_after)
+        if roll < self.profile.throttle_rate + self.profile.failure_rate:
+            raise HttpResponseError(500, "Internal Server Error")
+
+    def _pager(self, operation: str, scope: str, items: list[Any]) -> Iterator[Any]:
+        """Yield items a page at a time, each page being one call."""
+        size = self.profile.page_size
+        for start in range(0, max(len(items), 1), size):
+            self._call(operation, scope)
+            page = items[start : start + size]
+            self._count_bytes(operation, [vars(item) for item in page])
+            yield from page
+
+    def _count_bytes(self, operation: str, rows: list[dict[str, Any]]) -> None:
+        size = sum(len(json.dumps(row, separators=(",", ":"))) for row in rows)
+        with self._lock:
+            self.bytes_sent[operation] += size
+
+    def _in_group(self, subscription_id: str, group: str, resource_type: str = "") -> list[Any]:
+        return [
+            resource
+            for resource in self.resources(subscription_id)
+            if resource.resource_group.lower() == group.lower()
+            and (not resource_type or resource.type == resource_type)
+        ]
+
+    def _of_type(self, subscription_id: str, resource_type: str) -> list[Any]:
+        return [r for r in self.resources(subscription_id) if r.type == resource_type]
+
+    # ------------------------------------------------------------------------
+    # Clients
+    # ------------------------------------------------------------------------
+    def client(self, service: str, subscription_id: str) -> Any:
+        """A fake management client with the operation groups the CLI uses."""
+        sub = subscription_id
+        vm, storage, vnet = RESOURCE_TYPES[:3]
+        if service == "resource":
+            return SimpleNamespace(
+                resources=SimpleNamespace(
+                    list=lambda filter=None: self._pager(
+                        "resources.list", sub, _odata_filter(self.resources(sub), filter)
+                    ),
+                    list_by_resource_group=lambda rg, filter=None: self._pager(
+                        "resources.list_by_resource_group",
+                        f"{sub}/{rg}",
+                        _odata_filter(self._in_group(sub, rg), filter),
+                    ),
+                ),
+                resource_groups=SimpleNamespace(
+                    create_or_update=lambda name, params: self._create_group(sub, name, params),
+                ),
+                deployments=SimpleNamespace(
+                    begin_what_if=lambda rg, _name, params: self._what_if(sub, rg, params),
+                    begin_what_if_at_subscription_scope=lambda _name, params: self._what_if(
+                        sub, None, params
+                    ),
+                ),
+            )
+        if service == "compute":
+            return SimpleNamespace(
+                virtual_machines=SimpleNamespace(
+                    list_all=lambda: self._pager(
+                        "virtual_machines.list_all", sub, self._of_type(sub, vm)
+                    ),
+                    list=lambda rg: self._pager(
+                        "virtual_machines.list", f"{sub}/{rg}", self._in_group(sub, rg, vm)
+                    ),
+                )
+            )
+        if service == "storage":
+            return SimpleNamespace(
+                storage_accounts=SimpleNamespace(
+                    list=lambda: self._pager(
+                        "storage_accounts.list", sub, self._of_type(sub, storage)
+                    ),
+                    list_by_resource_group=lambda rg: self._pager(
+                        "storage_accounts.list_by_resource_group",
+                        f"{sub}/{rg}",
+                        self._in_group(sub, rg, storage),
+                    ),
+                    begin_create=lambda rg, name, params, continuation_token=None, **_polling: (
+                        self._begin_create_account(sub, rg, name, params, continuation_token)
+                    ),
+                )
+            )
+        if service == "resourcegraph":
+            return SimpleNamespace(resources=self._graph_query)
+        if service == "network":
+            return SimpleNamespace(
+                virtual_networks=SimpleNamespace(
+                    list_all=lambda: self._pager(
+                        "virtual_networks.list_all", sub, self._of_type(sub, vnet)
+                    ),
+                    list=lambda rg: self._pager(
+                        "virtual_networks.list", f"{sub}/{rg}", self._in_group(sub, rg, vnet)
+                    ),
+                )
+            )
+        raise ValueError(f"Unknown service: {service}")
+
+    def _create_group(self, sub: str, name: str, params: dict[str, Any]) -> SimpleNamespace:
+        self._call("resource_groups.create_or_update", f"{sub}/{name}")
+        group = SimpleNamespace(
+            id=f"/subscriptions/{sub}/resourceGroups/{name}",
+            name=name,
+            location=params["location"],
+            tags=dict(params.get("tags") or {}),
+        )
+        with self._lock:
+            self._created_groups.setdefault(sub, {})[name.lower()] = group
+        return group
+
+    def _group(self, sub: str, name: str) -> Optional[SimpleNamespace]:
+        """A generated or created resource group, or None."""
+        with self._lock:
+            created = self._created_groups.get(sub, {}).get(name.lower())
+        if created is not None:
+            return created
+        match = re.fullmatch(r"rg-(\d{3})", name.lower())
+        if match is None or int(match.group(1)) >= self.groups:
+            return None
+        index = int(match.group(1))
+        return SimpleNamespace(
+            id=f"/subscriptions/{sub}/resourceGroups/rg-{index:03d}",
+            name=f"rg-{index:03d}",
+            location=LOCATIONS[index % 3],
+            tags={},
+        )
+
+    # ------------------------------------------------------------------------
+    # What-if
+    # ------------------------------------------------------------------------
+    def _what_if(self, sub: str, group: Optional[str], params: dict[str, Any]) -> SimpleNamespace:
+        """
+        Predict a deployment of resource groups and storage accounts.
+
+        Like ARM, a missing target group is a 404 and a bad storage account
+        name is reported in the result's error rather than raised.
+        """
+        self._call("deployments.what_if", f"{sub}/{group or ''}")
+        if group is not None and self._group(sub, group) is None:
+            raise HttpResponseError(404, f"Resource group '{group}' could not be found.")
+        changes = []
+        error = None
+        for resource in params["properties"]["template"]["resources"]:
+            after = {k: v for k, v in resource.items() if k != "apiVersion"}
+            if resource["type"] == "Microsoft.Resources/resourceGroups":
+                resource_id = f"/subscriptions/{sub}/resourceGroups/{resource['name']}"
+                existing = self._group(sub, resource["name"])
+                before = None if existing is None else {**vars(existing), "type": resource["type"]}
+            else:
+                if not re.fullmatch(r"[a-z0-9]{3,24}", resource["name"]):
+                    error = SimpleNamespace(
+                        code="AccountNameInvalid",
+                        message=f"{resource['name']} is not a valid storage account name.",
+                    )
+                resource_id = (
+                    f"/subscriptions/{sub}/resourceGroups/{group}"
+                    f"/providers/{resource['type']}/{resource['name']}"
+                )
+                existing = self._inventory(sub).get(resource_id.lower())
+                before = None
+                if existing is not None:
+                    before = {
+                        **{k: v for k, v in vars(existing).items() if k != "resource_group"},
+                        "kind": "StorageV2",
+                        "sku": {"name": "Standard_LRS"},
+                    }
+            after = {"id": resource_id, **after}
+            if before is None:
+                change_type = "Create"
+            elif all(before.get(key) == value for key, value in after.items()):
+                change_type = "NoChange"
+            else:
+                change_type = "Modify"
+            changes.append(
+                SimpleNamespace(
+                    resource_id=resource_id, change_type=change_type, before=before, after=after
+                )
+            )
+        result = SimpleNamespace(
+            status="Failed" if error else "Succeeded",
+            changes=None if error else changes,
+            error=error,
+        )
+        return SimpleNamespace(result=lambda: result)
+
+    def _begin_create_account(
+        self,
+        sub: str,
+        group: str,
+        name: str,
+        params: dict[str, Any],
+        continuation_token: Optional[str] = None,
+    ) -> "FakePoller":
+        if continuation_token is not None:
+            with self._lock:
+                operation = self._operations.get(continuation_token)
+            if operation is None:
+                raise HttpResponseError(404, f"Operation {continuation_token} was not found")
+            return FakePoller(operation)
+        key = f"{sub}/{group}/{name}"
+        self._call("storage_accounts.begin_create", key)
+        account = _resource(sub, group, RESOURCE_TYPES[1], name, params["location"])
+        operation = FakeOperation(self, key, account)
+        with self._lock:
+            self._operations[operation.token] = operation
+        return FakePoller(operation)
+
+    def _finish_create(self, account: SimpleNamespace) -> None:
+        sub = account.id.split("/")[2]
+        with self._lock:
+            self._inventory(sub)[account.id.lower()] = account
+            self._record(sub, account.id, "Create")
+
+    # ------------------------------------------------------------------------
+    # Resource Graph
+    # ------------------------------------------------------------------------
+    def _graph_query(self, request: dict[str, Any]) -> SimpleNamespace:
+        """
+        Answer a Resource Graph request, one page per call.
+
+        Understands the three query shapes inventory_sync sends: a snapshot of
+        ``resources``, ``resources`` filtered to a list of IDs, and
+        ``resourcechanges`` after a datetime.
+        """
+        (sub,) = request["subscriptions"]
+        query = request["query"]
+        start = int(request.get("options", {}).get("$skipToken") or 0)
+        self._call("resourcegraph.resources", sub)
+        with self._lock:
+            key = (sub, query)
+            if start == 0 or key not in self._graph_results:
+                self._graph_results[key] = self._graph_rows(sub, query)
+            rows = self._graph_results[key]
+        end = start + self.profile.page_size
+        self._count_bytes("resourcegraph.resources", rows[start:end])
+        return SimpleNamespace(
+            data=rows[start:end],
+            skip_token=str(end) if end < len(rows) else None,
+            total_records=len(rows),
+        )
+
+    def _graph_rows(self, sub: str, query: str) -> list[dict[str, Any]]:
+        if query.startswith("resourcechanges"):
+            since = datetime.fromisoformat(re.search(r"> datetime\(([^)]+)\)", query).group(1))
+            latest: dict[str, tuple[float, str]] = {}
+            for at, resource_id, change_type in self._changes.get(sub, []):
+                if at > since.timestamp():
+                    latest[resource_id] = (at, change_type)
+            return [
+                {
+                    "targetResourceId": resource_id,
+                    "changeType": change_type,
+                    "changeTime": datetime.fromtimestamp(at, UTC).isoformat(),
+                }
+                for resource_id, (at, change_type) in latest.items()
+            ]
+        if not query.startswith("resources"):
+            raise ValueError(f"Unsupported Resource Graph query: {query}")
+        inventory = self._inventory(sub)
+        match = re.search(r"in \((.*?)\) \|", query)
+        if match is not None:
+            ids = [_unquote(i) for i in re.findall(_QUOTED, match.group(1))]
+            resources = [inventory[i] for i in ids if i in inventory]
+        elif "order by id" in query:
+            resources = sorted(inventory.values(), key=lambda r: r.id.lower())
+        else:
+            resources = list(inventory.values())
+        for column, tag, value in _KQL_CONDITION.findall(query):
+            value = _unquote(value).lower()
+            if column.startswith("tostring"):
+                tag = _unquote(tag).lower()
+                resources = [
+                    r
+                    for r in resources
+                    if any(k.lower() == tag and v.lower() == value for k, v in r.tags.items())
+                ]
+            else:
+                attribute = _GRAPH_ATTRIBUTES.get(column, column)
+                resources = [r for r in resources if getattr(r, attribute).lower() == value]
+        rows = [_graph_row(sub, resource) for resource in resources]
+        project = re.search(r"\| project ([\w, ]+)", query)
+        if project is not None:
+            columns = [c.strip() for c in project.group(1).split(",")]
+            rows = [{c: row.get(c) for c in columns} for row in rows]
+        return rows
+
+    def client_factory(
+        self, service: str, _credential: Any, subscription_id: str, _transport: Any
+    ) -> Any:
+        """Drop-in for ClientPool's client_factory."""
+        return self.client(service, subscription_id)
+
+    def install(self, config: Config) -> Any:
+        """
+        Make the process-wide ClientPool for config serve this fake.
+
+        Returns:
+            The installed ClientPool.
+        """
+        import clients
+
+        pool = clients.ClientPool(
+            config,
+            credential_factory=lambda _config: FakeCredential(),
+            client_factory=self.client_factory,
+        )
+        with clients._pool_lock:
+            if clients._pool is not None:
+                clients._pool.close()
+            clients._pool = pool
+        return pool
+
+
+class FakeOperation:
+    """
+    A long-running operation of the fake service.
+
+    Implements the polling-method protocol lro.LroManager drives: status
+    requests are made by whoever calls update_status(), as with
+    lro.manual_polling().
+    """
+
+    def __init__(self, azure: FakeAzure, key: str, resource: SimpleNamespace) -> None:
+        self.azure = azure
+        self.key = key
+        self.token = f"{key}@{id(self):x}"
+        self.resource = resource
+        self._finish_at = time.monotonic() + azure.profile.lro_duration
+        self._status = "InProgress"
+
+    def finished(self) -> bool:
+        return self._status != "InProgress"
+
+    def status(self) -> str:
+        return self._status
+
+    def retry_after(self) -> Optional[float]:
+        return self.azure.profile.lro_retry_after
+
+    def update_status(self) -> None:
+        with self.azure._lock:
+            self.azure.poll_threads.add(threading.get_ident())
+        self.azure._call("storage_accounts.poll", self.key)
+        if self._status == "InProgress" and time.monotonic() >= self._finish_at:
+            self.azure._finish_create(self.resource)
+            self._status = "Succeeded"
+
+    def final_resource(self) -> SimpleNamespace:
+        return self.resource
+
+
+# Seconds between status requests without a Retry-After, scaled down from the
+# SDK's 30 like the fake's latencies
+POLL_INTERVAL = 0.05
+
+
+class FakePoller:
+    """Stand-in for the SDK's LROPoller."""
+
+    def __init__(self, operation: FakeOperation) -> None:
+        self._operation = operation
+
+    def polling_method(self) -> FakeOperation:
+        return self._operation
+
+    def continuation_token(self) -> str:
+        return self._operation.token
+
+    def done(self) -> bool:
+        return self._operation.finished()
+
+    def status(self) -> str:
+        return self._operation.status()
+
+    def result(self) -> SimpleNamespace:
+        """Poll on the calling thread until the operation is over."""
+        operation = self._operation
+        operation.update_status()
+        while not operation.finished():
+            retry_after = operation.retry_after()
+            time.sleep(POLL_INTERVAL if retry_after is None else retry_after)
+            operation.update_status()
+        return operation.final_resource()
+
+
+class FakeCredential:
+    """Hands out a token that never expires."""
+
+    def get_token(self, *_scopes: str, **_kwargs: Any) -> SimpleNamespace:
+        return SimpleNamespace(token="fake-token", expires_on=time.time() + 3600)
+
+
+def _unquote(value: str) -> str:
+    return value.replace("''", "'").replace("\\'", "'").replace("\\\\", "\\")
+
+
+def _odata_filter(resources: list[Any], expression: Optional[str]) -> list[Any]:
+    """Evaluate the $filter forms ARM accepts on resources.list."""
+    if not expression:
+        return resources
+    tag = re.fullmatch(rf"tagName eq {_QUOTED} and tagValue eq {_QUOTED}", expression)
+    if tag is not None:
+        name, value = (_unquote(v).lower() for v in tag.groups())
+        # ARM leaves tags out of responses filtered by tag
+        return [
+            SimpleNamespace(**{**vars(r), "tags": None})
+            for r in resources
+            if any(k.lower() == name and v.lower() == value for k, v in r.tags.items())
+        ]
+    match = re.fullmatch(rf"(resourceType|location) eq {_QUOTED}", expression)
+    if match is None:
+        raise HttpResponseError(400, f"Invalid $filter: {expression}")
+    attribute = "type" if match.group(1) == "resourceType" else "location"
+    value = _unquote(match.group(2)).lower()
+    return [r for r in resources if getattr(r, attribute).lower() == value]
+
+
+def _graph_row(sub: str, resource: SimpleNamespace) -> dict[str, Any]:
+    return {
+        "id": resource.id,
+        "name": resource.name,
+        "type": resource.type,
+        "location": resource.location,
+        "resourceGroup": resource.resource_group,
+        "subscriptionId": sub,
+        "tags": dict(resource.tags),
+    }
+
+
+def _resource(
+    sub: str, group: str, resource_type: str, name: str, location: str, env: str = "prod"
+) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=f"/subscriptions/{sub}/resourceGroups/{group}/providers/{resource_type}/{name}",
+        name=name,
+        type=resource_type,
+        location=location,
+        resource_group=group,
+        tags={"env": env},
+    )
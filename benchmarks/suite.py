@@ -0,0 +1,384 @@
+"""
+Benchmark suite with a stored baseline, for catching performance regressions.
+
+Runs the CLI's hot paths against the in-process FakeAzure backend:
+
+    cold_start     - a fresh `copilot help` process, best of N
+    classify       - intent classification throughput
+    listing        - `list resources` over a large paged subscription
+    fan_out        - `list resources` across many subscriptions at once,
+                     with latency and some throttling
+    cache          - the same listing as an inventory cache miss, then a hit
+    sync           - a full Resource Graph inventory load, then an incremental
+                     sync after 1% of the resources changed
+
+Results are written as JSON and compared against benchmarks/baseline.json:
+a metric more than --tolerance worse than its baseline fails the run (exit
+status 1). Baselines are machine-specific; regenerate one with
+--update-baseline on the machine that runs the comparison.
+
+Usage:
+    python -m benchmarks.suite [--quick] [--cases listing cache]
+        [--output results.json] [--baseline benchmarks/baseline.json]
+        [--tolerance 0.25] [--update-baseline]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from benchmarks.fake_azure import BackendProfile, FakeAzure
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_TOLERANCE = 0.25
+RESULTS_VERSION = 1
+# Timed runs per case; the fastest counts, which filters out scheduler noise
+REPEATS = 3
+
+SUBSCRIPTION = "00000000-0000-0000-0000-000000000000"
+COMMANDS = (
+    "list all resources in my subscription",
+    "create a storage account in westeurope",
+    "please show me the help page",
+    "this sentence mentions nothing the copilot understands at all",
+)
+
+Metrics = dict[str, dict[str, Any]]
+
+
+def metric(value: float, unit: str, better: str) -> dict[str, Any]:
+    return {"value": round(value, 3), "unit": unit, "better": better}
+
+
+class NullSink(io.TextIOBase):
+    """Discards CLI output."""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+@contextlib.contextmanager
+def cli_environment(directory: Path, subscriptions: list[str]) -> Iterator[Any]:
+    """
+    Point every store at a scratch directory and build a fresh Config.
+
+    Yields:
+        The Config the CLI will use.
+    """
+    from config import get_config
+
+    env = {
+        "AZURE_SUBSCRIPTION_ID": subscriptions[0],
+        "AZURE_SUBSCRIPTION_IDS": ",".join(subscriptions[1:]),
+        "FAN_OUT_WORKERS": "8",
+        "INVENTORY_CACHE_PATH": str(directory / "inventory.db"),
+        "INVENTORY_CACHE_MAX_MB": "1024",
+        "HISTORY_DB_PATH": str(directory / "history.db"),
+        "TRANSLATION_CACHE_PATH": str(directory / "translations.db"),
+        "TOKEN_LEDGER_PATH": str(directory / "token_ledger.db"),
+        "CHROMA_PERSIST_DIRECTORY": str(directory / "chroma"),
+    }
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    get_config.cache_clear()
+    try:
+        yield get_config()
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        get_config.cache_clear()
+
+
+def run_cli(*args: str) -> float:
+    """Run one CLI command in this process with output discarded; returns seconds."""
+    from cli import cli
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(NullSink()), contextlib.redirect_stderr(NullSink()):
+        cli.main(list(args), prog_name="copilot", standalone_mode=False)
+    return time.perf_counter() - started
+
+
+# ============================================================================
+# Cases
+# ============================================================================
+def bench_cold_start(quick: bool) -> Metrics:
+    from startup import cold_start_command
+
+    timings = []
+    for _ in range(3 if quick else 7):
+        started = time.perf_counter()
+        subprocess.run(
+            cold_start_command(["help"]), capture_output=True, check=True, cwd=PROJECT_ROOT
+        )
+        timings.append(time.perf_counter() - started)
+    return {"cold_start.help_ms": metric(min(timings) * 1000, "ms", "lower")}
+
+
+def bench_classify(quick: bool) -> Metrics:
+    import cli  # noqa: F401 - registers the intents
+    from intents import registry
+
+    iterations = 5_000 if quick else 20_000
+
+    def classify_all() -> float:
+        started = time.perf_counter()
+        for index in range(iterations):
+            registry.classify(COMMANDS[index % len(COMMANDS)])
+        return time.perf_counter() - started
+
+    elapsed = min(classify_all() for _ in range(REPEATS))
+    return {"classify.per_second": metric(iterations / elapsed, "ops/s", "higher")}
+
+
+def bench_listing(quick: bool) -> Metrics:
+    groups = 10 if quick else 50
+    azure = FakeAzure(
+        [SUBSCRIPTION],
+        groups=groups,
+        resources_per_group=1000,
+        profile=BackendProfile(latency=0.001, page_size=1000),
+    )
+    rows = groups * 1000
+    with (
+        tempfile.TemporaryDirectory() as directory,
+        cli_environment(Path(directory), [SUBSCRIPTION]) as config,
+    ):
+        azure.install(config)
+        elapsed = min(
+            run_cli("--no-cache", "--format", "ndjson", "list", "resources")
+            for _ in range(1 if quick else REPEATS)
+        )
+    return {
+        "listing.rows_per_second": metric(rows / elapsed, "rows/s", "higher"),
+        "listing.total_ms": metric(elapsed * 1000, "ms", "lower"),
+    }
+
+
+def bench_fan_out(quick: bool) -> Metrics:
+    subscriptions = [
+        f"{index:08d}-0000-0000-0000-000000000000" for index in range(4 if quick else 8)
+    ]
+    profile = BackendProfile(
+        latency=0.02, page_size=200, throttle_rate=0.05, retry_after=0.01, seed=1
+    )
+    azure = FakeAzure(subscriptions, groups=4, resources_per_group=500, profile=profile)
+    with (
+        tempfile.TemporaryDirectory() as directory,
+        cli_environment(Path(directory), subscriptions) as config,
+    ):
+        azure.install(config)
+        elapsed = min(
+            run_cli("--no-cache", "--format", "ndjson", "list", "resources") for _ in range(REPEATS)
+        )
+        calls = azure.calls["resources.list"] / REPEATS
+    # What the same pages would take one after another
+    serial = calls * profile.latency
+    return {
+        "fan_out.wall_ms": metric(elapsed * 1000, "ms", "lower"),
+        "fan_out.speedup": metric(serial / elapsed, "x", "higher"),
+    }
+
+
+def bench_cache(quick: bool) -> Metrics:
+    groups = 5 if quick else 20
+    azure = FakeAzure(
+        [SUBSCRIPTION],
+        groups=groups,
+        resources_per_group=1000,
+        profile=BackendProfile(latency=0.002, page_size=1000),
+    )
+    with (
+        tempfile.TemporaryDirectory() as directory,
+        cli_environment(Path(directory), [SUBSCRIPTION]) as config,
+    ):
+        azure.install(config)
+        miss = min(
+            run_cli("--refresh", "--format", "ndjson", "list", "resources") for _ in range(REPEATS)
+        )
+        calls = azure.calls["resources.list"]
+        hit = min(run_cli("--format", "ndjson", "list", "resources") for _ in range(REPEATS))
+        if azure.calls["resources.list"] != calls:
+            raise RuntimeError("The cache-hit runs called the API")
+    return {
+        "cache.miss_ms": metric(miss * 1000, "ms", "lower"),
+        "cache.hit_ms": metric(hit * 1000, "ms", "lower"),
+    }
+
+
+def bench_sync(quick: bool) -> Metrics:
+    from inventory_cache import InventoryCache
+    from inventory_sync import InventorySync, ResourceGraph
+
+    groups = 10 if quick else 50
+    rows = groups * 1000
+    azure = FakeAzure(
+        [SUBSCRIPTION],
+        groups=groups,
+        resources_per_group=1000,
+        profile=BackendProfile(latency=0.001, page_size=1000),
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        cache = InventoryCache(Path(directory) / "inventory.db", max_bytes=1 << 30)
+        syncer = InventorySync(cache, ResourceGraph(azure.client("resourcegraph", SUBSCRIPTION)))
+        full = delta = float("inf")
+        for _ in range(REPEATS):
+            started = time.perf_counter()
+            syncer.sync(SUBSCRIPTION, full=True)
+            full = min(full, time.perf_counter() - started)
+        for _ in range(REPEATS):
+            azure.mutate(
+                SUBSCRIPTION, created=rows // 400, updated=rows // 200, deleted=rows // 400
+            )
+            started = time.perf_counter()
+            syncer.sync(SUBSCRIPTION)
+            delta = min(delta, time.perf_counter() - started)
+        cache.close()
+    return {
+        "sync.full_ms": metric(full * 1000, "ms", "lower"),
+        "sync.delta_ms": metric(delta * 1000, "ms", "lower"),
+        "sync.speedup": metric(full / delta, "x", "higher"),
+    }
+
+
+CASES: dict[str, Callable[[bool], Metrics]] = {
+    "cold_start": bench_cold_start,
+    "classify": bench_classify,
+    "listing": bench_listing,
+    "fan_out": bench_fan_out,
+    "cache": bench_cache,
+    "sync": bench_sync,
+}
+
+
+def run_suite(cases: Optional[list[str]] = None, quick: bool = False) -> dict[str, Any]:
+    """
+    Run benchmark cases.
+
+    Returns:
+        Results document: {"version", "meta", "metrics": {name: metric}}.
+    """
+    metrics: Metrics = {}
+    for name in cases or list(CASES):
+        metrics.update(CASES[name](quick))
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "created": datetime.now(UTC).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quick": quick,
+        },
+        "metrics": metrics,
+    }
+
+
+# ============================================================================
+# Baseline Comparison
+# ============================================================================
+@dataclass(frozen=True)
+class Comparison:
+    """One metric against its baseline."""
+
+    name: str
+    baseline: Optional[float]
+    current: float
+    unit: str
+    # Relative change, positive when the value went up
+    change: Optional[float]
+    status: str  # "ok", "regressed", "improved" or "new"
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], tolerance: float = DEFAULT_TOLERANCE
+) -> list[Comparison]:
+    """
+    Compare current results with a baseline.
+
+    A metric regresses when it is more than ``tolerance`` (a fraction) worse
+    than its baseline in the direction its "better" field gives.
+    """
+    comparisons = []
+    for name, result in current["metrics"].items():
+        base = baseline.get("metrics", {}).get(name)
+        if base is None or not base["value"]:
+            comparisons.append(Comparison(name, None, result["value"], result["unit"], None, "new"))
+            continue
+        change = (result["value"] - base["value"]) / base["value"]
+        worse = change if result["better"] == "lower" else -change
+        if worse > tolerance:
+            status = "regressed"
+        elif worse < -tolerance:
+            status = "improved"
+        else:
+            status = "ok"
+        comparisons.append(
+            Comparison(name, base["value"], result["value"], result["unit"], change, status)
+        )
+    return comparisons
+
+
+def print_comparisons(comparisons: list[Comparison]) -> None:
+    print(f"{'metric':<26} {'baseline':>12} {'current':>12} {'unit':>6} {'change':>8}  status")
+    for c in comparisons:
+        baseline = "-" if c.baseline is None else f"{c.baseline:,.1f}"
+        change = "-" if c.change is None else f"{c.change:+.0%}"
+        print(
+            f"{c.name:<26} {baseline:>12} {c.current:>12,.1f} {c.unit:>6} {change:>8}  {c.status}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--cases", nargs="+", choices=list(CASES), help="Cases to run (default: all)"
+    )
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs, fewer repeats")
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="Save the results as the baseline"
+    )
+    args = parser.parse_args()
+
+    results = run_suite(args.cases, args.quick)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if baseline.get("meta", {}).get("quick", results["meta"]["quick"]) != results["meta"]["quick"]:
+        print("Note: the baseline and this run differ in --quick; sizes are not comparable")
+    comparisons = compare(baseline, results, args.tolerance)
+    print_comparisons(comparisons)
+    regressed = [c.name for c in comparisons if c.status == "regressed"]
+    if regressed:
+        print(f"Regressed by more than {args.tolerance:.0%}: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,799 @@
+import sys
+from dataclasses import dataclass, replace
+from functools import cache
+
 import click
-from rich.console import Console
 
-console = Console()
+from intents import registry
+
+# Every keyword group of an intent must be present before it is executed
+MIN_CONFIDENCE = 1.0
+
+# Intents that say nothing about what the user is working on stay out of history
+UNRECORDED_INTENTS = frozenset({"help"})
+
+@dataclass(frozen=True)
+class CommandContext:
+    """Options a command handler runs with."""
+
+    command: str = ""
+    refresh: bool = False
+    use_cache: bool = True
+    output_format: str = "table"
+    dry_run: bool = False
+    workers: int = 4
+    fail_fast: bool = True
+    no_wait: bool = False
+    # Long-running operations are handed back as futures instead of waited for (batch)
+    defer_operations: bool = False
+    # Resolved with this command's --config-profile/--set; None uses the global config
+    config: object = None
+
+    @property
+    def machine_output(self):
+        """Status messages go to stderr so stdout stays parseable."""
+        return self.output_format != "table"
+
+    def get_config(self):
+        """The command's Config. Never shared state, so concurrent commands keep their own flags."""
+        if self.config is not None:
+            return self.config
+        from config import get_config
+
+        return get_config()
+
+@cache
+def get_console(stderr=False):
+    """Rich is only imported once a command actually renders rich output."""
+    from rich.console import Console
+
+    return Console(stderr=stderr)
+
+def complete_command(ctx, _param, incomplete):
+    """Shell completion for COMMAND: intent phrases, builtins and cached resource names."""
+    import contextlib
+    import io
+
+    from click.shell_completion import CompletionItem
+
+    from completion import KIND_COMMAND, CompletionIndex, get_completion_index
+    from config import get_config
+
+    phrases = [*(intent.description for intent in registry.intents if intent.description), *BUILTIN_PHRASES]
+    try:
+        # get_config() prints setup help when it fails; the shell would take it for completions
+        with contextlib.redirect_stdout(io.StringIO()):
+            config = get_config()
+        index = get_completion_index(config, phrases)
+    except ValueError:
+        # Not configured yet: commands still complete, resource names do not
+        index = CompletionIndex(phrases)
+    words = ctx.params.get("command") or ()
+    return [
+        CompletionItem(c.value, help=None if c.kind == KIND_COMMAND else c.kind.replace("_", " "))
+        for c in index.complete(words, incomplete)
+    ]
+
+def parse_settings(_ctx, _param, values):
+    """--set KEY=VALUE options as a dict."""
+    settings = {}
+    for value in values:
+        key, sep, setting = value.partition("=")
+        if not sep or not key.strip():
+            raise click.BadParameter(f"expected KEY=VALUE, got {value!r}")
+        settings[key.strip()] = setting
+    return settings
 
 @click.command()
-@click.argument('command')
-def cli(command):
-    """Process natural language commands"""
-    console.print(f"You said: {command}")
+@click.argument('command', nargs=-1, shell_complete=complete_command)
+@click.option('--refresh', is_flag=True, help='Refetch cached data from Azure.')
+@click.option('--no-cache', is_flag=True, help='Neither read nor write the local cache.')
+@click.option('--format', 'output_format', type=click.Choice(['table', 'ndjson', 'csv']),
+              default='table', show_default=True, help='Output format for listings.')
+@click.option('--dry-run', is_flag=True, help='Show what would change without changing anything.')
+@click.option('--workers', type=click.IntRange(min=1), default=4, show_default=True,
+              help='Batch steps run at once.')
+@click.option('--continue-on-error', is_flag=True, help='Keep running independent batch steps after a failure.')
+@click.option('--no-wait', is_flag=True,
+              help="Start long-running operations without waiting; check on them with 'copilot status'.")
+@click.option('--config-profile', metavar='NAME', help='Apply this profile from copilot.toml.')
+@click.option('--set', 'settings', metavar='KEY=VALUE', multiple=True, callback=parse_settings,
+              help='Override a setting for this command, e.g. --set default_location=westus.')
+@click.option('--startup-profile', is_flag=True, help='Report per-module import time of a cold start.')
+@click.option('--profile', is_flag=True, help='Print how long each stage of the command took.')
+@click.option('--profile-output', type=click.Path(dir_okay=False),
+              help='Also write the trace to this file (implies --profile).')
+@click.option('--profile-format', type=click.Choice(['chrome', 'otel']), default='chrome', show_default=True,
+              help='Trace file format: Chrome trace events or OpenTelemetry OTLP/JSON.')
+def cli(command, refresh, no_cache, output_format, dry_run, workers, continue_on_error, no_wait,
+        config_profile, settings, startup_profile, profile, profile_output, profile_format):
+    """Process natural language commands
+
+    Run `copilot shell` for an interactive session, `copilot batch FILE` to
+    run a file of commands, or `copilot daemon start` to keep a warm server
+    for scripted use.
+    """
+    command = " ".join(command)
+    if startup_profile:
+        import startup
+
+        startup.print_startup_profile(startup.profile_startup((command or "help",)))
+        return
+    if not command.strip():
+        raise click.UsageError("Missing argument 'COMMAND'.")
+    resolved = None
+    if config_profile or settings:
+        import config
+
+        try:
+            resolved = config.command_config(config_profile, settings)
+        except ValueError as e:
+            raise click.ClickException(str(e)) from e
+    ctx = CommandContext(
+        command, refresh, not no_cache, output_format, dry_run, workers, not continue_on_error, no_wait,
+        config=resolved
+    )
+    if not (profile or profile_output):
+        dispatch(command, ctx)
+        return
+
+    import tracing
+
+    tracer = tracing.start_tracing()
+    try:
+        with tracing.span("command"):
+            dispatch(command, ctx)
+    finally:
+        tracing.stop_tracing()
+        click.echo(tracing.format_profile(tracer), err=True)
+        if profile_output:
+            tracing.write_trace(tracer, profile_output, profile_format)
+            click.echo(f"Trace written to {profile_output}", err=True)
+
+def dispatch(command, ctx):
+    """Run a builtin, or else a natural language command."""
+    from config import command_scope
+
+    # Clients and caches replaced by a config reload stay open until this returns
+    with command_scope():
+        words = command.split()
+        if not words:
+            return
+        builtin = BUILTINS.get(words[0].lower())
+        if builtin is not None and builtin(words[1:], ctx):
+            return
+        run_command(command, ctx)
+
+def run_command(command, ctx):
+    """Classify a natural language command and run its handler."""
+    click.echo(f"You said: {command}", err=ctx.machine_output)
+
+    from tracing import span
 
     # Parse and handle the command
-    if "list" in command.lower() and "resource" in command.lower():
-        list_resources()
-    elif "help" in command.lower():
-        show_help()
+    with span("intent.classify"):
+        match = registry.classify(command, min_confidence=MIN_CONFIDENCE)
+    if match is None:
+        translation = translate_command(command, ctx)
+        if translation is None:
+            click.echo("Command not recognized", err=ctx.machine_output)
+        else:
+            record_history(command, translation.intent, ctx)
+        return
+    if match.intent.name in UNRECORDED_INTENTS:
+        match.intent.handler(ctx)
+        return
+    try:
+        match.intent.handler(ctx)
+    except (click.ClickException, ValueError):
+        record_history(command, match.intent.name, ctx, succeeded=False)
+        raise
+    record_history(command, match.intent.name, ctx)
+
+def record_history(command, intent, ctx, succeeded=True):
+    """Queue a command for the history store; never blocks or fails the command."""
+
+    try:
+        config = ctx.get_config()
+    except ValueError:
+        return
+    from batch import PRODUCES
+    from entities import extract_entities
+    from history import HistoryEntry, get_history_store
+
+    entities = extract_entities(command)
+    # "create rg app-rg" names the group it creates rather than one it runs in
+    resource_group = entities.resource_group
+    if PRODUCES.get(intent) == "resource_group" and succeeded:
+        resource_group = entities.name or resource_group
+    get_history_store(config).record(
+        HistoryEntry(command, intent, resource_group, entities.location, succeeded)
+    )
+
+def translate_command(command, ctx):
+    """Ask Azure OpenAI to translate a command no intent matched.
+
+    Returns the Translation, or None when Azure OpenAI is not configured.
+    """
+
+    try:
+        config = ctx.get_config()
+    except ValueError:
+        return None
+    if not config.is_openai_configured():
+        return None
+    import docs_index
+    import translator
+    from history import get_history_store
+    from translation_cache import get_translation_cache
+
+    console = get_console(stderr=True)
+    # Earlier commands of this session, so "now delete it" knows what "it" is
+    turns = get_history_store(config).session_commands()
+
+    def translate(query):
+        docs = docs_index.retrieve(config, query)
+        return translator.translate_live(
+            translator.get_translator(config), query, console, context=turns, docs=docs
+        ).to_dict()
+
+    try:
+        if ctx.use_cache:
+            # Anything the translation depends on besides the words themselves
+            context = {
+                "subscription": config.subscription_id,
+                "resource_group": config.default_resource_group,
+                "model": config.openai_deployment,
+            }
+            if turns:
+                context["turns"] = turns
+            data, _hit = get_translation_cache(config).get_or_translate(command, context, translate)
+        else:
+            data = translate(command)
+        translation = translator.Translation.from_dict(data)
+    except KeyboardInterrupt:
+        click.echo("Cancelled", err=True)
+        raise click.exceptions.Exit(130) from None
+    except translator.TranslationError as e:
+        raise click.ClickException(str(e)) from e
+
+    if ctx.machine_output:
+        import json
+
+        click.echo(json.dumps(translation.to_dict()))
+    elif translation.needs_clarification:
+        click.echo(translation.explanation)
+    else:
+        click.echo(f"Proposed command: {translation.command}")
+        if translation.explanation:
+            click.echo(translation.explanation)
+    return translation
+
+# ============================================================================
+# Built-in Commands
+# ============================================================================
+# Keyed by first word; a builtin returns False to let the text be treated as
+# a natural language command instead.
+
+def run_shell(args, _ctx):
+    if args:
+        return False
+    import config
+    import cost
+    import shell
+
+    cost.enable_background_refresh()
+    watcher = config.ConfigWatcher(
+        on_reload=lambda _config: click.echo("Configuration reloaded", err=True),
+        on_error=lambda e: click.echo(f"Configuration not reloaded: {e}", err=True),
+    )
+
+    def execute(argv):
+        # Checked between commands rather than from a thread, so notices never cut into a prompt
+        watcher.check()
+        return cli.main(argv, prog_name="copilot", standalone_mode=False)
+
+    shell.run_shell(execute)
+    return True
+
+def run_daemon(args, _ctx):
+    if len(args) != 1 or args[0].lower() not in ("start", "stop", "status"):
+        return False
+    import copilot_daemon
+
+    action = args[0].lower()
+    if action == "start":
+        try:
+            status = copilot_daemon.start()
+        except RuntimeError as e:
+            raise click.ClickException(str(e)) from e
+        click.echo(f"Daemon running (pid {status['pid']}) on {copilot_daemon.SOCKET_PATH}")
+    elif action == "stop":
+        click.echo("Daemon stopped" if copilot_daemon.stop() else "Daemon is not running")
     else:
-        console.print("Command not recognized")
+        status = copilot_daemon.status()
+        if status is None:
+            click.echo("Daemon is not running")
+        else:
+            click.echo(
+                f"Daemon running (pid {status['pid']}), up {status['uptime']:.0f}s, "
+                f"{status['requests']} requests served"
+            )
+    return True
+
+def run_batch(args, ctx):
+    if len(args) != 1:
+        return False
+    from pathlib import Path
+
+    import batch
+
+    try:
+        steps = batch.load_plan(Path(args[0]))
+    except batch.BatchError as e:
+        raise click.ClickException(str(e)) from e
+
+    console = get_console()
+    batch.print_plan(steps, console)
+    if ctx.dry_run or _default_dry_run(ctx):
+        return run_dry_run(steps, ctx)
+
+    def execute(step):
+        # Creates hand back their operation, so waiting on it does not hold a worker
+        return step.intent.handler(replace(ctx, command=step.command, defer_operations=True))
+
+    def on_result(result):
+        from rich.markup import escape
+
+        style = batch.STATUS_STYLES[result.status]
+        console.print(escape(f"[{result.step.step_id}] {result.status} in {result.elapsed:.2f} s"), style=style)
+
+    report = batch.run_plan(
+        steps, execute, max_workers=ctx.workers, fail_fast=ctx.fail_fast, on_result=on_result
+    )
+    batch.print_report(report, console)
+    if not report.ok:
+        raise click.exceptions.Exit(1)
+    return True
+
+def _default_dry_run(ctx):
+
+    try:
+        return ctx.get_config().default_dry_run
+    except ValueError:
+        return False
 
-def list_resources():
+def run_dry_run(steps, ctx):
+    """Validate every step of a batch with ARM what-if and print the diff of what would change."""
+    import azure_commands
+    import what_if
+
+    try:
+        config = ctx.get_config()
+        planner = what_if.get_dry_run_planner(config, use_cache=ctx.use_cache)
+        plan = planner.plan(steps, config)
+    except (ValueError, azure_commands.AzureCommandError) as e:
+        raise click.ClickException(str(e)) from e
+    styles = {"+": "green", "-": "red", "@": "cyan", "#": None}
+    for line in plan.diff().splitlines():
+        fg = None if line.startswith(("+++", "---")) else styles.get(line[:1])
+        click.secho(line, fg=fg, bold=line.startswith("#"))
+    click.echo(plan.summary())
+    # Steps that plan no ARM operation (reads, unsupported intents) have nothing to price
+    created = [
+        change.operation.resource for change in plan.changes
+        if change.operation is not None and change.change_type == what_if.CHANGE_CREATE
+        and change.operation.resource["type"] == what_if.STORAGE_ACCOUNT_TYPE
+    ]
+    if created:
+        import cost
+
+        items = [cost.CostItem(cost.SERVICE_STORAGE, r["sku"]["name"], r["location"]) for r in created]
+        click.echo(cost.get_cost_estimator(config).estimate_batch(items).summary())
+    if not plan.ok:
+        raise click.exceptions.Exit(1)
+    return True
+
+def run_usage(args, ctx):
+    if len(args) > 1 or (args and not args[0].isdigit()):
+        return False
+    import token_ledger
+
+    days = int(args[0]) if args else 30
+    config = ctx.get_config()
+    ledger = token_ledger.get_token_ledger(config)
+    if ledger is None:
+        click.echo("Token usage tracking is off (TRACK_TOKEN_USAGE=false)")
+        return True
+    token_ledger.print_usage(ledger.summary(since_seconds=days * 24 * 60 * 60), days)
+    return True
+
+def run_docs(args, ctx):
+    action = args[0].lower() if args else ""
+    if not (action == "ingest" and len(args) <= 2 or action == "search" and len(args) >= 2):
+        return False
+    from pathlib import Path
+
+    import docs_index
+    from embeddings import EmbeddingError
+
+    config = ctx.get_config()
+    index = docs_index.get_docs_index(config)
+    if action == "ingest":
+        root = Path(args[1]) if len(args) == 2 else config.docs_path
+        try:
+            report = index.ingest(root)
+        except (FileNotFoundError, EmbeddingError) as e:
+            raise click.ClickException(str(e)) from e
+        click.echo(report.summary())
+        return True
+
+    results = index.search(" ".join(args[1:]))
+    if not results:
+        click.echo("No matching documentation")
+    for result in results:
+        click.echo(f"{result.score:.3f}  {result.chunk.path}  {result.chunk.heading}")
+    return True
+
+def run_history(args, ctx):
+    if len(args) > 1 or (args and not args[0].isdigit()):
+        return False
+    from history import get_history_store
+
+    history = get_history_store(ctx.get_config())
+    history.flush()
+    for entry in reversed(history.recent(int(args[0]) if args else 20)):
+        status = "" if entry.succeeded else "  (failed)"
+        click.echo(f"{entry.command}{status}")
+    suggestions = history.next_commands(after=next((e.intent for e in history.recent(1)), None))
+    if suggestions:
+        click.echo("Often next: " + ", ".join(s.example for s in suggestions))
+    return True
+
+def run_status(args, ctx):
+    import re
+
+    if len(args) > 1 or (args and not re.fullmatch(r"[0-9a-f]{4,32}", args[0].lower())):
+        return False
+    import azure_commands
+    import lro
+
+    config = ctx.get_config()
+    store = lro.get_operation_store(config)
+    if not args:
+        records = store.recent()
+        if not records:
+            click.echo("No operations started with --no-wait")
+        for record in records:
+            click.echo(f"{record.op_id}  {record.status:<10}  {record.description}")
+        return True
+    record = store.get(args[0].lower())
+    if record is None:
+        raise click.ClickException(f"No operation {args[0]}")
+    status = record.status
+    if not lro.is_terminal(status):
+        try:
+            status, _result = lro.check(lro.resume(config, record))
+        except (ValueError, azure_commands.AzureCommandError) as e:
+            raise click.ClickException(str(e)) from e
+        store.set_status(record.op_id, status)
+    click.echo(f"{record.op_id}  {status}  {record.description}")
+    if status.lower() in ("failed", "canceled"):
+        raise click.exceptions.Exit(1)
+    return True
+
+def run_sync(args, ctx):
+    if len(args) > 1 or (args and args[0].lower() != "full"):
+        return False
+    import azure_commands
+    from inventory_cache import get_inventory_cache
+    from inventory_sync import get_inventory_sync
+
+    config = ctx.get_config()
+    try:
+        syncer = get_inventory_sync(config, get_inventory_cache(config))
+    except azure_commands.AzureCommandError as e:
+        raise click.ClickException(str(e)) from e
+    full = bool(args)
+    scopes = [azure_commands.Scope(sub) for sub in config.get_subscription_ids()]
+    failed = False
+    for result in azure_commands.fan_out(
+        scopes, lambda scope: syncer.sync(scope.subscription_id, full=full), max_workers=config.fan_out_workers
+    ):
+        if result.ok:
+            click.echo(result.value.summary())
+        else:
+            click.echo(f"{result.scope.subscription_id}: {result.error}", err=True)
+            failed = True
+    if failed:
+        raise click.exceptions.Exit(1)
+    return True
+
+BUILTINS = {
+    "shell": run_shell, "daemon": run_daemon, "batch": run_batch, "usage": run_usage, "docs": run_docs,
+    "history": run_history, "sync": run_sync, "status": run_status,
+}
+
+# Builtin invocations offered by shell completion
+BUILTIN_PHRASES = (
+    "shell", "daemon start", "daemon stop", "daemon status", "batch", "usage", "docs ingest", "docs search",
+    "history", "sync", "sync full", "status",
+)
+
+# Words that make "list"/"show" a resource listing
+LISTED_KINDS = ("resource", "vm", "virtual machine", "storage account", "vnet", "virtual network", "web app",
+                "key vault")
+
+@dataclass
+class ResourceSource:
+    """Where the rows of a listing come from, planned once per command."""
+
+    query: object
+    plan: object
+    rows: object
+    cache_hits: list
+
+    @property
+    def from_cache(self):
+        return bool(self.cache_hits) and all(self.cache_hits)
+
+def resource_source(ctx, console, columns):
+    """Plan a listing command and return a ResourceSource, or None if not configured.
+
+    Fresh cached listings are filtered locally; a miss is fetched from ARM or,
+    with INVENTORY_SYNC, Resource Graph, with the query's filters pushed down.
+    """
+    import azure_commands
+    import query_planner
+    from entities import extract_entities
+    from inventory_cache import get_inventory_cache, scope_key
+
+    try:
+        config = ctx.get_config()
+        inventory = get_inventory_cache(config) if ctx.use_cache else None
+    except ValueError as e:
+        console.print(f"Error: {e}", style="red", markup=False)
+        return None
+    graph = syncer = None
+    if config.inventory_sync:
+        import inventory_sync
+
+        try:
+            graph = inventory_sync.get_resource_graph(config)
+        except azure_commands.AzureCommandError as e:
+            console.print(f"Resource Graph unavailable, listing through ARM: {e}", style="yellow", markup=False)
+        else:
+            syncer = inventory_sync.InventorySync(inventory, graph) if inventory is not None else None
+
+    query = query_planner.ResourceQuery.from_entities(
+        extract_entities(ctx.command), config.default_resource_group, columns
+    )
+    local = query_planner.plan_query(query, "local")
+    remote = query_planner.plan_query(query, "arm" if graph is None else "graph")
+    cache_hits = []
+
+    def fetch(scope):
+        client = azure_commands.get_resource_client(config, scope.subscription_id)
+        return azure_commands.iter_resources(client, scope.resource_group)
+
+    def iter_scope(scope):
+        if inventory is not None:
+            if syncer is not None and scope.resource_group is None:
+                # Stale or --refresh: pull only what changed since the last sync
+                cached = None if ctx.refresh else inventory.iter(scope.subscription_id)
+                cache_hits.append(cached is not None)
+                if cached is None:
+                    syncer.sync(scope.subscription_id)
+                    cached = inventory.iter_scope(scope_key(scope.subscription_id))
+                return local.apply(cached)
+            cached = None if ctx.refresh else inventory.iter(scope.subscription_id, scope.resource_group)
+            if cached is not None:
+                cache_hits.append(True)
+                return local.apply(cached)
+            cache_hits.append(False)
+            if not query.predicates:
+                # A whole listing: keep a copy while passing it through
+                return local.apply(inventory.put_stream(scope.subscription_id, scope.resource_group, fetch(scope)))
+        client = graph if graph is not None else azure_commands.get_resource_client(config, scope.subscription_id)
+        return query_planner.run_plan(remote, scope.subscription_id, client)
+
+    def rows():
+        for event in azure_commands.fan_out_stream(
+            scopes, iter_scope, max_workers=config.fan_out_workers
+        ):
+            if event.error is not None:
+                console.print(f"Error: {event.error}", style="red", markup=False)
+            else:
+                yield event.item
+
+    scopes = [azure_commands.Scope(sub, query.resource_group) for sub in config.get_subscription_ids()]
+    return ResourceSource(query, remote, rows(), cache_hits)
+
+# Priorities: a full listing or count match beats estimate_cost, which beats creates
+@registry.register("list_resources", [("list", "show"), LISTED_KINDS], priority=2, description="list resources")
+def list_resources(ctx=CommandContext()):
+    console = get_console(stderr=ctx.machine_output)
     console.print("Listing your resources...", style="blue")
-    # Your resource listing logic here
 
-def show_help():
-    console.print("Available commands: list resources, help")
+    import query_planner
+    import render
+    from tracing import span
+
+    # ndjson carries whole rows; table and csv only show render.COLUMNS
+    columns = query_planner.COLUMNS if ctx.output_format == "ndjson" else tuple(c for c, _, _ in render.COLUMNS)
+    source = resource_source(ctx, console, columns)
+    if source is None:
+        return
+    with span("query.plan", plan=source.plan.explain()):
+        count = render.render_resources(source.rows, ctx.output_format, sys.stdout, get_console())
+    console.print(f"{count} resources" + (" (cached)" if source.from_cache else ""), style="dim")
+
+@registry.register("count_resources", [("how many", "count"), LISTED_KINDS], priority=3,
+                   description="count resources")
+def count_resources(ctx=CommandContext()):
+    console = get_console(stderr=ctx.machine_output)
+
+    import render
+    from entities import extract_entities
+    from resource_table import CODED_COLUMNS, ResourceTable
+    from tracing import span
+
+    group_by = extract_entities(ctx.command).group_by
+    # Counting needs only the grouping columns, so the server can leave out the rest
+    source = resource_source(ctx, console, CODED_COLUMNS)
+    if source is None:
+        return
+    with span("query.plan", plan=source.plan.explain()):
+        table = ResourceTable.from_rows(source.rows)
+    with span("aggregate", rows=len(table), group_by=group_by or "") as stage:
+        counts = table.count_by(group_by) if group_by else {(): len(table)}
+        stage.set(groups=len(counts))
+    render.render_counts(counts, (group_by,) if group_by else (), ctx.output_format, sys.stdout, get_console())
+    console.print(f"{len(table)} resources" + (" (cached)" if source.from_cache else ""), style="dim")
+
+@registry.register("create_resource_group", [("create", "make"), ("resource group", "rg")],
+                   description="create resource group")
+def create_resource_group(ctx=CommandContext()):
+    import azure_commands
+
+    try:
+        config = ctx.get_config()
+        entities = command_entities(ctx.command, config)
+        if not entities.name:
+            raise click.UsageError("Which resource group? e.g. 'create resource group my-rg in eastus'")
+        name = azure_commands.validate_resource_group_name(entities.name)
+        location = entities.location or config.default_location
+        if ctx.dry_run or config.default_dry_run:
+            click.echo(f"Would create resource group {name} in {location}")
+            click.echo(f"  az group create --name {name} --location {location}")
+            return
+        client = azure_commands.get_resource_client(config)
+        azure_commands.create_resource_group(client, name, location)
+    except (ValueError, azure_commands.AzureCommandError) as e:
+        raise click.ClickException(str(e)) from e
+    click.echo(f"Created resource group {name} in {location}")
+
+@registry.register("create_storage_account", [("create", "make"), ("storage",)], priority=1,
+                   description="create storage account")
+def create_storage_account(ctx=CommandContext()):
+    import azure_commands
+
+    try:
+        config = ctx.get_config()
+        entities = command_entities(ctx.command, config)
+        resource_group = entities.resource_group or infer_resource_group(config, ctx)
+        if not resource_group:
+            raise click.UsageError("Which resource group? e.g. 'create storage account in my-rg'")
+        name = entities.name or azure_commands.default_storage_account_name(
+            resource_group, config.subscription_id
+        )
+        azure_commands.validate_storage_account_name(name)
+        location = entities.location or config.default_location
+        sku = entities.sku or azure_commands.DEFAULT_STORAGE_SKU
+        estimate = storage_cost(config, sku, location)
+        if ctx.dry_run or config.default_dry_run:
+            click.echo(f"Would create storage account {name} in {resource_group} ({location}, {sku})")
+            click.echo(
+                f"  az storage account create --name {name} --resource-group {resource_group} "
+                f"--location {location} --sku {sku}"
+            )
+            if estimate is not None:
+                click.echo(f"  Estimated cost: {estimate.describe()}")
+            return
+        if estimate is not None and estimate.monthly > config.cost_warning_threshold:
+            click.secho(
+                f"Warning: {estimate.describe()}, above COST_WARNING_THRESHOLD (${config.cost_warning_threshold:,.2f})",
+                fg="yellow", err=True,
+            )
+        import lro
+
+        client = azure_commands.get_storage_client(config)
+        poller = azure_commands.begin_create_storage_account(
+            client, resource_group, name, location, sku, polling=lro.manual_polling()
+        )
+    except (ValueError, azure_commands.AzureCommandError) as e:
+        raise click.ClickException(str(e)) from e
+    return finish_operation(
+        ctx, config, "create_storage_account", f"Create storage account {name}", poller,
+        {"resource_group": resource_group, "name": name}, f"Created storage account {name} in {resource_group}",
+    )
+
+def storage_cost(config, sku, location):
+    """Monthly estimate for a new storage account, or None if its SKU has no known price."""
+    import cost
+
+    estimate = cost.get_cost_estimator(config).estimate(cost.CostItem(cost.SERVICE_STORAGE, sku, location))
+    return None if estimate.price is None else estimate
+
+# Whole words, so tags and names like costcenter=42 or cost-mgmt-rg are not questions
+@registry.register("estimate_cost", [("cost", "costs", "price", "prices", "pricing", "how much")], priority=2,
+                   description="estimate cost", whole_words=True)
+def estimate_cost(ctx=CommandContext()):
+    import azure_commands
+    import cost
+    from entities import STORAGE_SKUS, extract_entities
+
+    entities = extract_entities(ctx.command)
+    sku = entities.sku
+    if sku is None and "storage" in ctx.command.lower():
+        sku = azure_commands.DEFAULT_STORAGE_SKU
+    if sku is None:
+        raise click.UsageError("Which size or SKU? e.g. 'how much does a D4s_v5 cost in westeurope'")
+    try:
+        config = ctx.get_config()
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+    service = cost.SERVICE_STORAGE if sku in STORAGE_SKUS else cost.SERVICE_VM
+    item = cost.CostItem(service, sku, entities.location or config.default_location)
+    click.echo(cost.get_cost_estimator(config).estimate(item).describe())
+
+def command_entities(command, config):
+    """Entities of a command, asking the ENTITY_MODEL pipeline for a name the rules miss."""
+    from entities import extract_entities, get_entity_model
+
+    return extract_entities(command, get_entity_model(config))
+
+def finish_operation(ctx, config, kind, description, poller, arguments, done_message):
+    """Wait for a long-running operation, or leave it running for --no-wait and batch.
+
+    Returns:
+        The operation's future when ctx.defer_operations is set, else None.
+    """
+    import lro
+
+    if ctx.no_wait:
+        record = lro.OperationRecord(
+            lro.new_operation_id(), kind, description, config.subscription_id, arguments,
+            poller.continuation_token(),
+        )
+        lro.get_operation_store(config).add(record)
+        click.echo(f"Started: {description} (operation {record.op_id})")
+        click.echo(f"  Check on it with: copilot status {record.op_id}")
+        return None
+    manager = lro.get_lro_manager()
+    operation = manager.track(description, poller)
+    if ctx.defer_operations:
+        return operation.future
+    manager.wait([operation], None if ctx.machine_output else get_console())
+    if operation.error is not None:
+        raise click.ClickException(str(operation.error))
+    click.echo(done_message)
+    return None
+
+def infer_resource_group(config, ctx):
+    """The resource group mentioned most recently, else the configured default."""
+    from history import DEFAULT_CONTEXT_MAX_AGE, get_history_store
+
+    recent = get_history_store(config).last_resource_group(max_age=DEFAULT_CONTEXT_MAX_AGE)
+    if recent:
+        click.echo(f"Using resource group {recent} from your recent commands", err=ctx.machine_output)
+        return recent
+    return config.default_resource_group
+
+@registry.register("help", [("help",)], description="help")
+def show_help(_ctx=None):
+    commands = ", ".join(intent.description for intent in registry.intents if intent.description)
+    click.echo(f"Available commands: {commands}")
 
 if __name__ == '__main__':
     cli()
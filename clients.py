@@ -0,0 +1,339 @@
+"""
+Shared Azure credentials and management clients.
+
+Building a credential or an azure-mgmt-* client is not free: every credential
+has to fetch an AAD token and every client sets up its own HTTP session. The
+ClientPool keeps one credential per authentication method and one client per
+(service, subscription), all sharing a single pooled HTTP session, and hands
+out cached access tokens until shortly before they expire.
+
+Service principal tokens are also persisted to the OS-encrypted MSAL token
+cache, so consecutive CLI runs skip the token round trip entirely. Where the
+OS cannot encrypt it (headless Linux without a keyring), tokens are cached
+in memory only.
+"""
+
+import importlib
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from config import Config, retire
+from tracing import span
+
+# service name -> (module, client class)
+SERVICES = {
+    "resource": ("azure.mgmt.resource", "ResourceManagementClient"),
+    "compute": ("azure.mgmt.compute", "ComputeManagementClient"),
+    "storage": ("azure.mgmt.storage", "StorageManagementClient"),
+    "network": ("azure.mgmt.network", "NetworkManagementClient"),
+    "resourcegraph": ("azure.mgmt.resourcegraph", "ResourceGraphClient"),
+}
+
+# Services whose clients are not bound to a subscription (it goes in each request)
+TENANT_SERVICES = frozenset({"resourcegraph"})
+
+# Name of the persistent token cache shared by every copilot process
+TOKEN_CACHE_NAME = "azure-copilot"
+
+# Tokens are refreshed this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 300
+
+
+class ClientError(Exception):
+    """Raised when a credential or client cannot be created."""
+
+
+@dataclass
+class PoolStats:
+    """How often the pool built something versus reused what it had."""
+
+    credentials_built: int = 0
+    clients_built: int = 0
+    clients_reused: int = 0
+    tokens_acquired: int = 0
+    tokens_reused: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"clients built={self.clients_built} reused={self.clients_reused}, "
+            f"tokens acquired={self.tokens_acquired} reused={self.tokens_reused}"
+        )
+
+
+class CachingCredential:
+    """
+    TokenCredential wrapper that reuses tokens until they are about to expire.
+
+    The Azure SDK asks for a token on every request pipeline it builds; this
+    keeps those requests from reaching AAD (or spawning `az`) more than once
+    per token lifetime.
+    """
+
+    def __init__(
+        self,
+        credential: Any,
+        stats: PoolStats,
+        refresh_margin: float = TOKEN_REFRESH_MARGIN,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._credential = credential
+        self._stats = stats
+        self._refresh_margin = refresh_margin
+        self._clock = clock
+        self._tokens: dict[tuple[Any, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes: str, **kwargs: Any) -> Any:
+        """Return a cached access token for the scopes, acquiring one if needed."""
+        key = (scopes, kwargs.get("tenant_id"), kwargs.get("claims"))
+        with self._lock:
+            token = self._tokens.get(key)
+            if token is not None and token.expires_on - self._refresh_margin > self._clock():
+                self._stats.tokens_reused += 1
+                return token
+
+            with span("auth.get_token"):
+                token = self._credential.get_token(*scopes, **kwargs)
+            self._stats.tokens_acquired += 1
+            self._tokens[key] = token
+            return token
+
+    def close(self) -> None:
+        close = getattr(self._credential, "close", None)
+        if close is not None:
+            close()
+
+    def __enter__(self) -> "CachingCredential":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        # Clients close their credential on exit; the pool owns its lifetime instead
+        pass
+
+
+class PersistentCacheCredential:
+    """
+    Credential that persists its tokens if the OS can encrypt them.
+
+    azure-identity opens the persistent cache on the first token request and
+    raises ValueError there when no encrypted storage is available. The
+    credential is then rebuilt with an in-memory cache, so the tokens are
+    never written to disk unencrypted.
+    """
+
+    def __init__(self, build: Callable[[bool], Any]) -> None:
+        """
+        Args:
+            build: Builds the raw credential, with a persistent cache if passed True.
+        """
+        self._build = build
+        self._credential = build(True)
+        self.persistent = True
+
+    def get_token(self, *scopes: str, **kwargs: Any) -> Any:
+        """Return a token, dropping the persistent cache if it cannot be opened."""
+        try:
+            return self._credential.get_token(*scopes, **kwargs)
+        except ValueError:
+            if not self.persistent:
+                raise
+        self.close()
+        self._credential = self._build(False)
+        self.persistent = False
+        return self._credential.get_token(*scopes, **kwargs)
+
+    def close(self) -> None:
+        close = getattr(self._credential, "close", None)
+        if close is not None:
+            close()
+
+
+def _build_credential(config: Config) -> Any:
+    """
+    Create the Azure credential for the configured authentication method.
+
+    Only service principal tokens are persisted. DefaultAzureCredential is
+    deliberately built without a persistent cache: the Azure CLI and managed
+    identity it delegates to keep their own.
+    """
+    try:
+        from azure.identity import (
+            ClientSecretCredential,
+            DefaultAzureCredential,
+            TokenCachePersistenceOptions,
+        )
+    except ImportError as e:
+        raise ClientError(f"Azure SDK is not installed ({e.name}). Run: pip install -e .") from e
+
+    if config.get_authentication_method() == "service_principal":
+
+        def build(persistent: bool) -> Any:
+            options = TokenCachePersistenceOptions(name=TOKEN_CACHE_NAME) if persistent else None
+            return ClientSecretCredential(
+                config.tenant_id,
+                config.client_id,
+                config.client_secret,
+                cache_persistence_options=options,
+            )
+
+        return PersistentCacheCredential(build)
+    return DefaultAzureCredential()
+
+
+def _build_client(service: str, credential: Any, subscription_id: str, transport: Any) -> Any:
+    """Import and construct the management client for a service."""
+    module_name, class_name = SERVICES[service]
+    try:
+        client_class = getattr(importlib.import_module(module_name), class_name)
+    except ImportError as e:
+        raise ClientError(f"Azure SDK is not installed ({e.name}). Run: pip install -e .") from e
+    args = (credential,) if service in TENANT_SERVICES else (credential, subscription_id)
+    if transport is None:
+        return client_class(*args)
+    return client_class(*args, transport=transport)
+
+
+class ClientPool:
+    """
+    Memoized credentials and management clients for one configuration.
+
+    Example:
+        pool = ClientPool(config)
+        compute = pool.client("compute")
+        compute_again = pool.client("compute")  # same object, no new session
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        credential_factory: Callable[[Config], Any] = _build_credential,
+        client_factory: Callable[[str, Any, str, Any], Any] = _build_client,
+        pool_size: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            config: Configuration the credentials are built from.
+            credential_factory: Builds the raw credential, injectable for tests.
+            client_factory: Builds a client from (service, credential,
+                subscription_id, transport), injectable for tests.
+            pool_size: Max pooled HTTP connections. Defaults to config.fan_out_workers.
+        """
+        self.config = config
+        self.stats = PoolStats()
+        self._credential_factory = credential_factory
+        self._client_factory = client_factory
+        self._pool_size = pool_size or config.fan_out_workers
+        self._credentials: dict[str, CachingCredential] = {}
+        self._clients: dict[tuple[str, str], Any] = {}
+        self._session: Any = None
+        self._lock = threading.RLock()
+
+    def credential(self) -> CachingCredential:
+        """The shared credential for the configured authentication method."""
+        method = self.config.get_authentication_method()
+        with self._lock:
+            if method not in self._credentials:
+                with span("auth.credential", method=method):
+                    raw = self._credential_factory(self.config)
+                self._credentials[method] = CachingCredential(raw, self.stats)
+                self.stats.credentials_built += 1
+            return self._credentials[method]
+
+    def client(self, service: str, subscription_id: Optional[str] = None) -> Any:
+        """
+        Return the shared client for a service and subscription.
+
+        Args:
+            service: One of SERVICES ("resource", "compute", "storage", "network",
+                "resourcegraph").
+            subscription_id: Defaults to config.subscription_id. Ignored for
+                TENANT_SERVICES, which share one client.
+
+        Raises:
+            ValueError: If the service is unknown.
+            ClientError: If the Azure SDK is not installed.
+        """
+        if service not in SERVICES:
+            raise ValueError(f"Unknown service: {service}. Must be one of: {', '.join(SERVICES)}")
+        if service in TENANT_SERVICES:
+            key = (service, "")
+        else:
+            key = (service, subscription_id or self.config.subscription_id)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.stats.clients_reused += 1
+                return client
+            credential = self.credential()
+            with span("azure.client", service=service):
+                client = self._client_factory(service, credential, key[1], self._transport())
+            self._clients[key] = client
+            self.stats.clients_built += 1
+            return client
+
+    def _transport(self) -> Any:
+        """
+        A transport over the pool's shared requests.Session.
+
+        Every client gets its own transport object, but they all draw from one
+        connection pool, so TLS connections to ARM are reused across clients.
+        Returns None (SDK default transport) when requests is unavailable.
+        """
+        try:
+            import requests
+            from azure.core.pipeline.transport import RequestsTransport
+            from requests.adapters import HTTPAdapter
+        except ImportError:
+            return None
+        if self._session is None:
+            adapter = HTTPAdapter(pool_connections=self._pool_size, pool_maxsize=self._pool_size)
+            self._session = requests.Session()
+            self._session.mount("https://", adapter)
+        return RequestsTransport(session=self._session, session_owner=False)
+
+    def close(self) -> None:
+        """Close every client, credential and the shared HTTP session."""
+        with self._lock:
+            for client in self._clients.values():
+                close = getattr(client, "close", None)
+                if close is not None:
+                    close()
+            for credential in self._credentials.values():
+                credential.close()
+            if self._session is not None:
+                self._session.close()
+            self._clients.clear()
+            self._credentials.clear()
+            self._session = None
+
+
+# ============================================================================
+# Shared Pool
+# ============================================================================
+_pool: Optional[ClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_client_pool(config: Config) -> ClientPool:
+    """
+    Return the process-wide pool for a config.
+
+    A new pool replaces the old one when the config object changes (for
+    example after reload_config()), so stale credentials are never reused.
+    The old pool is closed once commands that were already running finish.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.config is not config:
+            if _pool is not None:
+                retire(_pool.close)
+            _pool = ClientPool(config)
+        return _pool
+
+
+def current_client_pool() -> Optional[ClientPool]:
+    """The process-wide pool if one has been created, without creating it."""
+    return _pool
@@ -0,0 +1,354 @@
+"""
+Completion index over command phrases and inventory resource names.
+
+Completing "create storage account in prod-" as the user types has to be
+fast at tens of thousands of resources, so names are not scanned:
+
+- Prefix matches come from one sorted array per kind of name (resource
+  group, VM, storage account, ...) searched with bisect.
+- Fuzzy matches ("prdlogs" -> "prodlogs") come from a trigram index that is only
+  built the first time a fuzzy lookup is needed.
+
+Names come from the inventory cache and are tracked per cached scope, so
+``sync`` only re-reads listings that were fetched since the last sync. A JSON
+snapshot of the index is kept next to the inventory cache, so a fresh
+process (click's shell completion starts one per TAB press) loads it instead
+of re-reading every cached listing.
+"""
+
+import heapq
+import json
+import math
+import threading
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from config import Config
+
+DEFAULT_LIMIT = 50
+# Minimum trigram similarity (Jaccard) for a fuzzy match
+DEFAULT_FUZZY_THRESHOLD = 0.3
+# Shortest input worth a fuzzy lookup
+MIN_FUZZY_LENGTH = 3
+SNAPSHOT_FILENAME = "completions.json"
+SNAPSHOT_VERSION = 1
+
+KIND_COMMAND = "command"
+KIND_RESOURCE_GROUP = "resource_group"
+KIND_VM = "vm"
+KIND_STORAGE_ACCOUNT = "storage_account"
+KIND_RESOURCE = "resource"
+NAME_KINDS = (KIND_RESOURCE_GROUP, KIND_VM, KIND_STORAGE_ACCOUNT, KIND_RESOURCE)
+
+# Resource types with their own kind; every other type is KIND_RESOURCE
+TYPE_KINDS = {
+    "microsoft.compute/virtualmachines": KIND_VM,
+    "microsoft.storage/storageaccounts": KIND_STORAGE_ACCOUNT,
+}
+
+# The word before the one being completed says what kind of name comes next
+KIND_HINTS = {
+    "in": (KIND_RESOURCE_GROUP,),
+    "group": (KIND_RESOURCE_GROUP,),
+    "rg": (KIND_RESOURCE_GROUP,),
+    "vm": (KIND_VM,),
+    "vms": (KIND_VM,),
+    "machine": (KIND_VM,),
+    "account": (KIND_STORAGE_ACCOUNT,),
+}
+
+# Above this many new names per kind, append and re-sort instead of insort
+_BULK_INSERT = 64
+
+# Scope holding the command phrases; never synced from the inventory
+_PHRASE_SCOPE = ""
+
+Term = tuple[str, str]  # (text, kind)
+
+
+@dataclass(frozen=True)
+class Completion:
+    """A candidate for the word being typed."""
+
+    value: str
+    kind: str
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"#{text}#"
+    return {padded[start : start + 3] for start in range(len(padded) - 2)}
+
+
+def resource_terms(resources: Iterable[dict[str, Any]]) -> set[Term]:
+    """Names worth completing from an inventory listing."""
+    terms: set[Term] = set()
+    for resource in resources:
+        if resource.get("name"):
+            kind = TYPE_KINDS.get((resource.get("type") or "").lower(), KIND_RESOURCE)
+            terms.add((resource["name"], kind))
+        if resource.get("resource_group"):
+            terms.add((resource["resource_group"], KIND_RESOURCE_GROUP))
+    return terms
+
+
+class CompletionIndex:
+    """
+    Prefix and fuzzy lookups over phrases and names, updated scope by scope.
+
+    Example:
+        index = CompletionIndex(phrases=["list resources", "create resource group"])
+        index.set_scope("sub/", [("prod-web01", KIND_VM)], version=fetched_at)
+        index.complete(["stop", "vm"], "prod")  # [Completion("prod-web01", "vm")]
+    """
+
+    def __init__(self, phrases: Iterable[str] = ()) -> None:
+        self._sorted: dict[str, list[tuple[str, str]]] = {}  # kind -> [(lowercase, text)]
+        self._counts: Counter[Term] = Counter()
+        self._scopes: dict[str, tuple[float, frozenset[Term]]] = {}
+        self._trigrams: Optional[defaultdict[str, set[Term]]] = None
+        self._lock = threading.RLock()
+        self.set_scope(_PHRASE_SCOPE, ((phrase.lower(), KIND_COMMAND) for phrase in phrases))
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    # ------------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------------
+    def _add(self, terms: Iterable[Term]) -> None:
+        added: dict[str, list[tuple[str, str]]] = {}
+        for term in terms:
+            self._counts[term] += 1
+            if self._counts[term] > 1:
+                continue
+            text, kind = term
+            added.setdefault(kind, []).append((text.lower(), text))
+            if self._trigrams is not None:
+                for gram in _trigrams(text.lower()):
+                    self._trigrams[gram].add(term)
+        for kind, entries in added.items():
+            existing = self._sorted.setdefault(kind, [])
+            if len(entries) < _BULK_INSERT:
+                for entry in entries:
+                    insort(existing, entry)
+            else:
+                # Sorting once beats shifting the array for every insert
+                existing += entries
+                existing.sort()
+
+    def _remove(self, terms: Iterable[Term]) -> None:
+        for term in terms:
+            self._counts[term] -= 1
+            if self._counts[term] > 0:
+                continue
+            del self._counts[term]
+            text, kind = term
+            entries = self._sorted[kind]
+            del entries[bisect_left(entries, (text.lower(), text))]
+            if self._trigrams is not None:
+                for gram in _trigrams(text.lower()):
+                    self._trigrams[gram].discard(term)
+
+    def set_scope(self, scope: str, terms: Iterable[Term], version: float = 0.0) -> None:
+        """
+        Replace the names contributed by one scope (an inventory listing).
+
+        Only the difference from what the scope contributed before is
+        applied. A name stays in the index while any scope contributes it.
+        """
+        new = frozenset(terms)
+        with self._lock:
+            old = self._scopes.get(scope, (0.0, frozenset()))[1]
+            self._remove(old - new)
+            self._add(new - old)
+            self._scopes[scope] = (version, new)
+
+    def drop_scope(self, scope: str) -> None:
+        """Remove every name a scope contributed."""
+        with self._lock:
+            _, old = self._scopes.pop(scope, (0.0, frozenset()))
+            self._remove(old)
+
+    def sync(self, inventory: Any) -> int:
+        """
+        Catch up with an InventoryCache.
+
+        Listings fetched since the last sync are re-read; listings that are
+        no longer cached are dropped.
+
+        Returns:
+            How many scopes changed.
+        """
+        cached = inventory.scopes()
+        changed = 0
+        with self._lock:
+            for scope in [s for s in self._scopes if s != _PHRASE_SCOPE and s not in cached]:
+                self.drop_scope(scope)
+                changed += 1
+            for scope, fetched_at in cached.items():
+                if self._scopes.get(scope, (None,))[0] != fetched_at:
+                    self.set_scope(scope, resource_terms(inventory.iter_scope(scope)), fetched_at)
+                    changed += 1
+        return changed
+
+    # ------------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------------
+    def prefix(
+        self, prefix: str, kinds: Sequence[str] = NAME_KINDS, limit: int = DEFAULT_LIMIT
+    ) -> list[Completion]:
+        """Entries starting with prefix (case-insensitive), alphabetically."""
+        prefix = prefix.lower()
+        with self._lock:
+            runs = []
+            for kind in kinds:
+                entries = self._sorted.get(kind, [])
+                run = []
+                for index in range(bisect_left(entries, (prefix,)), len(entries)):
+                    lowered, text = entries[index]
+                    if not lowered.startswith(prefix) or len(run) == limit:
+                        break
+                    run.append((lowered, text, kind))
+                runs.append(run)
+        merged = heapq.merge(*runs)
+        return [Completion(text, kind) for _, text, kind in list(merged)[:limit]]
+
+    def _trigram_index(self) -> defaultdict[str, set[Term]]:
+        if self._trigrams is None:
+            index: defaultdict[str, set[Term]] = defaultdict(set)
+            for term in self._counts:
+                for gram in _trigrams(term[0].lower()):
+                    index[gram].add(term)
+            self._trigrams = index
+        return self._trigrams
+
+    def fuzzy(
+        self,
+        query: str,
+        kinds: Sequence[str] = NAME_KINDS,
+        limit: int = DEFAULT_LIMIT,
+        threshold: float = DEFAULT_FUZZY_THRESHOLD,
+    ) -> list[Completion]:
+        """Entries sharing enough trigrams with query (Jaccard), most similar first."""
+        grams = _trigrams(query.lower())
+        with self._lock:
+            index = self._trigram_index()
+            # A match shares at least `needed` trigrams, so it is in one of the
+            # rarest len(grams) - needed + 1 posting lists. Only those are
+            # scanned; the common ones are just probed for the candidates found.
+            rarest = sorted(grams, key=lambda gram: len(index.get(gram, ())))
+            needed = max(1, math.ceil(threshold * len(grams)))
+            cut = len(rarest) - needed + 1
+            shared: Counter[Term] = Counter()
+            for gram in rarest[:cut]:
+                shared.update(index.get(gram, ()))
+            common = [index.get(gram, set()) for gram in rarest[cut:]]
+            scored = []
+            for term, count in shared.items():
+                if term[1] not in kinds:
+                    continue
+                count += sum(term in postings for postings in common)
+                # Jaccard similarity; a padded word of n characters has n trigrams
+                similarity = count / (len(grams) + len(term[0]) - count)
+                if similarity >= threshold:
+                    scored.append((-similarity, term[0].lower(), term))
+        return [Completion(text, kind) for _, _, (text, kind) in heapq.nsmallest(limit, scored)]
+
+    def complete(
+        self, words: Sequence[str], incomplete: str, limit: int = DEFAULT_LIMIT
+    ) -> list[Completion]:
+        """
+        Candidates for the word being typed.
+
+        Args:
+            words: Words already typed.
+            incomplete: The partial word under the cursor.
+            limit: Most candidates returned.
+
+        Returns:
+            The next word of matching command phrases, then resource names
+            (only the kind the previous word asks for, such as resource groups
+            after "in"), then fuzzy name matches if prefixes found too few.
+        """
+        typed = [word.lower() for word in words]
+        hinted = KIND_HINTS.get(typed[-1]) if typed else None
+        results: list[Completion] = []
+
+        line = " ".join([*typed, incomplete.lower()])
+        for phrase in self.prefix(line, (KIND_COMMAND,), limit):
+            phrase_words = phrase.value.split()
+            if len(phrase_words) > len(typed):
+                results.append(Completion(phrase_words[len(typed)], KIND_COMMAND))
+
+        if hinted or incomplete:
+            kinds = hinted or NAME_KINDS
+            results += self.prefix(incomplete, kinds, limit)
+            if len(results) < limit and len(incomplete) >= MIN_FUZZY_LENGTH:
+                results += self.fuzzy(incomplete, kinds, limit)
+        return list(dict.fromkeys(results))[:limit]
+
+    # ------------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------------
+    def save(self, path: Path) -> None:
+        """Write the inventory-derived part of the index to a JSON snapshot."""
+        with self._lock:
+            scopes = {
+                scope: [version, sorted(terms)]
+                for scope, (version, terms) in self._scopes.items()
+                if scope != _PHRASE_SCOPE
+            }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps({"version": SNAPSHOT_VERSION, "scopes": scopes}))
+        temporary.replace(path)
+
+    def load(self, path: Path) -> bool:
+        """
+        Add the scopes of a snapshot written by save.
+
+        Returns:
+            False if the snapshot is missing, unreadable or from another version.
+        """
+        try:
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return False
+        if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+            return False
+        for scope, (version, terms) in snapshot["scopes"].items():
+            self.set_scope(scope, (tuple(term) for term in terms), version)
+        return True
+
+
+# ============================================================================
+# Shared Index
+# ============================================================================
+_index: Optional[CompletionIndex] = None
+_index_config: Optional[Config] = None
+_index_lock = threading.Lock()
+
+
+def get_completion_index(config: Config, phrases: Iterable[str] = ()) -> CompletionIndex:
+    """
+    Return the process-wide index, synced with the inventory cache.
+
+    The first call loads the snapshot; every call picks up listings cached
+    since, and rewrites the snapshot when anything changed.
+    """
+    global _index, _index_config
+    from inventory_cache import get_inventory_cache
+
+    snapshot = config.inventory_cache_path.parent / SNAPSHOT_FILENAME
+    with _index_lock:
+        if _index is None or _index_config is not config:
+            _index = CompletionIndex(phrases)
+            _index_config = config
+            _index.load(snapshot)
+        if _index.sync(get_inventory_cache(config)):
+            _index.save(snapshot)
+        return _index
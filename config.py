@@ -1,90 +1,217 @@
 """
 Configuration management for Azure Copilot.
 
-This module loads and validates configuration from environment variables,
-providing a clean API for accessing settings throughout the application.
+This module loads and validates configuration, providing a clean API for
+accessing settings throughout the application.
+
+Every setting is one Config field declared with setting(), which names its
+environment variable, default and parser. load_config() resolves each
+setting from layers, later ones winning:
+
+    defaults < copilot.toml < .env < environment < CLI flags
+
+copilot.toml (COPILOT_CONFIG) holds settings at the top level, per profile
+under ``[profiles.<name>]`` (picked with --config-profile or COPILOT_PROFILE)
+and per subscription under ``[subscriptions."<id>"]``, applied in that order.
+Keys are setting names or environment variable names. The parsed files are
+cached on disk (COPILOT_CONFIG_CACHE), keyed by their mtime and size, so a
+start-up with unchanged files neither parses TOML nor imports dotenv. The
+.env file (COPILOT_DOTENV, else the one python-dotenv finds) is read into the
+config only and no longer copied into os.environ.
+
+Nothing is loaded at import time: the Config singleton is built on the first
+call to get_config(), so commands that never touch configuration (like
+"help") don't pay for it. The shell and the daemon run a ConfigWatcher that
+rebuilds it when a source file changes; singletons built from a config
+replace themselves once they see a new one.
 """
 
+import json
 import os
-from dataclasses import dataclass, field
+import sys
+import threading
+from collections import Counter
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from functools import cache
 from pathlib import Path
-from typing import Optional
+from types import MappingProxyType
+from typing import Any, Optional
 
-from dotenv import load_dotenv
+from tracing import span
 
-# Load .env file from the project root
-load_dotenv()
+# Bump when the layout of the disk cache changes
+CACHE_VERSION = 1
 
+TRUE_VALUES = frozenset({"true", "1", "yes", "on"})
+FALSE_VALUES = frozenset({"false", "0", "no", "off", ""})
 
-@dataclass
+
+def _parse_type_ttls(value: str) -> Mapping[str, int]:
+    """
+    Parse per resource type TTLs from "Type=seconds,Type=seconds".
+
+    Raises:
+        ValueError: If an entry is not in Type=seconds form.
+    """
+    ttls = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        resource_type, sep, seconds = entry.partition("=")
+        if not sep or not seconds.strip().isdigit():
+            raise ValueError(
+                f"Invalid INVENTORY_CACHE_TYPE_TTLS entry: {entry!r}. Expected Type=seconds"
+            )
+        ttls[resource_type.strip()] = int(seconds)
+    return MappingProxyType(ttls)
+
+
+def _flag(value: str) -> bool:
+    folded = value.strip().lower()
+    if folded not in TRUE_VALUES | FALSE_VALUES:
+        raise ValueError("expected true or false")
+    return folded in TRUE_VALUES
+
+
+def _csv(value: str) -> tuple[str, ...]:
+    return tuple(part.strip() for part in value.split(",") if part.strip())
+
+
+def _parse(env: str, raw: Optional[str], parse: Callable[[str], Any]) -> Any:
+    if raw is None:
+        return None
+    try:
+        return parse(raw)
+    except ValueError as e:
+        raise ValueError(f"Invalid {env}={raw!r}: {e}") from e
+
+
+def setting(env: str, default: Optional[str], parse: Callable[[str], Any] = str) -> Any:
+    """
+    Declare a Config field.
+
+    Args:
+        env: Environment variable (and .env / copilot.toml key) it is read from.
+        default: Raw value when no layer sets it; None leaves the field None.
+        parse: Turns the raw string into the field's value; raises ValueError.
+    """
+    return field(
+        default_factory=lambda: _parse(env, os.getenv(env, default), parse),
+        metadata={"env": env, "default": default, "parse": parse},
+    )
+
+
+@dataclass(frozen=True, slots=True)
 class Config:
     """
-    Application configuration loaded from environment variables.
+    Application configuration, immutable once built.
 
-    All settings are loaded from .env file or environment variables.
-    See .env.example for available configuration options.
+    Config() reads the process environment only; get_config() and
+    load_config() resolve every layer. See .env.example for available
+    configuration options.
     """
 
     # =========================================================================
     # Azure Authentication (Required)
     # =========================================================================
-    subscription_id: str = field(default_factory=lambda: os.getenv("AZURE_SUBSCRIPTION_ID", ""))
+    subscription_id: str = setting("AZURE_SUBSCRIPTION_ID", "")
 
     # Optional authentication for Service Principal
-    client_id: Optional[str] = field(default_factory=lambda: os.getenv("AZURE_CLIENT_ID", None))
-    client_secret: Optional[str] = field(
-        default_factory=lambda: os.getenv("AZURE_CLIENT_SECRET", None)
-    )
-    tenant_id: Optional[str] = field(default_factory=lambda: os.getenv("AZURE_TENANT_ID", None))
+    client_id: Optional[str] = setting("AZURE_CLIENT_ID", None)
+    client_secret: Optional[str] = setting("AZURE_CLIENT_SECRET", None)
+    tenant_id: Optional[str] = setting("AZURE_TENANT_ID", None)
 
     # =========================================================================
     # Azure Defaults
     # =========================================================================
-    default_location: str = field(default_factory=lambda: os.getenv("DEFAULT_LOCATION", "eastus"))
-    default_resource_group: str = field(
-        default_factory=lambda: os.getenv("DEFAULT_RESOURCE_GROUP", "")
-    )
+    default_location: str = setting("DEFAULT_LOCATION", "eastus")
+    default_resource_group: str = setting("DEFAULT_RESOURCE_GROUP", "")
+
+    # Extra subscriptions that multi-scope queries fan out across
+    additional_subscription_ids: tuple[str, ...] = setting("AZURE_SUBSCRIPTION_IDS", "", _csv)
+    fan_out_workers: int = setting("FAN_OUT_WORKERS", "8", int)
 
     # =========================================================================
     # Azure OpenAI (Week 3+ - Optional)
     # =========================================================================
-    openai_endpoint: Optional[str] = field(
-        default_factory=lambda: os.getenv("AZURE_OPENAI_ENDPOINT", None)
-    )
-    openai_api_key: Optional[str] = field(
-        default_factory=lambda: os.getenv("AZURE_OPENAI_API_KEY", None)
-    )
-    openai_deployment: str = field(
-        default_factory=lambda: os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4-turbo")
-    )
-    openai_api_version: str = field(
-        default_factory=lambda: os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
-    )
+    openai_endpoint: Optional[str] = setting("AZURE_OPENAI_ENDPOINT", None)
+    openai_api_key: Optional[str] = setting("AZURE_OPENAI_API_KEY", None)
+    openai_deployment: str = setting("AZURE_OPENAI_DEPLOYMENT", "gpt-4-turbo")
+    openai_api_version: str = setting("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
 
     # =========================================================================
     # Application Settings
     # =========================================================================
-    log_level: str = field(default_factory=lambda: os.getenv("LOG_LEVEL", "INFO"))
-    debug: bool = field(default_factory=lambda: os.getenv("DEBUG", "false").lower() == "true")
-    default_dry_run: bool = field(
-        default_factory=lambda: os.getenv("DEFAULT_DRY_RUN", "false").lower() == "true"
-    )
-    skip_confirmations: bool = field(
-        default_factory=lambda: os.getenv("SKIP_CONFIRMATIONS", "false").lower() == "true"
-    )
-    track_token_usage: bool = field(
-        default_factory=lambda: os.getenv("TRACK_TOKEN_USAGE", "true").lower() == "true"
+    log_level: str = setting("LOG_LEVEL", "INFO")
+    debug: bool = setting("DEBUG", "false", _flag)
+    default_dry_run: bool = setting("DEFAULT_DRY_RUN", "false", _flag)
+    skip_confirmations: bool = setting("SKIP_CONFIRMATIONS", "false", _flag)
+    track_token_usage: bool = setting("TRACK_TOKEN_USAGE", "true", _flag)
+
+    # =========================================================================
+    # Inventory Cache
+    # =========================================================================
+    inventory_cache_path: Path = setting("INVENTORY_CACHE_PATH", "./data/inventory.db", Path)
+    inventory_cache_ttl: int = setting("INVENTORY_CACHE_TTL", "300", int)
+    inventory_cache_max_mb: int = setting("INVENTORY_CACHE_MAX_MB", "64", int)
+    inventory_cache_type_ttls: Mapping[str, int] = setting(
+        "INVENTORY_CACHE_TYPE_TTLS", "", _parse_type_ttls
     )
+    inventory_sync: bool = setting("INVENTORY_SYNC", "false", _flag)
+
+    # =========================================================================
+    # Translation Cache
+    # =========================================================================
+    translation_cache_path: Path = setting("TRANSLATION_CACHE_PATH", "./data/translations.db", Path)
+    translation_cache_ttl: int = setting("TRANSLATION_CACHE_TTL", "86400", int)
+    translation_cache_max_entries: int = setting("TRANSLATION_CACHE_MAX_ENTRIES", "5000", int)
+    semantic_cache_threshold: float = setting("SEMANTIC_CACHE_THRESHOLD", "0.9", float)
+
+    # =========================================================================
+    # Dry Runs
+    # =========================================================================
+    # What-if results of `--dry-run batch`, memoized by template hash
+    what_if_cache_path: Path = setting("WHAT_IF_CACHE_PATH", "./data/what_if.db", Path)
+    what_if_cache_ttl: int = setting("WHAT_IF_CACHE_TTL", "600", int)
+
+    # =========================================================================
+    # Long-Running Operations
+    # =========================================================================
+    # Operations started with --no-wait, for `copilot status`
+    operations_db_path: Path = setting("OPERATIONS_DB_PATH", "./data/operations.db", Path)
+
+    # =========================================================================
+    # Cost Estimates
+    # =========================================================================
+    # Local retail price sheet; the bundled sample is used until one exists
+    price_sheet_path: Path = setting("PRICE_SHEET_PATH", "./data/prices.json.gz", Path)
+    price_sheet_ttl: int = setting("PRICE_SHEET_TTL", "604800", int)
+    price_sheet_refresh: bool = setting("PRICE_SHEET_REFRESH", "true", _flag)
+    # GB a new storage account is assumed to hold
+    cost_storage_gb: float = setting("COST_STORAGE_GB", "100", float)
+    # Monthly USD above which creates warn before running
+    cost_warning_threshold: float = setting("COST_WARNING_THRESHOLD", "100", float)
+
+    # =========================================================================
+    # Prompts and Token Usage
+    # =========================================================================
+    prompt_token_budget: int = setting("PROMPT_TOKEN_BUDGET", "4000", int)
+    token_ledger_path: Path = setting("TOKEN_LEDGER_PATH", "./data/token_ledger.db", Path)
+
+    # =========================================================================
+    # Command History
+    # =========================================================================
+    history_db_path: Path = setting("HISTORY_DB_PATH", "./data/history.db", Path)
 
     # =========================================================================
     # Vector Database (Week 5+ - Optional)
     # =========================================================================
-    chroma_persist_directory: Path = field(
-        default_factory=lambda: Path(os.getenv("CHROMA_PERSIST_DIRECTORY", "./data/chroma"))
-    )
-    embedding_model: str = field(
-        default_factory=lambda: os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
-    )
+    chroma_persist_directory: Path = setting("CHROMA_PERSIST_DIRECTORY", "./data/chroma", Path)
+    embedding_model: str = setting("EMBEDDING_MODEL", "text-embedding-ada-002")
+    # Markdown documentation that `copilot docs ingest` indexes
+    docs_path: Path = setting("DOCS_PATH", "./data/azure-docs", Path)
+    # spaCy pipeline asked for resource names the extraction rules miss
+    entity_model: str = setting("ENTITY_MODEL", "")
 
     def __post_init__(self) -> None:
         """Validate required configuration after initialization."""
@@ -118,7 +245,7 @@ class Config:
                 f"Invalid LOG_LEVEL: {self.log_level}. Must be one of: {', '.join(valid_levels)}"
             )
         # Normalize to uppercase
-        self.log_level = self.log_level.upper()
+        object.__setattr__(self, "log_level", self.log_level.upper())
 
     def is_service_principal_configured(self) -> bool:
         """
@@ -129,6 +256,16 @@ class Config:
         """
         return bool(self.client_id and self.client_secret and self.tenant_id)
 
+    def get_subscription_ids(self) -> list[str]:
+        """
+        All subscriptions to query, primary first and without duplicates.
+
+        Returns:
+            subscription_id followed by any AZURE_SUBSCRIPTION_IDS entries.
+        """
+        ids = [self.subscription_id, *self.additional_subscription_ids]
+        return list(dict.fromkeys(i for i in ids if i))
+
     def is_openai_configured(self) -> bool:
         """
         Check if Azure OpenAI is configured (Week 3+ feature).
@@ -167,21 +304,455 @@ class Config:
         )
 
 
+# ============================================================================
+# Layered Resolution
+# ============================================================================
+@cache
+def _settings() -> dict[str, tuple[str, Optional[str], Callable[[str], Any]]]:
+    """Field name -> (environment variable, default, parser)."""
+    return {
+        f.name: (f.metadata["env"], f.metadata["default"], f.metadata["parse"])
+        for f in fields(Config)
+    }
+
+
+@cache
+def _keys() -> dict[str, str]:
+    """Lower-cased setting and environment variable names -> environment variable."""
+    keys = {}
+    for name, (env, _default, _parse) in _settings().items():
+        keys[name] = keys[env.lower()] = env
+    return keys
+
+
+def _raw(value: Any) -> str:
+    """A TOML value as the string a setting's parser expects."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list):
+        return ",".join(_raw(item) for item in value)
+    if isinstance(value, dict):
+        return ",".join(f"{key}={_raw(item)}" for key, item in value.items())
+    return str(value)
+
+
+def _layer(values: Mapping[str, Any], where: str) -> dict[str, str]:
+    """Settings keyed by environment variable, from setting or variable names."""
+    layer = {}
+    for key, value in values.items():
+        env = _keys().get(key.lower())
+        if env is None:
+            raise ValueError(f"Unknown setting {key!r} in {where}")
+        layer[env] = _raw(value)
+    return layer
+
+
+def parse_config_file(path: Path) -> dict[str, Any]:
+    """
+    Read a copilot.toml file.
+
+    Returns:
+        {"settings": layer, "profiles": {name: layer}, "subscriptions": {id: layer}},
+        each layer mapping environment variable names to raw values.
+
+    Raises:
+        ValueError: If the file is not valid TOML or names an unknown setting.
+    """
+    import tomllib
+
+    try:
+        with open(path, "rb") as f:
+            document = tomllib.load(f)
+    except tomllib.TOMLDecodeError as e:
+        raise ValueError(f"Invalid {path}: {e}") from e
+    sections: dict[str, Any] = {}
+    for section in ("profiles", "subscriptions"):
+        tables = document.pop(section, {})
+        if not isinstance(tables, dict) or not all(isinstance(t, dict) for t in tables.values()):
+            raise ValueError(f"Invalid {path}: [{section}] must only hold tables")
+        sections[section] = {
+            name: _layer(table, f"{path} [{section}.{name}]") for name, table in tables.items()
+        }
+    return {"settings": _layer(document, str(path)), **sections}
+
+
+def _find_dotenv() -> Path:
+    """The .env file python-dotenv would find for this module, else the one it would use."""
+    here = Path(__file__).resolve().parent
+    for directory in (here, *here.parents):
+        if (directory / ".env").is_file():
+            return directory / ".env"
+    return here / ".env"
+
+
+def _stamp(path: Path) -> Optional[list[int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+@dataclass(frozen=True)
+class ConfigSources:
+    """Files a config is resolved from, besides the environment and CLI flags."""
+
+    config_file: Path
+    dotenv_file: Optional[Path]
+    # Parsed copies of both; None disables the disk cache
+    cache_file: Optional[Path]
+
+    @classmethod
+    def default(cls, environ: Mapping[str, str] = os.environ) -> "ConfigSources":
+        dotenv_file = environ.get("COPILOT_DOTENV")
+        cache_file = environ.get("COPILOT_CONFIG_CACHE", "./data/config_cache.json")
+        return cls(
+            Path(environ.get("COPILOT_CONFIG", "./copilot.toml")),
+            Path(dotenv_file) if dotenv_file else _find_dotenv(),
+            Path(cache_file) if cache_file else None,
+        )
+
+    def stamps(self) -> dict[str, Optional[list[int]]]:
+        """mtime and size of each source file (None if missing)."""
+        paths = (self.config_file, self.dotenv_file)
+        return {str(path): _stamp(path) for path in paths if path is not None}
+
+
+_NO_FILE: dict[str, Any] = {"settings": {}, "profiles": {}, "subscriptions": {}}
+
+
+def _read_files(sources: ConfigSources) -> tuple[dict[str, Any], dict[str, str], dict]:
+    """
+    Parsed copilot.toml and .env, from the disk cache while neither has changed.
+
+    Returns:
+        (parse_config_file() result, .env values, stamps of the files read).
+    """
+    stamps = sources.stamps()
+    if sources.cache_file is not None:
+        try:
+            cached = json.loads(sources.cache_file.read_text(encoding="utf-8"))
+            if cached["version"] == CACHE_VERSION and cached["stamps"] == stamps:
+                return cached["file"], cached["dotenv"], stamps
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+    file = parse_config_file(sources.config_file) if stamps[str(sources.config_file)] else _NO_FILE
+    dotenv: dict[str, str] = {}
+    if sources.dotenv_file is not None and stamps[str(sources.dotenv_file)]:
+        from dotenv import dotenv_values
+
+        values = dotenv_values(sources.dotenv_file)
+        dotenv = {key: value for key, value in values.items() if value is not None}
+    if sources.cache_file is not None:
+        _write_cache(
+            sources.cache_file,
+            {"version": CACHE_VERSION, "stamps": stamps, "file": file, "dotenv": dotenv},
+        )
+    return file, dotenv, stamps
+
+
+def _write_cache(path: Path, data: dict[str, Any]) -> None:
+    """Replace the cache file atomically; it may hold secrets from .env, so owner-only."""
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temporary, path)
+    except OSError:
+        temporary.unlink(missing_ok=True)
+
+
+def _merge(layers: Sequence[Mapping[str, str]]) -> dict[str, str]:
+    merged: dict[str, str] = {}
+    for layer in layers:
+        merged.update(layer)
+    return merged
+
+
+def _resolve(
+    profile: Optional[str],
+    overrides: Mapping[str, Any],
+    sources: Optional[ConfigSources],
+    environ: Mapping[str, str],
+) -> tuple[Config, dict]:
+    sources = sources or ConfigSources.default(environ)
+    file, dotenv, stamps = _read_files(sources)
+    profile = profile or environ.get("COPILOT_PROFILE") or None
+    profile_layer: dict[str, str] = {}
+    if profile:
+        if profile not in file["profiles"]:
+            known = ", ".join(sorted(file["profiles"])) or "none"
+            raise ValueError(
+                f"Unknown config profile {profile!r}. Profiles in {sources.config_file}: {known}"
+            )
+        profile_layer = file["profiles"][profile]
+    known_envs = set(_keys().values())
+    dotenv_layer = {key: value for key, value in dotenv.items() if key in known_envs}
+    env_layer = {key: environ[key] for key in known_envs if key in environ}
+    cli_layer = _layer(overrides, "--set")
+
+    layers = [file["settings"], profile_layer, dotenv_layer, env_layer, cli_layer]
+    raw = _merge(layers)
+    subscription_layer = file["subscriptions"].get(raw.get("AZURE_SUBSCRIPTION_ID", ""))
+    if subscription_layer:
+        raw = _merge([*layers[:2], subscription_layer, *layers[2:]])
+    values = {
+        name: _parse(env, raw.get(env, default), parse)
+        for name, (env, default, parse) in _settings().items()
+    }
+    return Config(**values), stamps
+
+
+def load_config(
+    profile: Optional[str] = None,
+    overrides: Optional[Mapping[str, Any]] = None,
+    sources: Optional[ConfigSources] = None,
+    environ: Optional[Mapping[str, str]] = None,
+) -> Config:
+    """
+    Resolve a Config from every layer.
+
+    Args:
+        profile: copilot.toml profile to apply. Defaults to COPILOT_PROFILE.
+        overrides: CLI flag layer; setting or environment variable name -> value.
+        sources: Files to read. Defaults to ConfigSources.default().
+        environ: Environment layer. Defaults to os.environ.
+
+    Raises:
+        ValueError: If a file, setting or profile is invalid.
+    """
+    environ = os.environ if environ is None else environ
+    return _resolve(profile, overrides or {}, sources, environ)[0]
+
+
 # ============================================================================
 # Singleton Instance
 # ============================================================================
-# Create a single global config instance that can be imported anywhere
-try:
-    config = Config()
-except ValueError as e:
-    # If configuration fails, print helpful error and re-raise
-    print(f"\n❌ Configuration Error: {e}\n")
-    print("💡 Quick Setup:")
-    print("   1. Copy .env.example to .env:  cp .env.example .env")
-    print("   2. Run: az login")
-    print("   3. Run: az account show --query id -o tsv")
-    print("   4. Add the subscription ID to your .env file\n")
-    raise
+# CLI flag layer and source files of the singleton, set by configure()
+_profile: Optional[str] = None
+_overrides: Mapping[str, str] = MappingProxyType({})
+_sources: Optional[ConfigSources] = None
+# Source file stamps the singleton was built from
+_loaded_stamps: Optional[dict] = None
+
+
+@cache
+def get_config() -> Config:
+    """
+    Return the global config instance, creating it on first use.
+
+    Returns:
+        The shared Config instance.
+
+    Raises:
+        ValueError: If the configuration is invalid.
+    """
+    global _loaded_stamps
+
+    with span("config.load"):
+        try:
+            config, _loaded_stamps = _resolve(_profile, _overrides, _sources, os.environ)
+            return config
+        except ValueError as e:
+            # If configuration fails, print helpful error and re-raise
+            print(f"\n❌ Configuration Error: {e}\n")
+            print("💡 Quick Setup:")
+            print("   1. Copy .env.example to .env:  cp .env.example .env")
+            print("   2. Run: az login")
+            print("   3. Run: az account show --query id -o tsv")
+            print("   4. Add the subscription ID to your .env file\n")
+            raise
+
+
+def configure(
+    profile: Optional[str] = None,
+    overrides: Optional[Mapping[str, str]] = None,
+    sources: Optional[ConfigSources] = None,
+) -> None:
+    """
+    Set the CLI flag layer (and optionally the files) get_config() resolves.
+
+    The singleton is rebuilt on next use only if something changed, so the
+    CLI can call this for every command.
+    """
+    global _profile, _overrides, _sources
+
+    overrides = dict(overrides or {})
+    if (profile, overrides, sources) != (_profile, dict(_overrides), _sources):
+        _profile, _overrides, _sources = profile, MappingProxyType(overrides), sources
+        get_config.cache_clear()
+
+
+def command_config(
+    profile: Optional[str] = None, overrides: Optional[Mapping[str, str]] = None
+) -> Config:
+    """
+    Return the config for one command's --config-profile / --set flags.
+
+    Without flags this is the singleton. With flags the config is resolved
+    for the caller alone and the module state is left untouched, so commands
+    running at once in the daemon never see each other's flags.
+
+    Raises:
+        ValueError: If the configuration is invalid.
+    """
+    if not profile and not overrides:
+        return get_config()
+    return _resolve(profile, overrides or {}, _sources, os.environ)[0]
+
+
+def __getattr__(name: str) -> Config:
+    """Keep `from config import config` working without building it at import."""
+    if name == "config":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# ============================================================================
+# Hot Reload
+# ============================================================================
+def config_is_stale() -> bool:
+    """True if a source file of the global config changed after it was built."""
+    stamps = _loaded_stamps
+    if stamps is None:
+        return False
+    return (_sources or ConfigSources.default()).stamps() != stamps
+
+
+# Objects built from a replaced config may still be in use by commands that
+# started before the swap; they are closed once those commands have finished.
+# Each retire() starts a new generation: (generation -> running commands),
+# and (generation retired in, close) pairs waiting for it to drain.
+_scope_lock = threading.Lock()
+_generation = 0
+_running: Counter[int] = Counter()
+_retired: list[tuple[int, Callable[[], None]]] = []
+
+
+def _due() -> list[Callable[[], None]]:
+    """Pop the retired closers no running command can still reach. Holds _scope_lock."""
+    oldest = min(_running, default=_generation)
+    due = [close for generation, close in _retired if generation < oldest]
+    _retired[:] = [(generation, close) for generation, close in _retired if generation >= oldest]
+    return due
+
+
+@contextmanager
+def command_scope() -> Iterator[None]:
+    """Mark a command as running, so objects retired meanwhile outlive it."""
+    with _scope_lock:
+        generation = _generation
+        _running[generation] += 1
+    try:
+        yield
+    finally:
+        with _scope_lock:
+            _running[generation] -= 1
+            if not _running[generation]:
+                del _running[generation]
+            due = _due()
+        for close in due:
+            close()
+
+
+def retire(close: Callable[[], None]) -> None:
+    """
+    Close a singleton its replacement made obsolete, once it is unused.
+
+    Runs ``close`` now if no command is running, else after every command
+    that started before this call has finished.
+    """
+    global _generation
+
+    with _scope_lock:
+        _retired.append((_generation, close))
+        _generation += 1
+        due = _due()
+    for close in due:
+        close()
+
+
+class ConfigWatcher:
+    """
+    Rebuilds the global config when copilot.toml or .env changes.
+
+    check() compares the files' mtime and size with those the config was
+    built from; start() runs it every ``interval`` seconds on a daemon
+    thread. Nothing is re-imported: singletons built from a config replace
+    themselves when they are next asked for with the new one. Files that
+    fail to parse or validate leave the current config in place.
+
+    Example:
+        with ConfigWatcher(on_reload=lambda config: print("reloaded")):
+            serve()
+    """
+
+    def __init__(
+        self,
+        interval: float = 1.0,
+        on_reload: Optional[Callable[[Config], None]] = None,
+        on_error: Optional[Callable[[ValueError], None]] = None,
+    ) -> None:
+        self.interval = interval
+        self.on_reload = on_reload
+        self.on_error = on_error
+        self._failed: Optional[dict] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """
+        Reload the config if a source file changed.
+
+        Returns:
+            True if the global config was replaced.
+        """
+        if not config_is_stale():
+            return False
+        stamps = (_sources or ConfigSources.default()).stamps()
+        if stamps == self._failed:
+            return False
+        try:
+            # Validate before dropping the config that works
+            _resolve(_profile, _overrides, _sources, os.environ)
+        except ValueError as e:
+            self._failed = stamps
+            if self.on_error is not None:
+                self.on_error(e)
+            return False
+        self._failed = None
+        config = reload_config()
+        if self.on_reload is not None:
+            self.on_reload(config)
+        return True
+
+    def start(self) -> "ConfigWatcher":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:  # keep watching whatever a callback does
+                print(f"Config watcher: {e}", file=sys.stderr)
+
+    def __enter__(self) -> "ConfigWatcher":
+        return self.start()
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.stop()
 
 
 # ============================================================================
@@ -189,15 +760,16 @@ except ValueError as e:
 # ============================================================================
 def reload_config() -> Config:
     """
-    Reload configuration from environment variables.
+    Rebuild the global config from its sources.
 
-    Useful for testing or when environment variables change at runtime.
+    Useful for testing or when files or environment variables change at
+    runtime.
 
     Returns:
         New Config instance with reloaded values.
     """
-    load_dotenv(override=True)
-    return Config()
+    get_config.cache_clear()
+    return get_config()
 
 
 def print_config(safe: bool = True) -> None:
@@ -208,6 +780,7 @@ def print_config(safe: bool = True) -> None:
         safe: If True, mask sensitive values. If False, show all values.
               WARNING: Only use safe=False in secure debugging environments!
     """
+    config = get_config()
     if safe:
         print(config)
     else:
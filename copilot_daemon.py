@@ -0,0 +1,395 @@
+"""
+Background daemon that keeps Azure Copilot warm for one-shot invocations.
+
+`copilot daemon start` launches a server that owns the warm state (config,
+credentials, client pool, inventory cache, compiled intents) and listens on a
+Unix domain socket. The `copilot` console script (main() below) is a thin
+client: it forwards its arguments over the socket and streams the output back,
+so scripted use pays neither Python imports nor credential setup per call.
+When no daemon is running, main() runs the command in-process as before.
+
+Protocol: newline-delimited JSON. The client sends one request object and the
+server answers with any number of {"stream": "stdout"|"stderr", "data": ...}
+messages followed by a final {"exit": code}.
+"""
+
+import io
+import json
+import os
+import socket
+import sys
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Optional
+
+SOCKET_PATH = Path(
+    os.getenv("COPILOT_DAEMON_SOCKET", "~/.cache/azure-copilot/daemon.sock")
+).expanduser()
+
+# Set to any value to never forward to the daemon
+NO_DAEMON_ENV = "COPILOT_NO_DAEMON"
+
+# Set by the shell when it asks click for completions; answered locally
+COMPLETE_ENV = "_COPILOT_COMPLETE"
+
+# First words that always run in the calling process
+LOCAL_COMMANDS = ("shell", "daemon")
+
+# Environment variables that affect Config; the daemon only serves clients
+# that set exactly the same ones to the same values
+CONFIG_ENV_PREFIXES = (
+    "AZURE_",
+    "DEFAULT_",
+    "INVENTORY_CACHE_",
+    "INVENTORY_SYNC",
+    "FAN_OUT_",
+    "LOG_LEVEL",
+    "DEBUG",
+    "SKIP_CONFIRMATIONS",
+    "TRACK_TOKEN_USAGE",
+    "CHROMA_",
+    "EMBEDDING_",
+    "DOCS_PATH",
+    "ENTITY_MODEL",
+    "TRANSLATION_CACHE_",
+    "SEMANTIC_CACHE_",
+    "PROMPT_TOKEN_BUDGET",
+    "TOKEN_LEDGER_PATH",
+    "HISTORY_DB_PATH",
+    "WHAT_IF_CACHE_",
+    "OPERATIONS_DB_PATH",
+    "PRICE_SHEET_",
+    "COST_",
+    "COPILOT_CONFIG",
+    "COPILOT_DOTENV",
+    "COPILOT_PROFILE",
+)
+
+START_TIMEOUT_SECONDS = 10.0
+
+
+def _config_env() -> dict[str, str]:
+    return {k: v for k, v in os.environ.items() if k.startswith(CONFIG_ENV_PREFIXES)}
+
+
+def _send(sock: socket.socket, message: dict[str, Any]) -> None:
+    sock.sendall(json.dumps(message).encode() + b"\n")
+
+
+def _messages(sock: socket.socket) -> Any:
+    """Yield decoded messages from the socket until it closes."""
+    with sock.makefile("rb") as stream:
+        for line in stream:
+            yield json.loads(line)
+
+
+def _connect(socket_path: Path, timeout: Optional[float] = None) -> Optional[socket.socket]:
+    if not socket_path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(socket_path))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+# ============================================================================
+# Client
+# ============================================================================
+def should_forward(argv: Sequence[str]) -> bool:
+    """True if this invocation may be sent to a daemon."""
+    if os.getenv(NO_DAEMON_ENV) or os.getenv(COMPLETE_ENV):
+        return False
+    # Profiles time this process; the daemon also serves other clients at once
+    if any(arg.startswith(("--startup-profile", "--profile")) for arg in argv):
+        return False
+    # A config of its own would replace the daemon's shared clients and caches
+    if any(arg.startswith(("--config-profile", "--set")) for arg in argv):
+        return False
+    words = " ".join(a for a in argv if not a.startswith("-")).split()
+    return not (words and words[0].lower() in LOCAL_COMMANDS)
+
+
+def forward(argv: Sequence[str], socket_path: Optional[Path] = None) -> Optional[int]:
+    """
+    Run a command on the daemon, streaming its output to this process.
+
+    Args:
+        argv: Arguments for the copilot command.
+        socket_path: Daemon socket. Defaults to SOCKET_PATH.
+
+    Returns:
+        The command's exit code, or None if no compatible daemon answered
+        (the caller should then run the command itself).
+    """
+    sock = _connect(socket_path or SOCKET_PATH)
+    if sock is None:
+        return None
+    with sock:
+        _send(
+            sock,
+            {
+                "argv": list(argv),
+                "cwd": os.getcwd(),
+                "env": _config_env(),
+                "tty": sys.stdout.isatty(),
+            },
+        )
+        try:
+            for message in _messages(sock):
+                if "fallback" in message:
+                    return None
+                if "exit" in message:
+                    return int(message["exit"])
+                stream = sys.stderr if message["stream"] == "stderr" else sys.stdout
+                stream.write(message["data"])
+                stream.flush()
+        except (OSError, ValueError):
+            pass
+    # The daemon went away mid-command; output may be partial
+    return 1
+
+
+def request(control: str, socket_path: Optional[Path] = None) -> Optional[dict[str, Any]]:
+    """Send a control message ("ping" or "shutdown") and return the reply."""
+    sock = _connect(socket_path or SOCKET_PATH, timeout=5.0)
+    if sock is None:
+        return None
+    with sock:
+        _send(sock, {"control": control})
+        return next(_messages(sock), None)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Console script entry point for `copilot`.
+
+    Forwards to a running daemon when possible, otherwise imports the CLI and
+    runs the command in this process.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if should_forward(argv):
+        code = forward(argv)
+        if code is not None:
+            sys.exit(code)
+
+    from cli import cli
+
+    cli.main(argv, prog_name="copilot")
+
+
+# ============================================================================
+# Server
+# ============================================================================
+class _RequestStreams(io.TextIOBase):
+    """
+    Stand-in for sys.stdout / sys.stderr that routes writes per thread.
+
+    The daemon serves requests on worker threads; output written by a request
+    goes back over that request's socket while other threads are unaffected.
+    """
+
+    encoding = "utf-8"
+
+    def __init__(self, name: str, fallback: Any) -> None:
+        import threading
+
+        super().__init__()
+        self._name = name
+        self._fallback = fallback
+        self._local = threading.local()
+
+    def bind(self, sock: Optional[socket.socket], tty: bool = False) -> None:
+        self._local.sock = sock
+        self._local.tty = tty
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: str) -> int:
+        # Rejecting bytes keeps click from mistaking this for a binary stream
+        if not isinstance(data, str):
+            raise TypeError(f"write() argument must be str, not {type(data).__name__}")
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            return int(self._fallback.write(data))
+        if data:
+            _send(sock, {"stream": self._name, "data": data})
+        return len(data)
+
+    def flush(self) -> None:
+        if getattr(self._local, "sock", None) is None:
+            self._fallback.flush()
+
+    def isatty(self) -> bool:
+        if getattr(self._local, "sock", None) is None:
+            return bool(self._fallback.isatty())
+        return bool(self._local.tty)
+
+
+class DaemonServer:
+    """Unix socket server that runs copilot commands in one warm process."""
+
+    def __init__(self, socket_path: Optional[Path] = None) -> None:
+        self.socket_path = socket_path or SOCKET_PATH
+        self.started = time.time()
+        self.requests_served = 0
+        self._server: Any = None
+
+    def serve_forever(self) -> None:
+        """Bind the socket and handle requests until shut down."""
+        import socketserver
+
+        from cli import cli
+        from config import ConfigWatcher
+        from cost import enable_background_refresh
+
+        daemon = self
+        stdout = _RequestStreams("stdout", sys.stdout)
+        stderr = _RequestStreams("stderr", sys.stderr)
+        sys.stdout, sys.stderr = stdout, stderr  # type: ignore[assignment]
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                message = json.loads(self.rfile.readline() or b"{}")
+                if "control" in message:
+                    daemon._control(self.connection, message["control"])
+                    return
+                # Both ways: a variable only the daemon has set would leak
+                # the daemon's credentials or defaults into the client
+                if message.get("cwd") != os.getcwd() or message.get("env") != _config_env():
+                    _send(self.connection, {"fallback": "environment differs"})
+                    return
+
+                stdout.bind(self.connection, message.get("tty", False))
+                stderr.bind(self.connection, message.get("tty", False))
+                try:
+                    code = daemon._run(cli, message["argv"])
+                finally:
+                    stdout.bind(None)
+                    stderr.bind(None)
+                daemon.requests_served += 1
+                _send(self.connection, {"exit": code})
+
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        self.socket_path.unlink(missing_ok=True)
+        self._server = socketserver.ThreadingUnixStreamServer(str(self.socket_path), Handler)
+        self._server.daemon_threads = True
+        os.chmod(self.socket_path, 0o600)
+        # Edits to copilot.toml or .env apply to the next request without a restart
+        watcher = ConfigWatcher().start()
+        # The daemon outlives a price sheet download, so stale sheets may refresh
+        enable_background_refresh()
+        try:
+            self._server.serve_forever()
+        finally:
+            watcher.stop()
+            self._server.server_close()
+            self.socket_path.unlink(missing_ok=True)
+            sys.stdout, sys.stderr = stdout._fallback, stderr._fallback
+
+    def shutdown(self) -> None:
+        """Stop serve_forever() from another thread."""
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _run(self, cli: Any, argv: list[str]) -> int:
+        import traceback
+
+        import click
+
+        try:
+            result = cli.main(argv, prog_name="copilot", standalone_mode=False)
+            return result if isinstance(result, int) else 0
+        except click.ClickException as e:
+            e.show()
+            return e.exit_code
+        except click.exceptions.Exit as e:
+            return e.exit_code
+        except click.exceptions.Abort:
+            sys.stderr.write("Aborted!\n")
+            return 1
+        except Exception:
+            traceback.print_exc()
+            return 1
+
+    def _control(self, sock: socket.socket, control: str) -> None:
+        if control == "ping":
+            _send(
+                sock,
+                {
+                    "pid": os.getpid(),
+                    "uptime": time.time() - self.started,
+                    "requests": self.requests_served,
+                },
+            )
+        elif control == "shutdown":
+            _send(sock, {"stopping": True})
+            import threading
+
+            threading.Thread(target=self.shutdown, daemon=True).start()
+        else:
+            _send(sock, {"error": f"unknown control message: {control}"})
+
+
+def serve(socket_path: Optional[Path] = None) -> None:
+    """Run the daemon in the foreground."""
+    DaemonServer(socket_path).serve_forever()
+
+
+# ============================================================================
+# Lifecycle (`copilot daemon start|stop|status`)
+# ============================================================================
+def start(socket_path: Optional[Path] = None) -> dict[str, Any]:
+    """
+    Launch the daemon in the background and wait until it answers.
+
+    Returns:
+        The daemon's ping reply.
+
+    Raises:
+        RuntimeError: If the daemon does not come up in time.
+    """
+    import subprocess
+
+    socket_path = socket_path or SOCKET_PATH
+    status = request("ping", socket_path)
+    if status is not None:
+        return status
+
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    log_path = socket_path.with_suffix(".log")
+    code = (
+        f"import copilot_daemon, pathlib; copilot_daemon.serve(pathlib.Path({str(socket_path)!r}))"
+    )
+    with open(log_path, "ab") as log:
+        subprocess.Popen(
+            [sys.executable, "-c", code],
+            cwd=os.getcwd(),
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+
+    deadline = time.monotonic() + START_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        status = request("ping", socket_path)
+        if status is not None:
+            return status
+        time.sleep(0.05)
+    raise RuntimeError(f"Daemon did not start within {START_TIMEOUT_SECONDS:.0f}s; see {log_path}")
+
+
+def stop(socket_path: Optional[Path] = None) -> bool:
+    """Ask the daemon to shut down. Returns False if none was running."""
+    return request("shutdown", socket_path) is not None
+
+
+def status(socket_path: Optional[Path] = None) -> Optional[dict[str, Any]]:
+    """The daemon's ping reply, or None if it is not running."""
+    return request("ping", socket_path)
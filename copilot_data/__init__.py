@@ -0,0 +1 @@
+"""Data files shipped with Azure Copilot (the sample retail price sheet)."""
@@ -0,0 +1,431 @@
+"""
+Cost estimates for create commands from a local retail price sheet.
+
+Prices come from the Azure Retail Prices API, but never while a command
+runs. PriceSheet keeps the subset estimates need (pay-as-you-go Linux VM
+hours and hot block blob GB-months per redundancy) in a gzip-compressed
+JSON file and indexes it by (service, SKU, region) in a dict, so a lookup is
+one hash probe.
+
+- With no local sheet yet, the sample sheet bundled with the code
+  (copilot_data/retail_prices.json.gz) is used, so estimates work fully
+  offline. Without that either, every estimate is "no price known".
+- In the shell and the daemon, a sheet older than PRICE_SHEET_TTL is
+  refreshed on a background thread while estimates keep using the old one;
+  the new sheet replaces it whole once the download has finished. One-shot
+  commands never start a download, as the process would exit before it
+  finished.
+- estimate_batch() looks each distinct (service, SKU, region) up once and
+  multiplies prices and quantities column by column.
+
+Estimates are list prices in USD, without discounts, reservations, taxes or
+usage-based charges such as transactions and egress.
+"""
+
+import gzip
+import json
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+from itertools import compress, repeat
+from operator import attrgetter, is_, mul
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlencode
+
+from config import Config
+
+SERVICE_VM = "Virtual Machines"
+SERVICE_STORAGE = "Storage"
+
+UNIT_HOUR = "1 Hour"
+UNIT_GB_MONTH = "1 GB/Month"
+HOURS_PER_MONTH = 730
+
+SHEET_VERSION = 1
+# Installed as package data of copilot_data (see pyproject.toml)
+BUNDLED_SHEET = Path(__file__).resolve().parent / "copilot_data" / "retail_prices.json.gz"
+RETAIL_PRICES_URL = "https://prices.azure.com/api/retail/prices"
+
+# [service, sku, region, unit price, unit], as stored in a sheet file
+PriceRow = list[Any]
+
+# Block blob products whose capacity meters price a StorageV2 account
+_STORAGE_PRODUCTS = frozenset({"General Block Blob v2", "Premium Block Blob"})
+_ITEM_KEY = attrgetter("service", "sku", "region")
+_STORAGE_METER = re.compile(r"^(Hot|Premium) (LRS|ZRS|GRS|RA-GRS|GZRS|RA-GZRS) Data Stored$")
+
+
+# Not frozen: a sheet builds tens of thousands, and frozen __init__ is much slower
+@dataclass(slots=True)
+class Price:
+    """Retail price of one SKU in one region."""
+
+    service: str
+    sku: str
+    region: str
+    unit_price: float
+    unit: str
+
+
+@dataclass(frozen=True)
+class CostItem:
+    """Something a command would create."""
+
+    service: str
+    sku: str
+    region: str
+    # Units billed per month (hours or GB); None uses the estimator's default
+    quantity: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class CostEstimate:
+    """Monthly cost of one item; monthly is None when the sheet has no price."""
+
+    item: CostItem
+    price: Optional[Price]
+    quantity: float
+    monthly: Optional[float]
+
+    def describe(self) -> str:
+        item = self.item
+        if self.price is None:
+            return f"{item.sku} ({item.service}) in {item.region}: no price known"
+        unit = "hour" if self.price.unit == UNIT_HOUR else "GB/month"
+        usage = (
+            f"{self.quantity:g} hours" if self.price.unit == UNIT_HOUR else f"{self.quantity:g} GB"
+        )
+        return (
+            f"{self.price.sku} ({self.price.service}) in {self.price.region}: "
+            f"${self.price.unit_price:.4f} per {unit}, about ${self.monthly:,.2f}/month for {usage}"
+        )
+
+
+@dataclass(frozen=True)
+class BatchEstimate:
+    """
+    Estimates of many items, as columns in input order.
+
+    costs holds each item's monthly cost, 0.0 where prices has None.
+    """
+
+    items: Sequence[CostItem]
+    prices: list[Optional[Price]]
+    quantities: array
+    costs: array
+    monthly: float
+
+    @property
+    def estimates(self) -> list[CostEstimate]:
+        return [
+            CostEstimate(item, price, quantity, None if price is None else cost)
+            for item, price, quantity, cost in zip(
+                self.items, self.prices, self.quantities, self.costs, strict=True
+            )
+        ]
+
+    @property
+    def unpriced(self) -> list[CostItem]:
+        return list(compress(self.items, map(is_, self.prices, repeat(None))))
+
+    def summary(self) -> str:
+        unpriced = self.prices.count(None)
+        text = (
+            f"Estimated cost: about ${self.monthly:,.2f}/month"
+            f" for {len(self.prices) - unpriced} priced resources"
+        )
+        if unpriced:
+            text += f" ({unpriced} without a known price)"
+        return text
+
+
+# ============================================================================
+# Price Sheet
+# ============================================================================
+class PriceSheet:
+    """
+    Retail prices indexed by (service, SKU, region).
+
+    SKUs and regions are matched case-insensitively.
+
+    Example:
+        sheet = PriceSheet.load(BUNDLED_SHEET)
+        sheet.price(SERVICE_VM, "Standard_D4s_v5", "westeurope").unit_price
+    """
+
+    __slots__ = ("currency", "fetched_at", "source", "_index")
+
+    def __init__(
+        self,
+        rows: Iterable[Sequence[Any]],
+        fetched_at: float = 0.0,
+        currency: str = "USD",
+        source: str = "",
+    ) -> None:
+        """
+        Args:
+            rows: [service, sku, region, unit price, unit] lists. The first
+                row for a key wins.
+            fetched_at: When the prices were retrieved (epoch seconds).
+            currency: Currency of every price.
+            source: Where the prices came from, for display.
+        """
+        self.fetched_at = fetched_at
+        self.currency = currency
+        self.source = source
+        self._index: dict[tuple[str, str, str], Price] = {}
+        for service, sku, region, unit_price, unit in rows:
+            key = (service, sku.lower(), region.lower())
+            if key not in self._index:
+                self._index[key] = Price(service, sku, region, float(unit_price), unit)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def price(self, service: str, sku: str, region: str) -> Optional[Price]:
+        return self._index.get((service, sku.lower(), region.lower()))
+
+    def regions(self) -> list[str]:
+        return sorted({region for _service, _sku, region in self._index})
+
+    def is_stale(self, ttl: float, now: Optional[float] = None) -> bool:
+        return (time.time() if now is None else now) - self.fetched_at > ttl
+
+    def rows(self) -> list[PriceRow]:
+        return [[p.service, p.sku, p.region, p.unit_price, p.unit] for p in self._index.values()]
+
+    @classmethod
+    def load(cls, path: Path) -> "PriceSheet":
+        """
+        Read a sheet written by save().
+
+        Raises:
+            OSError: If the file cannot be read or is not gzip.
+            ValueError: If the contents are not a price sheet.
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            document = json.load(f)
+        if not isinstance(document, dict) or document.get("version") != SHEET_VERSION:
+            raise ValueError(f"{path} is not a version {SHEET_VERSION} price sheet")
+        return cls(
+            document["rows"],
+            fetched_at=document.get("fetched_at", 0.0),
+            currency=document.get("currency", "USD"),
+            source=document.get("source", str(path)),
+        )
+
+    def save(self, path: Path) -> None:
+        """Write the sheet gzip-compressed, replacing any previous file atomically."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        document = {
+            "version": SHEET_VERSION,
+            "fetched_at": self.fetched_at,
+            "currency": self.currency,
+            "source": self.source,
+            "rows": self.rows(),
+        }
+        with gzip.open(temporary, "wt", encoding="utf-8") as f:
+            json.dump(document, f, separators=(",", ":"))
+        os.replace(temporary, path)
+
+
+def load_price_sheet(path: Path) -> PriceSheet:
+    """
+    The sheet at path, or the bundled one if path is missing or unreadable.
+
+    An empty sheet if neither can be read, so estimates say "no price known"
+    instead of failing the command.
+    """
+    for candidate in (path, BUNDLED_SHEET):
+        try:
+            return PriceSheet.load(candidate)
+        except (OSError, ValueError, EOFError):
+            continue
+    return PriceSheet([])
+
+
+def _price_row(item: dict[str, Any]) -> Optional[PriceRow]:
+    """A sheet row for a Retail Prices API item, or None if estimates do not use it."""
+    if item.get("type") != "Consumption" or item.get("tierMinimumUnits", 0):
+        return None
+    service, region = item.get("serviceName"), item.get("armRegionName")
+    product, unit = item.get("productName", ""), item.get("unitOfMeasure")
+    if service == SERVICE_VM:
+        name = item.get("skuName", "")
+        if unit != UNIT_HOUR or "Windows" in product or "Spot" in name or "Low Priority" in name:
+            return None
+        return [SERVICE_VM, item["armSkuName"], region, item["retailPrice"], UNIT_HOUR]
+    if service == SERVICE_STORAGE and product in _STORAGE_PRODUCTS and unit == UNIT_GB_MONTH:
+        meter = _STORAGE_METER.match(item.get("meterName", ""))
+        if meter is None:
+            return None
+        tier, redundancy = meter.groups()
+        sku = f"{'Premium' if tier == 'Premium' else 'Standard'}_{redundancy.replace('-', '')}"
+        return [SERVICE_STORAGE, sku, region, item["retailPrice"], UNIT_GB_MONTH]
+    return None
+
+
+def fetch_retail_prices(
+    regions: Sequence[str], urlopen: Optional[Callable[..., Any]] = None, timeout: float = 30.0
+) -> PriceSheet:
+    """
+    Download VM and storage prices for some regions from the Retail Prices API.
+
+    Args:
+        regions: ARM region names, e.g. ["eastus", "westeurope"].
+        urlopen: urllib.request.urlopen or a stand-in.
+        timeout: Seconds per page request.
+
+    Raises:
+        OSError: If a request fails.
+        ValueError: If a response is not JSON.
+        KeyError: If a price item lacks a field estimates need.
+    """
+    import urllib.request
+
+    opener = urlopen or urllib.request.urlopen
+    rows: list[PriceRow] = []
+    for region in regions:
+        for service in (SERVICE_VM, SERVICE_STORAGE):
+            query = (
+                f"serviceName eq '{service}' and priceType eq 'Consumption'"
+                f" and armRegionName eq '{region}'"
+            )
+            url: Optional[str] = f"{RETAIL_PRICES_URL}?{urlencode({'$filter': query})}"
+            while url:
+                with opener(url, timeout=timeout) as response:
+                    page = json.load(response)
+                rows.extend(row for row in map(_price_row, page.get("Items", [])) if row)
+                url = page.get("NextPageLink")
+    return PriceSheet(rows, fetched_at=time.time(), source=RETAIL_PRICES_URL)
+
+
+# ============================================================================
+# Estimator
+# ============================================================================
+class CostEstimator:
+    """
+    Monthly cost estimates from a PriceSheet.
+
+    Example:
+        estimator = get_cost_estimator(config)
+        estimator.estimate(CostItem(SERVICE_STORAGE, "Standard_GRS", "westeurope")).monthly
+    """
+
+    def __init__(
+        self, sheet: PriceSheet, storage_gb: float = 100.0, hours: float = HOURS_PER_MONTH
+    ) -> None:
+        """
+        Args:
+            sheet: Prices to estimate from; refresh_in_background() replaces it.
+            storage_gb: GB a storage account is assumed to hold.
+            hours: Hours a VM is assumed to run per month.
+        """
+        self.sheet = sheet
+        self.storage_gb = storage_gb
+        self.hours = hours
+        self.config: Optional[Config] = None
+        self.refresh_error: Optional[Exception] = None
+        self._refresh: Optional[threading.Thread] = None
+
+    def default_quantity(self, service: str) -> float:
+        return self.storage_gb if service == SERVICE_STORAGE else self.hours
+
+    def estimate(self, item: CostItem) -> CostEstimate:
+        price = self.sheet.price(item.service, item.sku, item.region)
+        quantity = self.default_quantity(item.service) if item.quantity is None else item.quantity
+        monthly = None if price is None else price.unit_price * quantity
+        return CostEstimate(item, price, quantity, monthly)
+
+    def estimate_batch(self, items: Sequence[CostItem]) -> BatchEstimate:
+        """
+        Estimate many items at once.
+
+        Each distinct (service, SKU, region) is looked up once; prices and
+        quantities are then multiplied as columns.
+        """
+        keys = list(map(_ITEM_KEY, items))
+        found = {key: self.sheet.price(*key) for key in set(keys)}
+        prices = list(map(found.__getitem__, keys))
+        unit_prices = array("d", (0.0 if p is None else p.unit_price for p in prices))
+        defaults = {SERVICE_STORAGE: self.storage_gb}
+        quantities = array(
+            "d",
+            (
+                defaults.get(item.service, self.hours) if item.quantity is None else item.quantity
+                for item in items
+            ),
+        )
+        costs = array("d", map(mul, unit_prices, quantities))
+        return BatchEstimate(items, prices, quantities, costs, math.fsum(costs))
+
+    def refresh_in_background(
+        self, fetch: Callable[[], PriceSheet], path: Optional[Path] = None
+    ) -> threading.Thread:
+        """
+        Fetch a new sheet on a daemon thread, save it to path and swap it in.
+
+        A failed fetch keeps the current sheet and is kept in refresh_error.
+        Only one refresh runs at a time.
+        """
+        if self._refresh is not None and self._refresh.is_alive():
+            return self._refresh
+
+        def refresh() -> None:
+            try:
+                sheet = fetch()
+                if path is not None:
+                    sheet.save(path)
+            except (OSError, ValueError, KeyError) as e:
+                self.refresh_error = e
+                return
+            self.refresh_error = None
+            self.sheet = sheet
+
+        self._refresh = threading.Thread(target=refresh, name="price-sheet-refresh", daemon=True)
+        self._refresh.start()
+        return self._refresh
+
+
+_estimator: Optional[CostEstimator] = None
+_estimator_lock = threading.Lock()
+_background_refresh = False
+
+
+def enable_background_refresh() -> None:
+    """Let get_cost_estimator() refresh stale sheets; for processes that outlive a download."""
+    global _background_refresh
+    _background_refresh = True
+
+
+def get_cost_estimator(config: Config) -> CostEstimator:
+    """
+    Return the process-wide estimator for a config.
+
+    Loads the local sheet (or the bundled one) and, once
+    enable_background_refresh() has been called, PRICE_SHEET_REFRESH is on and
+    the sheet is older than PRICE_SHEET_TTL, starts refreshing it in the
+    background for the regions it covers plus the default location.
+    """
+    global _estimator
+    with _estimator_lock:
+        if _estimator is not None and _estimator.config is config:
+            return _estimator
+        sheet = load_price_sheet(config.price_sheet_path)
+        estimator = CostEstimator(sheet, storage_gb=config.cost_storage_gb)
+        estimator.config = config
+        refresh = _background_refresh and config.price_sheet_refresh
+        if refresh and sheet.is_stale(config.price_sheet_ttl):
+            regions = sorted({*sheet.regions(), config.default_location.lower()})
+            estimator.refresh_in_background(
+                lambda: fetch_retail_prices(regions), config.price_sheet_path
+            )
+        _estimator = estimator
+        return estimator
@@ -0,0 +1,528 @@
+"""
+Offline retrieval index over local Azure documentation.
+
+Markdown files under Config.docs_path are split into heading-scoped chunks and
+stored in SQLite next to their embeddings. Ingestion is incremental: chunks
+are keyed by a hash of their content, so re-running it only embeds chunks
+that are new or changed and deletes those that disappeared. Embedding runs in
+batches across a process pool.
+
+Search is hybrid:
+
+1. BM25 over an FTS5 table (exact terms such as "--sku" or "Standard_LRS").
+2. Cosine similarity over the in-memory embeddings (paraphrases).
+3. Reciprocal rank fusion of both candidate lists, then a rerank of the fused
+   candidates that also rewards query terms in the heading and phrase matches.
+
+Retrieved chunks feed the translator's prompt as reference documentation.
+"""
+
+import hashlib
+import heapq
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Optional
+
+from config import Config, retire
+from embeddings import Embedder, EmbeddingError, cosine, get_embedder
+from prompts import overlap
+
+INDEX_FILENAME = "docs_index.db"
+DEFAULT_CHUNK_CHARS = 1200
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_CANDIDATES = 40
+# Reciprocal rank fusion constant; 60 is the value from the original RRF paper
+RRF_K = 60
+# Rerank weights: semantic similarity, query term coverage, heading match, phrase match
+RERANK_WEIGHTS = (0.5, 0.3, 0.1, 0.1)
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_TERM = re.compile(r"[a-z0-9]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id        INTEGER PRIMARY KEY,
+    path      TEXT NOT NULL,
+    hash      TEXT NOT NULL,
+    position  INTEGER NOT NULL,
+    heading   TEXT NOT NULL,
+    text      TEXT NOT NULL,
+    model     TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    UNIQUE (path, hash)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(heading, text);
+"""
+
+
+@dataclass(frozen=True)
+class DocChunk:
+    """A heading-scoped piece of a document."""
+
+    path: str
+    position: int
+    heading: str
+    text: str
+
+    @property
+    def content(self) -> str:
+        """What gets embedded and shown: the heading path, then the text."""
+        return f"{self.heading}\n{self.text}" if self.heading else self.text
+
+    @property
+    def hash(self) -> str:
+        return hashlib.sha256(self.content.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class IngestReport:
+    """What an ingestion run did."""
+
+    files: int
+    chunks: int
+    embedded: int
+    removed: int
+    seconds: float
+
+    @property
+    def reused(self) -> int:
+        return self.chunks - self.embedded
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.files} files, {self.chunks} chunks: {self.embedded} embedded, "
+            f"{self.reused} unchanged, {self.removed} removed in {self.seconds:.2f} s "
+            f"({self.chunks_per_second:.0f} chunks/s)"
+        )
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """A retrieved chunk and how it ranked."""
+
+    chunk: DocChunk
+    score: float
+    lexical_rank: Optional[int] = None
+    vector_rank: Optional[int] = None
+
+
+# ============================================================================
+# Chunking
+# ============================================================================
+def _split_long(paragraph: str, max_chars: int) -> list[str]:
+    """Split a paragraph longer than max_chars at whitespace."""
+    pieces: list[str] = []
+    while len(paragraph) > max_chars:
+        cut = paragraph.rfind(" ", 0, max_chars)
+        cut = cut if cut > 0 else max_chars
+        pieces.append(paragraph[:cut].rstrip())
+        paragraph = paragraph[cut:].lstrip()
+    if paragraph:
+        pieces.append(paragraph)
+    return pieces
+
+
+def chunk_markdown(path: str, text: str, max_chars: int = DEFAULT_CHUNK_CHARS) -> list[DocChunk]:
+    """
+    Split a markdown document into chunks of at most max_chars.
+
+    Each chunk stays within one section and carries its heading path
+    ("Virtual machines > Stop a VM"). Paragraphs are packed together until
+    the limit; fenced code blocks are kept whole unless they alone exceed it.
+
+    Args:
+        path: Document path recorded on every chunk.
+        text: Markdown source.
+        max_chars: Upper bound on a chunk's text length.
+    """
+    chunks: list[DocChunk] = []
+    headings: list[tuple[int, str]] = []
+    paragraphs: list[str] = []
+    lines: list[str] = []
+    in_fence = False
+
+    def end_paragraph() -> None:
+        if lines:
+            paragraphs.append("\n".join(lines).strip())
+            lines.clear()
+
+    def end_section() -> None:
+        end_paragraph()
+        heading = " > ".join(title for _, title in headings)
+        current = ""
+        for paragraph in filter(None, paragraphs):
+            for piece in _split_long(paragraph, max_chars):
+                if current and len(current) + 2 + len(piece) > max_chars:
+                    chunks.append(DocChunk(path, len(chunks), heading, current))
+                    current = ""
+                current = f"{current}\n\n{piece}" if current else piece
+        if current:
+            chunks.append(DocChunk(path, len(chunks), heading, current))
+        paragraphs.clear()
+
+    for line in text.splitlines():
+        if _FENCE.match(line):
+            in_fence = not in_fence
+            lines.append(line)
+            continue
+        heading = None if in_fence else _HEADING.match(line)
+        if heading:
+            end_section()
+            level = len(heading.group(1))
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, heading.group(2)))
+        elif not line.strip() and not in_fence:
+            end_paragraph()
+        else:
+            lines.append(line)
+    end_section()
+    return chunks
+
+
+# ============================================================================
+# Embedding
+# ============================================================================
+def _embed_batch(embedder: Embedder, texts: Sequence[str]) -> list[bytes]:
+    # Runs in a worker process; float32 bytes are much cheaper to send back than lists
+    return [array("f", vector).tobytes() for vector in embedder.embed(texts)]
+
+
+def embed_in_batches(
+    embedder: Embedder,
+    texts: Sequence[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: Optional[int] = None,
+) -> list[bytes]:
+    """
+    Embed texts in batches, spread across a process pool.
+
+    Args:
+        embedder: Must be picklable to be sent to worker processes.
+        texts: Texts to embed.
+        batch_size: Texts per embedder call.
+        workers: Worker processes. None uses one per CPU; 1 embeds in this process.
+
+    Returns:
+        One float32 vector per text, as bytes, in input order.
+
+    Raises:
+        EmbeddingError: If any batch fails.
+    """
+    batches = [texts[start : start + batch_size] for start in range(0, len(texts), batch_size)]
+    workers = min(workers or os.cpu_count() or 1, len(batches))
+    embed = partial(_embed_batch, embedder)
+    if workers <= 1:
+        results = map(embed, batches)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(embed, batches))
+    return [vector for batch in results for vector in batch]
+
+
+# ============================================================================
+# Index
+# ============================================================================
+def _terms(text: str) -> list[str]:
+    return _TERM.findall(text.lower())
+
+
+def _bigrams(terms: Sequence[str]) -> set[tuple[str, str]]:
+    return set(zip(terms, terms[1:], strict=False))
+
+
+class DocsIndex:
+    """
+    Hybrid BM25 + vector index of documentation chunks.
+
+    Example:
+        index = DocsIndex(Path("./data/chroma/docs_index.db"), HashingEmbedder())
+        index.ingest(Path("./data/azure-docs"))
+        for result in index.search("resize a virtual machine"):
+            print(result.chunk.heading, result.score)
+    """
+
+    def __init__(self, path: Path, embedder: Embedder) -> None:
+        """
+        Open (and create if needed) the index database.
+
+        Args:
+            path: SQLite file location. Use ":memory:" for a throwaway index.
+            embedder: Embeds chunks and queries. Chunks embedded by a
+                different model are re-embedded on the next ingest.
+        """
+        self.embedder = embedder
+        self.config: Optional[Config] = None
+        self._vectors: Optional[list[tuple[int, array]]] = None
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()
+        return int(count)
+
+    # ------------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------------
+    def ingest(
+        self,
+        root: Path,
+        max_chars: int = DEFAULT_CHUNK_CHARS,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        workers: Optional[int] = None,
+    ) -> IngestReport:
+        """
+        Bring the index in line with the markdown files under root.
+
+        Only chunks whose content hash is not already indexed (for the
+        current embedding model) are embedded. Chunks of files that changed
+        or were deleted are removed, so the index mirrors root.
+
+        Raises:
+            FileNotFoundError: If root is not a directory.
+            EmbeddingError: If embedding fails; the index is left unchanged.
+        """
+        start = time.perf_counter()
+        root = Path(root)
+        if not root.is_dir():
+            raise FileNotFoundError(f"Docs directory not found: {root}")
+        files = sorted(root.rglob("*.md"))
+        wanted: dict[tuple[str, str], DocChunk] = {}
+        for file in files:
+            relative = file.relative_to(root).as_posix()
+            for chunk in chunk_markdown(relative, file.read_text(encoding="utf-8"), max_chars):
+                wanted.setdefault((chunk.path, chunk.hash), chunk)
+
+        with self._lock:
+            indexed = {
+                (path, digest): row_id
+                for row_id, path, digest in self._db.execute(
+                    "SELECT id, path, hash FROM chunks WHERE model = ?", (self.embedder.name,)
+                )
+            }
+            (total,) = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()
+        new = [chunk for key, chunk in wanted.items() if key not in indexed]
+        vectors = embed_in_batches(
+            self.embedder, [chunk.content for chunk in new], batch_size, workers
+        )
+        stale = [row_id for key, row_id in indexed.items() if key not in wanted]
+
+        with self._lock, self._db:
+            # Rows from another embedding model are not in `indexed` and go too
+            removed = total - len(indexed) + len(stale)
+            self._db.execute(
+                "DELETE FROM chunks_fts WHERE rowid IN" " (SELECT id FROM chunks WHERE model != ?)",
+                (self.embedder.name,),
+            )
+            self._db.execute("DELETE FROM chunks WHERE model != ?", (self.embedder.name,))
+            for row_id in stale:
+                self._db.execute("DELETE FROM chunks WHERE id = ?", (row_id,))
+                self._db.execute("DELETE FROM chunks_fts WHERE rowid = ?", (row_id,))
+            self._db.executemany(
+                "UPDATE chunks SET position = ? WHERE id = ?",
+                [
+                    (wanted[key].position, row_id)
+                    for key, row_id in indexed.items()
+                    if key in wanted
+                ],
+            )
+            for chunk, vector in zip(new, vectors, strict=True):
+                cursor = self._db.execute(
+                    "INSERT INTO chunks (path, hash, position, heading, text, model, embedding)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        chunk.path,
+                        chunk.hash,
+                        chunk.position,
+                        chunk.heading,
+                        chunk.text,
+                        self.embedder.name,
+                        vector,
+                    ),
+                )
+                self._db.execute(
+                    "INSERT INTO chunks_fts (rowid, heading, text) VALUES (?, ?, ?)",
+                    (cursor.lastrowid, chunk.heading, chunk.text),
+                )
+            self._vectors = None
+        return IngestReport(len(files), len(wanted), len(new), removed, time.perf_counter() - start)
+
+    # ------------------------------------------------------------------------
+    # Retrieval
+    # ------------------------------------------------------------------------
+    def _lexical(self, terms: Sequence[str], limit: int) -> list[int]:
+        """Chunk ids by BM25 score, headings weighted double."""
+        if not terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT rowid FROM chunks_fts WHERE chunks_fts MATCH ?"
+                " ORDER BY bm25(chunks_fts, 2.0, 1.0) LIMIT ?",
+                (match, limit),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _load_vectors(self) -> list[tuple[int, array]]:
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = [
+                    (row_id, array("f", blob))
+                    for row_id, blob in self._db.execute("SELECT id, embedding FROM chunks")
+                ]
+            return self._vectors
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        candidates: int = DEFAULT_CANDIDATES,
+        rerank: bool = True,
+    ) -> list[SearchResult]:
+        """
+        Find the chunks most relevant to a query.
+
+        Args:
+            query: Natural language or az CLI text.
+            k: Results to return.
+            candidates: Results taken from each retriever before fusion.
+            rerank: Reorder fused candidates with the reranker; when False
+                they are returned in fusion order.
+
+        Returns:
+            Up to k results, best first. Lexical results are still returned
+            if the query cannot be embedded.
+        """
+        terms = _terms(query)
+        lexical = self._lexical(terms, candidates)
+        try:
+            query_vector: Optional[list[float]] = self.embedder.embed([query])[0]
+        except EmbeddingError:
+            query_vector = None
+        similarity: dict[int, float] = {}
+        if query_vector is not None:
+            similarity = {
+                row_id: cosine(query_vector, vector) for row_id, vector in self._load_vectors()
+            }
+        semantic = heapq.nlargest(candidates, similarity, key=similarity.__getitem__)
+
+        lexical_rank = {row_id: rank for rank, row_id in enumerate(lexical, 1)}
+        vector_rank = {row_id: rank for rank, row_id in enumerate(semantic, 1)}
+        fused = {
+            row_id: sum(1 / (RRF_K + ranks[row_id]) for ranks in (lexical_rank, vector_rank) if row_id in ranks)
+            for row_id in lexical_rank.keys() | vector_rank.keys()
+        }  # fmt: skip
+        ranked = sorted(fused, key=lambda row_id: (-fused[row_id], row_id))[:candidates]
+        if not ranked:
+            return []
+
+        with self._lock:
+            rows = {
+                row[0]: DocChunk(*row[1:])
+                for row in self._db.execute(
+                    "SELECT id, path, position, heading, text FROM chunks"
+                    f" WHERE id IN ({','.join('?' * len(ranked))})",
+                    ranked,
+                )
+            }
+        results = [
+            SearchResult(
+                rows[row_id], fused[row_id], lexical_rank.get(row_id), vector_rank.get(row_id)
+            )
+            for row_id in ranked
+        ]
+        if rerank:
+            scores = {
+                row_id: rerank_score(query, rows[row_id], similarity.get(row_id, 0.0))
+                for row_id in ranked
+            }
+            results = sorted(
+                (
+                    SearchResult(r.chunk, scores[row_id], r.lexical_rank, r.vector_rank)
+                    for row_id, r in zip(ranked, results, strict=True)
+                ),
+                key=lambda result: -result.score,
+            )
+        return results[:k]
+
+    @classmethod
+    def from_config(cls, config: Config) -> "DocsIndex":
+        """Open the index in Config.chroma_persist_directory with the configured embedder."""
+        index = cls(config.chroma_persist_directory / INDEX_FILENAME, get_embedder(config))
+        index.config = config
+        return index
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._db.close()
+
+
+def rerank_score(query: str, chunk: DocChunk, similarity: float) -> float:
+    """
+    Relevance of a fused candidate, combining RERANK_WEIGHTS of:
+
+    - the embedding similarity of query and chunk,
+    - the fraction of query terms found in the chunk,
+    - the fraction of query terms found in its heading,
+    - the fraction of the query's word pairs found in the chunk in order.
+
+    A lightweight stand-in for a cross-encoder that needs no model download.
+    """
+    query_bigrams = _bigrams(_terms(query))
+    phrase = (
+        len(query_bigrams & _bigrams(_terms(chunk.content))) / len(query_bigrams)
+        if query_bigrams
+        else 0.0
+    )
+    features = (similarity, overlap(query, chunk.content), overlap(query, chunk.heading), phrase)
+    return sum(weight * value for weight, value in zip(RERANK_WEIGHTS, features, strict=True))
+
+
+# ============================================================================
+# Shared Index
+# ============================================================================
+_index: Optional[DocsIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_docs_index(config: Config) -> DocsIndex:
+    """Return the process-wide docs index for a config."""
+    global _index
+    with _index_lock:
+        if _index is None or _index.config is not config:
+            if _index is not None:
+                retire(_index.close)
+            _index = DocsIndex.from_config(config)
+        return _index
+
+
+def retrieve(config: Config, query: str, k: int = 3) -> list[tuple[str, float]]:
+    """
+    Documentation for a prompt, as (text, relevance) pairs.
+
+    Returns an empty list, without creating anything, when no docs have been
+    ingested yet.
+    """
+    if not (config.chroma_persist_directory / INDEX_FILENAME).exists():
+        return []
+    return [(r.chunk.content, r.score) for r in get_docs_index(config).search(query, k)]
@@ -0,0 +1,137 @@
+"""
+Text embeddings for Azure Copilot.
+
+Two embedders share one interface (``embed(texts) -> list of vectors``):
+
+- AzureOpenAIEmbedder calls the embeddings deployment named by
+  Config.embedding_model on the configured Azure OpenAI resource.
+- HashingEmbedder hashes words and character trigrams into a fixed number of
+  buckets. It needs no network or model download and always returns the same
+  vector for the same text, so tests and offline use behave deterministically.
+
+Vectors are L2-normalized, so cosine similarity is a plain dot product.
+"""
+
+import hashlib
+import json
+import math
+import operator
+import re
+import urllib.error
+import urllib.request
+from collections.abc import Sequence
+from typing import Optional, Protocol
+
+from config import Config
+from tracing import span
+
+HASHING_DIMENSIONS = 256
+EMBEDDING_TIMEOUT_SECONDS = 30
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9._-]*")
+
+
+class EmbeddingError(Exception):
+    """Raised when texts cannot be embedded."""
+
+
+class Embedder(Protocol):
+    """Anything that turns texts into unit-length vectors."""
+
+    name: str
+
+    def embed(self, texts: Sequence[str]) -> list[list[float]]: ...
+
+
+def normalize_vector(vector: Sequence[float]) -> list[float]:
+    """Scale a vector to unit length (zero vectors are returned unchanged)."""
+    norm = math.sqrt(sum(x * x for x in vector))
+    if not norm:
+        return list(vector)
+    return [x / norm for x in vector]
+
+
+def cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    """Cosine similarity of two unit-length vectors."""
+    return sum(map(operator.mul, a, b))
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-features embedder for tests and offline use.
+
+    Similar phrasings share most of their words and trigrams and so land
+    close together; it has no notion of synonyms.
+    """
+
+    def __init__(self, dimensions: int = HASHING_DIMENSIONS) -> None:
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def _bucket(self, feature: str) -> tuple[int, float]:
+        digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dimensions, 1.0 if value >> 63 else -1.0
+
+    def embed_one(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimensions
+        for word in _WORD.findall(text.lower()):
+            index, sign = self._bucket(f"w:{word}")
+            vector[index] += sign
+            padded = f"#{word}#"
+            for start in range(len(padded) - 2):
+                index, sign = self._bucket(f"t:{padded[start : start + 3]}")
+                vector[index] += 0.5 * sign
+        return normalize_vector(vector)
+
+    def embed(self, texts: Sequence[str]) -> list[list[float]]:
+        return [self.embed_one(text) for text in texts]
+
+
+class AzureOpenAIEmbedder:
+    """Embeddings from an Azure OpenAI deployment, over its REST API."""
+
+    def __init__(self, config: Config, timeout: float = EMBEDDING_TIMEOUT_SECONDS) -> None:
+        if not config.is_openai_configured():
+            raise EmbeddingError("Azure OpenAI is not configured (AZURE_OPENAI_ENDPOINT/API_KEY)")
+        self.name = config.embedding_model
+        self._url = (
+            f"{(config.openai_endpoint or '').rstrip('/')}/openai/deployments/"
+            f"{config.embedding_model}/embeddings?api-version={config.openai_api_version}"
+        )
+        self._api_key = config.openai_api_key or ""
+        self._timeout = timeout
+
+    def embed(self, texts: Sequence[str]) -> list[list[float]]:
+        """
+        Embed texts in one request.
+
+        Raises:
+            EmbeddingError: If the request fails or the response is malformed.
+        """
+        if not texts:
+            return []
+        request = urllib.request.Request(
+            self._url,
+            data=json.dumps({"input": list(texts)}).encode(),
+            headers={"Content-Type": "application/json", "api-key": self._api_key},
+        )
+        try:
+            with (
+                span("llm.embed", texts=len(texts)),
+                urllib.request.urlopen(request, timeout=self._timeout) as response,
+            ):
+                body = json.load(response)
+            rows = sorted(body["data"], key=lambda row: row["index"])
+            return [normalize_vector(row["embedding"]) for row in rows]
+        except (urllib.error.URLError, TimeoutError) as e:
+            raise EmbeddingError(f"Embedding request failed: {e}") from e
+        except (KeyError, TypeError, ValueError) as e:
+            raise EmbeddingError(f"Unexpected embedding response: {e}") from e
+
+
+def get_embedder(config: Optional[Config] = None) -> Embedder:
+    """The Azure OpenAI embedder when configured, otherwise the hashing embedder."""
+    if config is not None and config.is_openai_configured():
+        return AzureOpenAIEmbedder(config)
+    return HashingEmbedder()
@@ -0,0 +1,399 @@
+"""
+Entity extraction for Azure Copilot commands.
+
+Pulls the resource name, resource group, location, SKU, resource type, tags
+and grouping column out of a natural language command once its intent is
+known, for example:
+
+    "create storage account logs01 in rg-prod"
+        -> Entities(name="logs01", resource_group="rg-prod",
+                    resource_type="Microsoft.Storage/storageAccounts")
+    "create a resource group called rg-prod in westeurope"
+        -> Entities(name="rg-prod", location="westeurope")
+    "show vms in eastus tagged env=prod"
+        -> Entities(location="eastus", resource_type="Microsoft.Compute/virtualMachines",
+                    tags=(("env", "prod"),))
+    "how many vms per region"
+        -> Entities(resource_type="Microsoft.Compute/virtualMachines", group_by="location")
+    "how much is a d4s_v5 in West Europe"
+        -> Entities(location="westeurope", sku="Standard_D4s_v5")
+
+Extraction is rules over one pass of the tokens: regions and SKUs come from
+frozen lexicons built at import, and the phrase tables are indexed by first
+word, so a command takes a few microseconds. When the rules find no name,
+an optional spaCy pipeline (ENTITY_MODEL) can be asked for one; spaCy is
+only imported the first time that happens.
+"""
+
+import re
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from functools import cache
+from types import MappingProxyType
+from typing import Any, Optional
+
+from config import Config
+
+# ============================================================================
+# Lexicons
+# ============================================================================
+# Azure regions by display name. The ARM name is the display name without
+# spaces ("West Europe" -> westeurope); either spelling is recognized.
+REGION_NAMES = (
+    "Australia East",
+    "Australia Southeast",
+    "Brazil South",
+    "Canada Central",
+    "Canada East",
+    "Central India",
+    "Central US",
+    "East Asia",
+    "East US",
+    "East US 2",
+    "France Central",
+    "Germany West Central",
+    "Japan East",
+    "Japan West",
+    "Korea Central",
+    "North Central US",
+    "North Europe",
+    "Norway East",
+    "South Africa North",
+    "South Central US",
+    "Southeast Asia",
+    "South India",
+    "Sweden Central",
+    "Switzerland North",
+    "UAE North",
+    "UK South",
+    "UK West",
+    "West Central US",
+    "West Europe",
+    "West US",
+    "West US 2",
+    "West US 3",
+)
+
+# ARM names of the regions above. Only these count as a location after
+# "in" / "at"; anything else there is taken to be a resource group.
+LOCATIONS = frozenset(name.replace(" ", "").lower() for name in REGION_NAMES)
+
+STORAGE_SKUS = frozenset(
+    {
+        "Standard_LRS",
+        "Standard_ZRS",
+        "Standard_GRS",
+        "Standard_RAGRS",
+        "Standard_GZRS",
+        "Standard_RAGZRS",
+        "Premium_LRS",
+        "Premium_ZRS",
+    }
+)
+
+
+def _vm_sizes() -> Iterator[str]:
+    """Common VM sizes of the B, D, E, F and NC series."""
+    for size in ("1ls", "1s", "1ms", "2s", "2ms", "2ats_v2", "4ms", "8ms", "12ms", "16ms", "20ms"):
+        yield f"Standard_B{size}"
+    for family, cores in (
+        ("D", (2, 4, 8, 16, 32, 48, 64, 96)),
+        ("E", (2, 4, 8, 16, 20, 32, 48, 64, 96)),
+    ):
+        for count in cores:
+            for features in ("", "s", "d", "ds", "a", "as", "ads"):
+                for version in ("v3", "v4", "v5"):
+                    yield f"Standard_{family}{count}{features}_{version}"
+    for count in (2, 4, 8, 16, 32, 48, 64, 72):
+        yield f"Standard_F{count}s_v2"
+    yield from ("Standard_NC6s_v3", "Standard_NC12s_v3", "Standard_NC24s_v3")
+    for count in (4, 8, 16, 64):
+        yield f"Standard_NC{count}as_T4_v3"
+
+
+VM_SIZES = frozenset(_vm_sizes())
+
+# Lower-cased SKU -> SKU as Azure spells it, for both lexicons
+SKUS = MappingProxyType({sku.lower(): sku for sku in STORAGE_SKUS | VM_SIZES})
+
+
+def _region_phrases() -> dict[str, tuple[tuple[tuple[str, ...], str], ...]]:
+    """Multi-word region names by first word, longest first so "east us 2" wins over "east us"."""
+    phrases: dict[str, tuple[tuple[tuple[str, ...], str], ...]] = {}
+    for name in sorted(REGION_NAMES, key=len, reverse=True):
+        if " " in name:
+            words = tuple(name.lower().split())
+            phrases[words[0]] = (*phrases.get(words[0], ()), (words, "".join(words)))
+    return phrases
+
+
+_REGION_PHRASES = _region_phrases()
+
+# VM sizes outside the lexicon, which always carry the Standard_ prefix
+_VM_SIZE = re.compile(r"standard_[a-z]+\d+[a-z0-9_]*", re.IGNORECASE)
+_TOKEN = re.compile(r"[^\s,]+")
+# Sentence punctuation ignored when a word is looked up in a lexicon
+_PUNCTUATION = "?!."
+
+
+def canonical_sku(word: str) -> Optional[str]:
+    """
+    The SKU a word names, spelled as Azure does, or None.
+
+    Storage SKUs and common VM sizes are recognized without their Standard_
+    prefix ("ra-grs", "d4s_v5"); other VM sizes only with it.
+    """
+    word = word.rstrip(_PUNCTUATION)
+    key = word.lower().replace("-", "")
+    sku = SKUS.get(key) or SKUS.get(f"standard_{key}")
+    if sku is None and _VM_SIZE.fullmatch(word):
+        return word
+    return sku
+
+
+# Phrases naming a kind of resource; the word after one is its name
+RESOURCE_KINDS = (
+    ("resource", "group"),
+    ("storage", "account"),
+    ("rg",),
+    ("group",),
+    ("storage",),
+    ("account",),
+)
+
+# Phrases naming a resource type, matched in the singular
+RESOURCE_TYPES = (
+    (("virtual", "machine"), "Microsoft.Compute/virtualMachines"),
+    (("vm",), "Microsoft.Compute/virtualMachines"),
+    (("storage", "account"), "Microsoft.Storage/storageAccounts"),
+    (("virtual", "network"), "Microsoft.Network/virtualNetworks"),
+    (("vnet",), "Microsoft.Network/virtualNetworks"),
+    (("web", "app"), "Microsoft.Web/sites"),
+    (("app", "service"), "Microsoft.Web/sites"),
+    (("key", "vault"), "Microsoft.KeyVault/vaults"),
+)
+
+# Phrases after "per" / "by" naming the column to group counts by
+GROUP_BY_COLUMNS = (
+    (("resource", "group"), "resource_group"),
+    (("rg",), "resource_group"),
+    (("group",), "resource_group"),
+    (("region",), "location"),
+    (("location",), "location"),
+    (("type",), "type"),
+)
+
+# Words that introduce another entity and therefore never are a name
+_MARKERS = frozenset(
+    {
+        "in",
+        "at",
+        "called",
+        "named",
+        "location",
+        "region",
+        "sku",
+        "with",
+        "on",
+        "tag",
+        "tags",
+        "tagged",
+        "per",
+        "by",
+        "subscription",
+    }
+)
+_FILLERS = frozenset({"a", "an", "the", "new"})
+# Words between "in" and what it is in: "in my subscription", "in the rg-x"
+_DETERMINERS = frozenset({"my", "our", "the", "this", "that"})
+_TAG = re.compile(r"^([\w.-]+)[=:](.+)$")
+
+
+@dataclass(frozen=True)
+class Entities:
+    """Values mentioned in a command. Anything not mentioned is None."""
+
+    name: Optional[str] = None
+    resource_group: Optional[str] = None
+    location: Optional[str] = None
+    sku: Optional[str] = None
+    resource_type: Optional[str] = None
+    # (name, value) pairs from "tagged env=prod"
+    tags: tuple[tuple[str, str], ...] = ()
+    # Resource row column from "per region" / "by resource group"
+    group_by: Optional[str] = None
+
+
+def _singular(word: str) -> str:
+    return word[:-1] if word.endswith("s") and len(word) > 2 else word
+
+
+def _phrase_index(phrases: Iterable[tuple[tuple[str, ...], Any]]) -> dict[str, tuple]:
+    """Phrases by their first word, in their original order."""
+    index: dict[str, list] = {}
+    for phrase, value in phrases:
+        index.setdefault(phrase[0], []).append((phrase, value))
+    return {word: tuple(entries) for word, entries in index.items()}
+
+
+_TYPE_PHRASES = _phrase_index(RESOURCE_TYPES)
+_GROUP_BY_PHRASES = _phrase_index(GROUP_BY_COLUMNS)
+_KIND_PHRASES = _phrase_index((phrase, len(phrase)) for phrase in RESOURCE_KINDS)
+
+
+def _phrase_at(phrases: dict[str, tuple], singular: list[str], index: int) -> tuple[Any, int]:
+    """Value of the phrase starting at index and its length, or (None, 0)."""
+    if index < len(singular):
+        for phrase, value in phrases.get(singular[index], ()):
+            if len(phrase) == 1 or tuple(singular[index : index + len(phrase)]) == phrase:
+                return value, len(phrase)
+    return None, 0
+
+
+def _join_regions(tokens: list[str], words: list[str]) -> list[str]:
+    """Tokens with each multi-word region replaced by its ARM name: "West Europe" -> westeurope."""
+    joined = []
+    index = 0
+    while index < len(words):
+        for phrase, region in _REGION_PHRASES.get(words[index], ()):
+            end = index + len(phrase)
+            if tuple(w.rstrip(_PUNCTUATION) for w in words[index:end]) == phrase:
+                joined.append(region)
+                index = end
+                break
+        else:
+            joined.append(tokens[index])
+            index += 1
+    return joined
+
+
+# ============================================================================
+# Extraction
+# ============================================================================
+def extract_entities(command: str, fallback: Optional[Callable[[str], Any]] = None) -> Entities:
+    """
+    Extract entities from a natural language command.
+
+    Args:
+        command: Command text, as typed.
+        fallback: spaCy pipeline (see get_entity_model) asked for a name
+            when the rules find none.
+
+    Returns:
+        Entities found in the command.
+    """
+    tokens = _TOKEN.findall(command)
+    words = [token.lower() for token in tokens]
+    if not _REGION_PHRASES.keys().isdisjoint(words):
+        tokens = _join_regions(tokens, words)
+        words = [token.lower() for token in tokens]
+    singular = [_singular(word) for word in words]
+    found: dict[str, str] = {}
+    tags: list[tuple[str, str]] = []
+
+    def value_at(index: int) -> Optional[str]:
+        if index < len(tokens) and words[index] not in _MARKERS:
+            return tokens[index].strip("'\"")
+        return None
+
+    index = 0
+    while index < len(words):
+        word = words[index]
+        if "resource_type" not in found and singular[index] in _TYPE_PHRASES:
+            resource_type, _ = _phrase_at(_TYPE_PHRASES, singular, index)
+            if resource_type:
+                found["resource_type"] = resource_type
+        if word in ("called", "named") and (value := value_at(index + 1)):
+            found.setdefault("name", value)
+        elif word in ("location", "region") and (value := value_at(index + 1)):
+            found.setdefault("location", value.lower())
+        elif word == "sku" and (value := value_at(index + 1)):
+            # "sku premium zrs" -> Premium_ZRS; a word that names no SKU is not one
+            sku = canonical_sku(value)
+            if sku is None and (second := value_at(index + 2)):
+                sku = canonical_sku(f"{value}_{second}")
+            if sku:
+                found.setdefault("sku", sku)
+        elif word in ("tag", "tags", "tagged"):
+            # Every name=value pair that follows, optionally joined by "and"
+            while index + 1 < len(tokens) and (
+                (match := _TAG.match(tokens[index + 1])) or words[index + 1] == "and"
+            ):
+                if match:
+                    tags.append((match.group(1), match.group(2).strip("'\"")))
+                index += 1
+        elif (
+            word in ("per", "by")
+            and (grouped := _phrase_at(_GROUP_BY_PHRASES, singular, index + 1))[0]
+        ):
+            found.setdefault("group_by", grouped[0])
+            index += grouped[1]
+        elif word in ("in", "at"):
+            target = index + 1
+            while target < len(words) and words[target] in _DETERMINERS:
+                target += 1
+            target += _phrase_at(_KIND_PHRASES, singular, target)[1]
+            value = value_at(target)
+            if value and (region := value.lower().rstrip(_PUNCTUATION)) in LOCATIONS:
+                found.setdefault("location", region)
+            elif value:
+                found.setdefault("resource_group", value)
+            index = target
+        elif kind := _phrase_at(_KIND_PHRASES, singular, index)[1]:
+            target = index + kind
+            while target < len(words) and words[target] in _FILLERS:
+                target += 1
+            if (value := value_at(target)) and not _phrase_at(_KIND_PHRASES, singular, target)[1]:
+                found.setdefault("name", value)
+            index = target - 1
+        elif (region := word.rstrip(_PUNCTUATION)) in LOCATIONS:
+            found.setdefault("location", region)
+        elif sku := canonical_sku(tokens[index]):
+            # "premium zrs" -> Premium_ZRS
+            if index and words[index - 1] == "premium":
+                sku = SKUS.get(f"premium_{sku.partition('_')[2].lower()}", sku)
+            found.setdefault("sku", sku)
+        index += 1
+
+    if fallback is not None and "name" not in found and (name := _name_from_doc(fallback(command))):
+        found["name"] = name
+    return Entities(**found, tags=tuple(tags))
+
+
+# ============================================================================
+# spaCy Fallback
+# ============================================================================
+def _name_from_doc(doc: Any) -> Optional[str]:
+    """First named entity or proper noun in a spaCy Doc that is not a region, SKU or keyword."""
+    candidates = [span.text for span in doc.ents] + [t.text for t in doc if t.pos_ == "PROPN"]
+    for text in candidates:
+        word = text.strip("'\"").lower()
+        if " " in word or word in LOCATIONS or word in _MARKERS or canonical_sku(word):
+            continue
+        return text.strip("'\"")
+    return None
+
+
+@cache
+def _load_model(name: str) -> Optional[Any]:
+    try:
+        import spacy
+    except ImportError:
+        return None
+    try:
+        return spacy.load(name, disable=["lemmatizer"])
+    except OSError:  # Model not downloaded
+        return None
+
+
+def get_entity_model(config: Config) -> Optional[Callable[[str], Any]]:
+    """
+    The spaCy pipeline named by ENTITY_MODEL, loaded on first use.
+
+    Returns:
+        The pipeline, or None if ENTITY_MODEL is empty or spaCy or the model
+        is not installed, in which case only the rules run.
+    """
+    if not config.entity_model:
+        return None
+    return _load_model(config.entity_model)
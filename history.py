@@ -0,0 +1,378 @@
+"""
+Persistent command history and conversational context.
+
+Every command is appended to a local SQLite database (WAL mode) so later
+commands can build on earlier ones:
+
+- "most frequent next command": intent-to-intent transition counts, kept in
+  an aggregate table as history is written, suggest what usually follows.
+- "last referenced resource group": the most recent value of each context
+  key (resource group, location) is kept in a small table, so "create a
+  storage account" can default to the group the user was just working in.
+
+Recording never blocks a command. ``record`` only enqueues the entry; a
+background thread writes queued entries in batches, one transaction each.
+Pending entries are flushed on ``close`` (and at interpreter exit for the
+shared store).
+"""
+
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from config import Config, retire
+
+DEFAULT_BATCH_SIZE = 500
+# Longest an entry waits in the queue before the writer commits it
+DEFAULT_FLUSH_INTERVAL = 0.2
+
+# Context keys tracked in the context table
+CONTEXT_RESOURCE_GROUP = "resource_group"
+CONTEXT_LOCATION = "location"
+
+# How long a referenced resource group or location is assumed to still apply
+DEFAULT_CONTEXT_MAX_AGE = 60 * 60
+
+# Earlier commands of a session given to the translator as context
+DEFAULT_SESSION_TURNS = 5
+
+# Transition source for the first command of a session
+SESSION_START = ""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS commands (
+    id             INTEGER PRIMARY KEY,
+    timestamp      REAL NOT NULL,
+    session        TEXT NOT NULL,
+    command        TEXT NOT NULL,
+    intent         TEXT,
+    resource_group TEXT,
+    location       TEXT,
+    succeeded      INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_commands_timestamp ON commands (timestamp);
+CREATE INDEX IF NOT EXISTS idx_commands_intent ON commands (intent, timestamp);
+CREATE INDEX IF NOT EXISTS idx_commands_resource_group ON commands (resource_group, timestamp);
+
+CREATE TABLE IF NOT EXISTS transitions (
+    previous_intent TEXT NOT NULL,
+    next_intent     TEXT NOT NULL,
+    count           INTEGER NOT NULL,
+    PRIMARY KEY (previous_intent, next_intent)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS context (
+    key       TEXT PRIMARY KEY,
+    value     TEXT NOT NULL,
+    timestamp REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+@dataclass(frozen=True)
+class HistoryEntry:
+    """One command as it was run."""
+
+    command: str
+    intent: Optional[str] = None
+    resource_group: Optional[str] = None
+    location: Optional[str] = None
+    succeeded: bool = True
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    """An intent that often comes next, with the last command that used it."""
+
+    intent: str
+    count: int
+    example: str
+
+
+class HistoryStore:
+    """
+    Command history with batched background writes.
+
+    Example:
+        history = HistoryStore(Path("./data/history.db"))
+        history.record(HistoryEntry("list resources in rg-prod", "list_resources", "rg-prod"))
+        history.last_resource_group()  # "rg-prod" once the writer has run
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        session: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Open (and create if needed) the history database and start the writer.
+
+        Args:
+            path: SQLite file location. Use ":memory:" for a throwaway store.
+            session: Groups commands into conversations for next-command
+                suggestions. Defaults to a new id per store.
+            batch_size: Most entries written per transaction.
+            flush_interval: Seconds the writer waits to fill a batch.
+            clock: Time source for context timestamps, injectable for tests.
+        """
+        self.session = session or uuid.uuid4().hex
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.config: Optional[Config] = None
+        self._clock = clock
+        self._last_intent: Optional[str] = None
+        self._closed = False
+        self._pending_context: dict[str, tuple[str, float]] = {}
+        self._queue: queue.Queue[Optional[HistoryEntry]] = queue.Queue()
+
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    # ------------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------------
+    def record(self, entry: HistoryEntry) -> None:
+        """Queue an entry for writing; returns immediately. Ignored once closed."""
+        if self._closed:
+            return
+        # Context from queued entries is visible before the writer gets to them
+        for key, value in (
+            (CONTEXT_RESOURCE_GROUP, entry.resource_group),
+            (CONTEXT_LOCATION, entry.location),
+        ):
+            if value and entry.succeeded:
+                self._pending_context[key] = (value, entry.timestamp)
+        self._queue.put(entry)
+
+    def flush(self) -> None:
+        """Block until every entry queued so far has been written."""
+        self._queue.join()
+
+    def _write_loop(self) -> None:
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                self._queue.task_done()
+                return
+            batch = [entry]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    entry = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                batch.append(entry)
+            try:
+                self.write(batch)
+            except sqlite3.Error:
+                # History is best effort; a failed batch must not stop the writer
+                pass
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def write(self, entries: Sequence[HistoryEntry]) -> None:
+        """
+        Write entries now, in one transaction, on the calling thread.
+
+        ``record`` is the non-blocking way in; this is what the writer calls
+        and is useful for bulk imports.
+        """
+        if not entries:
+            return
+        transitions: dict[tuple[str, str], int] = {}
+        context: dict[str, tuple[str, float]] = {}
+        previous = self._last_intent
+        for entry in entries:
+            if entry.intent is not None and entry.succeeded:
+                key = (previous if previous is not None else SESSION_START, entry.intent)
+                transitions[key] = transitions.get(key, 0) + 1
+                previous = entry.intent
+            # A failed command may name a group or region that does not exist
+            if not entry.succeeded:
+                continue
+            if entry.resource_group:
+                context[CONTEXT_RESOURCE_GROUP] = (entry.resource_group, entry.timestamp)
+            if entry.location:
+                context[CONTEXT_LOCATION] = (entry.location, entry.timestamp)
+
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO commands (timestamp, session, command, intent, resource_group,"
+                " location, succeeded) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        entry.timestamp,
+                        self.session,
+                        entry.command,
+                        entry.intent,
+                        entry.resource_group,
+                        entry.location,
+                        int(entry.succeeded),
+                    )
+                    for entry in entries
+                ],
+            )
+            self._db.executemany(
+                "INSERT INTO transitions (previous_intent, next_intent, count) VALUES (?, ?, ?)"
+                " ON CONFLICT (previous_intent, next_intent) DO UPDATE"
+                " SET count = count + excluded.count",
+                [(before, after, count) for (before, after), count in transitions.items()],
+            )
+            self._db.executemany(
+                "INSERT INTO context (key, value, timestamp) VALUES (?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = excluded.value,"
+                " timestamp = excluded.timestamp WHERE excluded.timestamp >= context.timestamp",
+                [(key, value, timestamp) for key, (value, timestamp) in context.items()],
+            )
+            self._last_intent = previous
+
+    # ------------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------------
+    def next_commands(self, after: Optional[str] = None, limit: int = 3) -> list[Suggestion]:
+        """
+        The intents that most often followed an intent.
+
+        Args:
+            after: Intent to look from. Defaults to the last successful intent
+                of this session (or session start if there is none).
+            limit: Most suggestions returned.
+
+        Returns:
+            Suggestions, most frequent first.
+        """
+        if after is None:
+            after = self._last_intent if self._last_intent is not None else SESSION_START
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT next_intent, count FROM transitions WHERE previous_intent = ?"
+                " ORDER BY count DESC, next_intent LIMIT ?",
+                (after, limit),
+            ).fetchall()
+            return [
+                Suggestion(intent, count, self._latest_command(intent)) for intent, count in rows
+            ]
+
+    def _latest_command(self, intent: str) -> str:
+        row = self._db.execute(
+            "SELECT command FROM commands WHERE intent = ? ORDER BY timestamp DESC LIMIT 1",
+            (intent,),
+        ).fetchone()
+        return row[0] if row else ""
+
+    def last_context(self, key: str, max_age: Optional[float] = None) -> Optional[str]:
+        """
+        The most recently referenced value of a context key.
+
+        Args:
+            key: CONTEXT_RESOURCE_GROUP or CONTEXT_LOCATION.
+            max_age: Ignore values last referenced longer ago than this many seconds.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, timestamp FROM context WHERE key = ?", (key,)
+            ).fetchone()
+        pending = self._pending_context.get(key)
+        if pending is not None and (row is None or pending[1] >= row[1]):
+            row = pending
+        if row is None or (max_age is not None and row[1] < self._clock() - max_age):
+            return None
+        return row[0]
+
+    def last_resource_group(self, max_age: Optional[float] = None) -> Optional[str]:
+        """The resource group the user most recently referred to."""
+        return self.last_context(CONTEXT_RESOURCE_GROUP, max_age)
+
+    def recent(self, limit: int = 20) -> list[HistoryEntry]:
+        """The latest commands from every session, newest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT command, intent, resource_group, location, succeeded, timestamp"
+                " FROM commands ORDER BY timestamp DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [HistoryEntry(row[0], row[1], row[2], row[3], bool(row[4]), row[5]) for row in rows]
+
+    def session_commands(self, limit: int = DEFAULT_SESSION_TURNS) -> list[str]:
+        """This session's latest commands, oldest first, including queued ones."""
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT command FROM commands WHERE session = ? ORDER BY timestamp DESC LIMIT ?",
+                (self.session, limit),
+            ).fetchall()
+        return [row[0] for row in reversed(rows)]
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM commands").fetchone()
+        return int(count)
+
+    @classmethod
+    def from_config(cls, config: Config) -> "HistoryStore":
+        store = cls(config.history_db_path)
+        store.config = config
+        return store
+
+    def close(self) -> None:
+        """Write pending entries, stop the writer and close the database."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        self._db.close()
+
+
+# ============================================================================
+# Shared Store
+# ============================================================================
+_store: Optional[HistoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_history_store(config: Config) -> HistoryStore:
+    """Return the process-wide history store for a config."""
+    global _store
+    with _store_lock:
+        if _store is None or _store.config is not config:
+            if _store is not None:
+                retire(_store.close)
+            _store = HistoryStore.from_config(config)
+        return _store
+
+
+def current_history_store() -> Optional[HistoryStore]:
+    """The process-wide store if one has been opened, without opening it."""
+    return _store
+
+
+@atexit.register
+def _close_store() -> None:
+    if _store is not None:
+        _store.close()
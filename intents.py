@@ -0,0 +1,252 @@
+"""
+Intent classification for Azure Copilot.
+
+Intents declare the keyword groups that identify them and are registered on an
+IntentRegistry. The registry compiles every keyword of every intent into a single
+Aho-Corasick automaton, so classifying a command is one pass over the input no
+matter how many intents exist.
+"""
+
+from collections import deque
+from collections.abc import Callable, Iterator, Sequence
+from dataclasses import dataclass
+from typing import Any, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass(frozen=True)
+class Intent:
+    """
+    A command the CLI knows how to handle.
+
+    Each entry in ``keywords`` is a group of interchangeable phrases. An intent
+    is fully matched when every group has at least one phrase in the command.
+    Phrases match word prefixes unless ``whole_words`` is set, in which case
+    they must be whole words: "cost" then matches neither "costcenter" nor
+    "cost-mgmt-rg".
+    """
+
+    name: str
+    keywords: tuple[tuple[str, ...], ...]
+    handler: Optional[Callable[..., Any]] = None
+    priority: int = 0
+    description: str = ""
+    whole_words: bool = False
+
+
+@dataclass(frozen=True)
+class IntentMatch:
+    """Result of classifying a command against the registry."""
+
+    intent: Intent
+    confidence: float
+    matched: tuple[str, ...]
+
+
+# ============================================================================
+# Aho-Corasick Automaton
+# ============================================================================
+class _Automaton:
+    """
+    Multi-pattern matcher over lowercase text.
+
+    Patterns only match at the start of a word, so "resource" matches
+    "resources" but "rg" does not match "charge". Patterns flagged in
+    ``whole_words`` must also end a word, where names joined with "-", "_"
+    and the like count as one word.
+    """
+
+    def __init__(self, patterns: Sequence[str], whole_words: Sequence[bool] = ()) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        self._lengths = [len(pattern) for pattern in patterns]
+        self._whole = list(whole_words) or [False] * len(patterns)
+
+        for label, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append(label)
+
+        # Breadth-first pass to wire failure links and inherit their outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state].extend(self._out[self._fail[next_state]])
+
+    def scan(self, text: str) -> Iterator[int]:
+        """Yield the label of every pattern occurrence that starts a word in text."""
+        goto, fail, out, lengths, whole = (
+            self._goto,
+            self._fail,
+            self._out,
+            self._lengths,
+            self._whole,
+        )
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for label in out[state]:
+                start = index - lengths[label] + 1
+                if whole[label]:
+                    if _in_word(text, start - 1) or _in_word(text, index + 1):
+                        continue
+                elif start and text[start - 1].isalnum():
+                    continue
+                yield label
+
+
+# Characters that join parts of one name or tag: rg-cost, cost_center, cost=42
+_JOINERS = frozenset("-_=:/")
+
+
+def _in_word(text: str, index: int) -> bool:
+    """True if text[index] exists and continues a word."""
+    return 0 <= index < len(text) and (text[index].isalnum() or text[index] in _JOINERS)
+
+
+# ============================================================================
+# Intent Registry
+# ============================================================================
+class IntentRegistry:
+    """Holds the known intents and classifies commands against them."""
+
+    def __init__(self) -> None:
+        self._intents: list[Intent] = []
+        self._labels: list[tuple[int, int, str]] = []
+        self._automaton: Optional[_Automaton] = None
+
+    @property
+    def intents(self) -> tuple[Intent, ...]:
+        """All registered intents, in registration order."""
+        return tuple(self._intents)
+
+    def add(self, intent: Intent) -> Intent:
+        """
+        Register an intent.
+
+        Args:
+            intent: Intent to add. Its keywords are normalized to lowercase.
+
+        Returns:
+            The normalized intent that was registered.
+
+        Raises:
+            ValueError: If the name is already taken or a keyword group is empty.
+        """
+        if any(existing.name == intent.name for existing in self._intents):
+            raise ValueError(f"Intent '{intent.name}' is already registered")
+        keywords = tuple(
+            tuple(phrase.strip().lower() for phrase in group if phrase.strip())
+            for group in intent.keywords
+        )
+        if not keywords or not all(keywords):
+            raise ValueError(f"Intent '{intent.name}' needs at least one phrase per keyword group")
+
+        intent = Intent(
+            intent.name,
+            keywords,
+            intent.handler,
+            intent.priority,
+            intent.description,
+            intent.whole_words,
+        )
+        self._intents.append(intent)
+        self._automaton = None
+        return intent
+
+    def register(
+        self,
+        name: str,
+        keywords: Sequence[Sequence[str]],
+        *,
+        priority: int = 0,
+        description: str = "",
+        whole_words: bool = False,
+    ) -> Callable[[F], F]:
+        """
+        Decorator that registers the decorated function as an intent handler.
+
+        Example:
+            @registry.register("help", [("help",)])
+            def show_help(): ...
+        """
+
+        def decorator(func: F) -> F:
+            groups = tuple(tuple(group) for group in keywords)
+            self.add(Intent(name, groups, func, priority, description, whole_words))
+            return func
+
+        return decorator
+
+    def compile(self) -> None:
+        """Build the automaton now instead of on the first classification."""
+        self._labels = [
+            (intent_index, group_index, phrase)
+            for intent_index, intent in enumerate(self._intents)
+            for group_index, group in enumerate(intent.keywords)
+            for phrase in group
+        ]
+        self._automaton = _Automaton(
+            [phrase for _, _, phrase in self._labels],
+            [self._intents[intent_index].whole_words for intent_index, _, _ in self._labels],
+        )
+
+    def classify(self, command: str, min_confidence: float = 0.0) -> Optional[IntentMatch]:
+        """
+        Find the intent that best matches a command.
+
+        Confidence is the fraction of an intent's keyword groups present in the
+        command. Ties are broken by priority, then by the number of keyword
+        groups (more specific wins), then by registration order.
+
+        Args:
+            command: Natural language command typed by the user.
+            min_confidence: Matches scoring below this are discarded.
+
+        Returns:
+            The best IntentMatch, or None if nothing matched well enough.
+        """
+        if self._automaton is None:
+            self.compile()
+        assert self._automaton is not None
+
+        groups_hit: dict[int, int] = {}
+        phrases_hit: dict[int, list[str]] = {}
+        for label in self._automaton.scan(command.lower()):
+            intent_index, group_index, phrase = self._labels[label]
+            groups_hit[intent_index] = groups_hit.get(intent_index, 0) | (1 << group_index)
+            phrases_hit.setdefault(intent_index, []).append(phrase)
+
+        best: Optional[IntentMatch] = None
+        best_key: tuple[float, int, int, int] = (-1.0, 0, 0, 0)
+        for intent_index, mask in groups_hit.items():
+            intent = self._intents[intent_index]
+            confidence = mask.bit_count() / len(intent.keywords)
+            key = (confidence, intent.priority, len(intent.keywords), -intent_index)
+            if confidence >= min_confidence and key > best_key:
+                best_key = key
+                best = IntentMatch(intent, confidence, tuple(phrases_hit[intent_index]))
+        return best
+
+
+# Default registry that the CLI registers its intents on
+registry = IntentRegistry()
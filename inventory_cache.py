@@ -0,0 +1,483 @@
+"""
+On-disk cache of Azure resource inventory.
+
+Listings are stored in a local SQLite database keyed by subscription ID and
+resource group, so repeated "list resources" commands answer from local state
+instead of paging through the subscription over the network.
+
+- Each resource type can have its own TTL; a cached listing expires as soon as
+  its shortest-lived resource type does.
+- The database is size-bounded: least recently used listings are evicted once
+  the stored payloads exceed ``max_bytes``.
+- Listings can be patched in place with changed and deleted resources
+  (``apply_changes``), with a sync watermark kept per subscription, so an
+  incremental sync does not have to rewrite the whole listing.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+from uuid import uuid4
+
+from config import Config, retire
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Rows read or written per round trip when streaming a listing
+_CHUNK_ROWS = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scopes (
+    scope_key       TEXT PRIMARY KEY,
+    subscription_id TEXT NOT NULL,
+    resource_group  TEXT NOT NULL,
+    fetched_at      REAL NOT NULL,
+    expires_at      REAL NOT NULL,
+    last_access     REAL NOT NULL,
+    size_bytes      INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scopes_last_access ON scopes (last_access);
+
+CREATE TABLE IF NOT EXISTS resources (
+    scope_key     TEXT NOT NULL,
+    seq           INTEGER NOT NULL,
+    resource_id   TEXT NOT NULL,
+    resource_type TEXT NOT NULL,
+    payload       TEXT NOT NULL,
+    PRIMARY KEY (scope_key, seq)
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    subscription_id TEXT PRIMARY KEY,
+    watermark       REAL NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class CacheLookup:
+    """Resources returned by get_or_fetch, and whether they came from the cache."""
+
+    resources: list[dict[str, Any]]
+    from_cache: bool
+
+
+def scope_key(subscription_id: str, resource_group: Optional[str] = None) -> str:
+    """Cache key for a subscription, optionally narrowed to one resource group."""
+    return f"{subscription_id.lower()}/{(resource_group or '').lower()}"
+
+
+class InventoryCache:
+    """
+    SQLite-backed, TTL-evicting, size-bounded cache of resource listings.
+
+    Example:
+        cache = InventoryCache(Path("./data/inventory.db"))
+        lookup = cache.get_or_fetch(sub_id, None, lambda: list_resources(client))
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        default_ttl: float = DEFAULT_TTL_SECONDS,
+        type_ttls: Optional[Mapping[str, float]] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Open (and create if needed) the cache database.
+
+        Args:
+            path: SQLite file location. Use ":memory:" for a throwaway cache.
+            default_ttl: Seconds a listing stays fresh when no type TTL applies.
+            type_ttls: Per resource type TTLs, e.g. {"Microsoft.Compute/virtualMachines": 60}.
+            max_bytes: Upper bound on the total size of cached payloads.
+            clock: Time source, injectable for tests.
+        """
+        self.default_ttl = default_ttl
+        self.type_ttls = {k.lower(): v for k, v in (type_ttls or {}).items()}
+        self.max_bytes = max_bytes
+        self.config: Optional[Config] = None
+        self._clock = clock
+
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared by fan-out worker threads, serialized by a lock
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def ttl_for(self, resource_type: str) -> float:
+        """TTL in seconds for a resource type."""
+        return self.type_ttls.get(resource_type.lower(), self.default_ttl)
+
+    # ------------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------------
+    def iter(
+        self, subscription_id: str, resource_group: Optional[str] = None
+    ) -> Optional[Iterator[dict[str, Any]]]:
+        """
+        Stream a fresh cached listing without loading it all into memory.
+
+        Rows are read in fixed-size chunks, so memory use does not depend on
+        the size of the listing.
+
+        Returns:
+            Iterator over cached resources, or None on a miss or expired entry.
+        """
+        key = scope_key(subscription_id, resource_group)
+        now = self._clock()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT expires_at FROM scopes WHERE scope_key = ?", (key,)
+            ).fetchone()
+            if row is None or row[0] <= now:
+                return None
+            with self._db:
+                self._db.execute(
+                    "UPDATE scopes SET last_access = ? WHERE scope_key = ?", (now, key)
+                )
+        return self._iter_rows(key)
+
+    def get(
+        self, subscription_id: str, resource_group: Optional[str] = None
+    ) -> Optional[list[dict[str, Any]]]:
+        """Return a fresh cached listing, or None on a miss or expired entry."""
+        with self._lock:
+            rows = self.iter(subscription_id, resource_group)
+            return None if rows is None else list(rows)
+
+    def scopes(self) -> dict[str, float]:
+        """Every stored scope key with when it was fetched, fresh or not."""
+        with self._lock:
+            return dict(self._db.execute("SELECT scope_key, fetched_at FROM scopes").fetchall())
+
+    def iter_scope(self, key: str) -> Iterator[dict[str, Any]]:
+        """
+        Stream a stored listing by scope key, whether or not it has expired.
+
+        Expired listings are still good enough for things like completion,
+        where a slightly stale name beats none.
+        """
+        return self._iter_rows(key)
+
+    def _iter_rows(self, key: str) -> Iterator[dict[str, Any]]:
+        last_seq = -1
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT seq, payload FROM resources"
+                    " WHERE scope_key = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (key, last_seq, _CHUNK_ROWS),
+                ).fetchall()
+            if not rows:
+                return
+            for _, payload in rows:
+                yield json.loads(payload)
+            last_seq = rows[-1][0]
+
+    # ------------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------------
+    def put(
+        self,
+        subscription_id: str,
+        resource_group: Optional[str],
+        resources: Iterable[dict[str, Any]],
+    ) -> None:
+        """Replace the cached listing for a scope."""
+        deque(self.put_stream(subscription_id, resource_group, resources), maxlen=0)
+
+    def put_stream(
+        self,
+        subscription_id: str,
+        resource_group: Optional[str],
+        resources: Iterable[dict[str, Any]],
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Replace the cached listing for a scope while passing resources through.
+
+        Each resource is yielded as soon as it is consumed, so a pager can be
+        rendered and cached in the same pass without materializing it. Rows
+        are staged in chunks; the previous listing stays readable until the
+        stream is exhausted, and is kept if the stream fails or is abandoned.
+        """
+        key = scope_key(subscription_id, resource_group)
+        # Per call, so concurrent refreshes of one scope never share rows
+        staging = f"{key}#staging:{uuid4().hex}"
+        started = self._clock()
+        ttl = self.default_ttl
+        size = 0
+        batch: list[tuple[str, int, str, str, str]] = []
+
+        def flush() -> None:
+            with self._lock, self._db:
+                self._db.executemany("INSERT INTO resources VALUES (?, ?, ?, ?, ?)", batch)
+            batch.clear()
+
+        try:
+            for seq, resource in enumerate(resources):
+                payload = json.dumps(resource, separators=(",", ":"))
+                resource_type = resource.get("type") or ""
+                ttl = min(ttl, self.ttl_for(resource_type))
+                size += len(payload)
+                batch.append((staging, seq, resource.get("id") or "", resource_type, payload))
+                if len(batch) >= _CHUNK_ROWS:
+                    flush()
+                yield resource
+            flush()
+        except BaseException:
+            with self._lock, self._db:
+                self._db.execute("DELETE FROM resources WHERE scope_key = ?", (staging,))
+            raise
+
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM resources WHERE scope_key = ?", (key,))
+            self._db.execute(
+                "UPDATE resources SET scope_key = ? WHERE scope_key = ?", (key, staging)
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO scopes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, subscription_id, resource_group or "", started, started + ttl, started, size),
+            )
+            self._evict(keep=key)
+
+    def apply_changes(
+        self,
+        subscription_id: str,
+        upserts: Iterable[dict[str, Any]],
+        deleted_ids: Iterable[str],
+        watermark: Optional[float] = None,
+    ) -> None:
+        """
+        Patch every stored listing of a subscription with changed resources.
+
+        Changed resources replace their old rows (or are appended, if new) in
+        the subscription listing and in the listing of their resource group;
+        deleted ones are removed. Patched listings count as freshly fetched.
+        Applying the same changes twice leaves the same listings.
+
+        Args:
+            subscription_id: Subscription the changes belong to.
+            upserts: Current state of created or updated resources.
+            deleted_ids: IDs of deleted resources.
+            watermark: If given, recorded with set_watermark in the same transaction.
+        """
+        upserts = list(upserts)
+        changed = sorted(
+            {(r.get("id") or "").lower() for r in upserts} | {i.lower() for i in deleted_ids}
+        )
+        now = self._clock()
+        with self._lock, self._db:
+            stored = self._db.execute(
+                "SELECT scope_key, resource_group FROM scopes WHERE lower(subscription_id) = ?",
+                (subscription_id.lower(),),
+            ).fetchall()
+            for key, resource_group in stored:
+                for start in range(0, len(changed), _CHUNK_ROWS):
+                    ids = changed[start : start + _CHUNK_ROWS]
+                    self._db.execute(
+                        "DELETE FROM resources WHERE scope_key = ? AND lower(resource_id) IN"
+                        f" ({', '.join('?' * len(ids))})",
+                        (key, *ids),
+                    )
+                (seq,) = self._db.execute(
+                    "SELECT COALESCE(MAX(seq), -1) FROM resources WHERE scope_key = ?", (key,)
+                ).fetchone()
+                rows = []
+                for resource in upserts:
+                    group = (resource.get("resource_group") or "").lower()
+                    if resource_group and group != resource_group.lower():
+                        continue
+                    seq += 1
+                    payload = json.dumps(resource, separators=(",", ":"))
+                    rows.append(
+                        (key, seq, resource.get("id") or "", resource.get("type") or "", payload)
+                    )
+                self._db.executemany("INSERT INTO resources VALUES (?, ?, ?, ?, ?)", rows)
+                self._refresh_scope(key, now)
+            if watermark is not None:
+                self._set_watermark(subscription_id, watermark)
+            self._evict(keep=scope_key(subscription_id))
+
+    def _refresh_scope(self, key: str, now: float) -> None:
+        """Recompute a patched listing's size and expiry."""
+        types = [
+            row[0]
+            for row in self._db.execute(
+                "SELECT DISTINCT resource_type FROM resources WHERE scope_key = ?", (key,)
+            )
+        ]
+        ttl = min([self.default_ttl, *(self.ttl_for(t) for t in types)])
+        (size,) = self._db.execute(
+            "SELECT COALESCE(SUM(length(payload)), 0) FROM resources WHERE scope_key = ?", (key,)
+        ).fetchone()
+        self._db.execute(
+            "UPDATE scopes SET fetched_at = ?, expires_at = ?, last_access = ?, size_bytes = ?"
+            " WHERE scope_key = ?",
+            (now, now + ttl, now, size, key),
+        )
+
+    def invalidate(
+        self, subscription_id: Optional[str] = None, resource_group: Optional[str] = None
+    ) -> None:
+        """Drop one scope, every scope of a subscription, or everything."""
+        with self._lock, self._db:
+            if subscription_id is None:
+                keys = [row[0] for row in self._db.execute("SELECT scope_key FROM scopes")]
+            elif resource_group is None:
+                keys = [
+                    row[0]
+                    for row in self._db.execute(
+                        "SELECT scope_key FROM scopes WHERE lower(subscription_id) = ?",
+                        (subscription_id.lower(),),
+                    )
+                ]
+            else:
+                keys = [scope_key(subscription_id, resource_group)]
+            self._delete(keys)
+
+    def get_or_fetch(
+        self,
+        subscription_id: str,
+        resource_group: Optional[str],
+        fetch: Callable[[], Iterable[dict[str, Any]]],
+        refresh: bool = False,
+    ) -> CacheLookup:
+        """
+        Return the cached listing for a scope, fetching and storing it on a miss.
+
+        Args:
+            subscription_id: Subscription being listed.
+            resource_group: Resource group being listed, or None for all of them.
+            fetch: Called to load the listing from Azure on a miss.
+            refresh: Ignore any cached listing and fetch a new one.
+        """
+        if not refresh:
+            cached = self.get(subscription_id, resource_group)
+            if cached is not None:
+                return CacheLookup(cached, from_cache=True)
+
+        resources = list(fetch())
+        self.put(subscription_id, resource_group, resources)
+        return CacheLookup(resources, from_cache=False)
+
+    def iter_or_fetch(
+        self,
+        subscription_id: str,
+        resource_group: Optional[str],
+        fetch: Callable[[], Iterable[dict[str, Any]]],
+        refresh: bool = False,
+    ) -> tuple[Iterator[dict[str, Any]], bool]:
+        """
+        Streaming variant of get_or_fetch.
+
+        Returns:
+            An iterator over the resources and whether they come from the cache.
+            On a miss the iterator writes through to the cache as it is consumed.
+        """
+        if not refresh:
+            cached = self.iter(subscription_id, resource_group)
+            if cached is not None:
+                return cached, True
+        return self.put_stream(subscription_id, resource_group, fetch()), False
+
+    @classmethod
+    def from_config(cls, config: Config) -> "InventoryCache":
+        """Open the cache using the inventory settings from Config."""
+        cache = cls(
+            config.inventory_cache_path,
+            default_ttl=config.inventory_cache_ttl,
+            type_ttls=config.inventory_cache_type_ttls,
+            max_bytes=config.inventory_cache_max_mb * 1024 * 1024,
+        )
+        cache.config = config
+        return cache
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._db.close()
+
+    # ------------------------------------------------------------------------
+    # Sync watermarks
+    # ------------------------------------------------------------------------
+    def watermark(self, subscription_id: str) -> Optional[float]:
+        """
+        When the subscription listing was last brought up to date by a sync.
+
+        Returns:
+            Epoch seconds, or None if the subscription was never synced or its
+            listing has since been invalidated or evicted.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT w.watermark FROM sync_state w JOIN scopes s ON s.scope_key = ?"
+                " WHERE w.subscription_id = ?",
+                (scope_key(subscription_id), subscription_id.lower()),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def set_watermark(self, subscription_id: str, watermark: float) -> None:
+        """Record that the subscription listing reflects every change up to watermark."""
+        with self._lock, self._db:
+            self._set_watermark(subscription_id, watermark)
+
+    def _set_watermark(self, subscription_id: str, watermark: float) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (subscription_id.lower(), watermark)
+        )
+
+    # ------------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------------
+    def _evict(self, keep: str) -> None:
+        """Drop least recently used scopes until the cache fits in max_bytes."""
+        (total,) = self._db.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM scopes").fetchone()
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in self._db.execute(
+            "SELECT scope_key, size_bytes FROM scopes WHERE scope_key != ? ORDER BY last_access",
+            (keep,),
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            victims.append(key)
+            total -= size
+        self._delete(victims)
+
+    def _delete(self, keys: list[str]) -> None:
+        for key in keys:
+            self._db.execute("DELETE FROM resources WHERE scope_key = ?", (key,))
+            self._db.execute("DELETE FROM scopes WHERE scope_key = ?", (key,))
+
+
+# ============================================================================
+# Shared Cache
+# ============================================================================
+_cache: Optional[InventoryCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_inventory_cache(config: Config) -> InventoryCache:
+    """
+    Return the process-wide cache for a config.
+
+    Long-running sessions (the shell) keep one open connection instead of
+    reopening the database for every command.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None or _cache.config is not config:
+            if _cache is not None:
+                retire(_cache.close)
+            _cache = InventoryCache.from_config(config)
+        return _cache
@@ -0,0 +1,247 @@
+"""
+Incremental inventory sync from the Azure Resource Graph change feed.
+
+Paging through a subscription with azure-mgmt-resource costs O(resources)
+on every refresh. Resource Graph keeps a feed of resource changes
+(``resourcechanges``), so after one full load a subscription listing can be
+brought up to date by fetching only what changed since the last sync:
+
+    1. Query the change feed for resources changed after the watermark.
+    2. Fetch the current state of the created and updated ones.
+    3. Patch the cached listings and advance the watermark.
+
+The watermark is the time a sync started, kept per subscription in the
+inventory cache. Each sync re-reads a short overlap before the watermark,
+because change records can show up in the feed some time after the change
+and local clocks drift; re-applying a change is harmless. Once a watermark
+is older than the feed's retention the next sync is a full load again.
+"""
+
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from azure_commands import AzureCommandError, is_azure_error
+from config import Config
+from inventory_cache import InventoryCache, scope_key
+from tracing import span
+
+# Resource Graph keeps change history for 14 days; leave a day of margin
+CHANGE_RETENTION_SECONDS = 13 * 24 * 60 * 60
+# Re-read this much of the feed before the watermark on every sync
+CHANGE_OVERLAP_SECONDS = 5 * 60
+# Resource IDs per "current state" query
+_ID_BATCH = 200
+
+RESOURCE_COLUMNS = "id, name, type, location, resourceGroup, tags"
+SNAPSHOT_QUERY = f"resources | project {RESOURCE_COLUMNS} | order by id asc"
+CHANGES_QUERY = (
+    "resourcechanges"
+    " | extend changeTime = todatetime(properties.changeAttributes.timestamp),"
+    " targetResourceId = tolower(tostring(properties.targetResourceId)),"
+    " changeType = tostring(properties.changeType)"
+    " | where changeTime > datetime({since})"
+    " | summarize arg_max(changeTime, changeType) by targetResourceId"
+    " | project targetResourceId, changeType, changeTime"
+)
+CURRENT_QUERY = f"resources | where tolower(id) in ({{ids}}) | project {RESOURCE_COLUMNS}"
+
+
+@dataclass(frozen=True)
+class ResourceChange:
+    """The latest change to one resource since the watermark."""
+
+    resource_id: str
+    change_type: str  # "Create", "Update" or "Delete"
+    changed_at: str
+
+
+@dataclass(frozen=True)
+class SyncResult:
+    """What one sync of a subscription did."""
+
+    subscription_id: str
+    full: bool
+    upserted: int
+    deleted: int
+    watermark: float
+
+    def summary(self) -> str:
+        if self.full:
+            return f"{self.subscription_id}: full load, {self.upserted} resources"
+        return f"{self.subscription_id}: {self.upserted} changed, {self.deleted} deleted"
+
+
+def format_kql_datetime(epoch: float) -> str:
+    """Epoch seconds as a KQL datetime literal body (UTC, ISO 8601)."""
+    return datetime.fromtimestamp(epoch, UTC).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def graph_row_to_dict(row: dict[str, Any]) -> dict[str, Any]:
+    """Convert a Resource Graph row into the shape resource_to_dict produces."""
+    return {
+        "id": row.get("id") or "",
+        "name": row.get("name"),
+        "type": row.get("type"),
+        "location": row.get("location"),
+        "resource_group": row.get("resourceGroup") or "",
+        "tags": dict(row.get("tags") or {}),
+    }
+
+
+class ResourceGraph:
+    """
+    Paged Resource Graph queries scoped to one subscription at a time.
+
+    Requests are sent as plain dicts, which the SDK serializes like its
+    QueryRequest model, so nothing beyond the client is imported.
+    """
+
+    def __init__(self, client: Any) -> None:
+        """
+        Args:
+            client: ResourceGraphClient (or a fake with the same shape).
+        """
+        self._client = client
+
+    def query(self, subscription_id: str, query: str) -> Iterator[dict[str, Any]]:
+        """
+        Run a query and yield result rows, following skip tokens across pages.
+
+        Raises:
+            AzureCommandError: If the Resource Graph call fails.
+        """
+        skip_token = None
+        while True:
+            options: dict[str, Any] = {"resultFormat": "objectArray"}
+            if skip_token:
+                options["$skipToken"] = skip_token
+            request = {"subscriptions": [subscription_id], "query": query, "options": options}
+            try:
+                response = self._client.resources(request)
+            except Exception as e:
+                if is_azure_error(e):
+                    raise AzureCommandError(f"Resource Graph query failed: {e}") from e
+                raise
+            yield from response.data
+            skip_token = response.skip_token
+            if not skip_token:
+                return
+
+    def snapshot(self, subscription_id: str) -> Iterator[dict[str, Any]]:
+        """Every resource of a subscription."""
+        for row in self.query(subscription_id, SNAPSHOT_QUERY):
+            yield graph_row_to_dict(row)
+
+    def changes(self, subscription_id: str, since: float) -> list[ResourceChange]:
+        """The latest change to each resource changed after ``since`` (epoch seconds)."""
+        query = CHANGES_QUERY.format(since=format_kql_datetime(since))
+        return [
+            ResourceChange(row["targetResourceId"], row["changeType"], str(row["changeTime"]))
+            for row in self.query(subscription_id, query)
+        ]
+
+    def current(
+        self, subscription_id: str, resource_ids: Iterable[str]
+    ) -> Iterator[dict[str, Any]]:
+        """Current state of the given resources; deleted ones are simply absent."""
+        ids = sorted({resource_id.lower() for resource_id in resource_ids})
+        for start in range(0, len(ids), _ID_BATCH):
+            batch = ", ".join(_kql_string(i) for i in ids[start : start + _ID_BATCH])
+            for row in self.query(subscription_id, CURRENT_QUERY.format(ids=batch)):
+                yield graph_row_to_dict(row)
+
+
+def _kql_string(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+class InventorySync:
+    """
+    Keeps subscription listings in the inventory cache current.
+
+    Example:
+        syncer = InventorySync(get_inventory_cache(config), ResourceGraph(client))
+        result = syncer.sync(subscription_id)  # full the first time, deltas after
+    """
+
+    def __init__(
+        self,
+        cache: InventoryCache,
+        graph: ResourceGraph,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.cache = cache
+        self.graph = graph
+        self._clock = clock
+
+    def sync(self, subscription_id: str, full: bool = False) -> SyncResult:
+        """
+        Bring the cached listing of a subscription up to date.
+
+        Args:
+            subscription_id: Subscription to sync.
+            full: Reload everything even if an incremental sync is possible.
+
+        Raises:
+            AzureCommandError: If a Resource Graph query fails. The cached
+                listing and watermark are left as they were.
+        """
+        watermark = None if full else self.cache.watermark(subscription_id)
+        started = self._clock()
+        if watermark is None or started - watermark > CHANGE_RETENTION_SECONDS:
+            return self._full(subscription_id, started)
+
+        with span("sync.changes", subscription=subscription_id) as stage:
+            changes = self.graph.changes(subscription_id, watermark - CHANGE_OVERLAP_SECONDS)
+            live = [c.resource_id for c in changes if c.change_type.lower() != "delete"]
+            upserts = list(self.graph.current(subscription_id, live))
+            present = {resource["id"].lower() for resource in upserts}
+            # Updated and then deleted before we asked counts as deleted too
+            deleted = [c.resource_id for c in changes if c.resource_id.lower() not in present]
+            self.cache.apply_changes(subscription_id, upserts, deleted, watermark=started)
+            stage.set(changes=len(changes), upserted=len(upserts), deleted=len(deleted))
+        return SyncResult(subscription_id, False, len(upserts), len(deleted), started)
+
+    def _full(self, subscription_id: str, started: float) -> SyncResult:
+        with span("sync.full", subscription=subscription_id) as stage:
+            rows = 0
+            for _ in self.cache.put_stream(
+                subscription_id, None, self.graph.snapshot(subscription_id)
+            ):
+                rows += 1
+            # Resource group listings are rebuilt from the API when next asked for
+            prefix = scope_key(subscription_id)
+            for key in self.cache.scopes():
+                if key.startswith(prefix) and key != prefix:
+                    self.cache.invalidate(subscription_id, key[len(prefix) :])
+            self.cache.set_watermark(subscription_id, started)
+            stage.set(rows=rows)
+        return SyncResult(subscription_id, True, rows, 0, started)
+
+
+def get_resource_graph(config: Config) -> ResourceGraph:
+    """
+    Resource Graph over the shared client pool.
+
+    Raises:
+        AzureCommandError: If the Resource Graph SDK is not installed.
+    """
+    from clients import ClientError, get_client_pool
+
+    try:
+        return ResourceGraph(get_client_pool(config).client("resourcegraph"))
+    except ClientError as e:
+        raise AzureCommandError(str(e)) from e
+
+
+def get_inventory_sync(config: Config, cache: InventoryCache) -> InventorySync:
+    """
+    Build a syncer over the shared Resource Graph client.
+
+    Raises:
+        AzureCommandError: If the Resource Graph SDK is not installed.
+    """
+    return InventorySync(cache, get_resource_graph(config))
@@ -0,0 +1,483 @@
+"""
+Multiplexed polling of long-running Azure operations.
+
+Creating a storage account returns an LROPoller. Calling ``.result()`` on it
+blocks the caller while a thread of the poller's own polls the service, so
+twenty creates cost twenty blocked threads, each polling on its own
+schedule. LroManager tracks any number of operations on one asyncio loop in
+one background thread instead:
+
+- Pollers are started with manual_polling(), an ARMPolling whose run() does
+  nothing, so the SDK's polling thread exits at once and leaves the status
+  requests to the manager.
+- Between polls an operation waits as long as the service's Retry-After
+  asks, or otherwise backs off from INITIAL_DELAY by BACKOFF up to
+  MAX_DELAY. Throttled status requests wait out their Retry-After and are
+  tried again.
+- A status request is one short HTTP call and is made on the loop thread.
+
+Operations started with ``--no-wait`` are recorded in an OperationStore with
+their continuation token, so ``copilot status <op-id>`` can pick them up
+again from another process.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Callable, Sequence
+from concurrent import futures
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path
+from typing import Any, Optional
+
+import azure_commands
+from azure_commands import (
+    AzureCommandError,
+    RetryPolicy,
+    is_azure_error,
+    is_throttled,
+    parse_retry_after,
+    retry_after_seconds,
+)
+from config import Config, retire
+from tracing import span
+
+# Seconds before the first status request when the service gives no Retry-After
+INITIAL_DELAY = 1.0
+MAX_DELAY = 30.0
+BACKOFF = 1.5
+
+STATUS_IN_PROGRESS = "InProgress"
+STATUS_SUCCEEDED = "Succeeded"
+STATUS_FAILED = "Failed"
+STATUS_CANCELED = "Canceled"
+TERMINAL_STATUSES = frozenset(s.lower() for s in (STATUS_SUCCEEDED, STATUS_FAILED, STATUS_CANCELED))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    op_id              TEXT PRIMARY KEY,
+    kind               TEXT NOT NULL,
+    description        TEXT NOT NULL,
+    subscription_id    TEXT NOT NULL,
+    arguments          TEXT NOT NULL,
+    continuation_token TEXT NOT NULL,
+    status             TEXT NOT NULL,
+    started_at         REAL NOT NULL,
+    updated_at         REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_operations_started_at ON operations (started_at);
+"""
+
+
+def is_terminal(status: str) -> bool:
+    return status.lower() in TERMINAL_STATUSES
+
+
+def new_operation_id() -> str:
+    return uuid.uuid4().hex[:8]
+
+
+# ============================================================================
+# Polling Methods
+# ============================================================================
+@cache
+def _manual_polling_class() -> type:
+    from azure.mgmt.core.polling.arm_polling import ARMPolling
+
+    class ManualPolling(ARMPolling):
+        """ARMPolling that leaves the status requests to LroManager."""
+
+        # Private state of azure-core 1.x's LROBasePolling, which has no public
+        # accessor for the last status response or the operation strategy.
+        # Declared here so the dependency is explicit; revisit on azure-core 2.
+        _pipeline_response: Any
+        _operation: Any
+
+        def run(self) -> None:
+            # LROPoller calls this on its own thread; returning ends that thread
+            return None
+
+        def retry_after(self) -> Optional[float]:
+            response = getattr(self._pipeline_response, "http_response", None)
+            return parse_retry_after(getattr(response, "headers", None))
+
+        def final_resource(self) -> Any:
+            # What ARMPolling does once an operation has finished
+            url = self._operation.get_final_get_url(self._pipeline_response)
+            if url:
+                self._pipeline_response = self.request_status(url)
+            return self.resource()
+
+    return ManualPolling
+
+
+def manual_polling() -> Optional[Any]:
+    """
+    A polling method for ``begin_*`` calls whose operations LroManager will poll.
+
+    Returns:
+        The polling method, or None if azure-mgmt-core is not installed, in
+        which case the SDK's default polling is kept.
+    """
+    try:
+        return _manual_polling_class()()
+    except ImportError:
+        return None
+
+
+def _polling_method(poller: Any) -> Optional[Any]:
+    """The poller's polling method if the manager can drive it, else None."""
+    get = getattr(poller, "polling_method", None)
+    method = get() if callable(get) else None
+    if all(hasattr(method, name) for name in ("update_status", "retry_after", "final_resource")):
+        return method
+    return None
+
+
+def check(poller: Any) -> tuple[str, Any]:
+    """
+    Poll an operation once.
+
+    Returns:
+        Its status and, once it has succeeded, its result.
+
+    Raises:
+        ValueError: If the poller cannot be polled step by step.
+    """
+    method = _polling_method(poller)
+    if method is None:
+        raise ValueError("This operation cannot be polled")
+    if not method.finished():
+        method.update_status()
+    status = method.status()
+    return status, method.final_resource() if status.lower() == "succeeded" else None
+
+
+# ============================================================================
+# Manager
+# ============================================================================
+@dataclass
+class LroOperation:
+    """One tracked operation. The manager's loop thread keeps it up to date."""
+
+    op_id: str
+    description: str
+    status: str = STATUS_IN_PROGRESS
+    polls: int = 0
+    started: float = field(default_factory=time.monotonic)
+    ended: Optional[float] = None
+    result: Any = None
+    error: Optional[BaseException] = None
+    # Resolves to the result, or raises the error, once the operation is over
+    future: futures.Future = field(default_factory=futures.Future, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.ended or time.monotonic()) - self.started
+
+
+class LroManager:
+    """
+    Polls many long-running operations from one thread.
+
+    Example:
+        manager = get_lro_manager()
+        operations = [manager.track(f"create {name}", begin(name)) for name in names]
+        manager.wait(operations, console)
+    """
+
+    def __init__(
+        self,
+        initial_delay: float = INITIAL_DELAY,
+        max_delay: float = MAX_DELAY,
+        backoff: float = BACKOFF,
+        retry: RetryPolicy = RetryPolicy(),
+    ) -> None:
+        """
+        Args:
+            initial_delay: Seconds before the first poll without a Retry-After.
+            max_delay: Upper bound on the wait between polls, Retry-After included.
+            backoff: Factor the wait grows by after each poll without a Retry-After.
+            retry: Backoff for throttled status requests.
+        """
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.retry = retry
+        self.operations: dict[str, LroOperation] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="lro-poller", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def track(self, description: str, poller: Any, op_id: Optional[str] = None) -> LroOperation:
+        """Start polling an operation in the background and return its LroOperation."""
+        operation = LroOperation(op_id or new_operation_id(), description)
+        with self._lock:
+            self.operations[operation.op_id] = operation
+        asyncio.run_coroutine_threadsafe(self._track(operation, poller), self._ensure_loop())
+        return operation
+
+    async def _track(self, operation: LroOperation, poller: Any) -> None:
+        try:
+            result = await self._until_done(operation, poller)
+        except Exception as e:
+            if is_azure_error(e):
+                e = AzureCommandError(f"{operation.description}: {e}")
+            operation.error = e
+            operation.status = STATUS_FAILED
+            operation.ended = time.monotonic()
+            operation.future.set_exception(e)
+        else:
+            operation.result = result
+            operation.status = STATUS_SUCCEEDED
+            operation.ended = time.monotonic()
+            operation.future.set_result(result)
+
+    async def _until_done(self, operation: LroOperation, poller: Any) -> Any:
+        method = _polling_method(poller)
+        if method is None:
+            # A poller the manager cannot step through waits on a worker thread
+            return await asyncio.get_running_loop().run_in_executor(None, poller.result)
+        delay = self.initial_delay
+        throttled = 0
+        while not method.finished():
+            hint = method.retry_after()
+            await asyncio.sleep(delay if hint is None else min(hint, self.max_delay))
+            delay = min(delay * self.backoff, self.max_delay)
+            try:
+                with span("lro.poll", operation=operation.op_id):
+                    method.update_status()
+            except Exception as e:
+                throttled += 1
+                if not is_throttled(e) or throttled >= self.retry.max_attempts:
+                    raise
+                await asyncio.sleep(self.retry.delay(throttled, retry_after_seconds(e)))
+                continue
+            operation.polls += 1
+            operation.status = method.status()
+        status = method.status()
+        if status.lower() != "succeeded":
+            raise AzureCommandError(f"{operation.description}: {status}")
+        return method.final_resource()
+
+    def wait(
+        self, operations: Sequence[LroOperation], console: Any = None, refresh: float = 0.1
+    ) -> None:
+        """
+        Block until the operations are over.
+
+        Args:
+            operations: Operations returned by track().
+            console: Rich console to draw one progress view of all of them
+                on; None waits silently.
+            refresh: Seconds between redraws of the progress view.
+        """
+        pending = [operation.future for operation in operations]
+        if console is None:
+            futures.wait(pending)
+            return
+        from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+
+        columns = (
+            SpinnerColumn(),
+            TextColumn("{task.description}"),
+            TextColumn("[dim]{task.fields[status]}"),
+            TimeElapsedColumn(),
+        )
+        # Redrawn from this thread, so Rich needs no refresh thread of its own
+        with Progress(*columns, console=console, auto_refresh=False) as progress:
+            tasks = [
+                progress.add_task(operation.description, total=1, status=operation.status)
+                for operation in operations
+            ]
+            while True:
+                for task, operation in zip(tasks, operations, strict=True):
+                    progress.update(task, completed=int(operation.done), status=operation.status)
+                progress.refresh()
+                pending = [future for future in pending if not future.done()]
+                if not pending:
+                    return
+                futures.wait(pending, timeout=refresh, return_when=futures.FIRST_COMPLETED)
+
+    def close(self) -> None:
+        """Stop the loop thread. Operations still being polled are abandoned."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None and thread is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+
+_manager: Optional[LroManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_lro_manager() -> LroManager:
+    """Return the process-wide manager."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = LroManager()
+        return _manager
+
+
+# ============================================================================
+# Detached Operations
+# ============================================================================
+@dataclass(frozen=True)
+class OperationRecord:
+    """An operation started with --no-wait."""
+
+    op_id: str
+    kind: str
+    description: str
+    subscription_id: str
+    # What resuming the operation needs besides the token, e.g. the account name
+    arguments: dict[str, Any]
+    continuation_token: str
+    status: str = STATUS_IN_PROGRESS
+    started_at: float = 0.0
+    updated_at: float = 0.0
+
+
+class OperationStore:
+    """SQLite record of detached operations, for `copilot status`."""
+
+    def __init__(self, path: Path, clock: Callable[[], float] = time.time) -> None:
+        """
+        Args:
+            path: SQLite file location. Use ":memory:" for a throwaway store.
+            clock: Time source, injectable for tests.
+        """
+        self.config: Optional[Config] = None
+        self._clock = clock
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def add(self, record: OperationRecord) -> OperationRecord:
+        now = self._clock()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO operations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record.op_id,
+                    record.kind,
+                    record.description,
+                    record.subscription_id,
+                    json.dumps(record.arguments),
+                    record.continuation_token,
+                    record.status,
+                    record.started_at or now,
+                    now,
+                ),
+            )
+        return self.get(record.op_id) or record
+
+    def get(self, op_id: str) -> Optional[OperationRecord]:
+        """The operation with this ID, or the only one whose ID starts with it."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM operations WHERE op_id LIKE ? ESCAPE '\\' LIMIT 2",
+                (op_id.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%",),
+            ).fetchall()
+        exact = [row for row in rows if row[0] == op_id]
+        if exact or len(rows) == 1:
+            return _record(exact[0] if exact else rows[0])
+        return None
+
+    def recent(self, limit: int = 20) -> list[OperationRecord]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM operations ORDER BY started_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [_record(row) for row in rows]
+
+    def set_status(self, op_id: str, status: str) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE operations SET status = ?, updated_at = ? WHERE op_id = ?",
+                (status, self._clock(), op_id),
+            )
+
+    @classmethod
+    def from_config(cls, config: Config) -> "OperationStore":
+        store = cls(config.operations_db_path)
+        store.config = config
+        return store
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def _record(row: tuple) -> OperationRecord:
+    return OperationRecord(
+        row[0], row[1], row[2], row[3], json.loads(row[4]), row[5], row[6], row[7], row[8]
+    )
+
+
+_store: Optional[OperationStore] = None
+_store_lock = threading.Lock()
+
+
+def get_operation_store(config: Config) -> OperationStore:
+    """Return the process-wide operation store for a config."""
+    global _store
+    with _store_lock:
+        if _store is None or _store.config is not config:
+            if _store is not None:
+                retire(_store.close)
+            _store = OperationStore.from_config(config)
+        return _store
+
+
+def _resume_storage_account(config: Config, record: OperationRecord) -> Any:
+    client = azure_commands.get_storage_client(config, record.subscription_id)
+    return azure_commands.begin_create_storage_account(
+        client,
+        record.arguments["resource_group"],
+        record.arguments["name"],
+        polling=manual_polling(),
+        continuation_token=record.continuation_token,
+    )
+
+
+# Operation kind -> picks up its poller again from a record
+RESUMERS: dict[str, Callable[[Config, OperationRecord], Any]] = {
+    "create_storage_account": _resume_storage_account,
+}
+
+
+def resume(config: Config, record: OperationRecord) -> Any:
+    """
+    Rebuild the poller of a detached operation from its continuation token.
+
+    Raises:
+        ValueError: If operations of this kind cannot be resumed.
+        AzureCommandError: If the Azure call fails.
+    """
+    resumer = RESUMERS.get(record.kind)
+    if resumer is None:
+        raise ValueError(f"Cannot resume {record.kind} operations")
+    return resumer(config, record)
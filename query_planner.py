@@ -0,0 +1,229 @@
+"""
+Query planning for resource listings: filter and project on the server.
+
+"show vms in eastus tagged env=prod" should not page through every resource
+of a subscription only to throw most of them away. The planner turns the
+entities of a listing command into a ResourceQuery and plans it for one of
+three sources:
+
+    arm    - ``resources.list(filter=...)``. ARM accepts a single predicate
+             in ``$filter`` (resourceType, location, or one tag name/value
+             pair, which also strips tags from the results) and has no
+             ``$select``; everything else is filtered locally.
+    graph  - a Resource Graph KQL query. Every predicate goes into ``where``
+             and only the needed columns into ``project``.
+    local  - rows already on hand (the inventory cache); everything is
+             filtered locally.
+
+Whatever a source cannot evaluate stays in the plan's residual predicates,
+which are compiled once into a single row test and applied with ``filter``.
+"""
+
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from entities import Entities
+
+BACKENDS = ("arm", "graph", "local")
+
+# Columns of a resource row, as produced by azure_commands.resource_to_dict
+COLUMNS = ("id", "name", "type", "location", "resource_group", "tags")
+
+# Row column -> Resource Graph column
+GRAPH_COLUMNS = {"resource_group": "resourceGroup"}
+
+Row = dict[str, Any]
+
+
+@dataclass(frozen=True)
+class Predicate:
+    """A case-insensitive equality test on one column, or on one tag if ``tag`` is set."""
+
+    column: str
+    value: str
+    tag: Optional[str] = None
+
+    def matcher(self) -> Callable[[Row], bool]:
+        value = self.value.lower()
+        if self.tag is not None:
+            tag = self.tag.lower()
+
+            def match_tag(row: Row) -> bool:
+                tags = row.get("tags") or {}
+                return any(k.lower() == tag and str(v).lower() == value for k, v in tags.items())
+
+            return match_tag
+        column = self.column
+        return lambda row: (row.get(column) or "").lower() == value
+
+    def describe(self) -> str:
+        if self.tag is not None:
+            return f"tag {self.tag}={self.value}"
+        return f"{self.column}={self.value}"
+
+
+@dataclass(frozen=True)
+class ResourceQuery:
+    """What a listing command asks for."""
+
+    resource_group: Optional[str] = None
+    predicates: tuple[Predicate, ...] = ()
+    # Columns the output needs; others may be left out by the server
+    columns: tuple[str, ...] = COLUMNS
+
+    @classmethod
+    def from_entities(
+        cls,
+        entities: Entities,
+        default_resource_group: Optional[str] = None,
+        columns: tuple[str, ...] = COLUMNS,
+    ) -> "ResourceQuery":
+        predicates = []
+        if entities.resource_type:
+            predicates.append(Predicate("type", entities.resource_type))
+        if entities.location:
+            predicates.append(Predicate("location", entities.location))
+        predicates.extend(Predicate("tags", value, tag=name) for name, value in entities.tags)
+        return cls(
+            entities.resource_group or default_resource_group or None, tuple(predicates), columns
+        )
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """How a ResourceQuery is run against one source."""
+
+    backend: str
+    query: ResourceQuery
+    pushed: tuple[Predicate, ...] = ()
+    residual: tuple[Predicate, ...] = ()
+    # ARM $filter, for the "arm" backend
+    odata_filter: Optional[str] = None
+    # Full query text, for the "graph" backend
+    kql: Optional[str] = None
+    _keep: Optional[Callable[[Row], bool]] = field(default=None, compare=False, repr=False)
+
+    def apply(self, rows: Iterable[Row]) -> Iterator[Row]:
+        """Filter rows by the residual predicates and trim them to the query's columns."""
+        rows = iter(rows) if self._keep is None else filter(self._keep, rows)
+        columns = self.query.columns
+        if set(columns) >= set(COLUMNS):
+            return rows
+        return ({column: row.get(column) for column in columns} for row in rows)
+
+    def explain(self) -> str:
+        pushed = ", ".join(p.describe() for p in self.pushed) or "nothing"
+        residual = ", ".join(p.describe() for p in self.residual) or "nothing"
+        return f"{self.backend}: server filters {pushed}; local filters {residual}"
+
+
+def compile_filter(predicates: Iterable[Predicate]) -> Optional[Callable[[Row], bool]]:
+    """One row test for all predicates, or None when there is nothing to test."""
+    checks = [predicate.matcher() for predicate in predicates]
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    return lambda row: all(check(row) for check in checks)
+
+
+def plan_query(query: ResourceQuery, backend: str) -> QueryPlan:
+    """
+    Decide which predicates a source evaluates and build its request.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if backend == "arm":
+        pushed, odata = _arm_pushdown(query)
+        residual = tuple(p for p in query.predicates if p not in pushed)
+        return QueryPlan(
+            backend, query, pushed, residual, odata_filter=odata, _keep=compile_filter(residual)
+        )
+    if backend == "graph":
+        return QueryPlan(backend, query, query.predicates, (), kql=_kql(query))
+    if backend == "local":
+        residual = query.predicates
+        return QueryPlan(backend, query, (), residual, _keep=compile_filter(residual))
+    raise ValueError(f"Unknown query backend: {backend}. Must be one of: {', '.join(BACKENDS)}")
+
+
+# ============================================================================
+# ARM $filter
+# ============================================================================
+def _odata_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _arm_pushdown(query: ResourceQuery) -> tuple[tuple[Predicate, ...], Optional[str]]:
+    """Pick the one predicate ARM filters on, most selective first."""
+    by_column = {p.column: p for p in query.predicates if p.tag is None}
+    if "type" in by_column:
+        predicate = by_column["type"]
+        return (predicate,), f"resourceType eq {_odata_string(predicate.value)}"
+    if "location" in by_column:
+        predicate = by_column["location"]
+        return (predicate,), f"location eq {_odata_string(predicate.value)}"
+    tags = [p for p in query.predicates if p.tag is not None]
+    # A tag filter drops tags from the response, so only when nobody needs them
+    if len(tags) == 1 and "tags" not in query.columns:
+        (predicate,) = tags
+        return (predicate,), (
+            f"tagName eq {_odata_string(predicate.tag or '')}"
+            f" and tagValue eq {_odata_string(predicate.value)}"
+        )
+    return (), None
+
+
+# ============================================================================
+# Resource Graph KQL
+# ============================================================================
+def _kql_string(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _kql(query: ResourceQuery) -> str:
+    conditions = []
+    if query.resource_group:
+        conditions.append(f"resourceGroup =~ {_kql_string(query.resource_group)}")
+    for predicate in query.predicates:
+        if predicate.tag is not None:
+            column = f"tostring(tags[{_kql_string(predicate.tag)}])"
+        else:
+            column = GRAPH_COLUMNS.get(predicate.column, predicate.column)
+        conditions.append(f"{column} =~ {_kql_string(predicate.value)}")
+    parts = ["resources"]
+    if conditions:
+        parts.append("where " + " and ".join(conditions))
+    parts.append("project " + ", ".join(GRAPH_COLUMNS.get(c, c) for c in query.columns))
+    return " | ".join(parts)
+
+
+# ============================================================================
+# Execution
+# ============================================================================
+def run_plan(plan: QueryPlan, subscription_id: str, client: Any) -> Iterator[Row]:
+    """
+    Fetch a planned query for one subscription from its server.
+
+    Args:
+        plan: An "arm" or "graph" plan.
+        subscription_id: Subscription to query.
+        client: ResourceManagementClient for "arm", inventory_sync.ResourceGraph
+            for "graph".
+
+    Raises:
+        AzureCommandError: If the Azure call fails.
+    """
+    if plan.backend == "arm":
+        from azure_commands import iter_resources
+
+        rows = iter_resources(client, plan.query.resource_group, odata_filter=plan.odata_filter)
+    elif plan.backend == "graph":
+        from inventory_sync import graph_row_to_dict
+
+        rows = (graph_row_to_dict(row) for row in client.query(subscription_id, plan.kql or ""))
+    else:
+        raise ValueError(f"A {plan.backend} plan has no server to run on")
+    return plan.apply(rows)
@@ -0,0 +1,174 @@
+"""
+Streaming output for resource listings.
+
+Rows are written as they arrive instead of after the whole listing has been
+fetched, so the first results appear immediately and memory use stays
+constant regardless of how many resources a tenant has.
+"""
+
+import csv
+import json
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from typing import Any, TextIO
+
+from tracing import span
+
+OUTPUT_FORMATS = ("table", "ndjson", "csv")
+
+# Columns shown for each resource, in order: (key, table header, table width)
+COLUMNS = (
+    ("name", "Name", 32),
+    ("type", "Type", 44),
+    ("location", "Location", 14),
+    ("resource_group", "Resource Group", 24),
+)
+
+# Rows rendered per Rich table chunk in table mode
+TABLE_CHUNK_ROWS = 50
+
+
+def _chunks(rows: Iterable[dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def write_ndjson(rows: Iterable[dict[str, Any]], out: TextIO) -> int:
+    """Write one JSON object per line, flushing after each. Returns the row count."""
+    count = 0
+    for row in rows:
+        out.write(json.dumps(row, separators=(",", ":")) + "\n")
+        out.flush()
+        count += 1
+    return count
+
+
+def write_csv(rows: Iterable[dict[str, Any]], out: TextIO) -> int:
+    """Write a header and one CSV line per row, flushing after each. Returns the row count."""
+    writer = csv.writer(out)
+    writer.writerow([key for key, _, _ in COLUMNS])
+    count = 0
+    for row in rows:
+        writer.writerow([row.get(key, "") for key, _, _ in COLUMNS])
+        out.flush()
+        count += 1
+    return count
+
+
+def write_table(rows: Iterable[dict[str, Any]], console: Any) -> int:
+    """
+    Render rows as a Rich table, one fixed-width chunk at a time.
+
+    Every chunk uses the same column widths and only the first shows the
+    header, so the chunks read as one continuous table.
+
+    Args:
+        rows: Resources to render.
+        console: rich.console.Console to print to.
+
+    Returns:
+        Number of rows rendered.
+    """
+    from rich import box
+    from rich.table import Table
+
+    count = 0
+    for chunk in _chunks(rows, TABLE_CHUNK_ROWS):
+        table = Table(box=box.SIMPLE_HEAD, show_header=count == 0, show_edge=False, pad_edge=False)
+        for _, header, width in COLUMNS:
+            table.add_column(header, width=width, no_wrap=True, overflow="ellipsis")
+        for row in chunk:
+            table.add_row(*(str(row.get(key) or "") for key, _, _ in COLUMNS))
+        console.print(table)
+        count += len(chunk)
+    return count
+
+
+def render_resources(
+    rows: Iterable[dict[str, Any]], output_format: str, out: TextIO, console: Any = None
+) -> int:
+    """
+    Stream resources to the terminal in the requested format.
+
+    Args:
+        rows: Resources, typically straight from an SDK pager or the cache.
+        output_format: One of OUTPUT_FORMATS.
+        out: Stream for ndjson and csv output.
+        console: Rich console for table output.
+
+    Returns:
+        Number of rows rendered.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unknown output format: {output_format}. Must be one of: {OUTPUT_FORMATS}"
+        )
+    # Rows usually stream from the API, so this includes waiting for it
+    with span("render", format=output_format) as stage:
+        if output_format == "ndjson":
+            count = write_ndjson(rows, out)
+        elif output_format == "csv":
+            count = write_csv(rows, out)
+        else:
+            count = write_table(rows, console)
+        stage.set(rows=count)
+    return count
+
+
+def render_counts(
+    counts: dict[tuple[str, ...], int],
+    columns: tuple[str, ...],
+    output_format: str,
+    out: TextIO,
+    console: Any = None,
+) -> int:
+    """
+    Write aggregated resource counts in the requested format.
+
+    Args:
+        counts: {(value, ...): count} as returned by ResourceTable.count_by.
+        columns: Names of the grouped columns, one per key value.
+        output_format: One of OUTPUT_FORMATS.
+        out: Stream for ndjson and csv output.
+        console: Rich console for table output.
+
+    Returns:
+        Number of groups written.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unknown output format: {output_format}. Must be one of: {OUTPUT_FORMATS}"
+        )
+    rows = [
+        {**dict(zip(columns, key, strict=True)), "count": count} for key, count in counts.items()
+    ]
+    if output_format == "ndjson":
+        return write_ndjson(rows, out)
+    headers = [*columns, "count"]
+    if output_format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(headers)
+        writer.writerows([row[header] for header in headers] for row in rows)
+        return len(rows)
+
+    from rich import box
+    from rich.table import Table
+
+    table = Table(box=box.SIMPLE_HEAD, show_edge=False, pad_edge=False)
+    for header in headers:
+        table.add_column(
+            header.replace("_", " ").title(), justify="right" if header == "count" else "left"
+        )
+    for row in rows:
+        table.add_row(
+            *(f"{row[header]:,}" if header == "count" else row[header] or "-" for header in headers)
+        )
+    console.print(table)
+    return len(rows)
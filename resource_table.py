@@ -0,0 +1,197 @@
+"""
+Columnar, memory-compact table of resources.
+
+A list of SDK models (or of plain dicts) spends most of its memory on
+per-object dicts and on repeating the same few strings: a subscription has
+a handful of types, regions and resource groups but tens of thousands of
+resources. ResourceTable stores one column per field instead:
+
+- type, location and resource group are codes into per-column string tables,
+  kept in ``array("I")``;
+- an ID is stored as a code for everything before its last segment plus the
+  last segment, which is usually the name and then shares its string;
+- rows with the same tags share one tags dict.
+
+Aggregations work on the integer codes, so "how many VMs per region" is a
+Counter over zipped arrays rather than a pass over full row objects.
+"""
+
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any, Optional
+
+# Columns stored as codes into a string table
+CODED_COLUMNS = ("type", "location", "resource_group")
+COLUMNS = ("id", "name", *CODED_COLUMNS, "tags")
+
+
+class _StringTable:
+    """Assigns each distinct string a small integer code."""
+
+    __slots__ = ("codes", "values")
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self.codes: dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ResourceTable:
+    """
+    Resources stored column by column.
+
+    Example:
+        table = ResourceTable.from_rows(rows)
+        table.count_by("location")  # {("eastus",): 120, ("westeurope",): 80}
+        for row in table.sort_by("name"):
+            ...
+    """
+
+    def __init__(self) -> None:
+        self._strings = {column: _StringTable() for column in (*CODED_COLUMNS, "id_prefix")}
+        self._codes = {column: array("I") for column in (*CODED_COLUMNS, "id_prefix")}
+        self._names: list[str] = []
+        # Last segment of each ID; the name itself when they are equal
+        self._id_suffixes: list[str] = []
+        self._tag_sets: list[dict[str, str]] = []
+        self._tag_index: dict[tuple[tuple[str, str], ...], int] = {}
+        self._tags = array("I")
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict[str, Any]]) -> "ResourceTable":
+        table = cls()
+        table.extend(rows)
+        return table
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def append(self, row: dict[str, Any]) -> None:
+        """Add a resource row (as produced by azure_commands.resource_to_dict)."""
+        name = row.get("name") or ""
+        for column in CODED_COLUMNS:
+            self._codes[column].append(self._strings[column].code(row.get(column) or ""))
+        prefix, _, suffix = (row.get("id") or "").rpartition("/")
+        self._codes["id_prefix"].append(self._strings["id_prefix"].code(prefix))
+        self._names.append(name)
+        self._id_suffixes.append(name if suffix == name else suffix)
+        tags = row.get("tags") or {}
+        key = tuple(sorted(tags.items()))
+        code = self._tag_index.get(key)
+        if code is None:
+            code = self._tag_index[key] = len(self._tag_sets)
+            self._tag_sets.append(dict(key))
+        self._tags.append(code)
+
+    def extend(self, rows: Iterable[dict[str, Any]]) -> None:
+        for row in rows:
+            self.append(row)
+
+    # ------------------------------------------------------------------------
+    # Reading rows
+    # ------------------------------------------------------------------------
+    def column(self, name: str) -> list[Any]:
+        """Every value of one column, in row order."""
+        if name in CODED_COLUMNS:
+            values = self._strings[name].values
+            return [values[code] for code in self._codes[name]]
+        if name == "name":
+            return list(self._names)
+        if name == "id":
+            return [self._id(index) for index in range(len(self))]
+        if name == "tags":
+            return [dict(self._tag_sets[code]) for code in self._tags]
+        raise ValueError(f"Unknown column: {name}. Must be one of: {', '.join(COLUMNS)}")
+
+    def row(self, index: int) -> dict[str, Any]:
+        """One resource as a fresh dict."""
+        return {
+            "id": self._id(index),
+            "name": self._names[index],
+            **{
+                column: self._strings[column].values[self._codes[column][index]]
+                for column in CODED_COLUMNS
+            },
+            "tags": dict(self._tag_sets[self._tags[index]]),
+        }
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return (self.row(index) for index in range(len(self)))
+
+    def rows(self, indices: Iterable[int]) -> Iterator[dict[str, Any]]:
+        return (self.row(index) for index in indices)
+
+    def _id(self, index: int) -> str:
+        prefix = self._strings["id_prefix"].values[self._codes["id_prefix"][index]]
+        return f"{prefix}/{self._id_suffixes[index]}" if prefix else self._id_suffixes[index]
+
+    # ------------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------------
+    def count_by(self, *columns: str) -> dict[tuple[str, ...], int]:
+        """
+        Count resources per distinct combination of coded column values.
+
+        Returns:
+            {(value, ...): count}, most common first.
+
+        Raises:
+            ValueError: If a column is not one of CODED_COLUMNS.
+        """
+        for column in columns:
+            if column not in CODED_COLUMNS:
+                raise ValueError(
+                    f"Cannot group by {column}. Must be one of: {', '.join(CODED_COLUMNS)}"
+                )
+        if not columns:
+            return {(): len(self)}
+        counts = Counter(zip(*(self._codes[column] for column in columns), strict=True))
+        tables = [self._strings[column].values for column in columns]
+        return {
+            tuple(table[code] for table, code in zip(tables, key, strict=True)): count
+            for key, count in counts.most_common()
+        }
+
+    def where(self, column: str, value: str) -> list[int]:
+        """Indices of rows whose coded column equals value (case-insensitive)."""
+        wanted = {
+            code
+            for text, code in self._strings[column].codes.items()
+            if text.lower() == value.lower()
+        }
+        return [index for index, code in enumerate(self._codes[column]) if code in wanted]
+
+    def sort_by(self, column: str, reverse: bool = False) -> list[int]:
+        """
+        Row indices ordered by a column (case-insensitive).
+
+        Coded columns sort their few distinct strings once and then the rows by
+        integer rank.
+        """
+        if column == "name":
+            keys: Sequence[Any] = [name.lower() for name in self._names]
+        elif column in CODED_COLUMNS:
+            folded = [value.lower() for value in self._strings[column].values]
+            positions = {value: position for position, value in enumerate(sorted(set(folded)))}
+            rank = [positions[value] for value in folded]
+            keys = [rank[code] for code in self._codes[column]]
+        else:
+            raise ValueError(f"Cannot sort by {column}")
+        return sorted(range(len(self)), key=keys.__getitem__, reverse=reverse)
+
+    def distinct(self, column: str) -> list[str]:
+        """Distinct values of a coded column, in first-seen order."""
+        return list(self._strings[column].values)
+
+    def summary(self, column: Optional[str] = None) -> list[tuple[str, int]]:
+        """(value, count) pairs for one coded column, most common first."""
+        if column is None:
+            return [("total", len(self))]
+        return [(key[0], count) for key, count in self.count_by(column).items()]
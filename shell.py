@@ -0,0 +1,180 @@
+"""
+Interactive shell for Azure Copilot (`copilot shell`).
+
+Every line is run through the same click command as a one-shot `copilot`
+invocation, but inside one long-lived process: imports, the Config singleton,
+credentials, SDK clients, the inventory cache and the compiled intent registry
+all stay warm, so after the first command latency is dominated by Azure itself.
+"""
+
+import os
+import shlex
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Optional
+
+import click
+
+from completion import KIND_COMMAND, CompletionIndex
+from intents import registry
+
+PROMPT = "copilot> "
+EXIT_COMMANDS = ("exit", "quit")
+SHELL_COMMANDS = (*EXIT_COMMANDS, "stats")
+
+# Where command history is kept between sessions
+HISTORY_FILE = Path(os.getenv("COPILOT_HISTORY_FILE", "~/.azure_copilot_history")).expanduser()
+HISTORY_LENGTH = 1000
+
+
+def completions(text: str, index: Optional[CompletionIndex] = None) -> list[str]:
+    """
+    Known commands that start with the text typed so far.
+
+    Args:
+        text: The whole line typed so far.
+        index: Completion index; when given, the word being typed is also
+            completed against cached resource names.
+
+    Returns:
+        Sorted list of matching intent phrases and shell commands, then the
+        line completed with each matching resource name.
+    """
+    phrases = {intent.description for intent in registry.intents if intent.description}
+    phrases.update(SHELL_COMMANDS)
+    prefix = text.lstrip().lower()
+    matches = sorted(phrase for phrase in phrases if phrase.startswith(prefix))
+    if index is not None and prefix:
+        words = text.split()
+        incomplete = "" if text[-1].isspace() else words.pop()
+        head = text[: len(text) - len(incomplete)]
+        matches += [
+            head + c.value for c in index.complete(words, incomplete) if c.kind != KIND_COMMAND
+        ]
+    return matches
+
+
+def _completion_index() -> Optional[CompletionIndex]:
+    from completion import get_completion_index
+    from config import get_config
+
+    try:
+        return get_completion_index(get_config())
+    except ValueError:
+        return None
+
+
+def _setup_readline(history_file: Path) -> Optional[Callable[[], None]]:
+    """
+    Enable tab completion and persistent history when readline is available.
+
+    Returns:
+        Function that saves the history, or None without readline.
+    """
+    try:
+        import readline
+    except ImportError:  # pragma: no cover - Windows without pyreadline
+        return None
+
+    matches: list[str] = []
+
+    def complete(_text: str, state: int) -> Optional[str]:
+        # readline asks for one match per call; compute them once per TAB
+        if state == 0:
+            matches[:] = completions(readline.get_line_buffer(), _completion_index())
+        return matches[state] if state < len(matches) else None
+
+    # Complete against the whole line so multi-word phrases work
+    readline.set_completer_delims("")
+    readline.set_completer(complete)
+    readline.parse_and_bind("tab: complete")
+    readline.set_history_length(HISTORY_LENGTH)
+    if history_file.exists():
+        readline.read_history_file(history_file)
+
+    def save() -> None:
+        history_file.parent.mkdir(parents=True, exist_ok=True)
+        readline.write_history_file(history_file)
+
+    return save
+
+
+def split_line(line: str) -> list[str]:
+    """
+    Split a line like a shell would, or on whitespace if its quotes are unpaired.
+
+    Natural language is full of apostrophes ("what's in rg-prod"), which
+    shlex reads as an unclosed quotation.
+    """
+    try:
+        return shlex.split(line)
+    except ValueError:
+        return line.split()
+
+
+def show_stats() -> None:
+    """Print how much warm state has been reused in this session."""
+    from clients import current_client_pool
+    from translation_cache import current_translation_cache
+
+    pool = current_client_pool()
+    if pool is None:
+        click.echo("No Azure clients created yet")
+    else:
+        click.echo(pool.stats.summary())
+    translations = current_translation_cache()
+    if translations is not None:
+        click.echo(translations.metrics.summary())
+
+
+def run_shell(
+    execute: Callable[[Sequence[str]], object],
+    input_func: Callable[[str], str] = input,
+    history_file: Optional[Path] = None,
+) -> None:
+    """
+    Read commands until EOF or `exit` and run each one through ``execute``.
+
+    Args:
+        execute: Runs one command line, given as an argv list (for example
+            ``cli.main`` with standalone_mode=False).
+        input_func: Reads a line, injectable for tests.
+        history_file: Where readline history is loaded from and saved to.
+            Defaults to HISTORY_FILE.
+    """
+    save_history = _setup_readline(history_file or HISTORY_FILE)
+    click.echo("Azure Copilot shell. Type 'help' for commands, 'exit' to quit.")
+    try:
+        while True:
+            try:
+                line = input_func(PROMPT).strip()
+            except EOFError:
+                click.echo()
+                break
+            except KeyboardInterrupt:
+                click.echo()
+                continue
+
+            if not line:
+                continue
+            if line.lower() in EXIT_COMMANDS:
+                break
+            if line.lower() == "stats":
+                show_stats()
+                continue
+            if line.lower() == "shell":
+                click.echo("Already in the copilot shell")
+                continue
+
+            try:
+                execute(split_line(line))
+            except click.ClickException as e:
+                e.show()
+            except ValueError as e:
+                click.echo(f"Error: {e}", err=True)
+            except (click.exceptions.Abort, KeyboardInterrupt):
+                # Abort: a confirmation prompt was declined or interrupted
+                click.echo("Cancelled", err=True)
+    finally:
+        if save_history is not None:
+            save_history()
@@ -0,0 +1,113 @@
+"""
+Startup profiling for the copilot entry point.
+
+Runs a command in a fresh interpreter with ``-X importtime`` and reports how
+long each imported module took, so slow imports on the startup path are easy
+to spot. Used by ``copilot --startup-profile``.
+"""
+
+import subprocess
+import sys
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+# Modules that must stay off the startup path of cheap commands like "help"
+HEAVY_MODULES = ("rich", "dotenv", "azure")
+
+_PROJECT_ROOT = Path(__file__).resolve().parent
+
+
+@dataclass(frozen=True)
+class ImportTiming:
+    """Import cost of a single module, in microseconds."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+@dataclass(frozen=True)
+class StartupProfile:
+    """Result of profiling one cold start."""
+
+    argv: tuple[str, ...]
+    wall_seconds: float
+    imports: tuple[ImportTiming, ...]
+
+    def slowest(self, limit: int = 15) -> list[ImportTiming]:
+        """Top-level and nested imports ordered by cumulative time."""
+        return sorted(self.imports, key=lambda t: t.cumulative_us, reverse=True)[:limit]
+
+
+def parse_importtime(output: str) -> list[ImportTiming]:
+    """
+    Parse the stderr produced by ``python -X importtime``.
+
+    Args:
+        output: Raw stderr text.
+
+    Returns:
+        One ImportTiming per imported module, in import order.
+    """
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # Header row
+        timings.append(
+            ImportTiming(
+                module=fields[2].strip(),
+                self_us=int(fields[0]),
+                cumulative_us=int(fields[1]),
+            )
+        )
+    return timings
+
+
+def cold_start_command(argv: Sequence[str]) -> list[str]:
+    """Build the interpreter command line that runs the CLI with argv."""
+    code = f"import cli; cli.cli({list(argv)!r}, prog_name='copilot')"
+    return [sys.executable, "-c", code]
+
+
+def profile_startup(argv: Sequence[str] = ("help",)) -> StartupProfile:
+    """
+    Run the CLI once in a fresh interpreter and collect per-module import times.
+
+    Args:
+        argv: Arguments to pass to the copilot command.
+
+    Returns:
+        StartupProfile with wall-clock time and import timings.
+    """
+    command = cold_start_command(argv)
+    command.insert(1, "-X")
+    command.insert(2, "importtime")
+    start = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True, cwd=_PROJECT_ROOT)
+    wall_seconds = time.perf_counter() - start
+    return StartupProfile(tuple(argv), wall_seconds, tuple(parse_importtime(result.stderr)))
+
+
+def print_startup_profile(profile: StartupProfile, limit: int = 15) -> None:
+    """Render the slowest imports of a startup profile as a Rich table."""
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title=f"copilot {' '.join(profile.argv)} — {profile.wall_seconds * 1000:.0f} ms")
+    table.add_column("Module")
+    table.add_column("Self (ms)", justify="right")
+    table.add_column("Cumulative (ms)", justify="right")
+    for timing in profile.slowest(limit):
+        table.add_row(
+            timing.module, f"{timing.self_us / 1000:.1f}", f"{timing.cumulative_us / 1000:.1f}"
+        )
+    Console().print(table)
+
+    heavy = sorted({t.module for t in profile.imports if t.module.split(".")[0] in HEAVY_MODULES})
+    if heavy:
+        Console().print(f"Heavy modules on this path: {', '.join(heavy)}", style="yellow")
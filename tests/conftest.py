@@ -6,12 +6,16 @@ Fixtures are like "setup helpers" that run before your tests.
 """
 
 import os
+import time
+from types import SimpleNamespace
 from typing import Generator
 from unittest.mock import MagicMock, patch
 
 import pytest
 from click.testing import CliRunner
 
+from config import configure, get_config
+
 
 # ============================================================================
 # Environment Fixtures - Manage test environment variables
@@ -19,7 +23,7 @@ from click.testing import CliRunner
 
 
 @pytest.fixture(autouse=True)
-def mock_env_vars(monkeypatch: pytest.MonkeyPatch) -> None:
+def mock_env_vars(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
     """
     Automatically sets fake environment variables for ALL tests.
 
@@ -31,12 +35,30 @@ def mock_env_vars(monkeypatch: pytest.MonkeyPatch) -> None:
     """
     # Set a fake Azure subscription ID so tests don't use your real one
     monkeypatch.setenv("AZURE_SUBSCRIPTION_ID", "00000000-0000-0000-0000-000000000000")
+    # Commands run by tests must not land in the real command history
+    monkeypatch.setenv("HISTORY_DB_PATH", str(tmp_path / "history.db"))
+    # Neither a developer's copilot.toml nor the parsed-config cache in ./data
+    monkeypatch.setenv("COPILOT_CONFIG", str(tmp_path / "copilot.toml"))
+    monkeypatch.setenv("COPILOT_CONFIG_CACHE", str(tmp_path / "config_cache.json"))
+    # Price estimates come from the bundled sheet, never the network
+    monkeypatch.setenv("PRICE_SHEET_PATH", str(tmp_path / "prices.json.gz"))
+    monkeypatch.setenv("PRICE_SHEET_REFRESH", "false")
 
     # TODO: Add more environment variables here as needed
     # monkeypatch.setenv("DEFAULT_LOCATION", "eastus")
     # monkeypatch.setenv("LOG_LEVEL", "DEBUG")
 
 
+@pytest.fixture(autouse=True)
+def reset_config_singleton() -> Generator[None, None, None]:
+    """Rebuild the lazily created Config singleton from each test's environment."""
+    configure()
+    get_config.cache_clear()
+    yield
+    configure()
+    get_config.cache_clear()
+
+
 # ============================================================================
 # CLI Testing Fixtures - Test Click commands
 # ============================================================================
@@ -104,6 +126,68 @@ def mock_resource_client() -> Generator[MagicMock, None, None]:
         yield client
 
 
+class FakeResourceClient:
+    """
+    In-memory stand-in for ResourceManagementClient.
+
+    Only implements the pieces the CLI uses. ``list_calls`` counts how many
+    times a listing was requested, so tests can tell cache hits from misses.
+    ``latency`` seconds are slept on every listing to simulate network time.
+    """
+
+    def __init__(self, resources: list[SimpleNamespace], latency: float = 0.0) -> None:
+        self._resources = resources
+        self.latency = latency
+        self.list_calls = 0
+        self.resources = SimpleNamespace(
+            list=self._list, list_by_resource_group=self._list_by_resource_group
+        )
+
+    def _list(self, **kwargs):
+        self.list_calls += 1
+        time.sleep(self.latency)
+        return iter(self._resources)
+
+    def _list_by_resource_group(self, resource_group_name: str, **kwargs):
+        self.list_calls += 1
+        time.sleep(self.latency)
+        return iter(
+            r for r in self._resources if f"/resourceGroups/{resource_group_name}/" in r.id
+        )
+
+
+def create_fake_resource(
+    name: str,
+    resource_type: str = "Microsoft.Storage/storageAccounts",
+    resource_group: str = "dev-rg",
+    location: str = "eastus",
+    tags: dict[str, str] | None = None,
+) -> SimpleNamespace:
+    """Create an object shaped like an SDK GenericResource."""
+    return SimpleNamespace(
+        id=(
+            "/subscriptions/00000000-0000-0000-0000-000000000000"
+            f"/resourceGroups/{resource_group}/providers/{resource_type}/{name}"
+        ),
+        name=name,
+        type=resource_type,
+        location=location,
+        tags=tags,
+    )
+
+
+@pytest.fixture
+def fake_resource_client() -> FakeResourceClient:
+    """A fake ResourceManagementClient holding a few resources in two groups."""
+    return FakeResourceClient(
+        [
+            create_fake_resource("devstore"),
+            create_fake_resource("devvm", "Microsoft.Compute/virtualMachines"),
+            create_fake_resource("prodstore", resource_group="prod-rg", location="westus"),
+        ]
+    )
+
+
 # ============================================================================
 # Test Data Helpers - Create fake Azure objects for testing
 # ============================================================================
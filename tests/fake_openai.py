@@ -0,0 +1,94 @@
+"""
+Local stand-in for an Azure OpenAI chat completions deployment.
+
+Streams a scripted reply as server-sent events, one event per chunk, so the
+streaming translator can be tested (and benchmarked) without network access.
+"""
+
+import json
+import threading
+import time
+from collections.abc import Sequence
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+
+class FakeOpenAIServer:
+    """
+    Serves scripted chat completion streams on 127.0.0.1.
+
+    Attributes:
+        chunks: Content deltas streamed for every request.
+        delay: Seconds slept before each chunk.
+        status: HTTP status to answer with; anything but 200 sends an error body.
+        requests: JSON bodies received, in order.
+        chunks_sent: Chunks written for the most recent request.
+        disconnected: Set when a client hangs up before the stream ends.
+    """
+
+    def __init__(self, chunks: Sequence[str] = (), delay: float = 0.0) -> None:
+        self.chunks = list(chunks)
+        self.delay = delay
+        self.status = 200
+        self.requests: list[dict[str, Any]] = []
+        self.chunks_sent = 0
+        self.disconnected = threading.Event()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def endpoint(self) -> str:
+        assert self._server is not None, "server is not running"
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOpenAIServer":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                fake.requests.append(json.loads(self.rfile.read(length)))
+                if fake.status != 200:
+                    self.send_response(fake.status)
+                    self.end_headers()
+                    self.wfile.write(b'{"error": {"message": "scripted failure"}}')
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                fake.chunks_sent = 0
+                try:
+                    # Azure opens with a prompt filter event that has no choices
+                    self._event({"choices": [], "prompt_filter_results": []})
+                    for chunk in fake.chunks:
+                        time.sleep(fake.delay)
+                        self._event({"choices": [{"index": 0, "delta": {"content": chunk}}]})
+                        fake.chunks_sent += 1
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except OSError:
+                    fake.disconnected.set()
+
+            def _event(self, payload: dict[str, Any]) -> None:
+                self.wfile.write(b"data: " + json.dumps(payload).encode() + b"\n\n")
+                self.wfile.flush()
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def reply_chunks(reply: dict[str, Any], size: int = 8, trailer: str = "") -> list[str]:
+    """Split a JSON reply (plus any trailing text) into streaming chunks of ``size`` characters."""
+    text = json.dumps(reply) + trailer
+    return [text[start : start + size] for start in range(0, len(text), size)]
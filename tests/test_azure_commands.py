@@ -0,0 +1,270 @@
+"""
+Tests for the azure_commands.py module.
+
+Azure is never called: the fake SDK clients from conftest.py stand in for it.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+from azure_commands import (
+    AzureCommandError,
+    RetryPolicy,
+    Scope,
+    fan_out,
+    fan_out_stream,
+    is_throttled,
+    iter_resources,
+    list_resources,
+    resource_group_from_id,
+    resource_to_dict,
+    retry_after_seconds,
+)
+from tests.conftest import FakeResourceClient, create_fake_resource
+
+# ============================================================================
+# Resource Listing Tests
+# ============================================================================
+
+
+def test_resource_group_from_id():
+    """The resource group is parsed out of the ARM ID, case-insensitively."""
+    rid = "/subscriptions/1/resourcegroups/My-RG/providers/Microsoft.Web/sites/app"
+    assert resource_group_from_id(rid) == "My-RG"
+    assert resource_group_from_id("/subscriptions/1") == ""
+
+
+def test_resource_to_dict():
+    """SDK models are converted into plain dictionaries."""
+    resource = resource_to_dict(create_fake_resource("web", tags={"env": "prod"}))
+    assert resource["name"] == "web"
+    assert resource["resource_group"] == "dev-rg"
+    assert resource["tags"] == {"env": "prod"}
+
+
+def test_list_resources_by_group(fake_resource_client):
+    """Passing a resource group narrows the listing."""
+    assert [r["name"] for r in list_resources(fake_resource_client, "prod-rg")] == ["prodstore"]
+    assert len(list_resources(fake_resource_client)) == 3
+
+
+# ============================================================================
+# Fan-Out Tests
+# ============================================================================
+
+
+class ThrottledError(Exception):
+    """Shaped like azure.core.exceptions.HttpResponseError for a 429."""
+
+    def __init__(self, retry_after: str | None = None) -> None:
+        super().__init__("Too Many Requests")
+        self.status_code = 429
+        headers = {"Retry-After": retry_after} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=429, headers=headers)
+
+
+def test_fan_out_wall_time_tracks_slowest_scope():
+    """Ten scopes of 0.2s each finish in about 0.2s, not 2s."""
+    clients = {
+        f"sub-{i}": FakeResourceClient([create_fake_resource(f"r{i}")], latency=0.2)
+        for i in range(10)
+    }
+    scopes = [Scope(sub) for sub in clients]
+
+    start = time.perf_counter()
+    results = list(
+        fan_out(scopes, lambda s: list_resources(clients[s.subscription_id]), max_workers=10)
+    )
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.0
+    assert sorted(r.value[0]["name"] for r in results) == sorted(f"r{i}" for i in range(10))
+
+
+def test_fan_out_streams_in_completion_order():
+    """A fast scope is yielded before a slow one regardless of input order."""
+    slow = FakeResourceClient([create_fake_resource("slow")], latency=0.3)
+    fast = FakeResourceClient([create_fake_resource("fast")], latency=0.0)
+    clients = {"slow": slow, "fast": fast}
+
+    results = fan_out(
+        [Scope("slow"), Scope("fast")], lambda s: list_resources(clients[s.subscription_id])
+    )
+    assert next(results).scope.subscription_id == "fast"
+    assert next(results).scope.subscription_id == "slow"
+
+
+def test_fan_out_limits_concurrency_per_subscription():
+    """No more than max_per_subscription calls run at once for a subscription."""
+    lock = threading.Lock()
+    running, peak = 0, 0
+
+    def call(scope):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    scopes = [Scope("sub", f"rg-{i}") for i in range(6)]
+    list(fan_out(scopes, call, max_workers=6, max_per_subscription=2))
+    assert peak == 2
+
+
+def test_fan_out_honors_retry_after_on_429():
+    """A throttled scope sleeps for Retry-After seconds and is retried."""
+    calls = []
+    sleeps = []
+
+    def call(scope):
+        calls.append(scope)
+        if len(calls) == 1:
+            raise ThrottledError(retry_after="3")
+        return "ok"
+
+    (result,) = fan_out([Scope("sub")], call, sleep=sleeps.append)
+    assert result.ok and result.value == "ok"
+    assert result.attempts == 2
+    assert sleeps == [3.0]
+
+
+def test_fan_out_gives_up_after_max_attempts():
+    """Persistent throttling is reported once the retry budget is spent."""
+    sleeps = []
+
+    def call(scope):
+        raise ThrottledError()
+
+    (result,) = fan_out(
+        [Scope("sub")], call, retry=RetryPolicy(max_attempts=3, base_delay=0.5), sleep=sleeps.append
+    )
+    assert isinstance(result.error, ThrottledError)
+    assert result.attempts == 3
+    assert len(sleeps) == 2
+    assert all(0 <= s <= 1.0 for s in sleeps)
+
+
+def test_fan_out_reports_errors_per_scope():
+    """One failing scope does not stop the others."""
+
+    def call(scope):
+        if scope.resource_group == "bad":
+            raise RuntimeError("boom")
+        return scope.resource_group
+
+    scopes = [Scope("s", "bad"), Scope("s", "good")]
+    results = {r.scope.resource_group: r for r in fan_out(scopes, call)}
+    assert isinstance(results["bad"].error, RuntimeError)
+    assert results["good"].value == "good"
+
+
+def test_retry_after_parses_seconds_and_dates():
+    """Retry-After may be delta-seconds or an HTTP date."""
+    assert retry_after_seconds(ThrottledError("7")) == 7.0
+    assert retry_after_seconds(ThrottledError("Wed, 21 Oct 2015 07:28:00 GMT")) == 0.0
+    assert retry_after_seconds(ThrottledError("soon")) is None
+    assert retry_after_seconds(ThrottledError()) is None
+    assert is_throttled(ThrottledError())
+    assert not is_throttled(RuntimeError())
+
+
+def test_throttling_is_seen_through_wrapped_errors():
+    """A 429 wrapped in AzureCommandError is still retried with its Retry-After."""
+    try:
+        raise AzureCommandError("Failed to list resources") from ThrottledError("3")
+    except AzureCommandError as e:
+        wrapped = e
+    assert is_throttled(wrapped)
+    assert retry_after_seconds(wrapped) == 3.0
+    assert not is_throttled(AzureCommandError("plain"))
+
+
+def test_fan_out_retries_listings_throttled_by_the_sdk():
+    """list_resources wraps the SDK's 429 in AzureCommandError; fan_out still retries it."""
+    client = FakeResourceClient([create_fake_resource("vm1")])
+    list_ok = client.resources.list
+
+    def throttled_once(**kwargs):
+        client.resources.list = list_ok
+        raise ThrottledError(retry_after="2")
+
+    client.resources.list = throttled_once
+    sleeps = []
+    (result,) = fan_out([Scope("sub")], lambda scope: list_resources(client), sleep=sleeps.append)
+    assert result.ok and [r["name"] for r in result.value] == ["vm1"]
+    assert result.attempts == 2
+    assert sleeps == [2.0]
+
+
+def test_fan_out_stream_yields_items_before_slow_scopes_finish():
+    """Items from a fast scope arrive while a slow scope is still running."""
+    slow = FakeResourceClient([create_fake_resource("slow")], latency=0.5)
+    fast = FakeResourceClient([create_fake_resource(f"fast{i}") for i in range(3)])
+    clients = {"slow": slow, "fast": fast}
+
+    start = time.perf_counter()
+    stream = fan_out_stream(
+        [Scope("slow"), Scope("fast")], lambda s: iter_resources(clients[s.subscription_id])
+    )
+    first = next(stream)
+    assert first.item["name"] == "fast0"
+    assert time.perf_counter() - start < 0.4
+    assert sorted(e.item["name"] for e in stream) == ["fast1", "fast2", "slow"]
+
+
+def test_fan_out_stream_retries_throttling_before_first_item():
+    """A 429 before any item is produced is retried transparently."""
+    attempts = []
+
+    def call(scope):
+        attempts.append(scope)
+        if len(attempts) == 1:
+            raise ThrottledError(retry_after="0")
+        return iter([1, 2])
+
+    events = list(fan_out_stream([Scope("sub")], call, sleep=lambda s: None))
+    assert [e.item for e in events] == [1, 2]
+
+
+def test_fan_out_stream_reports_errors_after_items():
+    """A failure after items were produced is reported, not retried."""
+
+    def call(scope):
+        yield 1
+        raise ThrottledError()
+
+    events = list(fan_out_stream([Scope("sub")], call))
+    assert events[0].item == 1
+    assert isinstance(events[1].error, ThrottledError)
+
+
+# ============================================================================
+# Resource Creation Tests
+# ============================================================================
+
+
+def test_validate_names():
+    import pytest
+
+    from azure_commands import validate_resource_group_name, validate_storage_account_name
+
+    assert validate_resource_group_name("My_RG-(1).prod") == "My_RG-(1).prod"
+    assert validate_storage_account_name("logs01") == "logs01"
+    for bad in ("", "ends.", "a/b", "x" * 91):
+        with pytest.raises(ValueError):
+            validate_resource_group_name(bad)
+    for bad in ("ab", "UPPER", "has-dash", "x" * 25):
+        with pytest.raises(ValueError):
+            validate_storage_account_name(bad)
+
+
+def test_default_storage_account_name_is_stable_and_valid():
+    from azure_commands import default_storage_account_name, validate_storage_account_name
+
+    name = default_storage_account_name("My-Very-Long-Resource-Group", "sub")
+    assert name == default_storage_account_name("my-very-long-resource-group", "sub")
+    assert name != default_storage_account_name("my-very-long-resource-group", "other")
+    validate_storage_account_name(name)
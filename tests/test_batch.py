@@ -0,0 +1,194 @@
+"""
+Tests for the batch.py module.
+
+Steps are classified against a small registry built here, and executed by
+recording callables instead of touching Azure.
+"""
+
+import threading
+import time
+
+import pytest
+
+from batch import (
+    STATUS_CANCELLED,
+    STATUS_FAILED,
+    STATUS_OK,
+    STATUS_SKIPPED,
+    BatchError,
+    load_plan,
+    parse_plan,
+    run_plan,
+    stages,
+)
+from intents import IntentRegistry
+
+
+@pytest.fixture
+def intents():
+    registry = IntentRegistry()
+    registry.register("create_resource_group", [("create",), ("rg",)])(lambda ctx: None)
+    registry.register("create_storage_account", [("create",), ("storage",)], priority=1)(
+        lambda ctx: None
+    )
+    registry.register("list_resources", [("list",), ("resource",)])(lambda ctx: None)
+    return registry
+
+
+PLAN = """
+# storage first on purpose: dependencies do not depend on file order
+create storage account data01 in app-rg
+create rg app-rg
+create rg other-rg
+create storage in other-rg
+list resources
+"""
+
+
+# ============================================================================
+# Parsing Tests
+# ============================================================================
+
+
+def test_dependencies_follow_resource_groups(intents):
+    """A step using a resource group waits for the step that creates it."""
+    steps = parse_plan(PLAN, intents=intents)
+    assert [step.line for step in steps] == [3, 4, 5, 6, 7]
+    assert [step.depends_on for step in steps] == [(1,), (), (), (2,), ()]
+
+
+def test_stages_group_independent_steps(intents):
+    steps = parse_plan(PLAN, intents=intents)
+    assert [[step.line for step in stage] for stage in stages(steps)] == [[4, 5, 7], [3, 6]]
+
+
+def test_every_unrecognized_line_is_reported(intents):
+    with pytest.raises(BatchError) as exc_info:
+        parse_plan("create rg a\nfrobnicate\nlist resources\nteleport", intents=intents)
+    message = str(exc_info.value)
+    assert "line 2: command not recognized: frobnicate" in message
+    assert "line 4: command not recognized: teleport" in message
+
+
+def test_empty_plan_is_an_error(intents):
+    with pytest.raises(BatchError, match="no commands"):
+        parse_plan("# nothing\n\n", intents=intents)
+
+
+def test_jsonl_plans_support_ids_and_after(intents, tmp_path):
+    path = tmp_path / "plan.jsonl"
+    path.write_text(
+        '{"id": "rg", "command": "create rg a"}\n'
+        '"list resources"\n'
+        '{"command": "create storage in b", "after": ["rg"]}\n'
+    )
+    steps = load_plan(path, intents=intents)
+    assert [step.step_id for step in steps] == ["rg", "2", "3"]
+    assert steps[2].depends_on == (0,)
+
+
+def test_cycles_are_rejected(intents):
+    plan = (
+        '{"id": "a", "command": "list resources", "after": "b"}\n'
+        '{"id": "b", "command": "list resources", "after": "a"}\n'
+    )
+    with pytest.raises(BatchError, match="depend on each other"):
+        parse_plan(plan, jsonl=True, intents=intents)
+
+
+def test_unknown_after_id_is_rejected(intents):
+    with pytest.raises(BatchError, match="unknown step id"):
+        parse_plan('{"command": "list resources", "after": ["nope"]}', jsonl=True, intents=intents)
+
+
+def test_missing_plan_file(tmp_path):
+    with pytest.raises(BatchError, match="Cannot read plan"):
+        load_plan(tmp_path / "missing.txt")
+
+
+# ============================================================================
+# Scheduling Tests
+# ============================================================================
+
+
+def test_steps_run_after_their_dependencies(intents):
+    finished = []
+    lock = threading.Lock()
+
+    def execute(step):
+        time.sleep(0.01)
+        with lock:
+            finished.append(step.index)
+
+    steps = parse_plan(PLAN, intents=intents)
+    report = run_plan(steps, execute, max_workers=4)
+    assert report.ok
+    assert finished.index(1) < finished.index(0)
+    assert finished.index(2) < finished.index(3)
+
+
+def test_independent_steps_run_concurrently(intents):
+    """Four 50 ms steps with no dependencies take ~50 ms with four workers."""
+    steps = parse_plan("list resources\n" * 4, intents=intents)
+    report = run_plan(steps, lambda step: time.sleep(0.05), max_workers=4)
+    assert report.elapsed < 0.15
+    assert all(result.started < 0.04 for result in report.results)
+
+
+def test_failure_skips_dependents_and_continues(intents):
+    """With fail_fast off, only steps depending on the failure are skipped."""
+
+    def execute(step):
+        if step.command == "create rg app-rg":
+            raise RuntimeError("quota exceeded")
+
+    steps = parse_plan(PLAN, intents=intents)
+    report = run_plan(steps, execute, fail_fast=False)
+    statuses = [result.status for result in report.results]
+    assert statuses == [STATUS_SKIPPED, STATUS_FAILED, STATUS_OK, STATUS_OK, STATUS_OK]
+    assert str(report.results[1].error) == "quota exceeded"
+    assert not report.ok
+
+
+def test_fail_fast_starts_nothing_new(intents):
+    def execute(step):
+        raise RuntimeError("boom")
+
+    steps = parse_plan("create rg one\ncreate storage in one\nlist resources", intents=intents)
+    report = run_plan(steps, execute, max_workers=1)
+    statuses = [result.status for result in report.results]
+    assert statuses == [STATUS_FAILED, STATUS_SKIPPED, STATUS_CANCELLED]
+    assert report.count(STATUS_FAILED) == 1
+
+
+def test_on_result_sees_each_step(intents):
+    seen = []
+    steps = parse_plan(PLAN, intents=intents)
+    run_plan(steps, lambda step: None, on_result=seen.append)
+    assert sorted(result.step.index for result in seen) == [0, 1, 2, 3, 4]
+
+
+def test_steps_can_hand_back_long_running_operations(intents):
+    """Steps returning a Future end with it and free their worker meanwhile."""
+    from concurrent.futures import Future
+
+    operations = {}
+
+    def execute(step):
+        operations[step.index] = future = Future()
+        if step.command == "create rg app-rg":
+            threading.Timer(0.05, future.set_exception, [RuntimeError("conflict")]).start()
+        else:
+            threading.Timer(0.05, future.set_result, [None]).start()
+        return future
+
+    steps = parse_plan(
+        "create rg app-rg\ncreate rg one\ncreate rg two\ncreate storage in app-rg", intents=intents
+    )
+    report = run_plan(steps, execute, max_workers=1, fail_fast=False)
+    statuses = [result.status for result in report.results]
+    assert statuses == [STATUS_FAILED, STATUS_OK, STATUS_OK, STATUS_SKIPPED]
+    assert str(report.results[0].error) == "conflict"
+    # Three 50 ms operations overlapped on one worker
+    assert report.elapsed < 0.12
+    assert all(result.elapsed >= 0.04 for result in report.results[:3])
@@ -0,0 +1,111 @@
+"""
+Tests for the benchmark suite's fake Azure backend and baseline comparison.
+"""
+
+import json
+
+import pytest
+
+from azure_commands import AzureCommandError, Scope, fan_out, is_throttled, list_resources
+from benchmarks.fake_azure import BackendProfile, FakeAzure, HttpResponseError
+from benchmarks.suite import compare, metric
+from cli import cli
+
+SUB = "00000000-0000-0000-0000-000000000000"
+
+
+def results(**values):
+    return {
+        "metrics": {name: metric(value, "ms", better) for name, (value, better) in values.items()}
+    }
+
+
+# ============================================================================
+# Fake Backend Tests
+# ============================================================================
+
+
+def test_listing_is_paged_and_deterministic():
+    azure = FakeAzure([SUB], groups=3, resources_per_group=7, profile=BackendProfile(page_size=5))
+    rows = list_resources(azure.client("resource", SUB))
+    assert len(rows) == 21
+    assert azure.calls["resources.list"] == 5
+    assert rows == list_resources(
+        FakeAzure([SUB], groups=3, resources_per_group=7).client("resource", SUB)
+    )
+    assert {
+        r["resource_group"] for r in list_resources(azure.client("resource", SUB), "rg-001")
+    } == {"rg-001"}
+
+
+def test_other_services():
+    azure = FakeAzure([SUB], groups=2, resources_per_group=10)
+    assert len(list(azure.client("compute", SUB).virtual_machines.list_all())) == 4
+    assert len(list(azure.client("network", SUB).virtual_networks.list("rg-000"))) == 2
+    storage = azure.client("storage", SUB).storage_accounts
+    account = storage.begin_create("rg-000", "newacct", {"location": "eastus"}).result()
+    assert account.name == "newacct"
+    assert len(list(storage.list_by_resource_group("rg-000"))) == 3
+    with pytest.raises(ValueError):
+        azure.client("dns", SUB)
+
+
+def test_injected_failures_look_like_sdk_errors():
+    azure = FakeAzure([SUB], profile=BackendProfile(failure_rate=1.0))
+    with pytest.raises(AzureCommandError, match="500"):
+        list_resources(azure.client("resource", SUB))
+
+
+def test_throttling_is_retried_by_fan_out():
+    profile = BackendProfile(throttle_rate=0.2, retry_after=0.0, seed=3)
+    azure = FakeAzure([SUB], groups=1, resources_per_group=1, profile=profile)
+    scopes = [Scope(SUB, f"rg-{n}") for n in range(20)]
+
+    def call(scope):
+        return list_resources(azure.client("resource", scope.subscription_id), scope.resource_group)
+
+    outcomes = list(fan_out(scopes, call, sleep=lambda _seconds: None))
+    assert all(outcome.ok for outcome in outcomes)
+    assert any(outcome.attempts > 1 for outcome in outcomes)
+    assert is_throttled(HttpResponseError(429, "Too Many Requests"))
+
+
+def test_cli_runs_against_installed_fake(cli_runner, monkeypatch, tmp_path):
+    from config import get_config
+
+    monkeypatch.setenv("INVENTORY_CACHE_PATH", str(tmp_path / "inventory.db"))
+    azure = FakeAzure([SUB], groups=3, resources_per_group=10)
+    azure.install(get_config())
+    result = cli_runner.invoke(cli, ["--no-cache", "--format", "ndjson", "list", "resources"])
+    assert result.exit_code == 0, result.output
+    rows = [json.loads(line) for line in result.output.splitlines() if line.startswith("{")]
+    assert len(rows) == 30
+
+
+# ============================================================================
+# Baseline Comparison Tests
+# ============================================================================
+
+
+def test_compare_respects_direction_and_tolerance():
+    baseline = results(
+        latency=(100.0, "lower"), throughput=(1000.0, "higher"), steady=(10.0, "lower")
+    )
+    current = results(
+        latency=(130.0, "lower"),
+        throughput=(1500.0, "higher"),
+        steady=(11.0, "lower"),
+        extra=(5.0, "lower"),
+    )
+    statuses = {c.name: c.status for c in compare(baseline, current, tolerance=0.25)}
+    assert statuses == {
+        "latency": "regressed",
+        "throughput": "improved",
+        "steady": "ok",
+        "extra": "new",
+    }
+
+
+def test_compare_without_baseline():
+    (comparison,) = compare({}, results(latency=(100.0, "lower")))
+    assert (comparison.status, comparison.change) == ("new", None)
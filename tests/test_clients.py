@@ -0,0 +1,193 @@
+"""
+Tests for the clients.py module.
+
+Credentials and clients are built by fake factories, so no Azure SDK or
+network access is needed.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from clients import (
+    CachingCredential,
+    ClientPool,
+    PersistentCacheCredential,
+    PoolStats,
+    get_client_pool,
+)
+from config import Config, command_scope
+
+
+class FakeCredential:
+    """Issues tokens that expire an hour after ``clock()``."""
+
+    def __init__(self, clock) -> None:
+        self.clock = clock
+        self.calls = 0
+        self.closed = False
+
+    def get_token(self, *scopes, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(token=f"token-{self.calls}", expires_on=self.clock() + 3600)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def built():
+    """Records every credential and client the pool constructs."""
+    return {"credentials": [], "clients": []}
+
+
+@pytest.fixture
+def pool(built) -> ClientPool:
+    def credential_factory(config):
+        credential = FakeCredential(lambda: 0)
+        built["credentials"].append(credential)
+        return credential
+
+    def client_factory(service, credential, subscription_id, transport):
+        client = SimpleNamespace(service=service, subscription_id=subscription_id, closed=False)
+        client.close = lambda: setattr(client, "closed", True)
+        built["clients"].append(client)
+        return client
+
+    return ClientPool(Config(), credential_factory, client_factory)
+
+
+# ============================================================================
+# Client Pool Tests
+# ============================================================================
+
+
+def test_clients_are_memoized_per_service_and_subscription(pool, built):
+    """The same (service, subscription) returns the same client object."""
+    first = pool.client("compute")
+    assert pool.client("compute") is first
+    assert pool.client("compute", "00000000-0000-0000-0000-000000000000") is first
+    assert pool.client("compute", "other-sub") is not first
+    assert pool.client("storage") is not first
+
+    assert len(built["clients"]) == 3
+    assert pool.stats.clients_built == 3
+    assert pool.stats.clients_reused == 2
+
+
+def test_tenant_services_share_one_client(pool, built):
+    """Resource Graph takes subscriptions per request, so one client serves them all."""
+    graph = pool.client("resourcegraph", "sub-a")
+    assert pool.client("resourcegraph", "sub-b") is graph
+    assert built["clients"] == [graph]
+    assert graph.subscription_id == ""
+
+
+def test_one_credential_is_shared_by_all_clients(pool, built):
+    """Every client is built with the same credential."""
+    pool.client("compute")
+    pool.client("network")
+    assert len(built["credentials"]) == 1
+    assert pool.stats.credentials_built == 1
+
+
+def test_unknown_service_raises(pool):
+    """Only known services can be requested."""
+    with pytest.raises(ValueError):
+        pool.client("cosmos")
+
+
+def test_close_closes_everything(pool, built):
+    """Closing the pool closes clients and credentials and forgets them."""
+    pool.client("compute")
+    pool.close()
+    assert built["clients"][0].closed
+    assert built["credentials"][0].closed
+    pool.client("compute")
+    assert len(built["clients"]) == 2
+
+
+def test_shared_pool_follows_config_object():
+    """get_client_pool returns one pool per config object."""
+    config = Config()
+    assert get_client_pool(config) is get_client_pool(config)
+    assert get_client_pool(Config()) is not get_client_pool(config)
+
+
+def test_replaced_pool_outlives_running_commands(monkeypatch):
+    """A pool replaced mid-command is closed only after that command finishes."""
+    closed = []
+    monkeypatch.setattr(ClientPool, "close", lambda self: closed.append(self))
+    old = get_client_pool(Config())
+    closed.clear()  # whatever earlier tests left behind
+    with command_scope():
+        new = get_client_pool(Config())
+        assert closed == []
+    assert closed == [old]
+    get_client_pool(Config())
+    assert closed == [old, new]
+
+
+# ============================================================================
+# Token Caching Tests
+# ============================================================================
+
+
+def test_tokens_are_reused_until_near_expiry():
+    """Tokens are cached until refresh_margin seconds before they expire."""
+    now = [1000.0]
+    raw = FakeCredential(lambda: now[0])
+    stats = PoolStats()
+    credential = CachingCredential(raw, stats, refresh_margin=300, clock=lambda: now[0])
+
+    scope = "https://management.azure.com/.default"
+    first = credential.get_token(scope)
+    assert credential.get_token(scope) is first
+    now[0] += 3600 - 301
+    assert credential.get_token(scope) is first
+    now[0] += 2
+    assert credential.get_token(scope) is not first
+
+    assert raw.calls == 2
+    assert stats.tokens_acquired == 2
+    assert stats.tokens_reused == 2
+    assert "reused=2" in stats.summary()
+
+
+def test_tokens_are_cached_per_scope_and_tenant():
+    """Different scopes or tenants get their own tokens."""
+    raw = FakeCredential(lambda: 0)
+    credential = CachingCredential(raw, PoolStats(), clock=lambda: 0)
+    credential.get_token("a")
+    credential.get_token("b")
+    credential.get_token("a", tenant_id="t2")
+    credential.get_token("a")
+    assert raw.calls == 3
+
+
+def test_credential_survives_client_context_exit():
+    """Clients closing their credential on exit don't close the shared one."""
+    raw = FakeCredential(lambda: 0)
+    with CachingCredential(raw, PoolStats()):
+        pass
+    assert not raw.closed
+
+
+def test_unencryptable_token_cache_falls_back_to_memory():
+    """Without an encrypted keyring the credential is rebuilt unpersisted."""
+
+    class NoKeyringCredential(FakeCredential):
+        def get_token(self, *scopes, **kwargs):
+            raise ValueError("Cache encryption is impossible")
+
+    built = []
+
+    def build(persistent):
+        built.append((NoKeyringCredential if persistent else FakeCredential)(lambda: 0))
+        return built[-1]
+
+    credential = PersistentCacheCredential(build)
+    assert credential.get_token("a").token == "token-1"
+    assert credential.get_token("a").token == "token-2"
+    assert not credential.persistent
+    assert len(built) == 2 and built[0].closed
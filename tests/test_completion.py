@@ -0,0 +1,209 @@
+"""
+Tests for the completion.py module and shell completion of the CLI.
+"""
+
+import pytest
+
+from cli import cli
+from completion import (
+    KIND_COMMAND,
+    KIND_RESOURCE,
+    KIND_RESOURCE_GROUP,
+    KIND_STORAGE_ACCOUNT,
+    KIND_VM,
+    SNAPSHOT_FILENAME,
+    Completion,
+    CompletionIndex,
+    get_completion_index,
+    resource_terms,
+)
+from inventory_cache import InventoryCache, scope_key
+from shell import completions
+
+SUB = "00000000-0000-0000-0000-000000000000"
+
+PROD = [
+    {"name": "web01", "type": "Microsoft.Compute/virtualMachines", "resource_group": "rg-prod"},
+    {"name": "web02", "type": "Microsoft.Compute/virtualMachines", "resource_group": "rg-prod"},
+    {"name": "prodlogs", "type": "Microsoft.Storage/storageAccounts", "resource_group": "rg-prod"},
+    {"name": "prod-vnet", "type": "Microsoft.Network/virtualNetworks", "resource_group": "rg-prod"},
+]
+DEV = [
+    {"name": "devbox", "type": "Microsoft.Compute/virtualMachines", "resource_group": "rg-dev"},
+]
+
+
+def values(completions):
+    return [c.value for c in completions]
+
+
+@pytest.fixture
+def index():
+    index = CompletionIndex(["list resources", "list vms", "create resource group", "stop vm"])
+    index.set_scope("prod", resource_terms(PROD), version=1.0)
+    index.set_scope("dev", resource_terms(DEV), version=1.0)
+    return index
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    cache = InventoryCache(tmp_path / "inventory.db")
+    yield cache
+    cache.close()
+
+
+# ============================================================================
+# Index Tests
+# ============================================================================
+
+
+def test_resource_terms_assign_kinds():
+    assert resource_terms(PROD) == {
+        ("web01", KIND_VM),
+        ("web02", KIND_VM),
+        ("prodlogs", KIND_STORAGE_ACCOUNT),
+        ("prod-vnet", KIND_RESOURCE),
+        ("rg-prod", KIND_RESOURCE_GROUP),
+    }
+
+
+def test_prefix_is_case_insensitive_and_sorted(index):
+    assert index.prefix("WEB") == [Completion("web01", KIND_VM), Completion("web02", KIND_VM)]
+    assert values(index.prefix("prod")) == ["prod-vnet", "prodlogs"]
+    assert values(index.prefix("rg-", kinds=(KIND_RESOURCE_GROUP,))) == ["rg-dev", "rg-prod"]
+    assert index.prefix("web", limit=1) == [Completion("web01", KIND_VM)]
+
+
+def test_fuzzy_tolerates_typos(index):
+    assert values(index.fuzzy("prdlogs"))[0] == "prodlogs"
+    assert values(index.fuzzy("devbxo")) == ["devbox"]
+    assert index.fuzzy("zzzzzz") == []
+
+
+def test_complete_phrases_word_by_word(index):
+    assert values(index.complete([], "li")) == ["list"]
+    assert values(index.complete(["list"], "")) == ["resources", "vms"]
+    assert values(index.complete(["create", "resource"], "gr")) == ["group"]
+
+
+def test_complete_uses_previous_word_as_kind_hint(index):
+    assert values(index.complete(["list", "resources", "in"], "")) == ["rg-dev", "rg-prod"]
+    assert values(index.complete(["stop", "vm"], "")) == ["devbox", "web01", "web02"]
+    # Phrases are still consulted after a hint word; none extends "stop vm we"
+    assert values(index.complete(["stop", "vm"], "we")) == ["web01", "web02"]
+    assert values(index.complete(["list", "resources", "in"], "rg-prdo")) == ["rg-prod"]
+
+
+def test_scopes_are_refcounted(index):
+    index.set_scope("prod-copy", resource_terms(PROD[:1]), version=1.0)
+    index.drop_scope("prod")
+    assert values(index.prefix("web")) == ["web01"]
+    assert values(index.prefix("rg-", kinds=(KIND_RESOURCE_GROUP,))) == ["rg-dev", "rg-prod"]
+    index.drop_scope("prod-copy")
+    assert index.prefix("web") == []
+
+
+def test_updates_reach_a_built_trigram_index(index):
+    index.fuzzy("web")  # builds the trigram index
+    index.set_scope("dev", resource_terms([{"name": "buildagent", "type": "x"}]), version=2.0)
+    assert values(index.fuzzy("bulidagent")) == ["buildagent"]
+    assert index.fuzzy("devbox") == []
+
+
+# ============================================================================
+# Inventory Sync and Snapshot Tests
+# ============================================================================
+
+
+def test_sync_reads_only_changed_scopes(index, inventory):
+    fresh = CompletionIndex()
+    inventory.put(SUB, None, PROD)
+    inventory.put(SUB, "rg-dev", DEV)
+    assert fresh.sync(inventory) == 2
+    assert fresh.sync(inventory) == 0
+    assert values(fresh.prefix("dev")) == ["devbox"]
+
+    inventory.put(SUB, "rg-dev", [{"name": "devbox2", "type": "x", "resource_group": "rg-dev"}])
+    assert fresh.sync(inventory) == 1
+    assert values(fresh.prefix("dev")) == ["devbox2"]
+
+    inventory.invalidate(SUB, "rg-dev")
+    assert fresh.sync(inventory) == 1
+    assert fresh.prefix("dev") == []
+    assert values(fresh.prefix("web")) == ["web01", "web02"]
+
+
+def test_snapshot_round_trip(index, tmp_path):
+    path = tmp_path / "snapshot.json"
+    index.save(path)
+    loaded = CompletionIndex(["list resources"])
+    assert loaded.load(path)
+    assert values(loaded.prefix("web")) == ["web01", "web02"]
+    assert values(loaded.complete([], "l")) == ["list"]
+    assert loaded.prefix("stop", kinds=(KIND_COMMAND,)) == []
+
+
+def test_bad_snapshots_are_ignored(tmp_path):
+    index = CompletionIndex()
+    assert not index.load(tmp_path / "missing.json")
+    (tmp_path / "bad.json").write_text("{not json")
+    assert not index.load(tmp_path / "bad.json")
+    (tmp_path / "old.json").write_text('{"version": 0, "scopes": {}}')
+    assert not index.load(tmp_path / "old.json")
+
+
+def test_shared_index_syncs_and_snapshots(monkeypatch, tmp_path):
+    from config import get_config
+    from inventory_cache import get_inventory_cache
+
+    monkeypatch.setenv("INVENTORY_CACHE_PATH", str(tmp_path / "inventory.db"))
+    config = get_config()
+    get_inventory_cache(config).put(SUB, None, PROD)
+    index = get_completion_index(config, ["list resources"])
+    assert values(index.prefix("web")) == ["web01", "web02"]
+    assert (tmp_path / SNAPSHOT_FILENAME).exists()
+    assert scope_key(SUB) in index._scopes
+
+
+# ============================================================================
+# Shell and CLI Tests
+# ============================================================================
+
+
+def test_shell_completions_include_resource_names(index):
+    assert completions("stop vm we", index) == ["stop vm web01", "stop vm web02"]
+    assert completions("list resources in ", index) == [
+        "list resources in rg-dev",
+        "list resources in rg-prod",
+    ]
+    assert completions("li", index) == ["list resources"]
+
+
+def test_click_shell_completion(monkeypatch, tmp_path, cli_runner):
+    from config import get_config
+    from inventory_cache import get_inventory_cache
+
+    monkeypatch.setenv("INVENTORY_CACHE_PATH", str(tmp_path / "inventory.db"))
+    get_inventory_cache(get_config()).put(SUB, None, PROD)
+
+    def complete(line):
+        env = {
+            "_COPILOT_COMPLETE": "bash_complete",
+            "COMP_WORDS": line,
+            "COMP_CWORD": str(len(line.split()) - (not line.endswith(" "))),
+        }
+        result = cli_runner.invoke(cli, [], env=env, prog_name="copilot")
+        assert result.exit_code == 0, result.output
+        return [line.split(",", 1)[1] for line in result.output.splitlines()]
+
+    assert complete("copilot li") == ["list"]
+    assert "daemon" in complete("copilot da")
+    assert complete("copilot daemon ") == ["start", "status", "stop"]
+    assert complete("copilot stop vm we") == ["web01", "web02"]
+
+
+def test_click_shell_completion_without_config(monkeypatch, cli_runner):
+    monkeypatch.delenv("AZURE_SUBSCRIPTION_ID")
+    env = {"_COPILOT_COMPLETE": "bash_complete", "COMP_WORDS": "copilot li", "COMP_CWORD": "1"}
+    result = cli_runner.invoke(cli, [], env=env, prog_name="copilot")
+    assert result.output.splitlines() == ["plain,list"]
@@ -7,10 +7,27 @@ TODO: Learn about pytest basics before implementing these tests
 https://docs.pytest.org/en/stable/getting-started.html
 """
 
+import dataclasses
 import os
+import threading
+from pathlib import Path
+
 import pytest
-from config import Config, reload_config
 
+import config as config_module
+from config import (
+    Config,
+    ConfigSources,
+    ConfigWatcher,
+    command_config,
+    command_scope,
+    configure,
+    get_config,
+    load_config,
+    parse_config_file,
+    reload_config,
+    retire,
+)
 
 # ============================================================================
 # Basic Configuration Tests
@@ -162,3 +179,236 @@ def test_reload_config_picks_up_new_values(monkeypatch):
     """
     # TODO (Optional): Implement this test
     pass
+
+
+def test_inventory_cache_type_ttls_are_parsed(monkeypatch):
+    """INVENTORY_CACHE_TYPE_TTLS is parsed into a type -> seconds mapping."""
+    monkeypatch.setenv(
+        "INVENTORY_CACHE_TYPE_TTLS", "Microsoft.Compute/virtualMachines=60, Microsoft.Web/sites=900"
+    )
+    assert Config().inventory_cache_type_ttls == {
+        "Microsoft.Compute/virtualMachines": 60,
+        "Microsoft.Web/sites": 900,
+    }
+
+
+def test_invalid_inventory_cache_type_ttls_raise(monkeypatch):
+    """Malformed TTL entries are rejected."""
+    monkeypatch.setenv("INVENTORY_CACHE_TYPE_TTLS", "Microsoft.Web/sites")
+    with pytest.raises(ValueError):
+        Config()
+
+
+# ============================================================================
+# Layered Configuration Tests
+# ============================================================================
+SUB = "00000000-0000-0000-0000-000000000000"
+
+CONFIG_FILE = f"""
+default_location = "eastus2"
+fan_out_workers = 3
+default_resource_group = "base-rg"
+
+[profiles.dev]
+default_location = "westus2"
+inventory_cache_type_ttls = {{ "Microsoft.Web/sites" = 60 }}
+additional_subscription_ids = ["sub-b", "sub-c"]
+
+[subscriptions."{SUB}"]
+default_resource_group = "sub-rg"
+fan_out_workers = 5
+"""
+
+
+@pytest.fixture
+def sources(tmp_path):
+    (tmp_path / "copilot.toml").write_text(CONFIG_FILE)
+    (tmp_path / ".env").write_text("FAN_OUT_WORKERS=6\nUNRELATED=1\n")
+    return ConfigSources(tmp_path / "copilot.toml", tmp_path / ".env", tmp_path / "cache.json")
+
+
+def test_layers_resolve_in_order(sources):
+    """File, profile, subscription, .env, environment and CLI flags override in that order."""
+    environ = {"AZURE_SUBSCRIPTION_ID": "other-sub"}
+    config = load_config(sources=sources, environ=environ)
+    assert config.default_location == "eastus2"
+    assert config.default_resource_group == "base-rg"
+    assert config.fan_out_workers == 6  # .env beats the file
+
+    config = load_config("dev", sources=sources, environ={**environ, "DEFAULT_LOCATION": "uksouth"})
+    assert config.default_location == "uksouth"  # environment beats the profile
+    assert config.inventory_cache_type_ttls == {"Microsoft.Web/sites": 60}
+    assert config.get_subscription_ids() == ["other-sub", "sub-b", "sub-c"]
+
+    config = load_config(
+        "dev",
+        {"fan_out_workers": "9", "LOG_LEVEL": "debug"},
+        sources=sources,
+        environ={"AZURE_SUBSCRIPTION_ID": SUB},
+    )
+    assert config.default_resource_group == "sub-rg"  # the subscription's own settings
+    assert config.fan_out_workers == 9  # CLI flags beat everything
+    assert config.log_level == "DEBUG"
+
+
+def test_profile_from_environment(sources):
+    """COPILOT_PROFILE selects a profile when none is passed."""
+    config = load_config(
+        sources=sources, environ={"AZURE_SUBSCRIPTION_ID": "x", "COPILOT_PROFILE": "dev"}
+    )
+    assert config.default_location == "westus2"
+
+
+@pytest.mark.parametrize(
+    ("profile", "overrides", "message"),
+    [
+        ("prod", {}, "Unknown config profile 'prod'"),
+        (None, {"no_such_setting": "1"}, "Unknown setting 'no_such_setting' in --set"),
+        (None, {"fan_out_workers": "many"}, "Invalid FAN_OUT_WORKERS='many'"),
+        (None, {"debug": "maybe"}, "Invalid DEBUG='maybe': expected true or false"),
+    ],
+)
+def test_invalid_layers_raise(sources, profile, overrides, message):
+    """Unknown profiles, unknown settings and bad values are rejected."""
+    with pytest.raises(ValueError, match=message):
+        load_config(profile, overrides, sources=sources, environ={"AZURE_SUBSCRIPTION_ID": "x"})
+
+
+def test_unknown_keys_in_config_file_raise(tmp_path):
+    """Config files with unknown or malformed settings are rejected."""
+    path = tmp_path / "copilot.toml"
+    path.write_text("[profiles.dev]\ncolour = 'blue'\n")
+    with pytest.raises(ValueError, match=r"Unknown setting 'colour' in .*\[profiles.dev\]"):
+        parse_config_file(path)
+    path.write_text("default_location = \n")
+    with pytest.raises(ValueError, match="Invalid"):
+        parse_config_file(path)
+
+
+def test_example_config_file_parses():
+    """The shipped copilot.toml.example is a valid config file."""
+    example = parse_config_file(Path(__file__).parent.parent / "copilot.toml.example")
+    assert set(example["profiles"]) == {"prod", "dev"}
+    assert example["profiles"]["prod"]["DEFAULT_DRY_RUN"] == "true"
+
+
+def test_config_is_immutable_and_slotted():
+    """Config is frozen and has no per-instance __dict__."""
+    config = Config()
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        config.default_location = "westus"
+    assert not hasattr(config, "__dict__")
+
+
+def test_parsed_files_are_cached_by_mtime(sources, monkeypatch):
+    """Unchanged files come from the parse cache; a newer mtime re-parses."""
+    environ = {"AZURE_SUBSCRIPTION_ID": "x"}
+    load_config(sources=sources, environ=environ)
+    assert sources.cache_file.exists()
+
+    def fail(_path):
+        raise AssertionError("parsed again")
+
+    monkeypatch.setattr(config_module, "parse_config_file", fail)
+    assert load_config(sources=sources, environ=environ).fan_out_workers == 6
+
+    stat = sources.dotenv_file.stat()
+    sources.dotenv_file.write_text("FAN_OUT_WORKERS=7\n")
+    os.utime(sources.dotenv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    monkeypatch.undo()
+    assert load_config(sources=sources, environ=environ).fan_out_workers == 7
+
+
+def test_watcher_reloads_changed_files(sources):
+    """check() swaps in a changed config and keeps the old one if it is broken."""
+    configure(sources=sources)
+    first = get_config()
+    errors = []
+    watcher = ConfigWatcher(on_error=errors.append)
+    assert not watcher.check()
+
+    stat = sources.config_file.stat()
+    sources.config_file.write_text(CONFIG_FILE.replace("eastus2", "centralus"))
+    os.utime(sources.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert watcher.check()
+    assert get_config() is not first
+    assert get_config().default_location == "centralus"
+
+    # A broken file keeps the working config and is reported once
+    current = get_config()
+    sources.config_file.write_text("default_location = \n")
+    assert not watcher.check() and not watcher.check()
+    assert get_config() is current
+    assert len(errors) == 1
+
+
+def test_watcher_thread_reloads(sources):
+    """The watcher thread reloads edits without an explicit check()."""
+    configure(sources=sources)
+    get_config()
+    reloaded = threading.Event()
+    with ConfigWatcher(interval=0.01, on_reload=lambda _config: reloaded.set()):
+        sources.dotenv_file.write_text("FAN_OUT_WORKERS=12\n")
+        assert reloaded.wait(5)
+    assert get_config().fan_out_workers == 12
+
+
+def test_cli_flags_are_the_top_layer(cli_runner, tmp_path, monkeypatch):
+    """--config-profile and --set override every file and variable."""
+    from cli import cli
+
+    (tmp_path / "copilot.toml").write_text('[profiles.dev]\ndefault_location = "westus2"\n')
+    result = cli_runner.invoke(
+        cli, ["--config-profile", "dev", "--dry-run", "create", "rg", "app-rg"]
+    )
+    assert "Would create resource group app-rg in westus2" in result.output
+    result = cli_runner.invoke(
+        cli, ["--set", "default_location=northeurope", "--dry-run", "create", "rg", "app-rg"]
+    )
+    assert "Would create resource group app-rg in northeurope" in result.output
+    result = cli_runner.invoke(cli, ["--set", "oops", "help"])
+    assert result.exit_code == 2 and "expected KEY=VALUE" in result.output
+
+
+def test_cli_flags_leave_the_global_config_alone(cli_runner, tmp_path):
+    """Per-command flags never replace the shared config."""
+    from cli import cli
+
+    (tmp_path / "copilot.toml").write_text('[profiles.dev]\ndefault_location = "westus2"\n')
+    before = get_config()
+    result = cli_runner.invoke(
+        cli, ["--set", "default_location=northeurope", "--dry-run", "create", "rg", "app-rg"]
+    )
+    assert "in northeurope" in result.output
+    assert get_config() is before and before.default_location == "eastus"
+
+    result = cli_runner.invoke(cli, ["--config-profile", "nope", "help"])
+    assert result.exit_code == 1 and "Unknown config profile 'nope'" in result.output
+
+
+def test_command_configs_are_independent():
+    """Commands with different flags get separate configs; without flags, the global one."""
+    north = command_config(overrides={"default_location": "northeurope"})
+    west = command_config(overrides={"default_location": "westus2"})
+    assert (north.default_location, west.default_location) == ("northeurope", "westus2")
+    assert command_config() is get_config()
+
+
+def test_retired_objects_close_after_older_commands_finish():
+    """retire() defers close until every command that could use the object ends."""
+    closed = []
+    retire(lambda: closed.append("idle"))
+    assert closed == ["idle"]
+
+    with command_scope():
+        retire(lambda: closed.append("first"))
+        with command_scope():  # started after the swap; never saw "first"
+            pass
+        assert closed == ["idle"]
+        second = command_scope()
+        second.__enter__()
+    assert closed == ["idle", "first"]
+    retire(lambda: closed.append("second"))
+    assert closed == ["idle", "first"]
+    second.__exit__(None, None, None)
+    assert closed == ["idle", "first", "second"]
@@ -0,0 +1,155 @@
+"""
+Tests for the copilot_daemon.py module.
+
+The server runs on a background thread in the test process, listening on a
+socket under tmp_path; the client talks to it like a separate process would.
+"""
+
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+import copilot_daemon
+from cli import cli
+from copilot_daemon import DaemonServer, forward, should_forward
+
+
+@pytest.fixture
+def socket_path():
+    # AF_UNIX paths are limited to ~100 bytes, so avoid pytest's long tmp_path
+    with tempfile.TemporaryDirectory(prefix="copilot-") as directory:
+        yield Path(directory) / "daemon.sock"
+
+
+@pytest.fixture
+def daemon(capsys, socket_path):
+    """A running DaemonServer, shut down after the test."""
+    server = DaemonServer(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(200):
+        if copilot_daemon.status(socket_path) is not None:
+            break
+        threading.Event().wait(0.01)
+    yield server
+    server.shutdown()
+    thread.join(timeout=5)
+
+
+# ============================================================================
+# Client Tests
+# ============================================================================
+
+
+def test_forward_without_daemon_returns_none(socket_path):
+    """No socket means the caller runs the command itself."""
+    assert forward(["help"], socket_path) is None
+    assert copilot_daemon.status(socket_path) is None
+
+
+def test_should_forward():
+    """Commands that need the caller's terminal or process stay local."""
+    assert should_forward(["list", "resources"])
+    assert should_forward(["--format", "ndjson", "help"])
+    assert not should_forward(["shell"])
+    assert not should_forward(["daemon", "start"])
+    assert not should_forward(["--startup-profile", "help"])
+    assert not should_forward(["--profile", "list", "resources"])
+    assert not should_forward(["--set", "default_location=westus2", "list", "resources"])
+    assert not should_forward(["--config-profile=dev", "help"])
+
+
+def test_no_daemon_env_disables_forwarding(monkeypatch):
+    monkeypatch.setenv("COPILOT_NO_DAEMON", "1")
+    assert not should_forward(["help"])
+
+
+def test_shell_completion_is_not_forwarded(monkeypatch):
+    monkeypatch.setenv("_COPILOT_COMPLETE", "bash_complete")
+    assert not should_forward([])
+
+
+def test_main_falls_back_to_in_process(capsys, monkeypatch, socket_path):
+    """Without a daemon, main() runs the CLI in this process."""
+    monkeypatch.setattr(copilot_daemon, "SOCKET_PATH", socket_path)
+    with pytest.raises(SystemExit) as exc_info:
+        copilot_daemon.main(["help"])
+    assert exc_info.value.code == 0
+    assert "Available commands" in capsys.readouterr().out
+
+
+# ============================================================================
+# Server Tests
+# ============================================================================
+
+
+def test_command_output_is_streamed_back(capsys, daemon, socket_path):
+    """Output written by the command on the daemon appears in the client."""
+    assert forward(["help"], socket_path) == 0
+    out = capsys.readouterr().out
+    assert "You said: help" in out
+    assert "Available commands" in out
+
+
+def test_stderr_and_exit_code_are_forwarded(capsys, daemon, socket_path):
+    """Usage errors keep click's exit code and go to the client's stderr."""
+    assert forward([], socket_path) == 2
+    assert "Missing argument" in capsys.readouterr().err
+
+
+def test_status_counts_requests(daemon, socket_path):
+    forward(["help"], socket_path)
+    forward(["help"], socket_path)
+    status = copilot_daemon.status(socket_path)
+    assert status["requests"] == 2
+    assert status["uptime"] >= 0
+
+
+def send_request(socket_path, env):
+    """Send a help request with the given config environment; return the first reply."""
+    sock = copilot_daemon._connect(socket_path)
+    with sock:
+        copilot_daemon._send(sock, {"argv": ["help"], "cwd": os.getcwd(), "env": env})
+        return next(copilot_daemon._messages(sock))
+
+
+def test_different_environment_falls_back(daemon, monkeypatch, socket_path):
+    """A client whose config environment differs is not served stale config."""
+    env = copilot_daemon._config_env()
+    assert send_request(socket_path, env | {"AZURE_SUBSCRIPTION_ID": "other"}) == {
+        "fallback": "environment differs"
+    }
+    assert daemon.requests_served == 0
+
+
+def test_variables_only_the_daemon_has_fall_back(daemon, monkeypatch, socket_path):
+    """Daemon-only settings such as service principal secrets never reach a client."""
+    client_env = copilot_daemon._config_env()
+    monkeypatch.setenv("AZURE_CLIENT_SECRET", "daemon-secret")
+    assert "fallback" in send_request(socket_path, client_env)
+    monkeypatch.setenv("INVENTORY_SYNC", "true")
+    assert "fallback" in send_request(
+        socket_path, copilot_daemon._config_env() | {"INVENTORY_SYNC": "false"}
+    )
+    assert send_request(socket_path, copilot_daemon._config_env()).get("fallback") is None
+
+
+def test_stop_shuts_the_server_down(daemon, socket_path):
+    assert copilot_daemon.stop(socket_path)
+    for _ in range(200):
+        if not socket_path.exists():
+            break
+        threading.Event().wait(0.01)
+    assert not socket_path.exists()
+    assert not copilot_daemon.stop(socket_path)
+
+
+def test_daemon_builtin_reports_status(cli_runner, monkeypatch, socket_path):
+    """`copilot daemon status` works whether or not a daemon is running."""
+    monkeypatch.setattr(copilot_daemon, "SOCKET_PATH", socket_path)
+    result = cli_runner.invoke(cli, ["daemon", "status"])
+    assert result.exit_code == 0
+    assert "Daemon is not running" in result.output
@@ -0,0 +1,330 @@
+"""
+Tests for the cost.py module.
+
+Estimates use the sample price sheet bundled with the code or small sheets
+built here; the Retail Prices API is replaced by canned pages.
+"""
+
+import io
+import json
+import math
+import threading
+import time
+
+import pytest
+
+from benchmarks.fake_azure import FakeAzure
+from cli import cli
+from config import get_config
+from cost import (
+    BUNDLED_SHEET,
+    HOURS_PER_MONTH,
+    SERVICE_STORAGE,
+    SERVICE_VM,
+    UNIT_GB_MONTH,
+    UNIT_HOUR,
+    CostEstimator,
+    CostItem,
+    PriceSheet,
+    fetch_retail_prices,
+    get_cost_estimator,
+    load_price_sheet,
+)
+
+SUB = "00000000-0000-0000-0000-000000000000"
+
+ROWS = [
+    [SERVICE_VM, "Standard_D4s_v5", "eastus", 0.192, UNIT_HOUR],
+    [SERVICE_VM, "Standard_D4s_v5", "westeurope", 0.211, UNIT_HOUR],
+    [SERVICE_STORAGE, "Standard_LRS", "eastus", 0.0184, UNIT_GB_MONTH],
+    [SERVICE_STORAGE, "Standard_GRS", "eastus", 0.0368, UNIT_GB_MONTH],
+]
+
+
+@pytest.fixture
+def estimator():
+    return CostEstimator(PriceSheet(ROWS, fetched_at=time.time()), storage_gb=100)
+
+
+# ============================================================================
+# Price Sheet Tests
+# ============================================================================
+
+
+def test_lookup_is_case_insensitive():
+    sheet = PriceSheet(ROWS)
+    assert sheet.price(SERVICE_VM, "standard_d4s_v5", "WestEurope").unit_price == 0.211
+    assert sheet.price(SERVICE_VM, "Standard_D4s_v5", "japaneast") is None
+    assert sheet.regions() == ["eastus", "westeurope"]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "sheets" / "prices.json.gz"
+    PriceSheet(ROWS, fetched_at=123.0, source="test").save(path)
+    sheet = PriceSheet.load(path)
+    assert (len(sheet), sheet.fetched_at, sheet.source) == (4, 123.0, "test")
+    assert sheet.is_stale(ttl=100, now=224.0) and not sheet.is_stale(ttl=100, now=223.0)
+
+
+def test_missing_or_broken_sheets_fall_back_to_bundled(tmp_path):
+    assert len(load_price_sheet(tmp_path / "missing.json.gz")) > 100
+    broken = tmp_path / "broken.json.gz"
+    broken.write_text("not gzip")
+    bundled = load_price_sheet(broken)
+    assert bundled.price(SERVICE_STORAGE, "Premium_LRS", "westeurope") is not None
+    assert bundled.price(SERVICE_VM, "Standard_NC6s_v3", "eastus") is not None
+    assert len(bundled) == len(PriceSheet.load(BUNDLED_SHEET))
+
+
+def test_without_any_sheet_estimates_have_no_price(tmp_path, monkeypatch):
+    """A missing bundled sheet (e.g. not installed) degrades to "no price known"."""
+    import cost
+
+    monkeypatch.setattr(cost, "BUNDLED_SHEET", tmp_path / "not-installed.json.gz")
+    sheet = load_price_sheet(tmp_path / "missing.json.gz")
+    assert len(sheet) == 0
+    estimate = CostEstimator(sheet).estimate(CostItem(SERVICE_STORAGE, "Standard_LRS", "eastus"))
+    assert "no price known" in estimate.describe()
+
+
+# ============================================================================
+# Estimator Tests
+# ============================================================================
+
+
+def test_estimate_uses_default_quantities(estimator):
+    vm = estimator.estimate(CostItem(SERVICE_VM, "Standard_D4s_v5", "eastus"))
+    assert vm.monthly == pytest.approx(0.192 * HOURS_PER_MONTH)
+    assert "about $140.16/month for 730 hours" in vm.describe()
+
+    storage = estimator.estimate(CostItem(SERVICE_STORAGE, "Standard_GRS", "eastus", 50))
+    assert storage.monthly == pytest.approx(1.84)
+
+    unknown = estimator.estimate(CostItem(SERVICE_VM, "Standard_D4s_v5", "japaneast"))
+    assert unknown.monthly is None and "no price known" in unknown.describe()
+
+
+def test_batch_matches_single_estimates(estimator):
+    items = [
+        CostItem(SERVICE_VM, "Standard_D4s_v5", "westeurope"),
+        CostItem(SERVICE_STORAGE, "Standard_LRS", "eastus", 10),
+        CostItem(SERVICE_VM, "standard_d4s_v5", "WESTEUROPE", 100),
+        CostItem(SERVICE_STORAGE, "Premium_ZRS", "eastus"),
+    ]
+    batch = estimator.estimate_batch(items)
+    singles = [estimator.estimate(item).monthly for item in items]
+    assert [e.monthly for e in batch.estimates] == pytest.approx(singles[:3] + [None])
+    assert batch.monthly == pytest.approx(math.fsum(singles[:3]))
+    assert batch.unpriced == [items[3]]
+    assert "3 priced resources (1 without a known price)" in batch.summary()
+
+
+# ============================================================================
+# Refresh Tests
+# ============================================================================
+
+
+def page(items, next_link=None):
+    return io.BytesIO(json.dumps({"Items": items, "NextPageLink": next_link}).encode())
+
+
+def vm_item(sku, price, **overrides):
+    item = {
+        "type": "Consumption",
+        "serviceName": SERVICE_VM,
+        "armRegionName": "eastus",
+        "armSkuName": sku,
+        "skuName": sku.removeprefix("Standard_").replace("_", " "),
+        "productName": "Virtual Machines Dsv5 Series",
+        "unitOfMeasure": UNIT_HOUR,
+        "retailPrice": price,
+    }
+    return item | overrides
+
+
+def storage_item(meter, price, product="General Block Blob v2"):
+    return {
+        "type": "Consumption",
+        "serviceName": SERVICE_STORAGE,
+        "armRegionName": "eastus",
+        "productName": product,
+        "meterName": meter,
+        "unitOfMeasure": UNIT_GB_MONTH,
+        "retailPrice": price,
+    }
+
+
+def test_fetch_keeps_rows_estimates_use():
+    pages = {
+        0: page(
+            [
+                vm_item("Standard_D2s_v5", 0.096),
+                vm_item("Standard_D2s_v5", 0.019, skuName="D2s v5 Spot"),
+                vm_item(
+                    "Standard_D2s_v5", 0.188, productName="Virtual Machines Dsv5 Series Windows"
+                ),
+                vm_item("Standard_D2s_v5", 0.05, type="Reservation"),
+            ],
+            next_link="page-2",
+        ),
+        1: page([vm_item("Standard_D4s_v5", 0.192)]),
+        2: page(
+            [
+                storage_item("Hot RA-GRS Data Stored", 0.046),
+                storage_item("Hot LRS Write Operations", 0.065),
+                storage_item("Hot LRS Data Stored", 0.0208, product="Blob Storage"),
+                storage_item("Premium LRS Data Stored", 0.15, product="Premium Block Blob"),
+            ]
+        ),
+    }
+    urls = []
+
+    def urlopen(url, timeout):
+        urls.append(url)
+        return pages[len(urls) - 1]
+
+    sheet = fetch_retail_prices(["eastus"], urlopen=urlopen)
+    assert sorted(row[1] for row in sheet.rows()) == [
+        "Premium_LRS",
+        "Standard_D2s_v5",
+        "Standard_D4s_v5",
+        "Standard_RAGRS",
+    ]
+    assert sheet.price(SERVICE_VM, "Standard_D2s_v5", "eastus").unit_price == 0.096
+    assert "armRegionName+eq+%27eastus%27" in urls[0] and urls[1] == "page-2"
+
+
+def test_background_refresh_swaps_the_sheet(estimator, tmp_path):
+    path = tmp_path / "prices.json.gz"
+    ready = threading.Event()
+
+    def fetch():
+        ready.wait(5)
+        return PriceSheet([[SERVICE_VM, "Standard_D4s_v5", "eastus", 0.2, UNIT_HOUR]])
+
+    thread = estimator.refresh_in_background(fetch, path)
+    assert estimator.refresh_in_background(fetch, path) is thread
+    item = CostItem(SERVICE_VM, "Standard_D4s_v5", "eastus", 1)
+    assert estimator.estimate(item).monthly == 0.192
+    ready.set()
+    thread.join(5)
+    assert estimator.estimate(item).monthly == 0.2
+    assert len(PriceSheet.load(path)) == 1
+
+
+def test_failed_refresh_keeps_the_sheet(estimator):
+    def fetch():
+        raise OSError("offline")
+
+    estimator.refresh_in_background(fetch).join(5)
+    assert isinstance(estimator.refresh_error, OSError)
+    assert len(estimator.sheet) == 4
+
+
+def test_malformed_refresh_keeps_the_sheet(estimator):
+    def urlopen(url, timeout):
+        item = vm_item("Standard_D4s_v5", 0.2)
+        del item["armSkuName"]
+        return page([item])
+
+    estimator.refresh_in_background(lambda: fetch_retail_prices(["eastus"], urlopen)).join(5)
+    assert isinstance(estimator.refresh_error, KeyError)
+    assert len(estimator.sheet) == 4
+
+
+def test_singleton_refreshes_stale_sheets_only_when_enabled(monkeypatch):
+    import cost
+
+    started = []
+    monkeypatch.setattr(
+        CostEstimator, "refresh_in_background", lambda self, fetch, path: started.append(path)
+    )
+    monkeypatch.setattr(cost, "_background_refresh", False)
+    config = get_config()
+    assert get_cost_estimator(config) is get_cost_estimator(config)
+    assert started == []
+
+    # One-shot commands exit before a download could finish
+    monkeypatch.setenv("PRICE_SHEET_REFRESH", "true")
+    get_config.cache_clear()
+    get_cost_estimator(get_config())
+    assert started == []
+
+    cost.enable_background_refresh()
+    get_config.cache_clear()
+    get_cost_estimator(get_config())
+    assert started == [get_config().price_sheet_path]
+
+
+# ============================================================================
+# CLI Tests
+# ============================================================================
+
+
+def test_cli_estimates_vm_sizes_and_storage(cli_runner):
+    result = cli_runner.invoke(cli, ["how", "much", "is", "a", "D4s_v5", "in", "westeurope?"])
+    assert result.exit_code == 0, result.output
+    assert "Standard_D4s_v5 (Virtual Machines) in westeurope: $0.2112 per hour" in result.output
+
+    result = cli_runner.invoke(cli, ["price", "of", "a", "storage", "account"])
+    assert "Standard_LRS (Storage) in eastus" in result.output
+
+    result = cli_runner.invoke(cli, ["what", "does", "it", "cost"])
+    assert result.exit_code == 2
+
+
+def test_listings_mentioning_cost_are_not_estimates(cli_runner):
+    """Tags and names containing "cost" list resources instead of asking for a SKU."""
+    from intents import registry
+
+    for command in (
+        "list vms tagged costcenter=42",
+        "show resources in cost-mgmt-rg",
+        "show resources that cost the most",
+    ):
+        assert registry.classify(command).intent.name == "list_resources", command
+    assert registry.classify("how much is a D4s_v5").intent.name == "estimate_cost"
+    result = cli_runner.invoke(cli, ["list", "vms", "tagged", "costcenter=42"])
+    assert "Which size or SKU?" not in result.output
+
+
+def test_cli_create_dry_run_shows_estimate(cli_runner):
+    result = cli_runner.invoke(
+        cli,
+        [
+            "--dry-run",
+            "create",
+            "storage",
+            "account",
+            "logs01",
+            "in",
+            "rg-000",
+            "sku",
+            "Standard_GRS",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert "Estimated cost: Standard_GRS (Storage) in eastus" in result.output
+    assert "about $3.68/month for 100 GB" in result.output
+
+
+def test_cli_create_warns_above_threshold(cli_runner, monkeypatch):
+    monkeypatch.setenv("COST_STORAGE_GB", "10000")
+    FakeAzure([SUB], groups=1, resources_per_group=5).install(get_config())
+    result = cli_runner.invoke(cli, ["create", "storage", "account", "logs01", "in", "rg-000"])
+    assert result.exit_code == 0, result.output
+    assert "Warning: Standard_LRS (Storage) in eastus" in result.output
+    assert "above COST_WARNING_THRESHOLD ($100.00)" in result.output
+
+
+def test_cli_dry_run_batch_totals_creates(cli_runner, monkeypatch, tmp_path):
+    monkeypatch.setenv("WHAT_IF_CACHE_PATH", str(tmp_path / "what_if.db"))
+    FakeAzure([SUB], groups=1, resources_per_group=5).install(get_config())
+    plan = tmp_path / "plan.txt"
+    plan.write_text(
+        "create storage account new01 in rg-000\n"
+        "create storage account new02 in rg-000 location westeurope sku Premium_LRS\n"
+    )
+    result = cli_runner.invoke(cli, ["--dry-run", "batch", str(plan)])
+    assert result.exit_code == 0, result.output
+    assert "Estimated cost: about $18.34/month for 2 priced resources" in result.output
@@ -0,0 +1,215 @@
+"""
+Tests for the docs_index.py module.
+
+The deterministic HashingEmbedder stands in for Azure OpenAI embeddings.
+"""
+
+import pytest
+
+from cli import cli
+from docs_index import (
+    DocsIndex,
+    chunk_markdown,
+    embed_in_batches,
+    get_docs_index,
+    rerank_score,
+    retrieve,
+)
+from embeddings import EmbeddingError, HashingEmbedder
+
+VM_DOC = """# Virtual machines
+
+Azure virtual machines run Windows or Linux in the cloud.
+
+## Stop a VM
+
+Use az vm stop to power off a running virtual machine. Billing continues
+until the VM is deallocated.
+
+```bash
+# Not a heading: a comment in a code block
+az vm stop --resource-group rg-prod --name web01
+```
+
+## Resize a VM
+
+Use az vm resize with --size to change the VM size, for example Standard_D4s_v5.
+"""
+
+STORAGE_DOC = """# Storage accounts
+
+## Create a storage account
+
+az storage account create needs a globally unique name, a resource group and
+a --sku such as Standard_LRS or Standard_GRS.
+"""
+
+
+@pytest.fixture
+def docs(tmp_path):
+    root = tmp_path / "docs"
+    (root / "compute").mkdir(parents=True)
+    (root / "compute" / "vm.md").write_text(VM_DOC)
+    (root / "storage.md").write_text(STORAGE_DOC)
+    return root
+
+
+@pytest.fixture
+def index():
+    index = DocsIndex(":memory:", HashingEmbedder())
+    yield index
+    index.close()
+
+
+# ============================================================================
+# Chunking Tests
+# ============================================================================
+
+
+def test_chunks_carry_heading_paths():
+    chunks = chunk_markdown("vm.md", VM_DOC)
+    assert [chunk.heading for chunk in chunks] == [
+        "Virtual machines",
+        "Virtual machines > Stop a VM",
+        "Virtual machines > Resize a VM",
+    ]
+    assert "# Not a heading" in chunks[1].text
+    assert [chunk.position for chunk in chunks] == [0, 1, 2]
+
+
+def test_long_sections_are_split():
+    text = "# Title\n\n" + "\n\n".join(f"Paragraph {n} " + "word " * 30 for n in range(10))
+    chunks = chunk_markdown("long.md", text, max_chars=400)
+    assert len(chunks) > 1
+    assert all(len(chunk.text) <= 400 for chunk in chunks)
+    assert all(chunk.heading == "Title" for chunk in chunks)
+
+
+def test_embed_in_batches_matches_serial():
+    texts = [f"text number {n}" for n in range(10)]
+    serial = embed_in_batches(HashingEmbedder(), texts, batch_size=3, workers=1)
+    pooled = embed_in_batches(HashingEmbedder(), texts, batch_size=3, workers=2)
+    assert serial == pooled
+    assert len(serial) == len(texts)
+
+
+# ============================================================================
+# Ingestion Tests
+# ============================================================================
+
+
+def test_reingest_only_embeds_changed_chunks(index, docs):
+    first = index.ingest(docs, workers=1)
+    assert (first.files, first.chunks, first.embedded) == (2, 4, 4)
+
+    unchanged = index.ingest(docs, workers=1)
+    assert (unchanged.embedded, unchanged.reused, unchanged.removed) == (0, 4, 0)
+
+    vm = docs / "compute" / "vm.md"
+    vm.write_text(vm.read_text().replace("Standard_D4s_v5", "Standard_E8s_v5"))
+    changed = index.ingest(docs, workers=1)
+    assert (changed.embedded, changed.removed) == (1, 1)
+    assert len(index) == 4
+
+
+def test_deleted_files_are_removed(index, docs):
+    index.ingest(docs, workers=1)
+    (docs / "storage.md").unlink()
+    report = index.ingest(docs, workers=1)
+    assert (report.removed, len(index)) == (1, 3)
+    assert all(r.chunk.path != "storage.md" for r in index.search("storage account sku"))
+
+
+def test_changing_embedder_reembeds_everything(tmp_path, docs):
+    path = tmp_path / "index.db"
+    DocsIndex(path, HashingEmbedder()).ingest(docs, workers=1)
+    report = DocsIndex(path, HashingEmbedder(dimensions=64)).ingest(docs, workers=1)
+    assert (report.embedded, report.removed) == (4, 4)
+
+
+def test_missing_docs_directory(index, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        index.ingest(tmp_path / "nope")
+
+
+# ============================================================================
+# Search Tests
+# ============================================================================
+
+
+def test_hybrid_search_finds_relevant_section(index, docs):
+    index.ingest(docs, workers=1)
+    best, *_ = index.search("how do I stop a vm")
+    assert best.chunk.heading == "Virtual machines > Stop a VM"
+    assert best.lexical_rank is not None and best.vector_rank is not None
+
+
+def test_exact_terms_match_lexically(index, docs):
+    index.ingest(docs, workers=1)
+    best, *_ = index.search("Standard_LRS")
+    assert best.chunk.path == "storage.md"
+
+
+def test_search_without_embeddings_is_lexical(docs):
+    class Broken(HashingEmbedder):
+        fail = False
+
+        def embed(self, texts):
+            if self.fail:
+                raise EmbeddingError("service unavailable")
+            return super().embed(texts)
+
+    embedder = Broken()
+    index = DocsIndex(":memory:", embedder)
+    index.ingest(docs, workers=1)
+    embedder.fail = True
+    best, *_ = index.search("resize vm size")
+    assert best.chunk.heading.endswith("Resize a VM")
+    assert best.vector_rank is None
+
+
+def test_rerank_prefers_heading_and_phrase_matches():
+    stop, resize = chunk_markdown("vm.md", VM_DOC)[1:]
+    assert rerank_score("stop a vm", stop, 0.5) > rerank_score("stop a vm", resize, 0.5)
+
+
+def test_empty_index(index):
+    assert index.search("anything") == []
+
+
+# ============================================================================
+# Config and CLI Tests
+# ============================================================================
+
+
+def test_retrieve_without_an_index(monkeypatch, tmp_path):
+    from config import get_config
+
+    monkeypatch.setenv("CHROMA_PERSIST_DIRECTORY", str(tmp_path / "chroma"))
+    assert retrieve(get_config(), "stop vm") == []
+    assert not (tmp_path / "chroma").exists()
+
+
+def test_cli_ingest_and_search(cli_runner, monkeypatch, tmp_path, docs):
+    from config import get_config
+
+    monkeypatch.setenv("CHROMA_PERSIST_DIRECTORY", str(tmp_path / "chroma"))
+    monkeypatch.setenv("DOCS_PATH", str(docs))
+    result = cli_runner.invoke(cli, ["docs", "ingest"])
+    assert result.exit_code == 0, result.output
+    assert "2 files, 4 chunks: 4 embedded" in result.output
+
+    result = cli_runner.invoke(cli, ["docs", "search", "resize", "vm"])
+    assert result.exit_code == 0
+    assert "compute/vm.md" in result.output.splitlines()[0]
+
+    texts = [text for text, _ in retrieve(get_config(), "resize vm", k=2)]
+    assert texts[0].startswith("Virtual machines > Resize a VM")
+    assert len(get_docs_index(get_config())) == 4
+
+
+def test_cli_ingest_missing_directory(cli_runner, monkeypatch, tmp_path):
+    monkeypatch.setenv("CHROMA_PERSIST_DIRECTORY", str(tmp_path / "chroma"))
+    result = cli_runner.invoke(cli, ["docs", "ingest", str(tmp_path / "nope")])
+    assert result.exit_code == 1
+    assert "not found" in result.output
@@ -0,0 +1,142 @@
+"""
+Tests for the entities.py module.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from config import get_config
+from entities import (
+    LOCATIONS,
+    SKUS,
+    Entities,
+    canonical_sku,
+    extract_entities,
+    get_entity_model,
+)
+
+
+@pytest.mark.parametrize(
+    "command, expected",
+    [
+        ("create rg app-rg", Entities(name="app-rg")),
+        (
+            "create a resource group called rg-prod in westeurope",
+            Entities(name="rg-prod", location="westeurope"),
+        ),
+        ("create storage in app-rg", Entities(resource_group="app-rg")),
+        (
+            "create storage account logs01 in rg-prod in EastUS sku Standard_GRS",
+            Entities(
+                name="logs01",
+                resource_group="rg-prod",
+                location="eastus",
+                sku="Standard_GRS",
+                resource_type="Microsoft.Storage/storageAccounts",
+            ),
+        ),
+        ("list resources in resource group prod", Entities(resource_group="prod")),
+        ("list resources", Entities()),
+        (
+            "show VMs in eastus tagged env=prod",
+            Entities(
+                location="eastus",
+                resource_type="Microsoft.Compute/virtualMachines",
+                tags=(("env", "prod"),),
+            ),
+        ),
+        (
+            "list storage accounts in rg-data with tags env=prod and team:web",
+            Entities(
+                resource_group="rg-data",
+                resource_type="Microsoft.Storage/storageAccounts",
+                tags=(("env", "prod"), ("team", "web")),
+            ),
+        ),
+        ("list virtual networks", Entities(resource_type="Microsoft.Network/virtualNetworks")),
+        (
+            "create rg app-rg in West Europe",
+            Entities(name="app-rg", location="westeurope"),
+        ),
+        (
+            "how much is a d4s_v5 in east us 2?",
+            Entities(location="eastus2", sku="Standard_D4s_v5"),
+        ),
+        (
+            "create storage account logs01 in rg-prod northeurope with grs",
+            Entities(
+                name="logs01",
+                resource_group="rg-prod",
+                location="northeurope",
+                sku="Standard_GRS",
+                resource_type="Microsoft.Storage/storageAccounts",
+            ),
+        ),
+        ("price of Standard_M128ms", Entities(sku="Standard_M128ms")),
+        ("list all resources in my subscription", Entities()),
+        (
+            "price of premium zrs storage in UK South?",
+            Entities(location="uksouth", sku="Premium_ZRS"),
+        ),
+        ("storage with ra-grs", Entities(sku="Standard_RAGRS")),
+        ("price of sku premium zrs", Entities(sku="Premium_ZRS")),
+        ("price of sku Standard LRS?", Entities(sku="Standard_LRS")),
+        ("price of sku gold", Entities()),
+    ],
+)
+def test_extract_entities(command, expected):
+    assert extract_entities(command) == expected
+
+
+def test_marker_words_are_never_names():
+    """'create storage account in x' has no account name, only a group."""
+    entities = extract_entities("create storage account in rg app-rg")
+    assert entities.name is None
+    assert entities.resource_group == "app-rg"
+
+
+def test_unknown_word_after_in_is_a_resource_group():
+    """Only known regions are locations; anything else names a group."""
+    assert extract_entities("create storage in narnia").resource_group == "narnia"
+    assert extract_entities("create rg x location narnia").location == "narnia"
+
+
+def test_lexicons():
+    assert len(LOCATIONS) == 32 and "germanywestcentral" in LOCATIONS
+    assert SKUS["standard_ragrs"] == "Standard_RAGRS"
+    assert canonical_sku("STANDARD_LRS") == "Standard_LRS"
+    assert canonical_sku("nc4as_t4_v3") == "Standard_NC4as_T4_v3"
+    assert canonical_sku("logs01") is None
+    assert canonical_sku("Standard") is None
+
+
+class FakeDoc:
+    """Stand-in for a spaCy Doc: (text, pos) tokens and entity texts."""
+
+    def __init__(self, tokens, ents=()):
+        self.ents = [SimpleNamespace(text=text) for text in ents]
+        self.tokens = [SimpleNamespace(text=text, pos_=pos) for text, pos in tokens]
+
+    def __iter__(self):
+        return iter(self.tokens)
+
+
+def test_fallback_names_what_the_rules_miss():
+    seen = []
+
+    def nlp(command):
+        seen.append(command)
+        return FakeDoc([("make", "VERB"), ("WestEurope", "PROPN"), ("Atlas", "PROPN")])
+
+    assert extract_entities("make me Atlas in westeurope", nlp).name == "Atlas"
+    assert extract_entities("create rg app-rg", nlp).name == "app-rg"
+    assert seen == ["make me Atlas in westeurope"]
+    assert extract_entities("hello", lambda _: FakeDoc([], ents=["East US"])).name is None
+
+
+def test_entity_model_is_optional(monkeypatch):
+    assert get_entity_model(get_config()) is None
+    monkeypatch.setenv("ENTITY_MODEL", "no_such_model")
+    get_config.cache_clear()
+    assert get_entity_model(get_config()) is None
@@ -0,0 +1,142 @@
+"""
+Tests for the history.py module.
+"""
+
+import pytest
+
+from cli import cli
+from history import HistoryEntry, HistoryStore, Suggestion
+
+SESSION = [
+    HistoryEntry("list resources in rg-a", "list_resources", "rg-a", timestamp=1.0),
+    HistoryEntry("create storage account in rg-a", "create_storage_account", "rg-a", timestamp=2.0),
+    HistoryEntry("list resources in rg-b", "list_resources", "rg-b", timestamp=3.0),
+    HistoryEntry("create storage account", "create_storage_account", timestamp=4.0),
+    HistoryEntry("create rg rg-c", "create_resource_group", "rg-c", "westus", False, 5.0),
+]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 10.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def store(clock):
+    store = HistoryStore(":memory:", flush_interval=0.01, clock=clock)
+    yield store
+    store.close()
+
+
+def test_record_is_written_in_the_background(store):
+    for entry in SESSION:
+        store.record(entry)
+    store.flush()
+    assert len(store) == len(SESSION)
+    assert [entry.command for entry in store.recent(2)] == [
+        "create rg rg-c",
+        "create storage account",
+    ]
+    assert not store.recent(1)[0].succeeded
+
+
+def test_next_commands_counts_transitions(store):
+    store.write(SESSION)
+    assert store.next_commands("list_resources") == [
+        Suggestion("create_storage_account", 2, "create storage account")
+    ]
+    # Failed commands do not count as a step in the conversation
+    assert store.next_commands("create_storage_account") == [
+        Suggestion("list_resources", 1, "list resources in rg-b")
+    ]
+    assert store.next_commands() == store.next_commands("create_storage_account")
+
+
+def test_first_command_of_a_session(tmp_path):
+    path = tmp_path / "history.db"
+    for session in ("one", "two"):
+        store = HistoryStore(path, session=session)
+        store.write(SESSION[:2])
+        store.close()
+    store = HistoryStore(path, session="three")
+    (suggestion,) = store.next_commands()
+    assert (suggestion.intent, suggestion.count) == ("list_resources", 2)
+    store.close()
+
+
+def test_last_resource_group_and_location(store, clock):
+    store.write(SESSION[:4])
+    store.write([HistoryEntry("create rg rg-d in eastus", None, "rg-d", "eastus", timestamp=4.5)])
+    assert store.last_resource_group() == "rg-d"
+    assert store.last_context("location") == "eastus"
+    assert store.last_resource_group(max_age=5.0) is None
+    assert store.last_resource_group(max_age=5.5) == "rg-d"
+
+
+def test_failed_commands_do_not_change_context(store):
+    """A failed command may name a group that does not exist; it is not remembered."""
+    store.write(SESSION)
+    assert store.last_resource_group() == "rg-b"
+    assert store.last_context("location") is None
+    store.flush_interval = 60
+    store.record(HistoryEntry("show rg-z", None, "rg-z", "westus", False, timestamp=9.0))
+    assert store.last_resource_group() == "rg-b"
+    assert store.last_context("location") is None
+
+
+def test_queued_context_is_visible_before_it_is_written(store):
+    store.flush_interval = 60
+    store.record(HistoryEntry("show rg-z", None, "rg-z", timestamp=9.0))
+    assert store.last_resource_group() == "rg-z"
+
+
+def test_older_entries_do_not_overwrite_context(store):
+    store.write([HistoryEntry("a", None, "rg-new", timestamp=5.0)])
+    store.write([HistoryEntry("b", None, "rg-old", timestamp=1.0)])
+    assert store.last_resource_group() == "rg-new"
+
+
+def test_close_flushes_and_ignores_later_records(tmp_path):
+    path = tmp_path / "history.db"
+    store = HistoryStore(path, flush_interval=60)
+    store.record(SESSION[0])
+    store.close()
+    store.record(SESSION[1])
+    store.close()
+    reopened = HistoryStore(path)
+    assert len(reopened) == 1
+    reopened.close()
+
+
+# ============================================================================
+# CLI Tests
+# ============================================================================
+
+
+def test_cli_records_history_and_infers_resource_group(cli_runner):
+    result = cli_runner.invoke(cli, ["create", "rg", "app-rg", "--dry-run"])
+    assert result.exit_code == 0, result.output
+    result = cli_runner.invoke(cli, ["create", "storage", "account", "logs01", "--dry-run"])
+    assert result.exit_code == 0, result.output
+    assert "Using resource group app-rg from your recent commands" in result.output
+    assert "--resource-group app-rg" in result.output
+
+    result = cli_runner.invoke(cli, ["history"])
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert lines[:2] == ["create rg app-rg", "create storage account logs01"]
+
+
+def test_cli_records_failures(cli_runner):
+    result = cli_runner.invoke(cli, ["create", "storage", "account", "Bad_Name", "in", "app-rg"])
+    assert result.exit_code == 1
+    result = cli_runner.invoke(cli, ["history", "1"])
+    assert "(failed)" in result.output
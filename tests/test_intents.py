@@ -0,0 +1,129 @@
+"""
+Tests for the intents.py module.
+
+These tests verify intent registration and classification.
+"""
+
+import pytest
+
+from intents import Intent, IntentRegistry
+
+
+@pytest.fixture
+def registry() -> IntentRegistry:
+    """A registry with the same intents the CLI ships with."""
+    registry = IntentRegistry()
+    registry.add(Intent("list_resources", (("list",), ("resource",)), description="list resources"))
+    registry.add(Intent("help", (("help",),), description="help"))
+    return registry
+
+
+# ============================================================================
+# Classification Tests
+# ============================================================================
+
+
+def test_classify_full_match_has_full_confidence(registry):
+    """All keyword groups present means confidence 1.0."""
+    match = registry.classify("list my resources")
+    assert match is not None
+    assert match.intent.name == "list_resources"
+    assert match.confidence == 1.0
+    assert match.matched == ("list", "resource")
+
+
+def test_classify_partial_match_reports_partial_confidence(registry):
+    """Only one of two groups present gives confidence 0.5."""
+    match = registry.classify("list my vms")
+    assert match is not None
+    assert match.confidence == 0.5
+    assert registry.classify("list my vms", min_confidence=1.0) is None
+
+
+def test_classify_is_case_insensitive(registry):
+    """Commands are matched regardless of case."""
+    for command in ["HELP", "Help", "hElP"]:
+        assert registry.classify(command).intent.name == "help"
+
+
+def test_classify_unknown_command_returns_none(registry):
+    """Nothing matched means no intent."""
+    assert registry.classify("foobar") is None
+    assert registry.classify("") is None
+
+
+def test_keywords_only_match_at_word_start(registry):
+    """Keywords match word prefixes but not the middle of a word."""
+    assert registry.classify("resources list").confidence == 1.0
+    assert registry.classify("blacklist") is None
+
+
+def test_more_specific_intent_wins_ties(registry):
+    """When both intents fully match, the one with more keyword groups wins."""
+    assert registry.classify("help me list resources").intent.name == "list_resources"
+
+
+def test_priority_breaks_ties():
+    """A higher priority intent beats an equally confident one."""
+    registry = IntentRegistry()
+    registry.add(Intent("create_rg", (("create",), ("rg",))))
+    registry.add(Intent("create_storage", (("create",), ("storage",)), priority=1))
+    assert registry.classify("create storage in rg-data").intent.name == "create_storage"
+
+
+def test_whole_word_intents_ignore_longer_words():
+    """whole_words keywords match neither word prefixes nor parts of joined names."""
+    registry = IntentRegistry()
+    registry.add(Intent("cost", (("cost", "how much"),), whole_words=True))
+    assert registry.classify("what does it cost?").intent.name == "cost"
+    assert registry.classify("how much, roughly").intent.name == "cost"
+    for command in ("costs", "tagged costcenter=42", "in cost-mgmt-rg", "rg-cost", "cost_center"):
+        assert registry.classify(command) is None, command
+
+
+def test_overlapping_keywords_are_all_found():
+    """Keywords that share prefixes and suffixes are matched in one pass."""
+    registry = IntentRegistry()
+    registry.add(Intent("pronouns", (("he",), ("she",), ("hers",))))
+    registry.add(Intent("phrase", (("resource group",),)))
+    match = registry.classify("she hers")
+    assert match.confidence == 1.0
+    assert sorted(match.matched) == ["he", "hers", "she"]
+    assert registry.classify("delete the resource group").intent.name == "phrase"
+
+
+# ============================================================================
+# Registration Tests
+# ============================================================================
+
+
+def test_register_decorator_attaches_handler():
+    """The decorator registers the function and returns it unchanged."""
+    registry = IntentRegistry()
+
+    @registry.register("greet", [("hello", "hi")])
+    def greet():
+        return "greeted"
+
+    match = registry.classify("Hi there")
+    assert match.intent.handler is greet
+    assert match.intent.handler() == "greeted"
+
+
+def test_duplicate_intent_name_raises(registry):
+    """Intent names must be unique."""
+    with pytest.raises(ValueError):
+        registry.add(Intent("help", (("assist",),)))
+
+
+def test_empty_keyword_group_raises(registry):
+    """Every keyword group needs at least one phrase."""
+    with pytest.raises(ValueError):
+        registry.add(Intent("broken", (("  ",),)))
+
+
+def test_registering_after_classify_recompiles(registry):
+    """Intents added after the first classification are still found."""
+    assert registry.classify("delete vm") is None
+    registry.add(Intent("delete_vm", (("delete",), ("vm",))))
+    assert registry.classify("delete vm").intent.name == "delete_vm"
@@ -0,0 +1,186 @@
+"""
+Tests for the inventory_cache.py module.
+
+A fake clock drives TTL expiry and a fake SDK client (see conftest.py)
+counts how often Azure would have been called.
+"""
+
+import pytest
+
+from azure_commands import iter_resources
+from inventory_cache import InventoryCache
+
+SUB = "00000000-0000-0000-0000-000000000000"
+
+
+class FakeClock:
+    """Manually advanced time source."""
+
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(tmp_path, clock) -> InventoryCache:
+    return InventoryCache(tmp_path / "inventory.db", default_ttl=300, clock=clock)
+
+
+# ============================================================================
+# Hit / Miss Tests
+# ============================================================================
+
+
+def test_second_lookup_is_served_from_cache(cache, fake_resource_client):
+    """Only the first lookup reaches the SDK client."""
+    fetch = lambda: iter_resources(fake_resource_client)  # noqa: E731
+
+    first = cache.get_or_fetch(SUB, None, fetch)
+    second = cache.get_or_fetch(SUB, None, fetch)
+
+    assert not first.from_cache
+    assert second.from_cache
+    assert second.resources == first.resources
+    assert fake_resource_client.list_calls == 1
+
+
+def test_scopes_are_cached_separately(cache, fake_resource_client):
+    """Each resource group gets its own entry."""
+    cache.get_or_fetch(SUB, "dev-rg", lambda: iter_resources(fake_resource_client, "dev-rg"))
+    assert cache.get(SUB, "prod-rg") is None
+    assert [r["name"] for r in cache.get(SUB, "DEV-RG")] == ["devstore", "devvm"]
+
+
+def test_refresh_bypasses_cache(cache, fake_resource_client):
+    """refresh=True always refetches and rewrites the entry."""
+    fetch = lambda: iter_resources(fake_resource_client)  # noqa: E731
+    cache.get_or_fetch(SUB, None, fetch)
+    lookup = cache.get_or_fetch(SUB, None, fetch, refresh=True)
+    assert not lookup.from_cache
+    assert fake_resource_client.list_calls == 2
+
+
+def test_cache_persists_across_instances(tmp_path, clock, fake_resource_client):
+    """A new process opening the same file sees the cached listing."""
+    InventoryCache(tmp_path / "inv.db", clock=clock).put(
+        SUB, None, iter_resources(fake_resource_client)
+    )
+    assert len(InventoryCache(tmp_path / "inv.db", clock=clock).get(SUB)) == 3
+
+
+# ============================================================================
+# TTL Tests
+# ============================================================================
+
+
+def test_entry_expires_after_default_ttl(cache, clock):
+    """Listings are fresh until the TTL passes."""
+    cache.put(SUB, None, [{"id": "a", "type": "Microsoft.Web/sites"}])
+    clock.now += 299
+    assert cache.get(SUB) is not None
+    clock.now += 1
+    assert cache.get(SUB) is None
+
+
+def test_shortest_type_ttl_wins(tmp_path, clock):
+    """A listing expires when its shortest-lived resource type does."""
+    cache = InventoryCache(
+        ":memory:",
+        default_ttl=300,
+        type_ttls={"Microsoft.Compute/virtualMachines": 60},
+        clock=clock,
+    )
+    cache.put(SUB, "vms", [{"id": "a", "type": "microsoft.compute/virtualmachines"}])
+    cache.put(SUB, "sites", [{"id": "b", "type": "Microsoft.Web/sites"}])
+    clock.now += 61
+    assert cache.get(SUB, "vms") is None
+    assert cache.get(SUB, "sites") is not None
+
+
+# ============================================================================
+# Eviction Tests
+# ============================================================================
+
+
+def test_least_recently_used_scope_is_evicted(clock):
+    """Writing past max_bytes drops the least recently read scope."""
+    resource = {"id": "x" * 100, "type": "t"}
+    cache = InventoryCache(":memory:", max_bytes=300, clock=clock)
+    cache.put(SUB, "a", [resource])
+    clock.now += 1
+    cache.put(SUB, "b", [resource])
+    clock.now += 1
+    cache.get(SUB, "a")  # "a" is now more recently used than "b"
+    clock.now += 1
+    cache.put(SUB, "c", [resource])
+
+    assert cache.get(SUB, "a") is not None
+    assert cache.get(SUB, "b") is None
+    assert cache.get(SUB, "c") is not None
+
+
+def test_invalidate_subscription(cache):
+    """Invalidating a subscription drops all of its scopes."""
+    cache.put(SUB, None, [])
+    cache.put(SUB, "rg", [])
+    cache.put("other", None, [])
+    cache.invalidate(SUB.upper())
+    assert cache.get(SUB) is None
+    assert cache.get(SUB, "rg") is None
+    assert cache.get("other") == []
+
+
+# ============================================================================
+# Streaming Tests
+# ============================================================================
+
+
+def test_put_stream_yields_while_writing(cache):
+    """Resources pass through put_stream and are cached once it is exhausted."""
+    rows = ({"id": str(i), "type": "t"} for i in range(1200))
+    stream = cache.put_stream(SUB, None, rows)
+    assert next(stream) == {"id": "0", "type": "t"}
+    assert cache.get(SUB) is None  # Not committed until the stream completes
+    assert sum(1 for _ in stream) == 1199
+    assert [r["id"] for r in cache.iter(SUB)] == [str(i) for i in range(1200)]
+
+
+def test_abandoned_stream_keeps_previous_listing(cache):
+    """Stopping a stream early leaves the old listing in place."""
+    cache.put(SUB, None, [{"id": "old", "type": "t"}])
+    stream = cache.put_stream(SUB, None, ({"id": str(i), "type": "t"} for i in range(10)))
+    next(stream)
+    stream.close()
+    assert cache.get(SUB) == [{"id": "old", "type": "t"}]
+
+
+def test_concurrent_streams_of_one_scope_do_not_mix(cache):
+    """Each stream stages its own rows; the last to finish is the listing."""
+    first = cache.put_stream(SUB, None, ({"id": f"a{i}", "type": "t"} for i in range(1200)))
+    for _ in range(1100):  # past one staged chunk
+        next(first)
+    abandoned = cache.put_stream(SUB, None, ({"id": f"c{i}", "type": "t"} for i in range(1200)))
+    for _ in range(1100):
+        next(abandoned)
+    abandoned.close()
+    assert [r["id"] for r in cache.put_stream(SUB, None, [{"id": "b", "type": "t"}])] == ["b"]
+    assert cache.get(SUB) == [{"id": "b", "type": "t"}]
+    assert sum(1 for _ in first) == 100
+    assert [r["id"] for r in cache.iter(SUB)] == [f"a{i}" for i in range(1200)]
+
+
+def test_iter_or_fetch_reports_cache_hits(cache, fake_resource_client):
+    """The first call streams from the SDK, the second from the cache."""
+    fetch = lambda: iter_resources(fake_resource_client)  # noqa: E731
+    rows, from_cache = cache.iter_or_fetch(SUB, None, fetch)
+    assert not from_cache and len(list(rows)) == 3
+    rows, from_cache = cache.iter_or_fetch(SUB, None, fetch)
+    assert from_cache and len(list(rows)) == 3
+    assert fake_resource_client.list_calls == 1
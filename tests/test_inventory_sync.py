@@ -0,0 +1,200 @@
+"""
+Tests for the inventory_sync.py module.
+
+Resource Graph is served by the FakeAzure stand-in from the benchmarks, whose
+change feed records every mutate() call.
+"""
+
+import json
+
+import pytest
+
+from azure_commands import AzureCommandError
+from benchmarks.fake_azure import BackendProfile, FakeAzure
+from cli import cli
+from inventory_cache import InventoryCache
+from inventory_sync import (
+    CHANGE_OVERLAP_SECONDS,
+    CHANGE_RETENTION_SECONDS,
+    InventorySync,
+    ResourceGraph,
+    format_kql_datetime,
+)
+
+SUB = "00000000-0000-0000-0000-000000000000"
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def azure(clock):
+    return FakeAzure(
+        [SUB], groups=3, resources_per_group=10, profile=BackendProfile(page_size=7), clock=clock
+    )
+
+
+@pytest.fixture
+def cache(clock):
+    cache = InventoryCache(":memory:", clock=clock)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def syncer(azure, cache, clock):
+    return InventorySync(cache, ResourceGraph(azure.client("resourcegraph", SUB)), clock=clock)
+
+
+def listing(rows):
+    """Comparable form of a listing: resource ID -> tags."""
+    return {row["id"].lower(): row["tags"] for row in rows}
+
+
+def expected(azure, resource_group=None):
+    return {
+        r.id.lower(): r.tags
+        for r in azure.resources(SUB)
+        if resource_group is None or r.resource_group == resource_group
+    }
+
+
+# ============================================================================
+# Sync Tests
+# ============================================================================
+
+
+def test_first_sync_is_a_full_load(syncer, azure, cache, clock):
+    result = syncer.sync(SUB)
+    assert (result.full, result.upserted, result.deleted) == (True, 30, 0)
+    assert listing(cache.get(SUB)) == expected(azure)
+    assert cache.watermark(SUB) == clock.now
+    # 30 rows in pages of 7
+    assert azure.calls["resourcegraph.resources"] == 5
+    assert "full load, 30 resources" in result.summary()
+
+
+def test_later_syncs_transfer_only_changes(syncer, azure, cache, clock):
+    syncer.sync(SUB)
+    clock.now += 3600
+    azure.mutate(SUB, created=2, updated=3, deleted=1)
+    clock.now += 60
+    calls = azure.calls["resourcegraph.resources"]
+
+    result = syncer.sync(SUB)
+    assert (result.full, result.upserted, result.deleted) == (False, 5, 1)
+    assert listing(cache.get(SUB)) == expected(azure)
+    # One page of changes, one page of current state
+    assert azure.calls["resourcegraph.resources"] - calls == 2
+    assert cache.watermark(SUB) == clock.now
+    assert "5 changed, 1 deleted" in result.summary()
+
+
+def test_resource_group_listings_are_patched(syncer, azure, cache, clock):
+    syncer.sync(SUB)
+    cache.put(SUB, "rg-001", [row for row in cache.get(SUB) if row["resource_group"] == "rg-001"])
+    clock.now += 3600
+    azure.mutate(SUB, created=3, updated=12, deleted=2)
+    syncer.sync(SUB)
+    assert listing(cache.get(SUB, "rg-001")) == expected(azure, "rg-001")
+    assert listing(cache.get(SUB)) == expected(azure)
+
+
+def test_overlapping_syncs_are_idempotent(syncer, azure, cache, clock):
+    syncer.sync(SUB)
+    clock.now += 10
+    azure.mutate(SUB, created=1, updated=1, deleted=1)
+    clock.now += 10
+    syncer.sync(SUB)
+    clock.now += 10
+    # The change is inside the overlap window and is applied a second time
+    assert clock.now - CHANGE_OVERLAP_SECONDS < cache.watermark(SUB)
+    again = syncer.sync(SUB)
+    assert again.upserted == 2
+    assert len(cache.get(SUB)) == 30
+    assert listing(cache.get(SUB)) == expected(azure)
+
+
+def test_sync_falls_back_to_full_load(syncer, cache, clock):
+    syncer.sync(SUB)
+    clock.now += CHANGE_RETENTION_SECONDS + 1
+    assert syncer.sync(SUB).full
+
+    cache.invalidate(SUB)
+    assert cache.watermark(SUB) is None
+    assert syncer.sync(SUB).full
+    assert syncer.sync(SUB, full=True).full
+
+
+def test_failed_sync_keeps_listing_and_watermark(syncer, azure, cache, clock):
+    syncer.sync(SUB)
+    watermark = cache.watermark(SUB)
+    clock.now += 60
+    azure.mutate(SUB, deleted=5)
+    azure.profile = BackendProfile(failure_rate=1.0)
+    with pytest.raises(AzureCommandError, match="Resource Graph query failed"):
+        syncer.sync(SUB)
+    assert cache.watermark(SUB) == watermark
+    assert len(cache.get(SUB)) == 30
+
+
+def test_changes_query_uses_watermark_minus_overlap(syncer, azure, cache, clock):
+    sent = []
+    graph_query = azure._graph_query
+    syncer.graph = ResourceGraph(
+        type("Client", (), {"resources": lambda _self, r: sent.append(r) or graph_query(r)})()
+    )
+    syncer.sync(SUB)
+    clock.now += 3600
+    syncer.sync(SUB)
+    changes = sent[-1]
+    assert changes["subscriptions"] == [SUB]
+    assert changes["options"]["resultFormat"] == "objectArray"
+    since = format_kql_datetime(clock.now - 3600 - CHANGE_OVERLAP_SECONDS)
+    assert f"datetime({since})" in changes["query"]
+
+
+# ============================================================================
+# CLI Tests
+# ============================================================================
+
+
+def test_cli_sync_then_list_uses_deltas(cli_runner, monkeypatch, tmp_path):
+    from config import get_config
+
+    monkeypatch.setenv("INVENTORY_CACHE_PATH", str(tmp_path / "inventory.db"))
+    monkeypatch.setenv("INVENTORY_SYNC", "true")
+    azure = FakeAzure([SUB], groups=2, resources_per_group=10)
+    azure.install(get_config())
+
+    result = cli_runner.invoke(cli, ["sync"])
+    assert result.exit_code == 0, result.output
+    assert "full load, 20 resources" in result.output
+
+    azure.mutate(SUB, created=1, deleted=1)
+    result = cli_runner.invoke(cli, ["--refresh", "--format", "ndjson", "list", "resources"])
+    assert result.exit_code == 0, result.output
+    rows = [json.loads(line) for line in result.output.splitlines() if line.startswith("{")]
+    assert listing(rows) == expected(azure)
+    # Nothing was paged through the resource management API
+    assert azure.calls["resources.list"] == 0
+
+
+def test_cli_sync_reports_failures(cli_runner, monkeypatch, tmp_path):
+    from config import get_config
+
+    monkeypatch.setenv("INVENTORY_CACHE_PATH", str(tmp_path / "inventory.db"))
+    FakeAzure([SUB], profile=BackendProfile(failure_rate=1.0)).install(get_config())
+    result = cli_runner.invoke(cli, ["sync", "full"])
+    assert result.exit_code == 1
+    assert "Resource Graph query failed" in result.output
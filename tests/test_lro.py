@@ -0,0 +1,228 @@
+"""
+Tests for the lro.py module.
+
+Operations come from the FakeAzure stand-in, whose storage account creates
+are long-running operations that finish after BackendProfile.lro_duration,
+or from scripted polling methods defined here.
+"""
+
+import contextlib
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import azure_commands
+from azure_commands import AzureCommandError
+from benchmarks.fake_azure import BackendProfile, FakeAzure
+from cli import cli
+from config import get_config
+from lro import STATUS_SUCCEEDED, LroManager, OperationRecord, OperationStore, check
+
+SUB = "00000000-0000-0000-0000-000000000000"
+
+
+class ScriptedPolling:
+    """Polling method that reports the given statuses, one per poll."""
+
+    def __init__(self, statuses, retry_after=None):
+        self.statuses = list(statuses)
+        self.current = "InProgress"
+        self.hint = retry_after
+        self.polled_at = []
+
+    def finished(self):
+        return self.current != "InProgress"
+
+    def status(self):
+        return self.current
+
+    def retry_after(self):
+        return self.hint
+
+    def update_status(self):
+        self.polled_at.append(time.monotonic())
+        self.current = self.statuses.pop(0)
+
+    def final_resource(self):
+        return "resource"
+
+
+def scripted(*statuses, retry_after=None):
+    method = ScriptedPolling(statuses, retry_after)
+    return SimpleNamespace(polling_method=lambda: method)
+
+
+@pytest.fixture
+def manager():
+    manager = LroManager(initial_delay=0.01, max_delay=0.05)
+    yield manager
+    manager.close()
+
+
+def begin(azure, name):
+    client = azure.client("storage", SUB)
+    return azure_commands.begin_create_storage_account(client, "rg-000", name, "eastus")
+
+
+# ============================================================================
+# Manager Tests
+# ============================================================================
+
+
+def test_operations_are_polled_on_one_thread(manager):
+    azure = FakeAzure(
+        [SUB], groups=1, resources_per_group=5, profile=BackendProfile(lro_duration=0.05)
+    )
+    operations = [
+        manager.track(f"create new{n:02d}", begin(azure, f"new{n:02d}")) for n in range(10)
+    ]
+    manager.wait(operations)
+    assert [operation.status for operation in operations] == [STATUS_SUCCEEDED] * 10
+    assert operations[0].result.name == "new00"
+    assert all(operation.polls >= 1 for operation in operations)
+    assert azure.poll_threads == {manager._thread.ident}
+    assert len(azure._in_group(SUB, "rg-000", "Microsoft.Storage/storageAccounts")) == 11
+
+
+def test_retry_after_is_honored_and_clamped(manager):
+    honored = scripted("InProgress", "Succeeded", retry_after=0.03)
+    clamped = scripted("Succeeded", retry_after=3600)
+    operations = [manager.track("honored", honored), manager.track("clamped", clamped)]
+    manager.wait(operations)
+    assert [operation.result for operation in operations] == ["resource", "resource"]
+    first, second = honored.polling_method().polled_at
+    assert second - first >= 0.025
+    assert operations[1].elapsed < 1
+
+
+def test_delay_backs_off_without_retry_after():
+    manager = LroManager(initial_delay=0.01, max_delay=1.0, backoff=3)
+    try:
+        poller = scripted("InProgress", "InProgress", "Succeeded")
+        manager.wait([manager.track("backoff", poller)])
+    finally:
+        manager.close()
+    first, second, third = poller.polling_method().polled_at
+    assert third - second >= 0.08  # 0.01 * 3**2
+    assert third - second > second - first
+
+
+def test_throttled_status_requests_are_retried(manager):
+    profile = BackendProfile(throttle_rate=0.4, retry_after=0.0, seed=3)
+    azure = FakeAzure([SUB], groups=1, profile=profile)
+    pollers = []
+    for n in range(8):
+        with contextlib.suppress(AzureCommandError):  # throttled start
+            pollers.append(begin(azure, f"new{n:02d}"))
+    operations = [manager.track(f"create {n}", poller) for n, poller in enumerate(pollers)]
+    manager.wait(operations)
+    assert all(operation.error is None for operation in operations)
+    assert azure.calls["storage_accounts.poll"] > len(operations)
+
+
+def test_failed_operations_raise(manager):
+    operation = manager.track("create broken", scripted("Failed"))
+    manager.wait([operation])
+    assert isinstance(operation.error, AzureCommandError)
+    assert str(operation.error) == "create broken: Failed"
+    with pytest.raises(AzureCommandError):
+        operation.future.result()
+
+
+def test_pollers_without_polling_method_wait_on_a_worker(manager):
+    operation = manager.track("opaque", SimpleNamespace(result=lambda: "done"))
+    assert operation.future.result(timeout=5) == "done"
+
+
+def test_wait_draws_progress(manager):
+    from io import StringIO
+
+    from rich.console import Console
+
+    out = StringIO()
+    operations = [
+        manager.track(f"create {n}", scripted("InProgress", "Succeeded")) for n in range(3)
+    ]
+    manager.wait(operations, Console(file=out, width=80), refresh=0.01)
+    assert "create 2" in out.getvalue() and "Succeeded" in out.getvalue()
+
+
+def test_check_polls_once():
+    assert check(scripted("InProgress")) == ("InProgress", None)
+    assert check(scripted("Succeeded")) == ("Succeeded", "resource")
+    with pytest.raises(ValueError):
+        check(SimpleNamespace(result=lambda: None))
+
+
+# ============================================================================
+# Operation Store Tests
+# ============================================================================
+
+
+def test_operation_store_round_trip():
+    now = [100.0]
+    store = OperationStore(":memory:", clock=lambda: now[0])
+    store.add(
+        OperationRecord("abc123", "create_storage_account", "Create x", SUB, {"name": "x"}, "t1")
+    )
+    now[0] += 1
+    store.add(OperationRecord("abd456", "create_storage_account", "Create y", SUB, {}, "t2"))
+    assert store.get("abc").arguments == {"name": "x"}
+    assert store.get("ab") is None  # ambiguous prefix
+    assert store.get("zzz") is None
+    store.set_status("abc123", "Succeeded")
+    assert [(r.op_id, r.status) for r in store.recent()] == [
+        ("abd456", "InProgress"),
+        ("abc123", "Succeeded"),
+    ]
+
+
+# ============================================================================
+# CLI Tests
+# ============================================================================
+
+
+@pytest.fixture
+def installed(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPERATIONS_DB_PATH", str(tmp_path / "operations.db"))
+    azure = FakeAzure([SUB], groups=3, profile=BackendProfile(lro_duration=0.05))
+    azure.install(get_config())
+    return azure
+
+
+def test_cli_waits_for_create(cli_runner, installed):
+    result = cli_runner.invoke(cli, ["create", "storage", "account", "logs01", "in", "rg-000"])
+    assert result.exit_code == 0, result.output
+    assert "Created storage account logs01 in rg-000" in result.output
+    assert installed.calls["storage_accounts.poll"] >= 1
+
+
+def test_cli_no_wait_and_status(cli_runner, installed):
+    result = cli_runner.invoke(
+        cli, ["--no-wait", "create", "storage", "account", "logs01", "in", "rg-000"]
+    )
+    assert result.exit_code == 0, result.output
+    op_id = result.output.split("operation ")[1].split(")")[0]
+    assert f"copilot status {op_id}" in result.output
+    assert installed.calls["storage_accounts.poll"] == 0
+
+    time.sleep(0.06)
+    result = cli_runner.invoke(cli, ["status", op_id])
+    assert result.exit_code == 0, result.output
+    assert f"{op_id}  Succeeded  Create storage account logs01" in result.output
+
+    result = cli_runner.invoke(cli, ["status"])
+    assert f"{op_id}  Succeeded" in result.output
+    assert cli_runner.invoke(cli, ["status", "ffffffff"]).exit_code == 1
+
+
+def test_cli_batch_creates_share_the_poller(cli_runner, installed, tmp_path):
+    plan = tmp_path / "plan.txt"
+    plan.write_text("".join(f"create storage account bulk{n:02d} in rg-001\n" for n in range(6)))
+    result = cli_runner.invoke(cli, ["--workers", "1", "batch", str(plan)])
+    assert result.exit_code == 0, result.output
+    assert result.output.count(" ok in ") == 6
+    assert len(installed.poll_threads) == 1
+    assert threading.main_thread().ident not in installed.poll_threads
@@ -0,0 +1,128 @@
+"""
+Tests for the prompts.py module.
+
+tiktoken is optional, so these tests use whichever counter is available and
+only assert relationships that hold for both.
+"""
+
+import pytest
+
+from prompts import (
+    KIND_CONTEXT,
+    KIND_DOC,
+    KIND_EXAMPLE,
+    PromptBudgetError,
+    PromptBuilder,
+    TokenCounter,
+    overlap,
+)
+
+QUERY = "stop vm web01 in rg-prod"
+CONTEXT = ["list vms in rg-prod", "show web01", "list storage accounts"]
+DOCS = [
+    ("az vm stop: Power off (stop) a running VM. " * 40, 0.9),
+    ("az storage account list: List storage accounts. " * 40, 0.2),
+]
+
+
+@pytest.fixture
+def counter():
+    return TokenCounter()
+
+
+# ============================================================================
+# Token Counter Tests
+# ============================================================================
+
+
+def test_counts_are_cached(counter):
+    first = counter.count("az vm list --resource-group rg-prod")
+    assert counter.count("az vm list --resource-group rg-prod") == first
+    assert (counter.hits, counter.misses) == (1, 1)
+
+
+def test_longer_text_has_more_tokens(counter):
+    assert 0 < counter.count("list vms") < counter.count("list every vm in every group")
+
+
+def test_truncate_fits_the_limit(counter):
+    text = "Power off a running virtual machine. " * 20
+    short = counter.truncate(text, 10)
+    assert text.startswith(short)
+    assert counter.count(short) <= 10
+    assert counter.truncate(text, 10_000) == text
+    assert counter.truncate(text, 0) == ""
+
+
+def test_count_messages_includes_overhead(counter):
+    messages = [{"role": "user", "content": "hi"}]
+    assert counter.count_messages(messages) > counter.count("hi")
+
+
+# ============================================================================
+# Prompt Builder Tests
+# ============================================================================
+
+
+def test_overlap():
+    assert overlap("stop vm web01", "stop vm web01 in rg-prod") == 1.0
+    assert overlap("stop vm web01", "list storage") == 0.0
+    assert overlap("", "anything") == 0.0
+
+
+def test_everything_fits_in_a_large_budget(counter):
+    builder = PromptBuilder(counter, budget=100_000)
+    prompt = builder.build(QUERY, CONTEXT, DOCS)
+    assert not prompt.dropped and not prompt.trimmed
+    assert prompt.messages[0]["role"] == "system"
+    assert prompt.messages[-1] == {"role": "user", "content": QUERY}
+    assert prompt.tokens == counter.count_messages(builder.unbudgeted(QUERY, CONTEXT, DOCS))
+
+
+def test_small_budget_keeps_most_relevant_and_fits(counter):
+    builder = PromptBuilder(counter, budget=450)
+    prompt = builder.build(QUERY, CONTEXT, DOCS)
+    assert prompt.tokens <= 450
+    kept = {(fragment.kind, fragment.position) for fragment in prompt.included}
+    assert (KIND_DOC, 0) in kept
+    assert (KIND_DOC, 1) not in kept
+    # The example closest to the query beats unrelated ones
+    stop_example = next(i for i, (req, _) in enumerate(builder.examples) if req.startswith("stop"))
+    assert (KIND_EXAMPLE, stop_example) in kept
+    assert prompt.tokens < counter.count_messages(builder.unbudgeted(QUERY, CONTEXT, DOCS))
+
+
+def test_documents_are_trimmed_to_fit(counter):
+    builder = PromptBuilder(counter, budget=400, examples=())
+    prompt = builder.build(QUERY, docs=DOCS[:1])
+    assert [fragment.kind for fragment in prompt.trimmed] == [KIND_DOC]
+    assert DOCS[0][0].startswith(prompt.trimmed[0].text)
+    assert prompt.tokens <= 400
+
+
+def test_context_keeps_chronological_order(counter):
+    builder = PromptBuilder(counter, budget=100_000, examples=())
+    prompt = builder.build(QUERY, CONTEXT)
+    context = next(m["content"] for m in prompt.messages if m["content"].startswith("Conversation"))
+    assert context.index(CONTEXT[0]) < context.index(CONTEXT[1]) < context.index(CONTEXT[2])
+
+
+def test_recent_context_outranks_old(counter):
+    builder = PromptBuilder(counter, examples=())
+    ranked = [
+        f for f in builder.rank("unrelated", ["old turn", "new turn"]) if f.kind == KIND_CONTEXT
+    ]
+    assert [fragment.text for fragment in ranked] == ["new turn", "old turn"]
+
+
+def test_required_parts_over_budget(counter):
+    with pytest.raises(PromptBudgetError):
+        PromptBuilder(counter, budget=10).build(QUERY)
+
+
+def test_from_config(monkeypatch):
+    from config import get_config
+
+    monkeypatch.setenv("PROMPT_TOKEN_BUDGET", "1234")
+    builder = PromptBuilder.from_config(get_config())
+    assert builder.budget == 1234
@@ -0,0 +1,219 @@
+"""
+Tests for the query_planner.py module.
+
+Server-side evaluation is checked against the FakeAzure stand-in, which
+implements the ARM $filter forms and the Resource Graph where/project
+clauses the planner emits.
+"""
+
+import json
+
+import pytest
+
+from benchmarks.fake_azure import BackendProfile, FakeAzure
+from cli import cli
+from entities import extract_entities
+from inventory_sync import ResourceGraph
+from query_planner import COLUMNS, Predicate, ResourceQuery, plan_query, run_plan
+
+SUB = "00000000-0000-0000-0000-000000000000"
+VM = "Microsoft.Compute/virtualMachines"
+
+
+def query_for(command, columns=COLUMNS):
+    return ResourceQuery.from_entities(extract_entities(command), columns=columns)
+
+
+@pytest.fixture(scope="module")
+def azure():
+    return FakeAzure([SUB], groups=6, resources_per_group=40, profile=BackendProfile(page_size=50))
+
+
+def everything(azure):
+    plan = plan_query(ResourceQuery(), "arm")
+    return list(run_plan(plan, SUB, azure.client("resource", SUB)))
+
+
+# ============================================================================
+# Planning Tests
+# ============================================================================
+
+
+def test_query_from_entities():
+    query = query_for("show vms in eastus tagged env=prod")
+    assert query.predicates == (
+        Predicate("type", VM),
+        Predicate("location", "eastus"),
+        Predicate("tags", "prod", tag="env"),
+    )
+    assert (
+        ResourceQuery.from_entities(extract_entities("list resources"), "rg-x").resource_group
+        == "rg-x"
+    )
+
+
+def test_arm_pushes_one_predicate():
+    plan = plan_query(query_for("show vms in eastus tagged env=prod"), "arm")
+    assert plan.odata_filter == f"resourceType eq '{VM}'"
+    assert [p.column for p in plan.residual] == ["location", "tags"]
+
+    plan = plan_query(query_for("list resources in westeurope"), "arm")
+    assert plan.odata_filter == "location eq 'westeurope'"
+    assert plan.residual == ()
+    assert "server filters location=westeurope" in plan.explain()
+
+
+def test_arm_tag_filter_only_when_tags_are_not_needed():
+    query = query_for("list resources tagged owner=o'brien")
+    assert plan_query(query, "arm").odata_filter is None
+
+    plan = plan_query(query_for("list resources tagged owner=o'brien", columns=("name",)), "arm")
+    assert plan.odata_filter == "tagName eq 'owner' and tagValue eq 'o''brien'"
+    assert plan.residual == ()
+
+
+def test_graph_pushes_everything_and_projects():
+    query = ResourceQuery.from_entities(
+        extract_entities("show vms in rg-app tagged env=prod"), columns=("name", "resource_group")
+    )
+    plan = plan_query(query, "graph")
+    assert plan.residual == ()
+    assert plan.kql == (
+        "resources | where resourceGroup =~ 'rg-app' and type =~ 'Microsoft.Compute/virtualMachines'"
+        " and tostring(tags['env']) =~ 'prod' | project name, resourceGroup"
+    )
+
+
+def test_local_plan_filters_and_projects():
+    rows = [
+        {
+            "id": "1",
+            "name": "a",
+            "type": VM,
+            "location": "EastUS",
+            "resource_group": "rg",
+            "tags": {"Env": "Prod"},
+        },
+        {
+            "id": "2",
+            "name": "b",
+            "type": VM,
+            "location": "westus",
+            "resource_group": "rg",
+            "tags": {},
+        },
+    ]
+    plan = plan_query(query_for("list vms in eastus tagged env=prod", columns=("name",)), "local")
+    assert list(plan.apply(rows)) == [{"name": "a"}]
+    assert list(plan_query(ResourceQuery(), "local").apply(rows)) == rows
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        plan_query(ResourceQuery(), "odata")
+    with pytest.raises(ValueError):
+        list(run_plan(plan_query(ResourceQuery(), "local"), SUB, None))
+
+
+# ============================================================================
+# Execution Tests
+# ============================================================================
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        "show vms in eastus tagged env=prod",
+        "list resources in westeurope",
+        "list storage accounts in rg-002",
+        "list resources in rg-001 tagged env=dev",
+        "list resources",
+    ],
+)
+@pytest.mark.parametrize("columns", [COLUMNS, ("name", "location")])
+def test_pushdown_returns_what_local_filtering_does(azure, command, columns):
+    query = query_for(command, columns)
+    expected = list(
+        plan_query(query, "local").apply(
+            row
+            for row in everything(azure)
+            if not query.resource_group or row["resource_group"] == query.resource_group
+        )
+    )
+    assert expected or command == "list resources in rg-001 tagged env=dev"
+
+    arm = run_plan(plan_query(query, "arm"), SUB, azure.client("resource", SUB))
+    graph = run_plan(
+        plan_query(query, "graph"), SUB, ResourceGraph(azure.client("resourcegraph", SUB))
+    )
+    key = lambda row: json.dumps(row, sort_keys=True)  # noqa: E731
+    assert sorted(map(key, arm)) == sorted(map(key, expected))
+    assert sorted(map(key, graph)) == sorted(map(key, expected))
+
+
+def test_pushdown_transfers_less(azure):
+    query = query_for("show vms in eastus", columns=("name",))
+    azure.bytes_sent.clear()
+    list(run_plan(plan_query(ResourceQuery(), "arm"), SUB, azure.client("resource", SUB)))
+    unfiltered = azure.bytes_sent["resources.list"]
+    list(run_plan(plan_query(query, "arm"), SUB, azure.client("resource", SUB)))
+    arm = azure.bytes_sent["resources.list"] - unfiltered
+    list(
+        run_plan(plan_query(query, "graph"), SUB, ResourceGraph(azure.client("resourcegraph", SUB)))
+    )
+    graph = azure.bytes_sent["resourcegraph.resources"]
+    assert graph < arm < unfiltered / 3
+
+
+# ============================================================================
+# CLI Tests
+# ============================================================================
+
+
+@pytest.fixture
+def installed(monkeypatch, tmp_path):
+    from config import get_config
+
+    monkeypatch.setenv("INVENTORY_CACHE_PATH", str(tmp_path / "inventory.db"))
+    azure = FakeAzure([SUB], groups=3, resources_per_group=20)
+    azure.install(get_config())
+    return azure
+
+
+def ndjson_rows(output):
+    return [json.loads(line) for line in output.splitlines() if line.startswith("{")]
+
+
+def test_cli_filtered_listing_is_pushed_down(cli_runner, installed):
+    result = cli_runner.invoke(
+        cli, ["--format", "ndjson", "show", "vms", "in", "eastus", "tagged", "env=prod"]
+    )
+    assert result.exit_code == 0, result.output
+    rows = ndjson_rows(result.output)
+    expected = [
+        r
+        for r in installed.resources(SUB)
+        if r.type == VM and r.location == "eastus" and r.tags["env"] == "prod"
+    ]
+    assert {r["name"] for r in rows} == {r.name for r in expected}
+    filtered = installed.bytes_sent["resources.list"]
+
+    # The partial listing was not cached, and the full one is far bigger
+    result = cli_runner.invoke(cli, ["--format", "ndjson", "list", "resources"])
+    assert "(cached)" not in result.output
+    assert filtered * 3 < installed.bytes_sent["resources.list"] - filtered
+
+
+def test_cli_filters_cached_listing_locally(cli_runner, installed):
+    cli_runner.invoke(cli, ["--format", "ndjson", "list", "resources"])
+    calls = installed.calls["resources.list"]
+    result = cli_runner.invoke(
+        cli, ["--format", "ndjson", "list", "storage", "accounts", "in", "eastus"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "(cached)" in result.output
+    assert installed.calls["resources.list"] == calls
+    rows = ndjson_rows(result.output)
+    assert rows and all(
+        r["type"] == "Microsoft.Storage/storageAccounts" and r["location"] == "eastus" for r in rows
+    )
@@ -0,0 +1,78 @@
+"""
+Tests for the render.py module.
+
+Rows come from generators to make sure nothing requires the full listing
+up front.
+"""
+
+import io
+
+import pytest
+from rich.console import Console
+
+from render import TABLE_CHUNK_ROWS, render_resources
+
+
+def make_rows(count: int):
+    for i in range(count):
+        yield {
+            "name": f"res{i}",
+            "type": "Microsoft.Web/sites",
+            "location": "eastus",
+            "resource_group": "rg",
+        }
+
+
+class FirstWriteRecorder(io.StringIO):
+    """Records how many rows had been produced when output was first flushed."""
+
+    def __init__(self, produced: list[int]) -> None:
+        super().__init__()
+        self._produced = produced
+        self.produced_at_first_flush = None
+
+    def flush(self) -> None:
+        if self.produced_at_first_flush is None and self.getvalue():
+            self.produced_at_first_flush = len(self._produced)
+        super().flush()
+
+
+def test_ndjson_is_written_before_the_source_is_exhausted():
+    """The first line is flushed after one row has been produced, not all of them."""
+    produced = []
+
+    def source():
+        for row in make_rows(1000):
+            produced.append(row)
+            yield row
+
+    out = FirstWriteRecorder(produced)
+    assert render_resources(source(), "ndjson", out) == 1000
+    assert out.produced_at_first_flush == 1
+
+
+def test_csv_columns():
+    """CSV output has the documented columns."""
+    out = io.StringIO()
+    render_resources(make_rows(2), "csv", out)
+    assert out.getvalue().splitlines() == [
+        "name,type,location,resource_group",
+        "res0,Microsoft.Web/sites,eastus,rg",
+        "res1,Microsoft.Web/sites,eastus,rg",
+    ]
+
+
+def test_table_is_rendered_in_chunks_with_one_header():
+    """Large tables are printed chunk by chunk and show the header once."""
+    console = Console(file=io.StringIO(), width=200)
+    count = render_resources(make_rows(TABLE_CHUNK_ROWS * 2 + 1), "table", io.StringIO(), console)
+    output = console.file.getvalue()
+    assert count == TABLE_CHUNK_ROWS * 2 + 1
+    assert output.count("Resource Group") == 1
+    assert f"res{TABLE_CHUNK_ROWS * 2}" in output
+
+
+def test_unknown_format_raises():
+    """Unsupported formats are rejected."""
+    with pytest.raises(ValueError):
+        render_resources([], "xml", io.StringIO())
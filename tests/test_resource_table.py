@@ -0,0 +1,169 @@
+"""
+Tests for the resource_table.py module.
+"""
+
+import json
+from collections import Counter
+
+import pytest
+
+from benchmarks.fake_azure import FakeAzure
+from cli import cli
+from resource_table import ResourceTable
+
+SUB = "00000000-0000-0000-0000-000000000000"
+
+
+def resource(
+    name, type_="Microsoft.Compute/virtualMachines", location="eastus", group="rg-1", **tags
+):
+    return {
+        "id": f"/subscriptions/{SUB}/resourceGroups/{group}/providers/{type_}/{name}",
+        "name": name,
+        "type": type_,
+        "location": location,
+        "resource_group": group,
+        "tags": tags,
+    }
+
+
+ROWS = [
+    resource("vm-b", location="westeurope", env="prod"),
+    resource("vm-a", env="prod"),
+    resource("logs", "Microsoft.Storage/storageAccounts", group="rg-2"),
+    resource("vm-c", location="WestEurope", group="rg-2", env="dev"),
+]
+
+
+@pytest.fixture
+def table():
+    return ResourceTable.from_rows(ROWS)
+
+
+# ============================================================================
+# Storage Tests
+# ============================================================================
+
+
+def test_rows_round_trip(table):
+    assert len(table) == 4
+    assert list(table) == ROWS
+    assert table.row(2) == ROWS[2]
+    assert table.column("location") == [r["location"] for r in ROWS]
+    assert table.column("id") == [r["id"] for r in ROWS]
+    assert table.column("tags") == [r["tags"] for r in ROWS]
+    with pytest.raises(ValueError, match="Unknown column"):
+        table.column("sku")
+
+
+def test_repeated_values_are_stored_once(table):
+    assert table.distinct("resource_group") == ["rg-1", "rg-2"]
+    assert table._tag_sets == [{"env": "prod"}, {}, {"env": "dev"}]
+    # Rows hand out copies, so callers cannot change the shared tags
+    table.row(0)["tags"]["env"] = "test"
+    assert table.row(1)["tags"] == {"env": "prod"}
+
+
+def test_partial_rows():
+    table = ResourceTable.from_rows([{"name": "x", "location": "eastus"}])
+    assert table.row(0) == {
+        "id": "",
+        "name": "x",
+        "type": "",
+        "location": "eastus",
+        "resource_group": "",
+        "tags": {},
+    }
+
+
+# ============================================================================
+# Query Tests
+# ============================================================================
+
+
+def test_count_by(table):
+    assert table.count_by("resource_group") == {("rg-1",): 2, ("rg-2",): 2}
+    assert table.count_by("type", "location") == {
+        ("Microsoft.Compute/virtualMachines", "westeurope"): 1,
+        ("Microsoft.Compute/virtualMachines", "eastus"): 1,
+        ("Microsoft.Storage/storageAccounts", "eastus"): 1,
+        ("Microsoft.Compute/virtualMachines", "WestEurope"): 1,
+    }
+    assert table.count_by() == {(): 4}
+    assert table.summary("location")[0] == ("eastus", 2)
+    with pytest.raises(ValueError, match="Cannot group by name"):
+        table.count_by("name")
+
+
+def test_where_and_sort_by(table):
+    assert table.where("location", "westeurope") == [0, 3]
+    assert [r["name"] for r in table.rows(table.sort_by("name"))] == [
+        "logs",
+        "vm-a",
+        "vm-b",
+        "vm-c",
+    ]
+    assert [table.row(i)["location"] for i in table.sort_by("location", reverse=True)][:2] == [
+        "westeurope",
+        "WestEurope",
+    ]
+    with pytest.raises(ValueError):
+        table.sort_by("tags")
+
+
+def test_count_by_matches_counter_on_large_inventory():
+    azure = FakeAzure([SUB], groups=10, resources_per_group=200)
+    rows = [
+        {"name": r.name, "type": r.type, "location": r.location, "resource_group": "rg"}
+        for r in azure.resources(SUB)
+    ]
+    table = ResourceTable.from_rows(rows)
+    expected = Counter((r["type"], r["location"]) for r in rows)
+    assert table.count_by("type", "location") == dict(expected)
+    assert list(table.count_by("type", "location").values()) == sorted(
+        expected.values(), reverse=True
+    )
+
+
+# ============================================================================
+# CLI Tests
+# ============================================================================
+
+
+@pytest.fixture
+def installed(monkeypatch, tmp_path):
+    from config import get_config
+
+    monkeypatch.setenv("INVENTORY_CACHE_PATH", str(tmp_path / "inventory.db"))
+    azure = FakeAzure([SUB], groups=3, resources_per_group=20)
+    azure.install(get_config())
+    return azure
+
+
+def test_cli_counts_per_region(cli_runner, installed):
+    result = cli_runner.invoke(cli, ["--format", "ndjson", "how", "many", "vms", "per", "region"])
+    assert result.exit_code == 0, result.output
+    counts = [json.loads(line) for line in result.output.splitlines() if line.startswith("{")]
+    expected = Counter(
+        r.location
+        for r in installed.resources(SUB)
+        if r.type == "Microsoft.Compute/virtualMachines"
+    )
+    assert {c["location"]: c["count"] for c in counts} == dict(expected)
+
+
+def test_cli_count_uses_cached_listing(cli_runner, installed):
+    cli_runner.invoke(cli, ["list", "resources"])
+    calls = installed.calls["resources.list"]
+    result = cli_runner.invoke(
+        cli, ["--format", "csv", "count", "resources", "by", "resource", "group"]
+    )
+    assert result.exit_code == 0, result.output
+    assert installed.calls["resources.list"] == calls
+    assert "resource_group,count" in result.output
+    assert "rg-000,20" in result.output
+    assert "(cached)" in result.output
+
+    result = cli_runner.invoke(cli, ["count", "resources"])
+    assert result.exit_code == 0, result.output
+    assert "60" in result.output
@@ -0,0 +1,137 @@
+"""
+Tests for the shell.py module.
+
+Input is fed from a list instead of the terminal.
+"""
+
+import pytest
+
+from cli import cli
+from shell import completions, run_shell
+
+
+def feed(*lines):
+    """Build an input function returning each line, then raising EOFError."""
+    remaining = list(lines)
+
+    def input_func(prompt):
+        if not remaining:
+            raise EOFError
+        line = remaining.pop(0)
+        if isinstance(line, BaseException):
+            raise line
+        return line
+
+    return input_func
+
+
+@pytest.fixture
+def history_file(tmp_path):
+    return tmp_path / "history"
+
+
+# ============================================================================
+# Shell Loop Tests
+# ============================================================================
+
+
+def test_each_line_is_executed_as_argv(history_file):
+    """Lines are split like a shell would and passed to execute."""
+    executed = []
+    run_shell(executed.append, feed("help", "list resources --refresh", "", "exit"), history_file)
+    assert executed == [["help"], ["list", "resources", "--refresh"]]
+
+
+def test_apostrophes_do_not_need_closing(history_file):
+    """An unpaired quote in natural language falls back to splitting on spaces."""
+    executed = []
+    run_shell(executed.append, feed("what's in rg-prod", 'list "my resources"'), history_file)
+    assert executed == [["what's", "in", "rg-prod"], ["list", "my resources"]]
+
+
+def test_exit_and_eof_end_the_session(history_file):
+    """Both `quit` and end of input stop the loop."""
+    executed = []
+    run_shell(executed.append, feed("quit", "help"), history_file)
+    run_shell(executed.append, feed(), history_file)
+    assert executed == []
+
+
+def test_ctrl_c_at_prompt_does_not_exit(history_file):
+    """Ctrl-C discards the current line and shows a new prompt."""
+    executed = []
+    run_shell(executed.append, feed(KeyboardInterrupt(), "help"), history_file)
+    assert executed == [["help"]]
+
+
+def test_errors_do_not_end_the_session(capsys, history_file):
+    """A failing command is reported and the shell keeps going."""
+    executed = []
+
+    def execute(argv):
+        executed.append(argv)
+        if argv == ["bad"]:
+            raise ValueError("boom")
+
+    run_shell(execute, feed("bad", 'unbalanced "quote', "help"), history_file)
+    assert executed == [["bad"], ["unbalanced", '"quote'], ["help"]]
+    assert "boom" in capsys.readouterr().err
+
+
+def test_declined_confirmation_does_not_end_the_session(capsys, history_file):
+    """click.Abort from a confirmation prompt cancels only that command."""
+    import click
+
+    executed = []
+
+    def execute(argv):
+        executed.append(argv)
+        if argv == ["create", "rg", "app-rg"]:
+            raise click.exceptions.Abort()
+
+    run_shell(execute, feed("create rg app-rg", "help"), history_file)
+    assert executed == [["create", "rg", "app-rg"], ["help"]]
+    assert "Cancelled" in capsys.readouterr().err
+
+
+def test_stats_command(capsys, history_file):
+    """`stats` reports client pool reuse without running a command."""
+    executed = []
+    run_shell(executed.append, feed("stats"), history_file)
+    assert executed == []
+    assert "clients" in capsys.readouterr().out
+
+
+# ============================================================================
+# Completion Tests
+# ============================================================================
+
+
+def test_completions_match_intent_phrases():
+    """Completion offers intent phrases and shell commands by prefix."""
+    assert completions("li") == ["list resources"]
+    assert completions("  LIST r") == ["list resources"]
+    assert "exit" in completions("")
+    assert completions("zzz") == []
+
+
+# ============================================================================
+# CLI Integration Tests
+# ============================================================================
+
+
+def test_copilot_shell_keeps_state_between_commands(cli_runner, monkeypatch, history_file):
+    """`copilot shell` runs several commands in one process."""
+    import shell
+
+    monkeypatch.setattr(shell, "HISTORY_FILE", history_file)
+    result = cli_runner.invoke(cli, ["shell"], input="help\nHELP\nshell\nexit\n")
+    assert result.exit_code == 0
+    assert result.output.count("Available commands") == 2
+    assert "Already in the copilot shell" in result.output
+
+
+def test_shell_with_arguments_is_a_normal_command(cli_runner):
+    """Only a bare `shell` starts the shell."""
+    result = cli_runner.invoke(cli, ["shell", "scripts", "help"])
+    assert "You said: shell scripts help" in result.output
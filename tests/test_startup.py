@@ -0,0 +1,110 @@
+"""
+Tests for the startup.py module and the cold-start path of the CLI.
+
+The budget test guards against heavy imports creeping onto the startup path.
+Override the budget with COPILOT_STARTUP_BUDGET (seconds) on slow machines.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from cli import cli
+from startup import HEAVY_MODULES, cold_start_command, parse_importtime, profile_startup
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+STARTUP_BUDGET_SECONDS = float(os.getenv("COPILOT_STARTUP_BUDGET", "0.5"))
+
+
+def _clean_env() -> dict[str, str]:
+    """Environment without Azure settings, to prove "help" never needs config."""
+    return {k: v for k, v in os.environ.items() if not k.startswith("AZURE_")}
+
+
+# ============================================================================
+# Cold Start Regression Tests
+# ============================================================================
+
+
+def test_cold_start_help_within_budget():
+    """A fresh `copilot help` must finish inside the startup budget (best of 3)."""
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        result = subprocess.run(
+            cold_start_command(["help"]),
+            capture_output=True,
+            text=True,
+            cwd=PROJECT_ROOT,
+            env=_clean_env(),
+        )
+        timings.append(time.perf_counter() - start)
+        assert result.returncode == 0, result.stderr
+        assert "Available commands" in result.stdout
+
+    assert min(timings) < STARTUP_BUDGET_SECONDS
+
+
+def test_help_does_not_import_heavy_modules():
+    """Rich, dotenv and the Azure SDK stay unloaded for `copilot help`."""
+    code = (
+        "import sys, cli\n"
+        "cli.cli(['help'], standalone_mode=False)\n"
+        "print(sorted({m.split('.')[0] for m in sys.modules}))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=PROJECT_ROOT,
+        env=_clean_env(),
+    )
+    assert result.returncode == 0, result.stderr
+    loaded = result.stdout.splitlines()[-1]
+    for module in HEAVY_MODULES:
+        assert f"'{module}'" not in loaded
+
+
+# ============================================================================
+# Import Time Parsing Tests
+# ============================================================================
+
+
+def test_parse_importtime_skips_header():
+    """Header and unrelated lines are ignored; nested modules are unindented."""
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   _io\n"
+        "import time:      4489 |      48391 | rich.console\n"
+        "Traceback: not an import line\n"
+    )
+    timings = parse_importtime(stderr)
+    assert [t.module for t in timings] == ["_io", "rich.console"]
+    assert timings[1].self_us == 4489
+    assert timings[1].cumulative_us == 48391
+
+
+def test_profile_startup_reports_imports():
+    """Profiling a cold start returns the CLI module among the imports."""
+    profile = profile_startup(["help"])
+    assert profile.wall_seconds > 0
+    assert "cli" in {t.module for t in profile.imports}
+    assert (
+        profile.slowest(3)
+        == sorted(profile.imports, key=lambda t: t.cumulative_us, reverse=True)[:3]
+    )
+
+
+def test_startup_profile_flag(cli_runner):
+    """`copilot --startup-profile` prints the import table."""
+    result = cli_runner.invoke(cli, ["--startup-profile"])
+    assert result.exit_code == 0
+    assert "Cumulative" in result.output
+
+
+def test_missing_command_is_usage_error(cli_runner):
+    """Running with no command and no flags is a usage error."""
+    result = cli_runner.invoke(cli, [])
+    assert result.exit_code == 2
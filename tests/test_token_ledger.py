@@ -0,0 +1,52 @@
+"""
+Tests for the token_ledger.py module.
+"""
+
+import pytest
+
+from token_ledger import TokenLedger, estimate_cost, get_token_ledger
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_estimate_cost_uses_longest_prefix():
+    assert estimate_cost("gpt-4o-mini-2024", 1000, 1000) == pytest.approx(0.00075)
+    assert estimate_cost("gpt-4o", 1000, 0) == pytest.approx(0.0025)
+    assert estimate_cost("my-custom-deployment", 1000, 1000) == 0.0
+
+
+def test_summary_totals_per_model():
+    clock = Clock()
+    ledger = TokenLedger(":memory:", clock=clock)
+    ledger.record("gpt-4-turbo", 1000, 100, latency_ms=800)
+    ledger.record("gpt-4-turbo", 500, 50, latency_ms=400)
+    ledger.record("gpt-4o-mini", 1000, 100, latency_ms=300)
+    first, second = ledger.summary()
+    assert (first.model, first.requests, first.prompt_tokens) == ("gpt-4-turbo", 2, 1500)
+    assert first.avg_latency_ms == pytest.approx(600)
+    assert first.cost_usd == pytest.approx(0.0195)
+    assert second.model == "gpt-4o-mini"
+
+
+def test_summary_since():
+    clock = Clock()
+    ledger = TokenLedger(":memory:", clock=clock)
+    ledger.record("gpt-4o", 10, 10, latency_ms=1)
+    clock.now += 3600
+    ledger.record("gpt-4o", 10, 10, latency_ms=1)
+    assert ledger.summary(since_seconds=60)[0].requests == 1
+    assert ledger.summary()[0].requests == 2
+
+
+def test_ledger_disabled_by_config(monkeypatch, tmp_path):
+    from config import get_config
+
+    monkeypatch.setenv("TOKEN_LEDGER_PATH", str(tmp_path / "ledger.db"))
+    monkeypatch.setenv("TRACK_TOKEN_USAGE", "false")
+    assert get_token_ledger(get_config()) is None
@@ -0,0 +1,198 @@
+"""
+Tests for the tracing.py module and the --profile option of the CLI.
+"""
+
+import json
+import threading
+
+import pytest
+
+import tracing
+from azure_commands import list_resources
+from cli import cli
+from tests.conftest import FakeResourceClient, create_fake_resource
+from tracing import Tracer, format_profile, span, start_tracing, stop_tracing, traced, write_trace
+
+
+class FakeClock:
+    """perf_counter_ns stand-in that advances 1 ms per reading."""
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        self.now += 1_000_000
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def no_tracer_left_behind():
+    yield
+    stop_tracing()
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    tracer = Tracer(clock=FakeClock())
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+    return tracer
+
+
+# ============================================================================
+# Span Tests
+# ============================================================================
+
+
+def test_spans_are_noops_when_disabled():
+    assert tracing.current_tracer() is None
+    with span("anything", key="value") as stage:
+        stage.set(rows=1)
+    assert span("a") is span("b")
+
+
+def test_spans_nest_and_record_attributes(tracer):
+    with span("command"):
+        with span("azure.list_resources", resource_group="rg") as stage:
+            stage.set(rows=3)
+        with span("render"):
+            pass
+
+    outer, inner, render = sorted(tracer.spans, key=lambda s: s.start_ns)
+    assert (outer.name, inner.parent_id, render.parent_id) == (
+        "command",
+        outer.span_id,
+        outer.span_id,
+    )
+    assert inner.attributes == {"resource_group": "rg", "rows": 3}
+    assert outer.parent_id is None
+
+
+def test_errors_are_recorded(tracer):
+    with pytest.raises(KeyError), span("lookup"):
+        raise KeyError("x")
+    assert tracer.spans[0].attributes["error"] == "KeyError"
+
+
+def test_spans_on_worker_threads_are_roots(tracer):
+    def work():
+        with span("worker"):
+            pass
+
+    with span("command"):
+        worker = threading.Thread(target=work)
+        worker.start()
+        worker.join()
+    by_name = {s.name: s for s in tracer.spans}
+    assert by_name["worker"].parent_id is None
+    assert by_name["worker"].thread_id != by_name["command"].thread_id
+
+
+def test_generator_spans_closed_out_of_order(tracer):
+    def rows():
+        with span("fetch"):
+            yield 1
+            yield 2
+
+    with span("command"):
+        iterator = rows()
+        next(iterator)
+        with span("render"):
+            iterator.close()  # closes "fetch", which is not on top of the stack
+    with span("after"):
+        pass
+    assert {s.name: s.parent_id for s in tracer.spans}["after"] is None
+
+
+def test_traced_decorator(tracer):
+    @traced("work")
+    def work(value):
+        return value * 2
+
+    assert work(21) == 42
+    assert [s.name for s in tracer.spans] == ["work"]
+
+
+def test_stages_compute_self_time(tracer):
+    # Each clock reading advances 1 ms: outer 1..6, inner 2..3 and 4..5
+    with span("outer"):
+        for _ in range(2):
+            with span("inner"):
+                pass
+    outer, inner = tracer.stages()
+    assert (outer.name, outer.calls, outer.total_ns, outer.self_ns) == ("outer", 1, 5e6, 3e6)
+    assert (inner.name, inner.calls, inner.total_ns, inner.self_ns) == ("inner", 2, 2e6, 2e6)
+    assert "inner" in format_profile(tracer).splitlines()[2]
+
+
+def test_sdk_calls_are_traced():
+    tracer = start_tracing()
+    client = FakeResourceClient([create_fake_resource("web"), create_fake_resource("db")])
+    assert len(list_resources(client)) == 2
+    stop_tracing()
+    (listing,) = tracer.spans
+    assert listing.name == "azure.list_resources"
+    assert listing.attributes["rows"] == 2
+
+
+# ============================================================================
+# Export Tests
+# ============================================================================
+
+
+def test_chrome_export(tracer, tmp_path):
+    with span("command", query="list"):
+        pass
+    path = tmp_path / "trace.json"
+    write_trace(tracer, path, "chrome")
+    (event,) = json.loads(path.read_text())["traceEvents"]
+    assert event["ph"] == "X"
+    assert (event["name"], event["dur"], event["args"]) == ("command", 1000.0, {"query": "list"})
+
+
+def test_otel_export(tracer, tmp_path):
+    with (
+        span("command"),
+        pytest.raises(ValueError),
+        span("azure.client", service="resource", retries=2),
+    ):
+        raise ValueError("nope")
+    path = tmp_path / "trace.json"
+    write_trace(tracer, path, "otel")
+    spans = json.loads(path.read_text())["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    child, parent = spans
+    assert child["parentSpanId"] == parent["spanId"] and parent["parentSpanId"] == ""
+    assert child["traceId"] == parent["traceId"] == tracer.trace_id
+    assert int(child["endTimeUnixNano"]) - int(child["startTimeUnixNano"]) == 1_000_000
+    attributes = {a["key"]: a["value"] for a in child["attributes"]}
+    assert attributes["service"] == {"stringValue": "resource"}
+    assert attributes["retries"] == {"intValue": "2"}
+    assert child["status"]["code"] == 2
+
+
+def test_unknown_trace_format(tracer, tmp_path):
+    with pytest.raises(ValueError):
+        write_trace(tracer, tmp_path / "trace.json", "xml")
+
+
+# ============================================================================
+# CLI Tests
+# ============================================================================
+
+
+def test_cli_profile_prints_breakdown(cli_runner):
+    result = cli_runner.invoke(cli, ["--profile", "help"])
+    assert result.exit_code == 0, result.output
+    assert "intent.classify" in result.output
+    assert result.output.splitlines()[-1].startswith("wall")
+    assert tracing.current_tracer() is None
+
+
+def test_cli_profile_output(cli_runner, tmp_path):
+    path = tmp_path / "trace.json"
+    result = cli_runner.invoke(
+        cli, ["--profile-output", str(path), "--profile-format", "otel", "list", "foo"]
+    )
+    assert result.exit_code == 0, result.output
+    assert f"Trace written to {path}" in result.output
+    spans = json.loads(path.read_text())["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert {"command", "intent.classify"} <= {s["name"] for s in spans}
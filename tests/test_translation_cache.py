@@ -0,0 +1,195 @@
+"""
+Tests for the translation_cache.py and embeddings.py modules.
+
+The deterministic HashingEmbedder stands in for Azure OpenAI embeddings.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from embeddings import EmbeddingError, HashingEmbedder, cosine, get_embedder
+from translation_cache import (
+    TIER_EXACT,
+    TIER_SEMANTIC,
+    TranslationCache,
+    context_key,
+    normalize_query,
+)
+
+CONTEXT = {"subscription": "sub-1", "model": "gpt-4"}
+LIST_VMS = {"command": "az vm list", "args": {}}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def cache(clock):
+    cache = TranslationCache(":memory:", HashingEmbedder(), ttl=60, max_entries=3, clock=clock)
+    yield cache
+    cache.close()
+
+
+# ============================================================================
+# Embedding Tests
+# ============================================================================
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    first, second = HashingEmbedder().embed(["list my vms", "list my vms"])
+    assert first == second
+    assert cosine(first, second) == pytest.approx(1.0)
+
+
+def test_similar_texts_are_closer_than_different_ones():
+    embedder = HashingEmbedder()
+    base, similar, different = embedder.embed(["list vms", "list all vms", "delete storage"])
+    assert cosine(base, similar) > 0.9 > cosine(base, different)
+
+
+def test_get_embedder_falls_back_to_hashing():
+    config = SimpleNamespace(is_openai_configured=lambda: False)
+    assert isinstance(get_embedder(config), HashingEmbedder)
+    assert isinstance(get_embedder(), HashingEmbedder)
+
+
+# ============================================================================
+# Exact Tier Tests
+# ============================================================================
+
+
+def test_normalize_query():
+    assert normalize_query("  Please LIST my VMs!! ") == "list vms"
+    assert normalize_query("list vms in rg-prod.") == "list vms in rg-prod"
+
+
+def test_context_key_ignores_order():
+    assert context_key({"a": 1, "b": 2}) == context_key({"b": 2, "a": 1})
+
+
+def test_exact_hit_after_normalization(cache):
+    cache.put("list my VMs", LIST_VMS, CONTEXT)
+    hit = cache.get("List the vms, please", CONTEXT)
+    assert hit.tier == TIER_EXACT
+    assert hit.translation == LIST_VMS
+
+
+def test_context_is_part_of_the_key(cache):
+    cache.put("list vms", LIST_VMS, CONTEXT)
+    assert cache.get("list vms", {**CONTEXT, "subscription": "sub-2"}) is None
+
+
+def test_entries_expire(cache, clock):
+    cache.put("list vms", LIST_VMS, CONTEXT)
+    clock.now += 61
+    assert cache.get("list vms", CONTEXT) is None
+
+
+# ============================================================================
+# Semantic Tier Tests
+# ============================================================================
+
+
+def test_semantic_hit_for_similar_wording(cache):
+    cache.put("list vms", LIST_VMS, CONTEXT)
+    hit = cache.get("list all vms", CONTEXT)
+    assert hit.tier == TIER_SEMANTIC
+    assert hit.similarity >= cache.threshold
+    assert hit.query == "list vms"
+
+
+def test_semantic_tier_requires_same_entities(cache):
+    """Near-identical wording about a different resource group is a miss."""
+    cache.threshold = 0.5
+    cache.put("list vms in rg-a", {"command": "az vm list -g rg-a"}, CONTEXT)
+    assert cache.get("list vms in rg-b", CONTEXT) is None
+    assert cache.get("list all vms in rg-a", CONTEXT).tier == TIER_SEMANTIC
+
+
+def test_semantic_tier_requires_same_verb(cache):
+    """Same entities but a different action is a miss; synonyms still hit."""
+    cache.threshold = 0.5
+    cache.put(
+        "show storage account logs01 in rg-a", {"command": "az storage account show"}, CONTEXT
+    )
+    assert cache.get("delete storage account logs01 in rg-a", CONTEXT) is None
+    assert cache.get("list storage account logs01 in rg-a", CONTEXT).tier == TIER_SEMANTIC
+
+
+def test_semantic_tier_survives_reopening(tmp_path):
+    path = tmp_path / "translations.db"
+    first = TranslationCache(path, HashingEmbedder())
+    first.put("list vms", LIST_VMS, CONTEXT)
+    first.close()
+    second = TranslationCache(path, HashingEmbedder())
+    assert second.get("list all vms", CONTEXT).tier == TIER_SEMANTIC
+    second.close()
+
+
+def test_embedding_failures_disable_only_the_semantic_tier(clock):
+    class Broken:
+        name = "broken"
+
+        def embed(self, texts):
+            raise EmbeddingError("service unavailable")
+
+    cache = TranslationCache(":memory:", Broken(), clock=clock)
+    cache.put("list vms", LIST_VMS, CONTEXT)
+    assert cache.get("list vms", CONTEXT).tier == TIER_EXACT
+    assert cache.get("list all vms", CONTEXT) is None
+
+
+# ============================================================================
+# Eviction and Metrics Tests
+# ============================================================================
+
+
+def test_least_recently_used_entries_are_evicted(cache, clock):
+    for name in ("one", "two", "three"):
+        cache.put(f"show {name}", {"command": name}, CONTEXT)
+        clock.now += 1
+    cache.get("show one", CONTEXT)
+    clock.now += 1
+    cache.put("show four", {"command": "four"}, CONTEXT)
+    assert len(cache) == 3
+    assert cache.get("show two", CONTEXT) is None
+    assert cache.get("show one", CONTEXT) is not None
+
+
+def test_get_or_translate_and_metrics(cache):
+    calls = []
+
+    def translate(query):
+        calls.append(query)
+        return LIST_VMS
+
+    assert cache.get_or_translate("list vms", CONTEXT, translate) == (LIST_VMS, None)
+    _, hit = cache.get_or_translate("list vms", CONTEXT, translate)
+    assert hit.tier == TIER_EXACT
+    cache.get_or_translate("list all vms", CONTEXT, translate)
+    assert calls == ["list vms"]
+    assert cache.metrics.exact_hits == 1
+    assert cache.metrics.semantic_hits == 1
+    assert cache.metrics.misses == 1
+    assert cache.metrics.hit_rate == pytest.approx(2 / 3)
+    assert "hit rate 67%" in cache.metrics.summary()
+
+
+def test_invalidate(cache):
+    cache.put("list vms", LIST_VMS, CONTEXT)
+    cache.put("list vms", LIST_VMS, {"subscription": "other"})
+    cache.invalidate(CONTEXT)
+    assert len(cache) == 1
+    cache.invalidate()
+    assert len(cache) == 0
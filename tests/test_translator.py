@@ -0,0 +1,201 @@
+"""
+Tests for the translator.py module.
+
+A local FakeOpenAIServer streams scripted replies, so these run offline.
+"""
+
+import json
+import time
+
+import pytest
+
+from cli import cli
+from config import get_config
+from history import get_history_store
+from prompts import PromptBuilder, TokenCounter
+from tests.fake_openai import FakeOpenAIServer, reply_chunks
+from token_ledger import TokenLedger
+from translator import (
+    JsonObjectScanner,
+    StreamingTranslator,
+    Translation,
+    TranslationError,
+    iter_sse_content,
+    preview_command,
+)
+
+STOP_VM = {
+    "intent": "stop_vm",
+    "command": "az vm stop -g rg-prod -n web01",
+    "arguments": {"resource_group": "rg-prod", "name": "web01"},
+    "explanation": "Stops VM web01.",
+}
+
+
+@pytest.fixture
+def fake_openai():
+    server = FakeOpenAIServer(reply_chunks(STOP_VM)).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def config(fake_openai, monkeypatch, tmp_path):
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", fake_openai.endpoint)
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
+    monkeypatch.setenv("TOKEN_LEDGER_PATH", str(tmp_path / "ledger.db"))
+    monkeypatch.setenv("TRANSLATION_CACHE_PATH", str(tmp_path / "translations.db"))
+    return get_config()
+
+
+@pytest.fixture
+def translator(config):
+    builder = PromptBuilder(TokenCounter("gpt-4o"), budget=2000)
+    return StreamingTranslator(config, builder=builder, ledger=TokenLedger(":memory:"), timeout=5)
+
+
+# ============================================================================
+# Stream Parsing Tests
+# ============================================================================
+
+
+def test_scanner_finds_object_end_across_chunks():
+    scanner = JsonObjectScanner()
+    assert not scanner.feed('```json\n{"a": "}{", ')
+    assert not scanner.feed('"b": {"c": "\\"}"}')
+    assert scanner.feed("}\n```\nHope that helps!")
+    assert scanner.object_text == '{"a": "}{", "b": {"c": "\\"}"}}'
+
+
+def test_preview_command_of_partial_reply():
+    assert preview_command('{"intent": "stop_vm", "comm') == ""
+    assert preview_command('{"intent": "stop_vm", "command": "az vm st') == "az vm st"
+    assert preview_command('{"command": "az \\"quoted\\" \\') == 'az "quoted" '
+    assert preview_command('{"command": "az \\u00') == "az \\u00"
+
+
+def test_iter_sse_content_skips_empty_events():
+    lines = [
+        b'data: {"choices": []}\n',
+        b"\n",
+        b'data: {"choices": [{"delta": {"role": "assistant"}}]}\n',
+        b'data: {"choices": [{"delta": {"content": "{}"}}]}\n',
+        b"data: [DONE]\n",
+        b'data: {"choices": [{"delta": {"content": "after done"}}]}\n',
+    ]
+    assert list(iter_sse_content(lines)) == ["{}"]
+    with pytest.raises(TranslationError):
+        list(iter_sse_content([b"data: {not json\n"]))
+
+
+def test_translation_from_dict_validates():
+    assert Translation.from_dict({"intent": "clarify"}).needs_clarification
+    with pytest.raises(TranslationError):
+        Translation.from_dict(["not", "an", "object"])
+
+
+# ============================================================================
+# Streaming Translator Tests
+# ============================================================================
+
+
+def test_translate_previews_and_parses(translator, fake_openai):
+    previews = []
+    translation = translator.translate("stop web01 in rg-prod", on_preview=previews.append)
+    assert translation == Translation.from_dict(STOP_VM)
+    assert previews[-1] == STOP_VM["command"]
+    assert all(STOP_VM["command"].startswith(preview) for preview in previews)
+    request = fake_openai.requests[0]
+    assert request["stream"] is True
+    assert request["messages"][-1] == {"role": "user", "content": "stop web01 in rg-prod"}
+
+
+def test_stream_stops_once_object_is_complete(translator, fake_openai):
+    fake_openai.chunks = reply_chunks(STOP_VM, trailer="\nLet me know if you need more." * 20)
+    fake_openai.delay = 0.01
+    started = time.perf_counter()
+    assert translator.translate("stop web01").command == STOP_VM["command"]
+    assert fake_openai.disconnected.wait(5)
+    assert fake_openai.chunks_sent < len(fake_openai.chunks)
+    assert time.perf_counter() - started < fake_openai.delay * len(fake_openai.chunks)
+
+
+def test_cancel_closes_the_connection(translator, fake_openai):
+    fake_openai.delay = 0.01
+
+    def cancel(_preview):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        translator.translate("stop web01", on_preview=cancel)
+    assert fake_openai.disconnected.wait(5)
+    (usage,) = translator.ledger.summary()
+    assert usage.requests == 1
+
+
+def test_usage_is_recorded(translator):
+    translator.translate("stop web01")
+    (usage,) = translator.ledger.summary()
+    assert usage.model == "gpt-4o"
+    assert usage.prompt_tokens > 0 and usage.completion_tokens > 0
+
+
+def test_truncated_reply_is_an_error(translator, fake_openai):
+    fake_openai.chunks = reply_chunks(STOP_VM)[:-1]
+    with pytest.raises(TranslationError, match="complete JSON"):
+        translator.translate("stop web01")
+
+
+def test_http_errors_are_translation_errors(translator, fake_openai):
+    fake_openai.status = 429
+    with pytest.raises(TranslationError, match="HTTP 429"):
+        translator.translate("stop web01")
+
+
+def test_requires_openai_configuration():
+    with pytest.raises(TranslationError, match="not configured"):
+        StreamingTranslator(get_config())
+
+
+# ============================================================================
+# CLI Tests
+# ============================================================================
+
+
+def test_cli_translates_unrecognized_commands(cli_runner, config, fake_openai):
+    result = cli_runner.invoke(cli, ["stop", "web01", "in", "rg-prod"])
+    assert result.exit_code == 0, result.output
+    assert f"Proposed command: {STOP_VM['command']}" in result.output
+
+    # The second identical request of a new run is answered from the translation cache
+    history = get_history_store(config)
+    history.flush()
+    history.session = "next-run"
+    result = cli_runner.invoke(cli, ["stop", "web01", "in", "rg-prod"])
+    assert result.exit_code == 0
+    assert sum("messages" in request for request in fake_openai.requests) == 1
+
+    # ...but not under another default resource group
+    result = cli_runner.invoke(
+        cli, ["--set", "default_resource_group=rg-dev", "stop", "web01", "in", "rg-prod"]
+    )
+    assert result.exit_code == 0
+    assert sum("messages" in request for request in fake_openai.requests) == 2
+
+
+def test_cli_translation_sees_earlier_commands_of_the_session(cli_runner, config, fake_openai):
+    """Commands run earlier in the session reach the prompt as context."""
+    cli_runner.invoke(cli, ["list", "resources", "in", "rg-prod"])
+    result = cli_runner.invoke(cli, ["stop", "web01", "there"])
+    assert result.exit_code == 0, result.output
+    *_, request = (request for request in fake_openai.requests if "messages" in request)
+    prompt = json.dumps(request["messages"])
+    assert "list resources in rg-prod" in prompt
+
+
+def test_cli_reports_translation_errors(cli_runner, config, fake_openai):
+    fake_openai.status = 500
+    result = cli_runner.invoke(cli, ["--no-cache", "stop", "web01"])
+    assert result.exit_code == 1
+    assert "HTTP 500" in result.output
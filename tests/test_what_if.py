@@ -0,0 +1,227 @@
+"""
+Tests for the what_if.py module.
+
+What-if calls go to the FakeAzure stand-in, whose deployments operations
+predict changes from its synthetic inventory with configurable latency.
+"""
+
+import time
+
+import pytest
+
+from batch import parse_plan
+from benchmarks.fake_azure import BackendProfile, FakeAzure
+from cli import cli
+from config import get_config
+from what_if import (
+    CHANGE_CREATE,
+    CHANGE_INVALID,
+    CHANGE_MODIFY,
+    CHANGE_NO_CHANGE,
+    DryRunPlan,
+    DryRunPlanner,
+    PlannedChange,
+    ValidationCache,
+    WhatIfResult,
+    WhatIfValidator,
+    resolve_operations,
+)
+
+SUB = "00000000-0000-0000-0000-000000000000"
+
+PLAN = """
+create resource group rg-new in westeurope
+create storage account newlogs01 in rg-new
+create resource group rg-000 in eastus
+create resource group rg-001 in eastus
+create storage account stor00200001 in rg-002 location southeastasia
+list resources
+"""
+
+
+def planner_for(azure, cache=None, **kwargs):
+    validator = WhatIfValidator(lambda sub: azure.client("resource", sub))
+    return DryRunPlanner(validator, cache, sleep=lambda _seconds: None, **kwargs)
+
+
+@pytest.fixture
+def azure():
+    return FakeAzure([SUB], groups=3, resources_per_group=5)
+
+
+# ============================================================================
+# Resolution Tests
+# ============================================================================
+
+
+def test_steps_resolve_to_arm_operations():
+    steps = parse_plan(PLAN)
+    resolved = resolve_operations(steps, get_config())
+    group, account = resolved[0][0], resolved[1][0]
+    assert group.resource_group is None
+    assert group.resource_id == f"/subscriptions/{SUB}/resourceGroups/rg-new"
+    assert group.template()["resources"][0]["location"] == "westeurope"
+    assert account.resource_group == "rg-new"
+    assert account.group_planned
+    assert account.resource["sku"] == {"name": "Standard_LRS"}
+    assert not resolved[4][0].group_planned
+    assert resolved[5] == (None, None)
+
+
+def test_template_hash_tracks_template_and_scope():
+    steps = parse_plan(
+        "create rg app-a in eastus\ncreate rg APP-A in eastus\ncreate rg app-a in westus"
+    )
+    first, renamed, moved = (op for op, _ in resolve_operations(steps, get_config()))
+    assert (
+        first.template_hash() == resolve_operations(steps[:1], get_config())[0][0].template_hash()
+    )
+    assert renamed.template_hash() != first.template_hash()
+    assert moved.template_hash() != first.template_hash()
+
+
+def test_unresolvable_steps_are_reported():
+    steps = parse_plan("create storage account Bad_Name in rg-000\ncreate storage account x1")
+    resolved = resolve_operations(steps, get_config())
+    assert resolved[0][0] is None and "Bad_Name" in resolved[0][1]
+    assert resolved[1][0] is None and "resource group" in resolved[1][1]
+
+
+# ============================================================================
+# Planning Tests
+# ============================================================================
+
+
+def test_plan_predicts_changes(azure):
+    plan = planner_for(azure).plan(parse_plan(PLAN), get_config())
+    assert [change.change_type for change in plan.changes] == [
+        CHANGE_CREATE,
+        CHANGE_CREATE,  # in a group the plan creates: worked out locally
+        CHANGE_NO_CHANGE,
+        CHANGE_MODIFY,  # rg-001 lives in westeurope
+        CHANGE_NO_CHANGE,
+        None,
+    ]
+    assert plan.ok and plan.validated == 5
+    diff = plan.diff()
+    assert "--- /dev/null\n+++ /subscriptions/" in diff
+    assert '+  "location": "westeurope",' in diff
+    assert '-  "location": "westeurope",\n+  "location": "eastus",' in diff
+    assert "# [7] list resources: no changes" in diff
+    assert plan.summary().startswith("Plan: 2 to create, 1 to modify, 2 unchanged; 5 validated")
+
+
+def test_invalid_and_failed_validations(azure):
+    plan = planner_for(azure).plan(
+        parse_plan("create storage account logs in rg-404\ncreate rg Bad_Name!"), get_config()
+    )
+    assert [change.change_type for change in plan.changes] == [CHANGE_INVALID, CHANGE_INVALID]
+    assert "could not be found" in plan.changes[0].error
+    assert not plan.ok
+    assert "invalid:" in plan.diff()
+
+
+def test_service_side_validation_errors():
+    failing = FakeAzure([SUB], groups=1)
+    validator = WhatIfValidator(lambda sub: failing.client("resource", sub))
+    (operation, _), *_ = resolve_operations(
+        parse_plan("create storage account abc in rg-000"), get_config()
+    )
+    operation = type(operation)(SUB, {**operation.resource, "name": "UPPER"}, "rg-000")
+    result = validator.what_if(operation)
+    assert result.change_type == CHANGE_INVALID and "UPPER" in result.error
+
+
+def test_validations_run_in_parallel():
+    azure = FakeAzure([SUB], groups=8, profile=BackendProfile(latency=0.05))
+    plan_text = "\n".join(f"create rg rg-{n:03d} in eastus" for n in range(8))
+    started = time.perf_counter()
+    plan = planner_for(azure, max_workers=8).plan(parse_plan(plan_text), get_config())
+    assert plan.validated == 8
+    assert time.perf_counter() - started < 8 * 0.05 * 0.75
+
+
+def test_throttled_validations_are_retried():
+    profile = BackendProfile(throttle_rate=0.3, retry_after=0.0, seed=5)
+    azure = FakeAzure([SUB], groups=6, profile=profile)
+    plan_text = "\n".join(f"create rg rg-{n:03d} in eastus" for n in range(6))
+    plan = planner_for(azure).plan(parse_plan(plan_text), get_config())
+    assert plan.ok
+    assert azure.calls["deployments.what_if"] > 6
+
+
+def test_replanning_unchanged_batch_uses_cache(azure):
+    cache = ValidationCache(":memory:")
+    steps = parse_plan(PLAN)
+    first = planner_for(azure, cache).plan(steps, get_config())
+    calls = azure.calls["deployments.what_if"]
+    second = planner_for(azure, cache).plan(steps, get_config())
+    # Only the step depending on a planned group is asked again
+    assert azure.calls["deployments.what_if"] == calls + 1
+    assert second.validated == 1
+    assert [c.cached for c in second.changes] == [True, False, True, True, True, False]
+    assert second.diff() == first.diff()
+
+
+def test_cache_entries_expire():
+    now = [1000.0]
+    cache = ValidationCache(":memory:", ttl=60, clock=lambda: now[0])
+    cache.put("abc", WhatIfResult("/x", CHANGE_CREATE, None, {"name": "x"}))
+    assert cache.get("abc").after == {"name": "x"}
+    now[0] += 61
+    assert cache.get("abc") is None
+    cache.put("def", WhatIfResult("/y", CHANGE_NO_CHANGE))
+    assert len(cache) == 1
+    cache.clear()
+    assert len(cache) == 0
+
+
+# ============================================================================
+# CLI Tests
+# ============================================================================
+
+
+@pytest.fixture
+def installed(monkeypatch, tmp_path):
+    monkeypatch.setenv("WHAT_IF_CACHE_PATH", str(tmp_path / "what_if.db"))
+    azure = FakeAzure([SUB], groups=3, resources_per_group=5)
+    azure.install(get_config())
+    return azure
+
+
+def test_cli_dry_run_batch_prints_diff(cli_runner, installed, tmp_path):
+    plan = tmp_path / "plan.txt"
+    plan.write_text(PLAN)
+    result = cli_runner.invoke(cli, ["--dry-run", "batch", str(plan)])
+    assert result.exit_code == 0, result.output
+    assert "+++ /subscriptions/" in result.output
+    assert "Plan: 2 to create" in result.output
+    assert installed.calls["resource_groups.create_or_update"] == 0
+
+    calls = installed.calls["deployments.what_if"]
+    result = cli_runner.invoke(cli, ["--dry-run", "batch", str(plan)])
+    assert "(4 cached)" in result.output
+    assert installed.calls["deployments.what_if"] == calls + 1
+
+
+def test_cli_dry_run_fails_on_invalid_step(cli_runner, tmp_path, monkeypatch):
+    monkeypatch.setenv("DEFAULT_DRY_RUN", "true")
+    FakeAzure([SUB], groups=3).install(get_config())
+    plan = tmp_path / "plan.txt"
+    plan.write_text("create storage account logs01 in rg-missing\n")
+    result = cli_runner.invoke(cli, ["--no-cache", "batch", str(plan)])
+    assert result.exit_code == 1
+    assert "invalid" in result.output
+
+
+def test_cli_dry_run_skips_changes_without_operation(cli_runner, installed, tmp_path, monkeypatch):
+    step = parse_plan("create storage account logs01 in rg-000")[0]
+    result = WhatIfResult(f"/subscriptions/{SUB}/resourceGroups/rg-000", CHANGE_CREATE, None, {})
+    plan = DryRunPlan((PlannedChange(step, None, result),), validated=1, elapsed=0.0)
+    monkeypatch.setattr(DryRunPlanner, "plan", lambda self, steps, config: plan)
+    path = tmp_path / "plan.txt"
+    path.write_text("create storage account logs01 in rg-000\n")
+    result = cli_runner.invoke(cli, ["--dry-run", "batch", str(path)])
+    assert result.exit_code == 0, result.output
+    assert "Plan: 1 to create" in result.output
+    assert "Estimated cost" not in result.output
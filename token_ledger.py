@@ -0,0 +1,190 @@
+"""
+Local ledger of LLM token usage, latency and cost.
+
+Every LLM request is recorded in a small SQLite table when
+Config.track_token_usage is on, so `copilot usage` can show what translation
+costs and whether prompt budgets and caching are paying off.
+"""
+
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from config import Config, retire
+
+# USD per 1,000 (prompt, completion) tokens, matched by deployment name prefix
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4": (0.03, 0.06),
+    "gpt-35-turbo": (0.0005, 0.0015),
+    "text-embedding-ada-002": (0.0001, 0.0),
+    "text-embedding-3-small": (0.00002, 0.0),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    id                INTEGER PRIMARY KEY,
+    timestamp         REAL NOT NULL,
+    model             TEXT NOT NULL,
+    purpose           TEXT NOT NULL,
+    prompt_tokens     INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    latency_ms        REAL NOT NULL,
+    cost_usd          REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_requests_timestamp ON requests (timestamp);
+"""
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Cost in USD of a request, using the longest MODEL_PRICES prefix of the model name.
+
+    Unknown models cost 0.0 rather than guessing.
+    """
+    name = model.lower()
+    matches = [prefix for prefix in MODEL_PRICES if name.startswith(prefix)]
+    if not matches:
+        return 0.0
+    prompt_price, completion_price = MODEL_PRICES[max(matches, key=len)]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+@dataclass(frozen=True)
+class UsageSummary:
+    """Totals for one model over a period."""
+
+    model: str
+    requests: int
+    prompt_tokens: int
+    completion_tokens: int
+    cost_usd: float
+    avg_latency_ms: float
+
+
+class TokenLedger:
+    """
+    Append-only SQLite log of LLM requests.
+
+    Example:
+        ledger = TokenLedger(Path("./data/token_ledger.db"))
+        ledger.record("gpt-4-turbo", prompt_tokens=812, completion_tokens=64, latency_ms=930)
+    """
+
+    def __init__(self, path: Path, clock: Callable[[], float] = time.time) -> None:
+        """
+        Args:
+            path: SQLite file location. Use ":memory:" for a throwaway ledger.
+            clock: Time source, injectable for tests.
+        """
+        self.config: Optional[Config] = None
+        self._clock = clock
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def record(
+        self,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency_ms: float,
+        purpose: str = "translate",
+    ) -> float:
+        """
+        Log one request.
+
+        Returns:
+            Its estimated cost in USD.
+        """
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO requests (timestamp, model, purpose, prompt_tokens,"
+                " completion_tokens, latency_ms, cost_usd) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._clock(), model, purpose, prompt_tokens, completion_tokens, latency_ms, cost),
+            )
+        return cost
+
+    def summary(self, since_seconds: Optional[float] = None) -> list[UsageSummary]:
+        """
+        Per-model totals, most expensive first.
+
+        Args:
+            since_seconds: Only include requests from the last this many seconds.
+        """
+        since = self._clock() - since_seconds if since_seconds is not None else 0.0
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT model, COUNT(*), SUM(prompt_tokens), SUM(completion_tokens),"
+                " SUM(cost_usd), AVG(latency_ms) FROM requests WHERE timestamp >= ?"
+                " GROUP BY model ORDER BY SUM(cost_usd) DESC, model",
+                (since,),
+            ).fetchall()
+        return [UsageSummary(*row) for row in rows]
+
+    @classmethod
+    def from_config(cls, config: Config) -> "TokenLedger":
+        ledger = cls(config.token_ledger_path)
+        ledger.config = config
+        return ledger
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._db.close()
+
+
+def print_usage(summaries: list[UsageSummary], days: int) -> None:
+    """Render a usage summary as a Rich table."""
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+    if not summaries:
+        console.print(f"No LLM requests in the last {days} days")
+        return
+    table = Table(title=f"LLM usage, last {days} days")
+    table.add_column("Model")
+    table.add_column("Requests", justify="right")
+    table.add_column("Prompt tokens", justify="right")
+    table.add_column("Completion tokens", justify="right")
+    table.add_column("Avg latency (ms)", justify="right")
+    table.add_column("Cost (USD)", justify="right")
+    for row in summaries:
+        table.add_row(
+            row.model,
+            str(row.requests),
+            f"{row.prompt_tokens:,}",
+            f"{row.completion_tokens:,}",
+            f"{row.avg_latency_ms:.0f}",
+            f"{row.cost_usd:.4f}",
+        )
+    console.print(table)
+
+
+# ============================================================================
+# Shared Ledger
+# ============================================================================
+_ledger: Optional[TokenLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_token_ledger(config: Config) -> Optional[TokenLedger]:
+    """The process-wide ledger, or None when Config.track_token_usage is off."""
+    global _ledger
+    if not config.track_token_usage:
+        return None
+    with _ledger_lock:
+        if _ledger is None or _ledger.config is not config:
+            if _ledger is not None:
+                retire(_ledger.close)
+            _ledger = TokenLedger.from_config(config)
+        return _ledger
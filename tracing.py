@@ -0,0 +1,339 @@
+"""
+Lightweight spans for finding where a command spends its time.
+
+    with span("intent.classify"):
+        match = registry.classify(command)
+
+Spans are only recorded while a Tracer is active (``copilot --profile``).
+Otherwise ``span`` returns a shared no-op context manager, one global lookup
+and no allocation, so it can stay on every hot path.
+
+A finished trace can be summarized per stage (``format_profile``) or written
+as Chrome trace-event JSON (chrome://tracing, Perfetto) or as OpenTelemetry
+OTLP/JSON spans (``write_trace``).
+"""
+
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional, TypeVar
+
+TRACE_FORMATS = ("chrome", "otel")
+SERVICE_NAME = "azure-copilot"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class Span:
+    """One timed stage. Times are perf_counter nanoseconds."""
+
+    name: str
+    span_id: int
+    parent_id: Optional[int]
+    thread_id: int
+    start_ns: int
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ns(self) -> int:
+        return self.end_ns - self.start_ns
+
+
+@dataclass(frozen=True)
+class StageTiming:
+    """All spans of one name: how often it ran and how long it took."""
+
+    name: str
+    calls: int
+    total_ns: int
+    # Total minus time spent in child spans
+    self_ns: int
+
+
+class _NoopSpan:
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _ActiveSpan:
+    def __init__(self, tracer: "Tracer", name: str, attributes: dict[str, Any]) -> None:
+        self._tracer = tracer
+        self._name = name
+        self._attributes = attributes
+        self._span: Optional[Span] = None
+
+    def __enter__(self) -> "_ActiveSpan":
+        self._span = self._tracer._open(self._name, self._attributes)
+        return self
+
+    def __exit__(self, exc_type: Any, _exc: Any, _tb: Any) -> None:
+        if self._span is not None:
+            if exc_type is not None:
+                self._span.attributes["error"] = exc_type.__name__
+            self._tracer._close(self._span)
+
+    def set(self, **attributes: Any) -> None:
+        """Add attributes known only once the stage has run (row counts, ...)."""
+        self._attributes.update(attributes)
+
+
+class Tracer:
+    """
+    Collects spans from every thread until stopped.
+
+    Spans nest per thread: a span opened while another is open on the same
+    thread becomes its child. Spans opened on worker threads are roots.
+    """
+
+    def __init__(self, clock: Callable[[], int] = time.perf_counter_ns) -> None:
+        self.spans: list[Span] = []
+        self.trace_id = uuid.uuid4().hex
+        self._clock = clock
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.started_ns = clock()
+        self.stopped_ns: Optional[int] = None
+        # Maps perf_counter readings onto wall-clock time for exports
+        self._unix_offset_ns = time.time_ns() - self.started_ns
+
+    def span(self, name: str, **attributes: Any) -> _ActiveSpan:
+        return _ActiveSpan(self, name, attributes)
+
+    def _open(self, name: str, attributes: dict[str, Any]) -> Span:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        with self._lock:
+            span_id = next(self._ids)
+        parent = stack[-1] if stack else None
+        span = Span(name, span_id, parent, threading.get_ident(), self._clock(), 0, attributes)
+        stack.append(span_id)
+        return span
+
+    def _close(self, span: Span) -> None:
+        span.end_ns = self._clock()
+        stack = self._local.stack
+        # Generators can close their spans out of order; remove this one wherever it is
+        if stack and stack[-1] == span.span_id:
+            stack.pop()
+        elif span.span_id in stack:
+            stack.remove(span.span_id)
+        with self._lock:
+            self.spans.append(span)
+
+    def stop(self) -> None:
+        if self.stopped_ns is None:
+            self.stopped_ns = self._clock()
+
+    @property
+    def wall_ns(self) -> int:
+        return (self.stopped_ns or self._clock()) - self.started_ns
+
+    # ------------------------------------------------------------------------
+    # Summaries and exports
+    # ------------------------------------------------------------------------
+    def stages(self) -> list[StageTiming]:
+        """Per-name totals, in the order each stage first started."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+        child_ns: dict[int, int] = {}
+        for span in spans:
+            if span.parent_id is not None:
+                child_ns[span.parent_id] = child_ns.get(span.parent_id, 0) + span.duration_ns
+        totals: dict[str, list[int]] = {}
+        for span in spans:
+            calls, total, own = totals.setdefault(span.name, [0, 0, 0])
+            totals[span.name] = [
+                calls + 1,
+                total + span.duration_ns,
+                own + span.duration_ns - child_ns.get(span.span_id, 0),
+            ]
+        return [StageTiming(name, *values) for name, values in totals.items()]
+
+    def to_chrome(self) -> dict[str, Any]:
+        """Chrome trace-event format: one complete ("X") event per span."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "displayTimeUnit": "ms",
+            "traceEvents": [
+                {
+                    "name": span.name,
+                    "cat": span.name.split(".")[0],
+                    "ph": "X",
+                    "ts": (span.start_ns - self.started_ns) / 1000,
+                    "dur": span.duration_ns / 1000,
+                    "pid": pid,
+                    "tid": span.thread_id,
+                    "args": {key: _json_value(value) for key, value in span.attributes.items()},
+                }
+                for span in spans
+            ],
+        }
+
+    def to_otel(self) -> dict[str, Any]:
+        """OpenTelemetry OTLP/JSON (as accepted by an OTLP/HTTP collector)."""
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": _otel_attributes({"service.name": SERVICE_NAME})},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": SERVICE_NAME},
+                            "spans": [self._otel_span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def _otel_span(self, span: Span) -> dict[str, Any]:
+        otel = {
+            "traceId": self.trace_id,
+            "spanId": f"{span.span_id:016x}",
+            "parentSpanId": f"{span.parent_id:016x}" if span.parent_id is not None else "",
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_ns + self._unix_offset_ns),
+            "endTimeUnixNano": str(span.end_ns + self._unix_offset_ns),
+            "attributes": _otel_attributes({"thread.id": span.thread_id, **span.attributes}),
+        }
+        if "error" in span.attributes:
+            otel["status"] = {
+                "code": 2,
+                "message": str(span.attributes["error"]),
+            }  # STATUS_CODE_ERROR
+        return otel
+
+
+def _json_value(value: Any) -> Any:
+    return value if isinstance(value, (bool, int, float, str)) or value is None else str(value)
+
+
+def _otel_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    encoded = []
+    for key, value in attributes.items():
+        typed: dict[str, Any]
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            # OTLP/JSON encodes 64-bit integers as strings
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": typed})
+    return encoded
+
+
+# ============================================================================
+# Process-wide Tracer
+# ============================================================================
+_tracer: Optional[Tracer] = None
+
+
+def span(name: str, **attributes: Any) -> Any:
+    """
+    Time a stage if tracing is on.
+
+    Example:
+        with span("azure.list_resources", resource_group=rg) as stage:
+            rows = fetch()
+            stage.set(rows=len(rows))
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP
+    return tracer.span(name, **attributes)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator form of ``span`` for functions that are one stage each."""
+
+    def decorate(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def start_tracing() -> Tracer:
+    """Start recording spans from every thread into a new Tracer."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop_tracing() -> Optional[Tracer]:
+    """Stop recording; returns the tracer that was active, if any."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.stop()
+    return tracer
+
+
+def current_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def format_profile(tracer: Tracer) -> str:
+    """Per-stage breakdown as a plain text table."""
+    wall_ns = tracer.wall_ns or 1
+    lines = [f"{'Stage':<32} {'Calls':>6} {'Total ms':>10} {'Self ms':>10} {'% wall':>7}"]
+    for stage in tracer.stages():
+        lines.append(
+            f"{stage.name:<32} {stage.calls:>6} {stage.total_ns / 1e6:>10.2f}"
+            f" {stage.self_ns / 1e6:>10.2f} {100 * stage.total_ns / wall_ns:>6.1f}%"
+        )
+    lines.append(f"{'wall':<32} {'':>6} {tracer.wall_ns / 1e6:>10.2f}")
+    return "\n".join(lines)
+
+
+def write_trace(tracer: Tracer, path: Path, trace_format: str = "chrome") -> None:
+    """
+    Export a trace to a JSON file.
+
+    Args:
+        tracer: Finished (or running) tracer.
+        path: Output file.
+        trace_format: "chrome" for trace-event JSON, "otel" for OTLP/JSON.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    if trace_format not in TRACE_FORMATS:
+        raise ValueError(
+            f"Unknown trace format: {trace_format}. Must be one of: {', '.join(TRACE_FORMATS)}"
+        )
+    document = tracer.to_chrome() if trace_format == "chrome" else tracer.to_otel()
+    Path(path).write_text(json.dumps(document, indent=1))
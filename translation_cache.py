@@ -0,0 +1,419 @@
+"""
+Two-tier cache of natural language -> Azure command translations.
+
+An LLM round trip takes seconds, but users ask for the same things over and
+over in slightly different words. Lookups go through two tiers:
+
+1. Exact: the normalized query plus its context (subscription, default
+   resource group, model...) hashed into a key. Catches repeats and trivial
+   variations in case, spacing, punctuation and filler words.
+2. Semantic: the query is embedded and compared with stored queries from the
+   same context. A stored translation is reused when the cosine similarity
+   clears the threshold *and* both queries ask for the same action and
+   mention the same entities, so "list VMs in rg-a" never answers "list VMs
+   in rg-b" and "delete rg-a" never answers "show rg-a".
+
+Entries live in SQLite with a TTL and are evicted least recently used first
+once ``max_entries`` is exceeded.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections.abc import Callable, Mapping
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from config import Config, retire
+from embeddings import Embedder, EmbeddingError, cosine, get_embedder
+from entities import extract_entities
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_SIMILARITY_THRESHOLD = 0.9
+
+TIER_EXACT = "exact"
+TIER_SEMANTIC = "semantic"
+
+# Words that never change what a command means
+FILLER_WORDS = frozenset({"please", "the", "my", "can", "could", "would", "you", "kindly"})
+
+# Verb -> action; queries asking for different actions never share a translation
+VERBS = {
+    **dict.fromkeys(("list", "show", "get", "display", "find"), "list"),
+    **dict.fromkeys(("create", "make", "add", "provision", "deploy"), "create"),
+    **dict.fromkeys(("delete", "remove", "destroy", "drop"), "delete"),
+    **dict.fromkeys(("update", "change", "modify", "resize"), "update"),
+    **dict.fromkeys(("count", "many"), "count"),
+    **dict.fromkeys(("cost", "price", "much"), "cost"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    key         TEXT PRIMARY KEY,
+    context     TEXT NOT NULL,
+    query       TEXT NOT NULL,
+    entities    TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    embedding   BLOB,
+    created_at  REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits        INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_translations_context ON translations (context);
+CREATE INDEX IF NOT EXISTS idx_translations_last_access ON translations (last_access);
+"""
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, strip punctuation and filler words, and collapse whitespace."""
+    words = re.sub(r"[^\w\s./-]", " ", query.lower()).split()
+    return " ".join(word.strip(".") for word in words if word not in FILLER_WORDS)
+
+
+def context_key(context: Optional[Mapping[str, Any]]) -> str:
+    """Stable string for a translation context."""
+    return json.dumps(dict(context or {}), sort_keys=True, separators=(",", ":"))
+
+
+def _entry_key(query: str, context: str) -> str:
+    return hashlib.sha256(f"{context}\n{query}".encode()).hexdigest()
+
+
+def _verb(query: str) -> str:
+    """The action a normalized query asks for: its first known verb, else its first word."""
+    for word in query.split():
+        if word in VERBS:
+            return VERBS[word]
+    return query.split(" ", 1)[0]
+
+
+def _reuse_key(query: str) -> str:
+    """What two queries must share for one's translation to answer the other."""
+    entities = asdict(extract_entities(query))
+    return json.dumps({"verb": _verb(query), **entities}, sort_keys=True)
+
+
+@dataclass(frozen=True)
+class CacheHit:
+    """A translation served from the cache."""
+
+    translation: dict[str, Any]
+    tier: str
+    similarity: float = 1.0
+    query: str = ""
+
+
+@dataclass
+class CacheMetrics:
+    """Hit counts and lookup time for this process."""
+
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    lookup_seconds: float = 0.0
+
+    @property
+    def lookups(self) -> int:
+        return self.exact_hits + self.semantic_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.exact_hits + self.semantic_hits) / self.lookups if self.lookups else 0.0
+
+    def summary(self) -> str:
+        average = self.lookup_seconds / self.lookups * 1000 if self.lookups else 0.0
+        return (
+            f"translations: {self.lookups} lookups, hit rate {self.hit_rate:.0%} "
+            f"(exact={self.exact_hits} semantic={self.semantic_hits}), "
+            f"avg lookup {average:.1f} ms"
+        )
+
+
+@dataclass
+class _Vectors:
+    """In-memory semantic index for one context: key -> (reuse key, vector)."""
+
+    entries: dict[str, tuple[str, array]] = field(default_factory=dict)
+
+
+class TranslationCache:
+    """
+    SQLite-backed exact + semantic translation cache.
+
+    Example:
+        cache = TranslationCache(Path("./data/translations.db"), HashingEmbedder())
+        translation, hit = cache.get_or_translate(query, context, llm_translate)
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        embedder: Optional[Embedder] = None,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Open (and create if needed) the cache database.
+
+        Args:
+            path: SQLite file location. Use ":memory:" for a throwaway cache.
+            embedder: Embeds queries for the semantic tier. None disables it.
+            ttl: Seconds a translation stays valid.
+            max_entries: Entries kept before least recently used ones are evicted.
+            threshold: Minimum cosine similarity for a semantic hit.
+            clock: Time source, injectable for tests.
+        """
+        self.embedder = embedder
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.metrics = CacheMetrics()
+        self.config: Optional[Config] = None
+        self._clock = clock
+        self._vectors: dict[str, _Vectors] = {}
+        # The embedding of the last missed query, reused when its translation is put
+        self._pending: Optional[tuple[str, array]] = None
+
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        # Every hit updates last_access; WAL without a sync per commit keeps that cheap
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    # ------------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------------
+    def get(self, query: str, context: Optional[Mapping[str, Any]] = None) -> Optional[CacheHit]:
+        """
+        Look a query up in the exact tier, then the semantic tier.
+
+        Returns:
+            CacheHit, or None on a miss.
+        """
+        start = time.perf_counter()
+        try:
+            hit = self._lookup(normalize_query(query), context_key(context))
+        finally:
+            self.metrics.lookup_seconds += time.perf_counter() - start
+        if hit is None:
+            self.metrics.misses += 1
+        elif hit.tier == TIER_EXACT:
+            self.metrics.exact_hits += 1
+        else:
+            self.metrics.semantic_hits += 1
+        return hit
+
+    def _lookup(self, query: str, context: str) -> Optional[CacheHit]:
+        now = self._clock()
+        key = _entry_key(query, context)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT translation, created_at FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] + self.ttl > now:
+                self._touch(key, now)
+                return CacheHit(json.loads(row[0]), TIER_EXACT, 1.0, query)
+
+        vector = self._embed(query)
+        if vector is None:
+            return None
+        reuse = _reuse_key(query)
+        best_key, best_similarity = None, self.threshold
+        with self._lock:
+            index = self._index(context)
+            for candidate, (candidate_reuse, candidate_vector) in index.entries.items():
+                if candidate_reuse != reuse:
+                    continue
+                similarity = cosine(vector, candidate_vector)
+                if similarity >= best_similarity:
+                    best_key, best_similarity = candidate, similarity
+            if best_key is None:
+                return None
+            row = self._db.execute(
+                "SELECT translation, created_at, query FROM translations WHERE key = ?",
+                (best_key,),
+            ).fetchone()
+            if row is None or row[1] + self.ttl <= now:
+                return None
+            self._touch(best_key, now)
+            return CacheHit(json.loads(row[0]), TIER_SEMANTIC, best_similarity, row[2])
+
+    def _embed(self, query: str) -> Optional[array]:
+        if self.embedder is None:
+            return None
+        if self._pending is not None and self._pending[0] == query:
+            return self._pending[1]
+        try:
+            vector = array("f", self.embedder.embed([query])[0])
+        except EmbeddingError:
+            # The exact tier still works when the embedding service is down
+            return None
+        self._pending = (query, vector)
+        return vector
+
+    def _index(self, context: str) -> _Vectors:
+        """The semantic index for a context, loaded from disk on first use."""
+        index = self._vectors.get(context)
+        if index is None:
+            index = self._vectors[context] = _Vectors()
+            for key, entities, blob in self._db.execute(
+                "SELECT key, entities, embedding FROM translations"
+                " WHERE context = ? AND embedding IS NOT NULL",
+                (context,),
+            ):
+                index.entries[key] = (entities, array("f", blob))
+        return index
+
+    def _touch(self, key: str, now: float) -> None:
+        with self._db:
+            self._db.execute(
+                "UPDATE translations SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                (now, key),
+            )
+
+    # ------------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------------
+    def put(
+        self,
+        query: str,
+        translation: Mapping[str, Any],
+        context: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        """Store the translation of a query, replacing any previous one."""
+        normalized, ctx = normalize_query(query), context_key(context)
+        key = _entry_key(normalized, ctx)
+        reuse = _reuse_key(normalized)
+        vector = self._embed(normalized)
+        now = self._clock()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (
+                    key,
+                    ctx,
+                    normalized,
+                    reuse,
+                    json.dumps(dict(translation), separators=(",", ":")),
+                    None if vector is None else vector.tobytes(),
+                    now,
+                    now,
+                ),
+            )
+            if vector is not None and ctx in self._vectors:
+                self._vectors[ctx].entries[key] = (reuse, vector)
+            self._evict()
+
+    def get_or_translate(
+        self,
+        query: str,
+        context: Optional[Mapping[str, Any]],
+        translate: Callable[[str], Mapping[str, Any]],
+    ) -> tuple[dict[str, Any], Optional[CacheHit]]:
+        """
+        Return a cached translation, calling ``translate`` and storing the result on a miss.
+
+        Returns:
+            The translation and the CacheHit it came from (None if it was translated).
+        """
+        hit = self.get(query, context)
+        if hit is not None:
+            return hit.translation, hit
+        translation = dict(translate(query))
+        self.put(query, translation, context)
+        return translation, None
+
+    def invalidate(self, context: Optional[Mapping[str, Any]] = None) -> None:
+        """Drop every entry of one context, or everything."""
+        with self._lock, self._db:
+            if context is None:
+                self._db.execute("DELETE FROM translations")
+                self._vectors.clear()
+            else:
+                ctx = context_key(context)
+                self._db.execute("DELETE FROM translations WHERE context = ?", (ctx,))
+                self._vectors.pop(ctx, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()
+        return int(count)
+
+    @classmethod
+    def from_config(cls, config: Config) -> "TranslationCache":
+        """Open the cache using the translation settings from Config."""
+        cache = cls(
+            config.translation_cache_path,
+            embedder=get_embedder(config),
+            ttl=config.translation_cache_ttl,
+            max_entries=config.translation_cache_max_entries,
+            threshold=config.semantic_cache_threshold,
+        )
+        cache.config = config
+        return cache
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._db.close()
+
+    # ------------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------------
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones beyond max_entries."""
+        expired = self._clock() - self.ttl
+        victims = [
+            row[0]
+            for row in self._db.execute(
+                "SELECT key FROM translations WHERE created_at <= ?", (expired,)
+            )
+        ]
+        (count,) = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()
+        excess = count - len(victims) - self.max_entries
+        if excess > 0:
+            victims += [
+                row[0]
+                for row in self._db.execute(
+                    "SELECT key FROM translations WHERE created_at > ?"
+                    " ORDER BY last_access LIMIT ?",
+                    (expired, excess),
+                )
+            ]
+        for key in victims:
+            self._db.execute("DELETE FROM translations WHERE key = ?", (key,))
+            for index in self._vectors.values():
+                index.entries.pop(key, None)
+
+
+# ============================================================================
+# Shared Cache
+# ============================================================================
+_cache: Optional[TranslationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_translation_cache(config: Config) -> TranslationCache:
+    """Return the process-wide translation cache for a config."""
+    global _cache
+    with _cache_lock:
+        if _cache is None or _cache.config is not config:
+            if _cache is not None:
+                retire(_cache.close)
+            _cache = TranslationCache.from_config(config)
+        return _cache
+
+
+def current_translation_cache() -> Optional[TranslationCache]:
+    """The process-wide cache if one has been opened, without opening it."""
+    return _cache
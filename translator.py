@@ -0,0 +1,371 @@
+"""
+Streaming natural language translation with Azure OpenAI.
+
+Commands the intent registry does not recognize are sent to the chat
+completions deployment named by Config.openai_deployment. The reply is
+streamed (server-sent events) so the proposed az command can be previewed
+while it is being generated, and the stream is closed as soon as the reply's
+JSON object is complete: anything the model adds after it is never waited for.
+Ctrl-C closes the connection immediately.
+"""
+
+import contextlib
+import json
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from config import Config
+from prompts import PromptBuilder
+from token_ledger import TokenLedger, get_token_ledger
+from tracing import span
+
+TRANSLATION_TIMEOUT_SECONDS = 60
+MAX_COMPLETION_TOKENS = 400
+CLARIFY_INTENT = "clarify"
+
+_SSE_DATA = b"data:"
+_SSE_DONE = "[DONE]"
+_COMMAND_FIELD = re.compile(r'"command"\s*:\s*"((?:[^"\\]|\\.)*)')
+
+
+class TranslationError(Exception):
+    """Raised when a request cannot be translated."""
+
+
+@dataclass(frozen=True)
+class Translation:
+    """A request translated into an Azure operation."""
+
+    intent: str
+    command: str
+    arguments: dict[str, Any] = field(default_factory=dict)
+    explanation: str = ""
+
+    @property
+    def needs_clarification(self) -> bool:
+        return self.intent == CLARIFY_INTENT
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "intent": self.intent,
+            "command": self.command,
+            "arguments": self.arguments,
+            "explanation": self.explanation,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Any) -> "Translation":
+        """
+        Validate a reply object.
+
+        Raises:
+            TranslationError: If it is not an object with a string intent.
+        """
+        if not isinstance(data, dict) or not isinstance(data.get("intent"), str):
+            raise TranslationError(f"Unexpected translation: {data!r}")
+        arguments = data.get("arguments") or {}
+        return cls(
+            data["intent"],
+            str(data.get("command") or ""),
+            dict(arguments) if isinstance(arguments, dict) else {},
+            str(data.get("explanation") or ""),
+        )
+
+
+# ============================================================================
+# Stream Parsing
+# ============================================================================
+class JsonObjectScanner:
+    """
+    Finds the end of the first top-level JSON object in streamed text.
+
+    Text before the opening brace (a code fence, "Sure!") is skipped. Braces
+    inside strings are ignored, so the object is complete exactly when its
+    closing brace arrives.
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def complete(self) -> bool:
+        return self.end is not None
+
+    @property
+    def object_text(self) -> str:
+        """The object so far (the whole object once complete)."""
+        if self.start is None:
+            return ""
+        return self.text[self.start : self.end]
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Add streamed text.
+
+        Returns:
+            True once the object is complete.
+        """
+        if self.end is not None:
+            return True
+        offset = len(self.text)
+        self.text += chunk
+        for index, char in enumerate(chunk, offset):
+            if self.start is None:
+                if char == "{":
+                    self.start = index
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if not self._depth:
+                    self.end = index + 1
+                    return True
+        return False
+
+
+def preview_command(text: str) -> str:
+    """The value of the "command" field in a partial JSON reply, as far as it has arrived."""
+    match = _COMMAND_FIELD.search(text)
+    if match is None:
+        return ""
+    try:
+        return json.loads(f'"{match.group(1)}"')
+    except ValueError:  # An escape sequence cut in half
+        return match.group(1)
+
+
+def iter_sse_content(lines: Iterable[bytes]) -> Iterator[str]:
+    """
+    Yield the content deltas of a streamed chat completion.
+
+    Args:
+        lines: Raw lines of a text/event-stream response.
+
+    Raises:
+        TranslationError: If an event is not valid JSON.
+    """
+    for line in lines:
+        if not line.startswith(_SSE_DATA):
+            continue
+        data = line[len(_SSE_DATA) :].strip().decode()
+        if data == _SSE_DONE:
+            return
+        try:
+            event = json.loads(data)
+        except ValueError as e:
+            raise TranslationError(f"Malformed stream event: {data[:80]!r}") from e
+        # Azure sends prompt filter results as events without choices
+        for choice in event.get("choices") or ():
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                yield content
+
+
+# ============================================================================
+# Translator
+# ============================================================================
+class StreamingTranslator:
+    """
+    Translates requests with a streamed chat completion.
+
+    Example:
+        translator = StreamingTranslator(get_config())
+        translation = translator.translate("stop web01 in rg-prod", on_preview=print)
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        builder: Optional[PromptBuilder] = None,
+        ledger: Optional[TokenLedger] = None,
+        timeout: float = TRANSLATION_TIMEOUT_SECONDS,
+    ) -> None:
+        """
+        Args:
+            config: Supplies the Azure OpenAI endpoint, key and deployment.
+            builder: Assembles prompts. Defaults to one built from config.
+            ledger: Records token usage of every request, if given.
+            timeout: Seconds to wait for the connection and between chunks.
+
+        Raises:
+            TranslationError: If Azure OpenAI is not configured.
+        """
+        if not config.is_openai_configured():
+            raise TranslationError("Azure OpenAI is not configured (AZURE_OPENAI_ENDPOINT/API_KEY)")
+        self.config = config
+        self.model = config.openai_deployment
+        self.builder = builder or PromptBuilder.from_config(config)
+        self.ledger = ledger
+        self._url = (
+            f"{(config.openai_endpoint or '').rstrip('/')}/openai/deployments/"
+            f"{config.openai_deployment}/chat/completions?api-version={config.openai_api_version}"
+        )
+        self._api_key = config.openai_api_key or ""
+        self._timeout = timeout
+
+    def stream(self, messages: Sequence[dict[str, str]]) -> Iterator[str]:
+        """
+        Yield the reply to a chat as it is generated.
+
+        Closing the generator closes the connection, which is how both early
+        stopping and cancellation end a request.
+
+        Raises:
+            TranslationError: If the request fails.
+        """
+        body = {
+            "messages": list(messages),
+            "stream": True,
+            "temperature": 0,
+            "max_tokens": MAX_COMPLETION_TOKENS,
+        }
+        request = urllib.request.Request(
+            self._url,
+            data=json.dumps(body).encode(),
+            headers={
+                "Content-Type": "application/json",
+                "Accept": "text/event-stream",
+                "api-key": self._api_key,
+            },
+        )
+        try:
+            response = urllib.request.urlopen(request, timeout=self._timeout)
+        except urllib.error.HTTPError as e:
+            raise TranslationError(f"Translation request failed: HTTP {e.code} {e.reason}") from e
+        except (urllib.error.URLError, TimeoutError) as e:
+            raise TranslationError(f"Translation request failed: {e}") from e
+        with response:
+            try:
+                yield from iter_sse_content(response)
+            except (OSError, TimeoutError) as e:
+                raise TranslationError(f"Translation stream broke off: {e}") from e
+
+    def translate(
+        self,
+        query: str,
+        context: Sequence[str] = (),
+        docs: Sequence[tuple[str, float]] = (),
+        on_preview: Optional[Callable[[str], None]] = None,
+    ) -> Translation:
+        """
+        Translate a request, stopping the stream once the reply object is complete.
+
+        Args:
+            query: The user's request.
+            context: Earlier turns of the session, oldest first.
+            docs: Retrieved documentation as (text, relevance score).
+            on_preview: Called with the partial az command whenever it grows.
+
+        Returns:
+            The parsed Translation.
+
+        Raises:
+            TranslationError: If the request fails or the reply is not a
+                complete JSON object.
+            KeyboardInterrupt: Propagated after the connection is closed.
+        """
+        with span("prompt.build"):
+            prompt = self.builder.build(query, context, docs)
+        scanner = JsonObjectScanner()
+        preview = ""
+        started = time.perf_counter()
+        try:
+            with (
+                span("llm.translate", model=self.model),
+                contextlib.closing(self.stream(prompt.messages)) as deltas,
+            ):
+                for delta in deltas:
+                    done = scanner.feed(delta)
+                    if on_preview is not None:
+                        command = preview_command(scanner.object_text)
+                        if command != preview:
+                            preview = command
+                            on_preview(command)
+                    if done:
+                        break
+        finally:
+            if self.ledger is not None and scanner.text:
+                self.ledger.record(
+                    self.model,
+                    prompt.tokens,
+                    self.builder.counter.count(scanner.text),
+                    (time.perf_counter() - started) * 1000,
+                    purpose="translate" if scanner.complete else "translate-incomplete",
+                )
+
+        if not scanner.complete:
+            raise TranslationError("The reply ended before a complete JSON object")
+        try:
+            data = json.loads(scanner.object_text)
+        except ValueError as e:
+            raise TranslationError(f"The reply is not valid JSON: {e}") from e
+        return Translation.from_dict(data)
+
+
+def translate_live(
+    translator: StreamingTranslator,
+    query: str,
+    console: Any,
+    context: Sequence[str] = (),
+    docs: Sequence[tuple[str, float]] = (),
+) -> Translation:
+    """
+    Translate while showing the command as it streams in, using Rich Live.
+
+    The live display is transient: it is cleared when the translation
+    finishes or is cancelled with Ctrl-C.
+    """
+    from rich.live import Live
+    from rich.spinner import Spinner
+    from rich.text import Text
+
+    spinner = Spinner("dots", text="Translating...", style="blue")
+
+    def on_preview(command: str) -> None:
+        spinner.update(text=Text(command, style="bold"))
+
+    with Live(spinner, console=console, transient=True, refresh_per_second=12):
+        return translator.translate(query, context, docs, on_preview=on_preview)
+
+
+# ============================================================================
+# Shared Translator
+# ============================================================================
+_translator: Optional[StreamingTranslator] = None
+_translator_lock = threading.Lock()
+
+
+def get_translator(config: Config) -> StreamingTranslator:
+    """
+    Return the process-wide translator for a config.
+
+    Raises:
+        TranslationError: If Azure OpenAI is not configured.
+    """
+    global _translator
+    with _translator_lock:
+        if _translator is None or _translator.config is not config:
+            _translator = StreamingTranslator(config, ledger=get_token_ledger(config))
+        return _translator
@@ -0,0 +1,563 @@
+"""
+Dry-run planning of batch commands with ARM what-if.
+
+`copilot --dry-run batch plan.txt` resolves every step of a plan into the
+ARM operation it would perform - a template with one resource, deployed at
+subscription or resource group scope - and asks the what-if API what that
+deployment would change. The what-if calls run concurrently through
+azure_commands.fan_out, so a plan takes about as long as its slowest
+validation, and the result is printed as a unified diff of each resource's
+state before and after.
+
+What-if answers are memoized by a hash of the template and its scope, so
+re-planning an unchanged batch makes no API calls while the answers are
+fresh. Answers that depend on other steps of the plan (a storage account in
+a resource group the plan has yet to create) are worked out locally and
+never cached.
+"""
+
+import difflib
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Optional
+
+import azure_commands
+from azure_commands import AzureCommandError, Scope, fan_out, is_azure_error, status_code
+from batch import BatchStep
+from config import Config, retire
+from tracing import span
+
+DEFAULT_TTL_SECONDS = 10 * 60
+
+CHANGE_CREATE = "Create"
+CHANGE_MODIFY = "Modify"
+CHANGE_NO_CHANGE = "NoChange"
+CHANGE_DELETE = "Delete"
+CHANGE_INVALID = "Invalid"  # Rejected by validation or the what-if call failed
+
+RESOURCE_GROUP_TYPE = "Microsoft.Resources/resourceGroups"
+STORAGE_ACCOUNT_TYPE = "Microsoft.Storage/storageAccounts"
+API_VERSIONS = {
+    RESOURCE_GROUP_TYPE: "2022-09-01",
+    STORAGE_ACCOUNT_TYPE: "2023-01-01",
+}
+SUBSCRIPTION_TEMPLATE_SCHEMA = (
+    "https://schema.management.azure.com/schemas/2018-05-01/subscriptionDeploymentTemplate.json#"
+)
+GROUP_TEMPLATE_SCHEMA = (
+    "https://schema.management.azure.com/schemas/2019-04-01/deploymentTemplate.json#"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS validations (
+    template_hash TEXT PRIMARY KEY,
+    result        TEXT NOT NULL,
+    created_at    REAL NOT NULL
+);
+"""
+
+
+# ============================================================================
+# Operations
+# ============================================================================
+@dataclass(frozen=True)
+class ArmOperation:
+    """The single-resource deployment a step would make."""
+
+    subscription_id: str
+    # ARM template resource: type, apiVersion, name, location and the rest of its body
+    resource: dict[str, Any]
+    # Deployment scope; None deploys at subscription scope
+    resource_group: Optional[str] = None
+    # The resource group is created by an earlier step of the same plan
+    group_planned: bool = False
+
+    @property
+    def resource_id(self) -> str:
+        sub = f"/subscriptions/{self.subscription_id}"
+        if self.resource["type"] == RESOURCE_GROUP_TYPE:
+            return f"{sub}/resourceGroups/{self.resource['name']}"
+        return (
+            f"{sub}/resourceGroups/{self.resource_group}"
+            f"/providers/{self.resource['type']}/{self.resource['name']}"
+        )
+
+    def template(self) -> dict[str, Any]:
+        schema = GROUP_TEMPLATE_SCHEMA if self.resource_group else SUBSCRIPTION_TEMPLATE_SCHEMA
+        return {"$schema": schema, "contentVersion": "1.0.0.0", "resources": [self.resource]}
+
+    def template_hash(self) -> str:
+        """Key for memoized validation: the template and where it is deployed."""
+        key = {
+            "subscription": self.subscription_id.lower(),
+            "resource_group": (self.resource_group or "").lower(),
+            "template": self.template(),
+        }
+        return hashlib.sha256(
+            json.dumps(key, sort_keys=True, separators=(",", ":")).encode()
+        ).hexdigest()
+
+    def desired_state(self) -> dict[str, Any]:
+        """The resource as it would be after the deployment."""
+        state = {key: value for key, value in self.resource.items() if key != "apiVersion"}
+        return {"id": self.resource_id, **state}
+
+
+def _resource_group_operation(step: BatchStep, config: Config) -> ArmOperation:
+    if not step.entities.name:
+        raise ValueError("Which resource group? e.g. 'create resource group my-rg in eastus'")
+    name = azure_commands.validate_resource_group_name(step.entities.name)
+    resource = {
+        "type": RESOURCE_GROUP_TYPE,
+        "apiVersion": API_VERSIONS[RESOURCE_GROUP_TYPE],
+        "name": name,
+        "location": step.entities.location or config.default_location,
+        "tags": {},
+    }
+    return ArmOperation(config.subscription_id, resource)
+
+
+def _storage_account_operation(step: BatchStep, config: Config) -> ArmOperation:
+    resource_group = step.entities.resource_group or config.default_resource_group
+    if not resource_group:
+        raise ValueError("Which resource group? e.g. 'create storage account in my-rg'")
+    name = step.entities.name or azure_commands.default_storage_account_name(
+        resource_group, config.subscription_id
+    )
+    azure_commands.validate_storage_account_name(name)
+    resource = {
+        "type": STORAGE_ACCOUNT_TYPE,
+        "apiVersion": API_VERSIONS[STORAGE_ACCOUNT_TYPE],
+        "name": name,
+        "location": step.entities.location or config.default_location,
+        "kind": "StorageV2",
+        "sku": {"name": step.entities.sku or azure_commands.DEFAULT_STORAGE_SKU},
+    }
+    return ArmOperation(config.subscription_id, resource, resource_group)
+
+
+# Intent -> builds the operation of one of its steps; other intents change nothing
+RESOLVERS: dict[str, Callable[[BatchStep, Config], ArmOperation]] = {
+    "create_resource_group": _resource_group_operation,
+    "create_storage_account": _storage_account_operation,
+}
+
+
+def resolve_operations(
+    steps: Sequence[BatchStep], config: Config
+) -> list[tuple[Optional[ArmOperation], Optional[str]]]:
+    """
+    Work out the ARM operation of every step.
+
+    Returns:
+        (operation, error) per step, in plan order. Read-only steps have
+        neither; steps that cannot be resolved have an error.
+    """
+    resolved: list[tuple[Optional[ArmOperation], Optional[str]]] = []
+    for step in steps:
+        resolver = RESOLVERS.get(step.intent.name)
+        try:
+            resolved.append((None if resolver is None else resolver(step, config), None))
+        except ValueError as e:
+            resolved.append((None, str(e)))
+
+    # A dependency may come later in the file, so groups are matched once all are resolved
+    created = {
+        index: operation.resource["name"].lower()
+        for index, (operation, _) in enumerate(resolved)
+        if operation is not None and operation.resource["type"] == RESOURCE_GROUP_TYPE
+    }
+    for step in steps:
+        operation = resolved[step.index][0]
+        if operation is not None and operation.resource_group:
+            group = operation.resource_group.lower()
+            if any(created.get(dependency) == group for dependency in step.depends_on):
+                resolved[step.index] = (replace(operation, group_planned=True), None)
+    return resolved
+
+
+# ============================================================================
+# Validation
+# ============================================================================
+@dataclass(frozen=True)
+class WhatIfResult:
+    """What a deployment would do to its resource."""
+
+    resource_id: str
+    change_type: str
+    before: Optional[dict[str, Any]] = None
+    after: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "resource_id": self.resource_id,
+            "change_type": self.change_type,
+            "before": self.before,
+            "after": self.after,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "WhatIfResult":
+        return cls(
+            data["resource_id"],
+            data["change_type"],
+            data.get("before"),
+            data.get("after"),
+            data.get("error"),
+        )
+
+
+class WhatIfValidator:
+    """
+    Asks the ARM what-if API what an operation would change.
+
+    Example:
+        validator = WhatIfValidator(lambda sub: get_resource_client(config, sub))
+        result = validator.what_if(operation)
+    """
+
+    def __init__(self, client_for: Callable[[str], Any]) -> None:
+        """
+        Args:
+            client_for: Returns the ResourceManagementClient (or a fake with
+                the same shape) for a subscription.
+        """
+        self._client_for = client_for
+
+    def what_if(self, operation: ArmOperation) -> WhatIfResult:
+        """
+        Run what-if for one operation.
+
+        Returns:
+            The predicted change. Templates the service rejects come back as
+            CHANGE_INVALID results rather than exceptions.
+
+        Raises:
+            AzureCommandError: If the what-if call itself fails; throttling
+                errors keep their cause so fan_out can retry them.
+        """
+        deployment = f"copilot-whatif-{operation.template_hash()[:16]}"
+        properties = {"mode": "Incremental", "template": operation.template()}
+        deployments = self._client_for(operation.subscription_id).deployments
+        try:
+            with span("azure.what_if", type=operation.resource["type"]):
+                if operation.resource_group:
+                    poller = deployments.begin_what_if(
+                        operation.resource_group, deployment, {"properties": properties}
+                    )
+                else:
+                    poller = deployments.begin_what_if_at_subscription_scope(
+                        deployment,
+                        {"location": operation.resource["location"], "properties": properties},
+                    )
+                result = poller.result()
+        except Exception as e:
+            if not is_azure_error(e):
+                raise
+            if operation.group_planned and status_code(e) == 404:
+                # The group does not exist until an earlier step creates it
+                return WhatIfResult(
+                    operation.resource_id, CHANGE_CREATE, None, operation.desired_state()
+                )
+            if status_code(e) == 400:
+                return WhatIfResult(operation.resource_id, CHANGE_INVALID, error=str(e))
+            raise AzureCommandError(f"What-if failed for {operation.resource_id}: {e}") from e
+        return self._parse(operation, result)
+
+    @staticmethod
+    def _parse(operation: ArmOperation, result: Any) -> WhatIfResult:
+        error = getattr(result, "error", None)
+        if error is not None:
+            message = getattr(error, "message", None) or str(error)
+            return WhatIfResult(operation.resource_id, CHANGE_INVALID, error=message)
+        changes = list(getattr(result, "changes", None) or [])
+        wanted = operation.resource_id.lower()
+        change = next((c for c in changes if (c.resource_id or "").lower() == wanted), None)
+        if change is None:
+            return WhatIfResult(operation.resource_id, CHANGE_NO_CHANGE)
+        change_type = getattr(change.change_type, "value", change.change_type)
+        return WhatIfResult(operation.resource_id, str(change_type), change.before, change.after)
+
+
+class ValidationCache:
+    """
+    What-if results by template hash, in SQLite, for ``ttl`` seconds.
+
+    Azure state changes under a plan too, so entries expire rather than
+    living as long as the template does.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Args:
+            path: SQLite file location. Use ":memory:" for a throwaway cache.
+            ttl: Seconds a result stays valid.
+            clock: Time source, injectable for tests.
+        """
+        self.ttl = ttl
+        self.config: Optional[Config] = None
+        self._clock = clock
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def get(self, template_hash: str) -> Optional[WhatIfResult]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result FROM validations WHERE template_hash = ? AND created_at > ?",
+                (template_hash, self._clock() - self.ttl),
+            ).fetchone()
+        return None if row is None else WhatIfResult.from_dict(json.loads(row[0]))
+
+    def put(self, template_hash: str, result: WhatIfResult) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO validations VALUES (?, ?, ?)",
+                (template_hash, json.dumps(result.to_dict()), self._clock()),
+            )
+            self._db.execute(
+                "DELETE FROM validations WHERE created_at <= ?", (self._clock() - self.ttl,)
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM validations")
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM validations").fetchone()
+        return int(count)
+
+    @classmethod
+    def from_config(cls, config: Config) -> "ValidationCache":
+        cache = cls(config.what_if_cache_path, ttl=config.what_if_cache_ttl)
+        cache.config = config
+        return cache
+
+    def close(self) -> None:
+        self._db.close()
+
+
+# ============================================================================
+# Planning
+# ============================================================================
+@dataclass(frozen=True)
+class PlannedChange:
+    """One step of a dry-run plan and what it would change."""
+
+    step: BatchStep
+    operation: Optional[ArmOperation] = None
+    result: Optional[WhatIfResult] = None
+    error: Optional[str] = None
+    cached: bool = False
+
+    @property
+    def change_type(self) -> Optional[str]:
+        """CHANGE_* of the step; None for steps that change nothing by design."""
+        if self.error is not None:
+            return CHANGE_INVALID
+        return None if self.result is None else self.result.change_type
+
+    @property
+    def ok(self) -> bool:
+        return self.change_type != CHANGE_INVALID
+
+
+@dataclass(frozen=True)
+class DryRunPlan:
+    """Every step of a batch with its predicted change, in plan order."""
+
+    changes: tuple[PlannedChange, ...]
+    # What-if calls made; the rest came from the cache or needed no call
+    validated: int
+    elapsed: float
+
+    @property
+    def ok(self) -> bool:
+        return all(change.ok for change in self.changes)
+
+    def count(self, change_type: str) -> int:
+        return sum(1 for change in self.changes if change.change_type == change_type)
+
+    def diff(self) -> str:
+        """Unified diff of every resource's state before and after the plan."""
+        return "".join(_change_diff(change) for change in self.changes)
+
+    def summary(self) -> str:
+        counts = ", ".join(
+            f"{self.count(change_type)} {label}"
+            for change_type, label in (
+                (CHANGE_CREATE, "to create"),
+                (CHANGE_MODIFY, "to modify"),
+                (CHANGE_DELETE, "to delete"),
+                (CHANGE_NO_CHANGE, "unchanged"),
+                (CHANGE_INVALID, "invalid"),
+            )
+            if self.count(change_type)
+        )
+        cached = sum(1 for change in self.changes if change.cached)
+        return (
+            f"Plan: {counts or 'no changes'}; {self.validated} validated"
+            f" ({cached} cached) in {self.elapsed:.2f} s"
+        )
+
+
+def _state_lines(state: Optional[dict[str, Any]]) -> list[str]:
+    if state is None:
+        return []
+    return (json.dumps(state, indent=2, sort_keys=True) + "\n").splitlines(keepends=True)
+
+
+def _change_diff(change: PlannedChange) -> str:
+    header = f"# [{change.step.step_id}] {change.step.command}"
+    if change.change_type is None:
+        return f"{header}: no changes\n"
+    if change.change_type == CHANGE_INVALID:
+        error = change.error or (change.result.error if change.result else None)
+        return f"{header}: invalid: {error}\n"
+    result = change.result
+    assert result is not None
+    lines = [f"{header}: {result.change_type}\n"]
+    if result.change_type != CHANGE_NO_CHANGE:
+        lines += difflib.unified_diff(
+            _state_lines(result.before),
+            _state_lines(result.after),
+            "/dev/null" if result.before is None else result.resource_id,
+            "/dev/null" if result.after is None else result.resource_id,
+        )
+    return "".join(lines)
+
+
+@dataclass(frozen=True)
+class _OperationScope(Scope):
+    """The fan-out scope of one step's what-if call."""
+
+    step_index: int = 0
+
+
+class DryRunPlanner:
+    """
+    Resolves a parsed batch into ARM operations and validates them in parallel.
+
+    Example:
+        planner = DryRunPlanner(WhatIfValidator(client_for), get_validation_cache(config))
+        plan = planner.plan(batch.load_plan(path), config)
+        print(plan.diff())
+    """
+
+    def __init__(
+        self,
+        validator: WhatIfValidator,
+        cache: Optional[ValidationCache] = None,
+        max_workers: int = 8,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Args:
+            validator: Runs what-if for one operation.
+            cache: Memoizes results by template hash. None validates everything.
+            max_workers: Upper bound on what-if calls at once.
+            sleep: Sleep function for throttling backoff, injectable for tests.
+        """
+        self.validator = validator
+        self.cache = cache
+        self.max_workers = max_workers
+        self._sleep = sleep
+
+    def plan(self, steps: Sequence[BatchStep], config: Config) -> DryRunPlan:
+        """Predict what running the steps would change, without changing anything."""
+        started = time.perf_counter()
+        with span("dry_run.resolve", steps=len(steps)):
+            resolved = resolve_operations(steps, config)
+        changes: dict[int, PlannedChange] = {}
+        pending: list[_OperationScope] = []
+        for step, (operation, error) in zip(steps, resolved, strict=True):
+            cached = None
+            if operation is not None and self.cache is not None:
+                cached = self.cache.get(operation.template_hash())
+            if operation is None or cached is not None:
+                changes[step.index] = PlannedChange(
+                    step, operation, cached, error, cached is not None
+                )
+            else:
+                pending.append(
+                    _OperationScope(operation.subscription_id, operation.resource_group, step.index)
+                )
+
+        with span("dry_run.validate", operations=len(pending)):
+            for outcome in self._validate(pending, resolved):
+                index = outcome.scope.step_index
+                operation = resolved[index][0]
+                assert operation is not None
+                if outcome.ok:
+                    result: WhatIfResult = outcome.value
+                    self._remember(operation, result)
+                    changes[index] = PlannedChange(steps[index], operation, result)
+                else:
+                    changes[index] = PlannedChange(
+                        steps[index], operation, error=str(outcome.error)
+                    )
+        return DryRunPlan(
+            tuple(changes[step.index] for step in steps),
+            len(pending),
+            time.perf_counter() - started,
+        )
+
+    def _validate(
+        self,
+        scopes: Iterable[_OperationScope],
+        resolved: Sequence[tuple[Optional[ArmOperation], Optional[str]]],
+    ) -> Iterable[Any]:
+        def call(scope: _OperationScope) -> WhatIfResult:
+            operation = resolved[scope.step_index][0]
+            assert operation is not None
+            return self.validator.what_if(operation)
+
+        return fan_out(scopes, call, max_workers=self.max_workers, sleep=self._sleep)
+
+    def _remember(self, operation: ArmOperation, result: WhatIfResult) -> None:
+        # An answer about a group the plan creates depends on the plan, not only on Azure
+        if self.cache is not None and not operation.group_planned:
+            self.cache.put(operation.template_hash(), result)
+
+
+# ============================================================================
+# Shared Instances
+# ============================================================================
+_cache: Optional[ValidationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_validation_cache(config: Config) -> ValidationCache:
+    """Return the process-wide validation cache for a config."""
+    global _cache
+    with _cache_lock:
+        if _cache is None or _cache.config is not config:
+            if _cache is not None:
+                retire(_cache.close)
+            _cache = ValidationCache.from_config(config)
+        return _cache
+
+
+def get_dry_run_planner(config: Config, use_cache: bool = True) -> DryRunPlanner:
+    """A planner validating through the shared client pool."""
+    validator = WhatIfValidator(
+        lambda subscription_id: azure_commands.get_resource_client(config, subscription_id)
+    )
+    cache = get_validation_cache(config) if use_cache else None
+    return DryRunPlanner(validator, cache, max_workers=config.fan_out_workers)